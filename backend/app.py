@@ -12,19 +12,25 @@ from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from starlette.middleware.cors import CORSMiddleware
 
-from .config.settings import APP_TITLE, CORS_ALLOW_ORIGINS, MAX_UPLOAD_SIZE_BYTES
-from .services.emotion_service import EmotionService
-from .services.action_detection_service import ActionDetectionService
-from .services.hand_gesture_service import HandGestureService
-from .services.rps_game_service import RPSGameService
-from .services.drawing_service import DrawingService
+from .config.settings import APP_TITLE, CORS_ALLOW_ORIGINS, MAX_UPLOAD_SIZE_BYTES, SERVICE_WARMUP_ON_STARTUP
 from .services.status_broadcaster import StatusBroadcaster
+from .services.inference_executor import InferenceExecutor
+from .services.video_shard_pool import shutdown_video_shard_pool
+from .utils.async_loops import cancel_loop_task, start_loop_task
 from .utils.gpu_runtime import get_gpu_status_dict
+from .utils.lazy_service import (
+    STATE_DEGRADED,
+    STATE_FAILED,
+    STATE_READY,
+    LazyService,
+    warm_up_services,
+)
+from .utils.model_registry import model_registry, run_idle_unloader
 
 # Import all routers
 from .routers import emotion, action, hand_gesture, drawing, websockets
@@ -36,13 +42,71 @@ FRONTEND_DIR = BASE_DIR / "frontend"
 TEMPLATES_DIR = FRONTEND_DIR / "templates"
 STATIC_DIR = FRONTEND_DIR / "static"
 
+
+# =============================================================================
+# Lazy service factories
+# =============================================================================
+# 服務模組在匯入時會設定 TensorFlow / MediaPipe，建構時會建立模型圖（RPS 辨識器可能還需下載模型），
+# 因此延後到背景暖機或第一次使用時才匯入並建立，讓 HTTP 伺服器啟動後立即可接受連線。
+
+def _create_emotion_service():
+    from .services.emotion_service import EmotionService
+    return EmotionService(status_broadcaster)
+
+
+def _create_action_service():
+    from .services.action_detection_service import ActionDetectionService
+    return ActionDetectionService(status_broadcaster)
+
+
+def _create_hand_gesture_service():
+    from .services.hand_gesture_service import HandGestureService
+    return HandGestureService(status_broadcaster)
+
+
+def _create_rps_game_service():
+    from .services.rps_game_service import RPSGameService
+    return RPSGameService(status_broadcaster)  # MediaPipe 手勢辨識版本
+
+
+def _create_drawing_service():
+    from .services.drawing_service import DrawingService
+    return DrawingService(status_broadcaster)
+
+
+def _create_rps_session_manager():
+    from .services.rps_session_manager import RPSSessionManager
+    # 每條 /ws/rps 連線一局獨立遊戲，共用 rps_game_service 的手勢辨識器
+    return RPSSessionManager(status_broadcaster, detector=rps_game_service.detector)
+
+
+def _create_drawing_session_manager():
+    from .services.drawing_session_manager import DrawingSessionManager
+    # 每條 /ws/drawing 連線一張獨立畫布，閒置回收並限制總記憶體
+    return DrawingSessionManager(status_broadcaster)
+
+
 # Initialize core services with shared status broadcaster
 status_broadcaster = StatusBroadcaster()
-emotion_service = EmotionService(status_broadcaster)
-action_service = ActionDetectionService(status_broadcaster)
-hand_gesture_service = HandGestureService(status_broadcaster)
-rps_game_service = RPSGameService(status_broadcaster)  # MediaPipe 手勢辨識版本
-drawing_service = DrawingService(status_broadcaster)
+inference_executor = InferenceExecutor()
+emotion_service = LazyService("emotion", _create_emotion_service)
+action_service = LazyService("action", _create_action_service)
+hand_gesture_service = LazyService("hand_gesture", _create_hand_gesture_service)
+rps_game_service = LazyService("rps", _create_rps_game_service)
+drawing_service = LazyService("drawing", _create_drawing_service)
+rps_session_manager = LazyService("rps_sessions", _create_rps_session_manager)
+drawing_session_manager = LazyService("drawing_sessions", _create_drawing_session_manager)
+
+# 背景暖機順序：即時互動（猜拳、繪畫）優先，最重的情緒模型最後
+LAZY_SERVICES = (
+    rps_game_service,
+    rps_session_manager,
+    drawing_service,
+    drawing_session_manager,
+    hand_gesture_service,
+    action_service,
+    emotion_service,
+)
 
 
 @asynccontextmanager
@@ -52,7 +116,10 @@ async def lifespan(app: FastAPI):
 
     Handles application startup and shutdown events. During startup, it sets
     the asyncio event loop for the status broadcaster service to ensure proper
-    async operations throughout the application lifecycle.
+    async operations throughout the application lifecycle, then starts a
+    background task that constructs the lazy services (and loads their models)
+    one by one so the server accepts connections immediately, plus a loop that
+    unloads models idle for longer than ``MODEL_IDLE_UNLOAD_SECONDS``.
 
     Args:
         app (FastAPI): The FastAPI application instance.
@@ -66,7 +133,25 @@ async def lifespan(app: FastAPI):
     """
     loop = asyncio.get_running_loop()
     status_broadcaster.set_loop(loop)
+    warmup_task = (
+        start_loop_task(warm_up_services(LAZY_SERVICES), name="service-warmup")
+        if SERVICE_WARMUP_ON_STARTUP else None
+    )
+    unloader_task = (
+        start_loop_task(run_idle_unloader(model_registry), name="model-idle-unloader")
+        if model_registry.idle_unload_seconds > 0 else None
+    )
     yield
+    cancel_loop_task(warmup_task)
+    cancel_loop_task(unloader_task)
+    # 只關閉已建立的服務，關閉流程不應觸發模型載入
+    if rps_session_manager.loaded:
+        rps_session_manager.close_all()
+    if drawing_session_manager.loaded:
+        drawing_session_manager.close_all()
+    inference_executor.shutdown(wait=False)
+    shutdown_video_shard_pool()
+    model_registry.close()
 
 
 app = FastAPI(
@@ -92,15 +177,16 @@ templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 # Initialize routers with service injection
 # =============================================================================
 
-emotion.init_router(emotion_service)
-action.init_router(action_service)
+emotion.init_router(emotion_service, inference_executor)
+action.init_router(action_service, inference_executor)
 hand_gesture.init_router(hand_gesture_service)
-drawing.init_router(drawing_service)
+drawing.init_router(drawing_service, inference_executor)
 websockets.init_router(
-    rps_service=rps_game_service,
+    rps_sessions=rps_session_manager,
     broadcaster=status_broadcaster,
     emotion_svc=emotion_service,
-    drawing_svc=drawing_service
+    drawing_sessions=drawing_session_manager,
+    executor=inference_executor
 )
 
 
@@ -202,3 +288,141 @@ async def gpu_status() -> dict:
         }
     """
     return get_gpu_status_dict()
+
+
+@app.get("/api/system/inference")
+async def inference_status() -> dict:
+    """
+    Return shared inference executor metrics.
+
+    Reports per-model concurrency limits, current queue depth, running jobs,
+    rejected (backpressured) requests and average wait/run latency.
+
+    Returns:
+        dict: Executor metrics keyed by model.
+
+    Example:
+        >>> response = await inference_status()
+        >>> response["models"]["deepface"]["queued"]
+        0
+    """
+    return inference_executor.get_metrics()
+
+
+@app.get("/api/system/broadcaster")
+async def broadcaster_status() -> dict:
+    """
+    Return status broadcaster publish / delivery / drop counters.
+
+    Reports subscriber counts per channel and how many messages were dropped
+    or coalesced because a subscriber queue was full.
+
+    Returns:
+        dict: Broadcaster statistics.
+
+    Example:
+        >>> response = await broadcaster_status()
+        >>> response["dropped"]
+        0
+    """
+    return status_broadcaster.get_stats()
+
+
+@app.get("/api/system/rps")
+async def rps_sessions_status() -> dict:
+    """
+    Return RPS game session counts and gesture-to-result latency.
+
+    Reports active sessions per game state and the time from accepting a
+    player's gesture to broadcasting the round result.
+
+    Returns:
+        dict: RPS session statistics, or ``{"state": ...}`` while the
+        session manager has not been built yet.
+
+    Example:
+        >>> response = await rps_sessions_status()
+        >>> response["gesture_to_result_ms"]["avg"]
+        1.2
+    """
+    # 監控查詢不應觸發模型載入；管理器尚未建立時只回報載入狀態
+    if not rps_session_manager.loaded:
+        return rps_session_manager.status()
+    return rps_session_manager.get_stats()
+
+
+@app.get("/api/system/drawing")
+async def drawing_sessions_status() -> dict:
+    """
+    Return gesture drawing session counts and estimated memory use.
+
+    Reports active per-connection canvases, their estimated memory footprint
+    against the configured cap, and how many idle sessions were reclaimed.
+
+    Returns:
+        dict: Drawing session statistics, or ``{"state": ...}`` while the
+        session manager has not been built yet.
+
+    Example:
+        >>> response = await drawing_sessions_status()
+        >>> response["active_sessions"]
+        2
+    """
+    # 監控查詢不應觸發模型載入；管理器尚未建立時只回報載入狀態
+    if not drawing_session_manager.loaded:
+        return drawing_session_manager.status()
+    return drawing_session_manager.get_stats()
+
+
+@app.get("/api/system/models")
+async def model_registry_status() -> dict:
+    """
+    Return the shared model registry: loaded instances and estimated memory.
+
+    Each MediaPipe model is keyed by its type and constructor options, so
+    services configured identically share one instance (or one instance pool).
+    Models idle for longer than ``MODEL_IDLE_UNLOAD_SECONDS`` are unloaded and
+    reloaded on next use.
+
+    Returns:
+        dict: Per-model instance counts, load / unload counts and memory estimates.
+
+    Example:
+        >>> response = await model_registry_status()
+        >>> response["models"]["face_mesh(...)"]["instances"]
+        2
+    """
+    return model_registry.get_stats()
+
+
+@app.get("/api/system/ready")
+async def readiness_status() -> JSONResponse:
+    """
+    Return per-service and per-model load state for readiness probes.
+
+    Services are constructed lazily by the background warmup task started in
+    ``lifespan`` (or on first use). Responds with HTTP 503 until every service
+    has either finished loading or failed. Built services also report the
+    state of each model they own (e.g. the DeepFace emotion model and
+    FaceMesh); a service whose model failed to load is reported as
+    ``degraded`` and sets the top-level ``degraded`` flag.
+
+    Returns:
+        JSONResponse: Overall readiness and per-service state, load time,
+        error and model states.
+
+    Example:
+        >>> response = await readiness_status()
+        >>> response.body
+        {'ready': True, 'degraded': True, 'services': {'emotion': {'state': 'degraded', ...,
+         'models': {'deepface_emotion': {'state': 'failed', 'error': '...'}, ...}}, ...}}
+    """
+    services = {service.name: service.status() for service in LAZY_SERVICES}
+    ready = all(
+        service["state"] in (STATE_READY, STATE_FAILED, STATE_DEGRADED) for service in services.values()
+    )
+    degraded = any(service["state"] in (STATE_FAILED, STATE_DEGRADED) for service in services.values())
+    return JSONResponse(
+        {"ready": ready, "degraded": degraded, "services": services},
+        status_code=200 if ready else 503,
+    )
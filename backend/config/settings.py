@@ -8,6 +8,69 @@ APP_PORT = int(os.getenv("APP_PORT", "8896"))
 
 MAX_UPLOAD_SIZE_BYTES = int(os.getenv("MAX_FILE_SIZE_MB", "50")) * 1024 * 1024
 
+# 啟動後在背景依序建立服務並載入模型；false 時改為第一次使用才建立
+SERVICE_WARMUP_ON_STARTUP = os.getenv("SERVICE_WARMUP_ON_STARTUP", "true").lower() == "true"
+
+# 上傳檔案以此區塊大小串流寫入暫存檔；UPLOAD_SPOOL_MEMFD=true 時在 Linux 改寫入 memfd（不落地，佔用 RAM）
+UPLOAD_CHUNK_SIZE_BYTES = int(os.getenv("UPLOAD_CHUNK_SIZE_KB", "1024")) * 1024
+UPLOAD_SPOOL_MEMFD = os.getenv("UPLOAD_SPOOL_MEMFD", "false").lower() == "true"
+
+# 模型登錄表：MediaPipe 模型超過此秒數未被使用即卸載（0 表示不卸載），以及閒置檢查的間隔秒數
+MODEL_IDLE_UNLOAD_SECONDS = float(os.getenv("MODEL_IDLE_UNLOAD_SECONDS", "600"))
+MODEL_IDLE_CHECK_SECONDS = float(os.getenv("MODEL_IDLE_CHECK_SECONDS", "30"))
+
+# DeepFace 情緒模型常駐設定：超過此 RSS (MB) 時釋放模型，0 表示停用記憶體壓力檢查
+EMOTION_MODEL_MAX_RSS_MB = int(os.getenv("EMOTION_MODEL_MAX_RSS_MB", "3072"))
+
+# 情緒模型微批次：單一批次最大筆數（0 表示停用批次，逐幀呼叫 DeepFace.analyze）與最長等待毫秒數。
+# /ws/emotion 影格在 FaceMesh 預檢（推論執行器的 face_mesh 並行上限）後直接排入批次，
+# 等待結果時不佔用推論執行緒或 deepface 並行名額，因此單一批次實際可合併
+# min(EMOTION_BATCH_MAX_SIZE, 同時送幀的連線數) 張臉；圖片上傳與影片 SSE 仍經由 deepface 上限逐一提交
+EMOTION_BATCH_MAX_SIZE = int(os.getenv("EMOTION_BATCH_MAX_SIZE", "8"))
+EMOTION_BATCH_MAX_WAIT_MS = float(os.getenv("EMOTION_BATCH_MAX_WAIT_MS", "10"))
+
+# /ws/emotion 結果快取：臉部關鍵點平均位移（相對臉部大小）低於門檻且結果未過期時沿用上次 DeepFace 結果
+EMOTION_CACHE_LANDMARK_DELTA = float(os.getenv("EMOTION_CACHE_LANDMARK_DELTA", "0.015"))
+EMOTION_CACHE_MAX_AGE_MS = float(os.getenv("EMOTION_CACHE_MAX_AGE_MS", "1500"))
+
+# 每種 FaceMesh 實例池（串流 / 靜態圖片）的實例數上限
+FACE_MESH_POOL_SIZE = int(os.getenv("FACE_MESH_POOL_SIZE", "4"))
+
+# 共用推論執行器：執行緒池大小、每個模型的最大排隊數與並行上限（格式: "deepface=1,rps_gesture=2"）
+INFERENCE_MAX_WORKERS = int(os.getenv("INFERENCE_MAX_WORKERS", "4"))
+INFERENCE_MAX_QUEUE_DEPTH = int(os.getenv("INFERENCE_MAX_QUEUE_DEPTH", "8"))
+INFERENCE_MODEL_CONCURRENCY = {}
+for _item in os.getenv("INFERENCE_MODEL_CONCURRENCY", "").split(","):
+    _key, _, _value = _item.partition("=")
+    if _key.strip() and _value.strip().isdigit():
+        INFERENCE_MODEL_CONCURRENCY[_key.strip()] = int(_value.strip())
+
+# 長影片分段平行分析：子行程數與每段最短秒數（影片短於兩段時不分段）
+VIDEO_SHARD_WORKERS = int(os.getenv("VIDEO_SHARD_WORKERS", str(os.cpu_count() or 1)))
+VIDEO_SHARD_MIN_SECONDS = float(os.getenv("VIDEO_SHARD_MIN_SECONDS", "10"))
+
+# 畫布編碼：格式（png / webp / jpeg）、PNG 壓縮等級 (0-9)、WebP/JPEG 品質 (1-100)
+# 以及 WebSocket 畫布推送的最短間隔（毫秒）
+CANVAS_ENCODE_FORMAT = os.getenv("CANVAS_ENCODE_FORMAT", "png").lower()
+CANVAS_PNG_COMPRESSION = int(os.getenv("CANVAS_PNG_COMPRESSION", "1"))
+CANVAS_ENCODE_QUALITY = int(os.getenv("CANVAS_ENCODE_QUALITY", "80"))
+CANVAS_PUSH_INTERVAL_MS = float(os.getenv("CANVAS_PUSH_INTERVAL_MS", "100"))
+
+# 猜拳遊戲：同時進行的遊戲工作階段上限（每條 /ws/rps 連線一局）
+RPS_MAX_SESSIONS = int(os.getenv("RPS_MAX_SESSIONS", "64"))
+
+# 猜拳影格節流：等待出拳時的辨識幀率、其餘狀態的預覽辨識幀率（0 表示只確認不辨識），
+# 以及倒數結束前提早開始辨識的毫秒數（預設與最後一次倒數廣播同時開始）
+RPS_ACTIVE_FPS = int(os.getenv("RPS_ACTIVE_FPS", "15"))
+RPS_PREVIEW_FPS = int(os.getenv("RPS_PREVIEW_FPS", "2"))
+RPS_DETECTION_LEAD_MS = float(os.getenv("RPS_DETECTION_LEAD_MS", "1000"))
+
+# 手勢繪畫工作階段（每條 /ws/drawing 連線一張畫布）：同時存在的上限、閒置多久（秒）後可回收，
+# 以及所有工作階段估計記憶體（畫布 + 手指追蹤器，MB）上限
+DRAWING_MAX_SESSIONS = int(os.getenv("DRAWING_MAX_SESSIONS", "16"))
+DRAWING_SESSION_IDLE_SECONDS = float(os.getenv("DRAWING_SESSION_IDLE_SECONDS", "300"))
+DRAWING_SESSIONS_MAX_MEMORY_MB = int(os.getenv("DRAWING_SESSIONS_MAX_MEMORY_MB", "1024"))
+
 _raw_origins = os.getenv("CORS_ALLOW_ORIGINS", "*")
 if _raw_origins.strip() == "*":
     CORS_ALLOW_ORIGINS = ["*"]
@@ -18,5 +81,32 @@ __all__ = [
     "APP_TITLE",
     "APP_PORT",
     "MAX_UPLOAD_SIZE_BYTES",
+    "SERVICE_WARMUP_ON_STARTUP",
+    "UPLOAD_CHUNK_SIZE_BYTES",
+    "UPLOAD_SPOOL_MEMFD",
     "CORS_ALLOW_ORIGINS",
+    "MODEL_IDLE_UNLOAD_SECONDS",
+    "MODEL_IDLE_CHECK_SECONDS",
+    "EMOTION_MODEL_MAX_RSS_MB",
+    "EMOTION_BATCH_MAX_SIZE",
+    "EMOTION_BATCH_MAX_WAIT_MS",
+    "EMOTION_CACHE_LANDMARK_DELTA",
+    "EMOTION_CACHE_MAX_AGE_MS",
+    "FACE_MESH_POOL_SIZE",
+    "INFERENCE_MAX_WORKERS",
+    "INFERENCE_MAX_QUEUE_DEPTH",
+    "INFERENCE_MODEL_CONCURRENCY",
+    "VIDEO_SHARD_WORKERS",
+    "VIDEO_SHARD_MIN_SECONDS",
+    "CANVAS_ENCODE_FORMAT",
+    "CANVAS_PNG_COMPRESSION",
+    "CANVAS_ENCODE_QUALITY",
+    "CANVAS_PUSH_INTERVAL_MS",
+    "RPS_MAX_SESSIONS",
+    "RPS_ACTIVE_FPS",
+    "RPS_PREVIEW_FPS",
+    "RPS_DETECTION_LEAD_MS",
+    "DRAWING_MAX_SESSIONS",
+    "DRAWING_SESSION_IDLE_SECONDS",
+    "DRAWING_SESSIONS_MAX_MEMORY_MB",
 ]
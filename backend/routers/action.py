@@ -14,7 +14,6 @@ Action Detection API Router
 """
 
 import os
-import tempfile
 from typing import TYPE_CHECKING
 
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
@@ -23,19 +22,23 @@ from fastapi.responses import JSONResponse
 if TYPE_CHECKING:
     from ..services.action_detection_service import ActionDetectionService
 
-from ..config.settings import MAX_UPLOAD_SIZE_BYTES
+from ..services.inference_executor import InferenceBusyError, InferenceExecutor
+from ..utils.lazy_service import resolve_service
+from ..utils.upload_ingest import UploadTooLargeError, ingest_upload
 
 # 創建 router
 router = APIRouter(prefix="/api/action", tags=["Action Detection"])
 
 # 全域變數（會在 app.py 中設定）
 action_service: 'ActionDetectionService' = None
+inference_executor: InferenceExecutor = None
 
 
-def init_router(service: 'ActionDetectionService'):
-    """初始化 router，注入 service"""
-    global action_service
+def init_router(service: 'ActionDetectionService', executor: InferenceExecutor):
+    """初始化 router，注入 service 與共用推論執行器"""
+    global action_service, inference_executor
     action_service = service
+    inference_executor = executor
 
 
 @router.post("/start")
@@ -60,7 +63,8 @@ async def start_detection(difficulty: str = Form("easy")) -> JSONResponse:
         >>> response.json()
         {'status': 'success', 'message': 'Action detection started'}
     """
-    result = action_service.start_action_detection(difficulty)
+    service = await resolve_service(action_service)
+    result = service.start_action_detection(difficulty)
     if result.get("status") == "error":
         raise HTTPException(
             status_code=400, detail=result.get("message", "啟動動作檢測失敗"))
@@ -83,7 +87,8 @@ async def stop_detection() -> JSONResponse:
         >>> response.json()
         {'status': 'success', 'message': 'Action detection stopped'}
     """
-    result = action_service.stop_action_detection()
+    service = await resolve_service(action_service)
+    result = service.stop_action_detection()
     return JSONResponse(result)
 
 
@@ -103,11 +108,15 @@ async def get_status() -> JSONResponse:
         >>> response.json()
         {'status': 'running', 'difficulty': 'easy', 'detections': 8}
     """
-    return JSONResponse(action_service.get_detection_status())
+    service = await resolve_service(action_service)
+    return JSONResponse(service.get_detection_status())
 
 
 @router.post("/analyze")
-async def analyze_video(file: UploadFile = File(...)) -> JSONResponse:
+async def analyze_video(
+    file: UploadFile = File(...),
+    parallel: bool = Form(False)
+) -> JSONResponse:
     """
     Analyze action from uploaded video file.
 
@@ -116,6 +125,8 @@ async def analyze_video(file: UploadFile = File(...)) -> JSONResponse:
 
     Args:
         file (UploadFile): The uploaded video file.
+        parallel (bool): Split long videos into time ranges analyzed in
+            separate worker processes.
 
     Returns:
         JSONResponse: Analysis results with action detection data and file information.
@@ -144,21 +155,26 @@ async def analyze_video(file: UploadFile = File(...)) -> JSONResponse:
         raise HTTPException(
             status_code=400, detail=f"不支援的影片格式: {file_ext}，請使用 MP4, AVI, MOV, MKV, WMV, WEBM")
 
-    # Read and validate file size
-    file_content = await file.read()
-    if len(file_content) > MAX_UPLOAD_SIZE_BYTES:
-        limit_mb = MAX_UPLOAD_SIZE_BYTES // (1024 * 1024)
-        raise HTTPException(status_code=413, detail=f"檔案過大，最大允許 {limit_mb}MB")
+    # Stream the upload to a temporary file, enforcing the size limit while writing
+    try:
+        upload = await ingest_upload(file, suffix=file_ext)
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
 
-    # Create temporary file for processing
-    suffix = file_ext or ""
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp.write(file_content)
-        temp_path = tmp.name
+    try:
+        # Build the service off the event loop only after the upload is validated
+        service = await resolve_service(action_service)
+    except RuntimeError as exc:
+        upload.cleanup()
+        raise HTTPException(status_code=503, detail=f"動作分析服務無法使用: {exc}")
 
     try:
-        # Analyze video
-        result = action_service.analyze_video(temp_path)
+        # Analyze video on the shared inference executor
+        try:
+            result = await inference_executor.run(
+                "action_video", service.analyze_video, upload.path, parallel=parallel)
+        except InferenceBusyError:
+            raise HTTPException(status_code=503, detail="動作分析忙碌中，請稍後再試")
 
         # Return comprehensive analysis results
         return JSONResponse({
@@ -168,9 +184,9 @@ async def analyze_video(file: UploadFile = File(...)) -> JSONResponse:
             "file_info": {
                 "name": file.filename,
                 "type": "video",
-                "size": len(file_content),
+                "size": upload.size,
             },
         })
     finally:
         # Ensure temporary file cleanup
-        os.unlink(temp_path)
+        upload.cleanup()
@@ -11,17 +11,22 @@ from fastapi.responses import JSONResponse
 if TYPE_CHECKING:
     from ..services.drawing_service import DrawingService
 
+from ..services.inference_executor import InferenceBusyError, InferenceExecutor
+from ..utils.lazy_service import resolve_service
+
 # 創建 router
 router = APIRouter(prefix="/api/drawing", tags=["Drawing"])
 
 # 全域變數（會在 app.py 中設定）
 drawing_service: 'DrawingService' = None
+inference_executor: InferenceExecutor = None
 
 
-def init_router(service: 'DrawingService'):
-    """初始化 router，注入 service"""
-    global drawing_service
+def init_router(service: 'DrawingService', executor: InferenceExecutor):
+    """初始化 router，注入 service 與共用推論執行器"""
+    global drawing_service, inference_executor
     drawing_service = service
+    inference_executor = executor
 
 
 @router.post("/start")
@@ -53,7 +58,8 @@ async def start_drawing_session(
         >>> response.json()
         {'status': 'success', 'session_id': 'draw123', 'canvas_size': [800, 600]}
     """
-    result = drawing_service.start_drawing_session(mode, color, auto_recognize)
+    service = await resolve_service(drawing_service)
+    result = service.start_drawing_session(mode, color, auto_recognize)
     if result.get("status") == "error":
         raise HTTPException(
             status_code=400, detail=result.get("message", "啟動繪畫會話失敗"))
@@ -76,7 +82,8 @@ async def stop_drawing_session() -> JSONResponse:
         >>> response.json()
         {'status': 'success', 'drawings_saved': 3, 'session_duration': 120}
     """
-    result = drawing_service.stop_drawing_session()
+    service = await resolve_service(drawing_service)
+    result = service.stop_drawing_session()
     return JSONResponse(result)
 
 
@@ -101,7 +108,8 @@ async def get_drawing_status() -> JSONResponse:
             'canvas_size': [800, 600]
         }
     """
-    return JSONResponse(drawing_service.get_drawing_status())
+    service = await resolve_service(drawing_service)
+    return JSONResponse(service.get_drawing_status())
 
 
 @router.post("/recognize")
@@ -125,7 +133,11 @@ async def recognize_drawing() -> JSONResponse:
             'bounding_box': [100, 150, 300, 250]
         }
     """
-    result = drawing_service.recognize_current_drawing()
+    service = await resolve_service(drawing_service)
+    try:
+        result = await inference_executor.run("drawing", service.recognize_current_drawing)
+    except InferenceBusyError:
+        raise HTTPException(status_code=503, detail="畫作辨識忙碌中，請稍後再試")
     return JSONResponse(result)
 
 
@@ -145,5 +157,6 @@ async def clear_canvas() -> JSONResponse:
         >>> response.json()
         {'status': 'success', 'message': 'Canvas cleared', 'previous_drawings': 2}
     """
-    result = drawing_service.clear_canvas()
+    service = await resolve_service(drawing_service)
+    result = service.clear_canvas()
     return JSONResponse(result)
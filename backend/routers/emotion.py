@@ -3,10 +3,10 @@ Emotion Analysis API Router
 情緒分析相關的 API 端點
 """
 
+import asyncio
 import json
 import os
-import tempfile
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
 from fastapi.responses import JSONResponse, StreamingResponse
@@ -14,19 +14,23 @@ from fastapi.responses import JSONResponse, StreamingResponse
 if TYPE_CHECKING:
     from ..services.emotion_service import EmotionService
 
-from ..config.settings import MAX_UPLOAD_SIZE_BYTES
+from ..services.inference_executor import InferenceBusyError, InferenceExecutor
+from ..utils.lazy_service import resolve_service
+from ..utils.upload_ingest import UploadTooLargeError, ingest_upload
 
 # 創建 router
 router = APIRouter(prefix="/api/emotion", tags=["Emotion Analysis"])
 
 # 全域變數（會在 app.py 中設定）
 emotion_service: 'EmotionService' = None
+inference_executor: InferenceExecutor = None
 
 
-def init_router(service: 'EmotionService'):
-    """初始化 router，注入 service"""
-    global emotion_service
+def init_router(service: 'EmotionService', executor: InferenceExecutor):
+    """初始化 router，注入 service 與共用推論執行器"""
+    global emotion_service, inference_executor
     emotion_service = service
+    inference_executor = executor
 
 
 @router.post("/analyze/image")
@@ -64,23 +68,27 @@ async def analyze_image(file: UploadFile = File(...)) -> JSONResponse:
         raise HTTPException(
             status_code=400, detail=f"DeepFace 僅支援圖片格式，收到: {file_ext}")
 
-    # Read and validate file size
-    file_content = await file.read()
-    if len(file_content) > MAX_UPLOAD_SIZE_BYTES:
-        limit_mb = MAX_UPLOAD_SIZE_BYTES // (1024 * 1024)
-        raise HTTPException(status_code=413, detail=f"檔案過大，最大允許 {limit_mb}MB")
+    # Stream the upload to a temporary file, enforcing the size limit while writing
+    try:
+        upload = await ingest_upload(file, suffix=file_ext)
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
 
-    # Create temporary file for processing
-    suffix = file_ext or ""
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp.write(file_content)
-        temp_path = tmp.name
+    try:
+        # Build the service off the event loop only after the upload is validated
+        service = await resolve_service(emotion_service)
+    except RuntimeError as exc:
+        upload.cleanup()
+        raise HTTPException(status_code=503, detail=f"情緒分析服務無法使用: {exc}")
 
     try:
-        # Use local DeepFace analysis
-        result = emotion_service.analyze_image_deepface(temp_path)
+        # Use local DeepFace analysis (runs on the shared inference executor)
+        result = await inference_executor.run(
+            "deepface", service.analyze_image_deepface, upload.path)
         return JSONResponse(result)
 
+    except InferenceBusyError:
+        raise HTTPException(status_code=503, detail="情緒分析忙碌中，請稍後再試")
     except Exception as e:
         return JSONResponse({
             'emotion_zh': '中性',
@@ -91,26 +99,29 @@ async def analyze_image(file: UploadFile = File(...)) -> JSONResponse:
         })
     finally:
         # Cleanup temporary file
-        if os.path.exists(temp_path):
-            os.unlink(temp_path)
+        upload.cleanup()
 
 
 @router.post("/analyze/video")
 async def analyze_video(
     file: UploadFile = File(...),
-    frame_interval: float = Form(0.5)
-) -> StreamingResponse:
+    frame_interval: float = Form(0.5),
+    parallel: bool = Form(False)
+):
     """
     影片情緒分析 - 使用 DeepFace 進行影片情緒檢測
 
     逐幀截取影片並使用DeepFace進行情緒分析，以Server-Sent Events串流返回結果。
+    parallel=true 時改為多行程分段分析（MediaPipe 特徵），一次回傳合併後的
+    完整結果（含 emotion_distribution 與 feature_averages）。
 
     Args:
         file (UploadFile): 上傳的影片檔案
-        frame_interval (float): 截幀間隔(秒)，默認0.5秒
+        frame_interval (float): 截幀間隔(秒)，默認0.5秒（僅串流模式）
+        parallel (bool): 是否使用多行程分段分析
 
     Returns:
-        StreamingResponse: SSE格式的串流分析結果
+        StreamingResponse | JSONResponse: SSE格式的串流分析結果，或分段分析的合併結果
     """
     # 驗證檔案
     if not file.filename:
@@ -123,26 +134,66 @@ async def analyze_video(
     if file_ext not in video_exts:
         raise HTTPException(status_code=400, detail=f"僅支援影片格式，收到: {file_ext}")
 
-    # 檢查檔案大小
-    file_content = await file.read()
-    if len(file_content) > MAX_UPLOAD_SIZE_BYTES:
-        limit_mb = MAX_UPLOAD_SIZE_BYTES // (1024 * 1024)
-        raise HTTPException(status_code=413, detail=f"檔案過大，最大允許 {limit_mb}MB")
-
     # 驗證截幀間隔
     if frame_interval < 0.1 or frame_interval > 5.0:
         raise HTTPException(status_code=400, detail="截幀間隔必須在0.1-5.0秒之間")
 
-    # 創建臨時檔案
-    suffix = file_ext or ""
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp.write(file_content)
-        temp_path = tmp.name
+    # 串流寫入臨時檔案，寫入途中檢查檔案大小
+    try:
+        upload = await ingest_upload(file, suffix=file_ext)
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
+
+    # 驗證通過後才在執行緒池中建立服務，格式錯誤的請求不必等待模型載入
+    try:
+        service = await resolve_service(emotion_service)
+    except RuntimeError as exc:
+        upload.cleanup()
+        raise HTTPException(status_code=503, detail=f"情緒分析服務無法使用: {exc}")
+
+    if parallel:
+        try:
+            result = await inference_executor.run(
+                "emotion_video", service.analyze_video, upload.path, parallel=True)
+        except InferenceBusyError:
+            raise HTTPException(status_code=503, detail="影片分析忙碌中，請稍後再試")
+        finally:
+            upload.cleanup()
+        return JSONResponse(result)
+
+    async def generate_stream():
+        """
+        產生SSE格式的串流數據
+
+        每一幀的解碼與分析都經由共用推論執行器執行，與其他情緒推論共用
+        deepface 並行上限；排隊已滿時送出錯誤事件並結束串流。客戶端中途斷線時
+        等進行中的一幀結束後才關閉產生器並刪除臨時檔案。
+        """
+        frames = service.analyze_video_deepface_stream(upload.path, frame_interval)
+        step: Optional[asyncio.Future] = None
+
+        def release() -> None:
+            # 產生器此時沒有在任何執行緒中執行，關閉它（釋放 VideoCapture）後再刪除臨時檔案
+            try:
+                close = getattr(frames, "close", None)
+                if close is not None:
+                    close()
+            finally:
+                upload.cleanup()
+
+        def release_after(done: asyncio.Future) -> None:
+            if not done.cancelled():
+                done.exception()  # 斷線後已無人等待這一步的結果或錯誤
+            release()
 
-    def generate_stream():
-        """產生SSE格式的串流數據"""
         try:
-            for result in emotion_service.analyze_video_deepface_stream(temp_path, frame_interval):
+            while True:
+                # 以 shield 保護進行中的一步：客戶端斷線取消串流時，這一步仍在工作執行緒中跑完
+                step = asyncio.ensure_future(inference_executor.run("deepface", next, frames, None))
+                result = await asyncio.shield(step)
+                if result is None:
+                    break
+
                 # 格式化為SSE格式
                 data = json.dumps(result, ensure_ascii=False)
                 yield f"data: {data}\n\n"
@@ -151,6 +202,13 @@ async def analyze_video(
                 if result.get("completed", False):
                     break
 
+        except InferenceBusyError:
+            error_data = {
+                "error": "情緒分析忙碌中，請稍後再試",
+                "frame_time": 0,
+                "completed": True
+            }
+            yield f"data: {json.dumps(error_data, ensure_ascii=False)}\n\n"
         except Exception as e:
             # 發送錯誤信息
             error_data = {
@@ -160,9 +218,11 @@ async def analyze_video(
             }
             yield f"data: {json.dumps(error_data, ensure_ascii=False)}\n\n"
         finally:
-            # 清理臨時檔案
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+            if step is not None and not step.done():
+                # 客戶端中途斷線：等工作執行緒中的 next(frames) 結束後才關閉產生器與刪除檔案
+                step.add_done_callback(release_after)
+            else:
+                release()
 
     return StreamingResponse(
         generate_stream(),
@@ -8,6 +8,8 @@ from typing import TYPE_CHECKING, Optional
 from fastapi import APIRouter, HTTPException, Form
 from fastapi.responses import JSONResponse
 
+from ..utils.lazy_service import resolve_service
+
 if TYPE_CHECKING:
     from ..services.hand_gesture_service import HandGestureService
 
@@ -46,7 +48,8 @@ async def start_gesture_detection(duration: Optional[int] = Form(None)) -> JSONR
         >>> response.json()
         {'status': 'success', 'message': 'Gesture detection started'}
     """
-    result = hand_gesture_service.start_gesture_detection(duration)
+    service = await resolve_service(hand_gesture_service)
+    result = service.start_gesture_detection(duration)
     if result.get("status") == "error":
         raise HTTPException(
             status_code=400, detail=result.get("message", "啟動手勢檢測失敗"))
@@ -69,7 +72,8 @@ async def stop_gesture_detection() -> JSONResponse:
         >>> response.json()
         {'status': 'success', 'message': 'Gesture detection stopped'}
     """
-    result = hand_gesture_service.stop_gesture_detection()
+    service = await resolve_service(hand_gesture_service)
+    result = service.stop_gesture_detection()
     return JSONResponse(result)
 
 
@@ -89,7 +93,8 @@ async def get_gesture_status() -> JSONResponse:
         >>> response.json()
         {'status': 'running', 'uptime': 30, 'current_gesture': 'thumbs_up'}
     """
-    return JSONResponse(hand_gesture_service.get_detection_status())
+    service = await resolve_service(hand_gesture_service)
+    return JSONResponse(service.get_detection_status())
 
 
 @router.get("/current")
@@ -108,4 +113,5 @@ async def get_current_gesture() -> JSONResponse:
         >>> response.json()
         {'gesture': 'peace_sign', 'confidence': 0.92, 'timestamp': 1640995200}
     """
-    return JSONResponse(hand_gesture_service.get_current_gesture())
+    service = await resolve_service(hand_gesture_service)
+    return JSONResponse(service.get_current_gesture())
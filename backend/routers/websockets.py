@@ -6,20 +6,30 @@ WebSocket Endpoints Router
 import asyncio
 import base64
 import logging
-import os
-import tempfile
-from typing import TYPE_CHECKING
+import time
+from typing import TYPE_CHECKING, Optional
 
 import cv2
 import numpy as np
+from ..services.inference_executor import InferenceBusyError, InferenceExecutor
+from ..services.drawing_session_manager import DrawingSessionLimitError
+from ..services.emotion_result_cache import EmotionResultCache
 from ..services.rps_game_service import GameState, RPSGesture
+from ..services.rps_session_manager import RPSSessionLimitError
+from ..services.status_broadcaster import OVERFLOW_COALESCE
+from ..utils.canvas_encoding import CANVAS_UPDATE_MODES
+from ..utils.frame_mailbox import LatestFrameMailbox, run_latest_frame_worker
+from ..utils.frame_protocol import FrameProtocolSession
+from ..utils.lazy_service import resolve_service
+from ..utils.roi_tracker import RoiTracker
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
 if TYPE_CHECKING:
-    from ..services.rps_game_service import RPSGameService
+    from ..services.rps_session_manager import RPSSessionManager
     from ..services.status_broadcaster import StatusBroadcaster
     from ..services.emotion_service import EmotionService
     from ..services.drawing_service import DrawingService
+    from ..services.drawing_session_manager import DrawingSessionManager
 
 logger = logging.getLogger(__name__)
 
@@ -27,24 +37,165 @@ logger = logging.getLogger(__name__)
 router = APIRouter(tags=["WebSocket"])
 
 # 全域變數（會在 app.py 中設定）
-rps_game_service: 'RPSGameService' = None
+rps_session_manager: 'RPSSessionManager' = None
 status_broadcaster: 'StatusBroadcaster' = None
 emotion_service: 'EmotionService' = None
-drawing_service: 'DrawingService' = None
+drawing_session_manager: 'DrawingSessionManager' = None
+inference_executor: InferenceExecutor = None
 
 
 def init_router(
-    rps_service: 'RPSGameService',
+    rps_sessions: 'RPSSessionManager',
     broadcaster: 'StatusBroadcaster',
     emotion_svc: 'EmotionService',
-    drawing_svc: 'DrawingService'
+    drawing_sessions: 'DrawingSessionManager',
+    executor: InferenceExecutor
 ):
-    """初始化 router，注入 services"""
-    global rps_game_service, status_broadcaster, emotion_service, drawing_service
-    rps_game_service = rps_service
+    """初始化 router，注入 services 與共用推論執行器"""
+    global rps_session_manager, status_broadcaster, emotion_service, drawing_session_manager, inference_executor
+    rps_session_manager = rps_sessions
     status_broadcaster = broadcaster
     emotion_service = emotion_svc
-    drawing_service = drawing_svc
+    drawing_session_manager = drawing_sessions
+    inference_executor = executor
+
+
+def _image_bytes(image_data) -> bytes:
+    """取得影像位元組：二進位影格直接使用，base64 字串（可含 data URL 前綴）則先解碼。"""
+    if isinstance(image_data, (bytes, bytearray, memoryview)):
+        return bytes(image_data)
+    if image_data.startswith("data:image/"):
+        image_data = image_data.split(",")[1]
+    return base64.b64decode(image_data)
+
+
+def _decode_image(image_data):
+    """解碼影像（原始位元組或 base64 字串）為 BGR ndarray，失敗時回傳 None。"""
+    nparr = np.frombuffer(_image_bytes(image_data), np.uint8)
+    return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+
+def _detect_rps_frame(image_data, roi_tracker: Optional[RoiTracker] = None):
+    """在推論執行緒中解碼影像並進行 RPS 手勢辨識（只搜尋連線上一幀手部附近）；無法解碼時回傳 None。"""
+    img = _decode_image(image_data)
+    if img is None:
+        return None
+    return rps_session_manager.detector.detect(img, roi_tracker=roi_tracker)
+
+
+def _analyze_emotion_frame(
+    image_data,
+    roi_tracker: Optional[RoiTracker] = None,
+    result_cache: Optional[EmotionResultCache] = None,
+):
+    """
+    在推論執行緒中解碼影像並進行 DeepFace 情緒分析；無法解碼時回傳 None。
+
+    FaceMesh 預檢只搜尋連線上一幀臉部附近，臉部幾乎沒動時沿用連線上次的分析結果。
+    """
+    frame = _decode_image(image_data)
+    if frame is None:
+        return None
+    return emotion_service.analyze_frame_deepface(
+        frame, roi_tracker=roi_tracker, result_cache=result_cache)
+
+
+def _submit_emotion_frame(
+    image_data,
+    roi_tracker: Optional[RoiTracker] = None,
+    result_cache: Optional[EmotionResultCache] = None,
+):
+    """在推論執行緒中解碼影像、FaceMesh 預檢並把臉部排入微批次；無法解碼時回傳 None。"""
+    frame = _decode_image(image_data)
+    if frame is None:
+        return None
+    return emotion_service.submit_frame_deepface(
+        frame, roi_tracker=roi_tracker, result_cache=result_cache)
+
+
+async def _analyze_emotion_frame_async(
+    image_data,
+    roi_tracker: Optional[RoiTracker] = None,
+    result_cache: Optional[EmotionResultCache] = None,
+):
+    """
+    分析 /ws/emotion 的一幀；無法解碼時回傳 None。
+
+    微批次啟用時只有 FaceMesh 預檢佔用推論執行緒（face_mesh 並行上限），之後在事件迴圈上
+    等待批次結果，不佔用執行緒也不佔用 deepface 名額，多條連線的影格因此能湊成最多
+    EMOTION_BATCH_MAX_SIZE 筆的批次。未啟用時整幀分析受 deepface 並行上限限制。
+
+    Raises:
+        InferenceBusyError: 推論佇列已滿
+    """
+    service = await resolve_service(emotion_service)
+    if not service.batching_enabled:
+        return await inference_executor.run(
+            "deepface", _analyze_emotion_frame, image_data, roi_tracker, result_cache)
+
+    submitted = await inference_executor.run(
+        "face_mesh", _submit_emotion_frame, image_data, roi_tracker, result_cache)
+    if submitted is None:
+        return None
+    result, future, landmarks = submitted
+    if future is None:
+        return result
+    # 等待批次完成但不在此拋出例外，批次失敗由 finish_batched_frame 轉為錯誤結果
+    await asyncio.wait([asyncio.wrap_future(future)])
+    return service.finish_batched_frame(future, landmarks, result_cache)
+
+
+def _start_frame_worker(mailbox: LatestFrameMailbox, handle_frame) -> asyncio.Task:
+    """啟動連線專屬的最新影格處理任務。"""
+    return asyncio.create_task(run_latest_frame_worker(mailbox, handle_frame))
+
+
+async def _stop_frame_worker(mailbox: LatestFrameMailbox, task: asyncio.Task) -> None:
+    """關閉信箱並取消影格處理任務。"""
+    mailbox.close()
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+def _drop_stats(mailbox: LatestFrameMailbox, dropped: int) -> dict:
+    """回報給客戶端的丟棄影格統計。"""
+    return {"dropped_frames": dropped, "dropped_frames_total": mailbox.dropped}
+
+
+class _RPSFrameGate:
+    """
+    /ws/rps 單一連線的影格節流狀態。
+
+    依遊戲工作階段的 ``frame_policy()`` 決定影格是否需要推論：辨識視窗外的影格
+    只以預覽幀率推論，其餘直接確認；希望的幀率改變時通知客戶端。
+    """
+
+    def __init__(self) -> None:
+        self.last_preview_at = 0.0
+        self.hinted_fps: Optional[int] = None
+        self.skipped = 0
+
+    def should_infer(self, policy: dict) -> bool:
+        """辨識視窗內每幀推論；視窗外依預覽幀率取樣，0 表示不推論。"""
+        if policy["detecting"]:
+            return True
+        preview_fps = policy["desired_fps"]
+        now = time.monotonic()
+        if preview_fps > 0 and now - self.last_preview_at >= 1.0 / preview_fps:
+            self.last_preview_at = now
+            return True
+        self.skipped += 1
+        return False
+
+    def rate_hint(self, policy: dict) -> Optional[dict]:
+        """幀率改變時回傳要送給客戶端的提示訊息，否則回傳 None。"""
+        if policy["desired_fps"] == self.hinted_fps:
+            return None
+        self.hinted_fps = policy["desired_fps"]
+        return {"type": "frame_rate", **policy}
 
 
 @router.websocket("/ws/rps")
@@ -65,13 +216,20 @@ async def websocket_rps(websocket: WebSocket) -> None:
     - 心跳保活: {"type": "ping"}
     - 遊戲控制: {"type": "game_control", "action": "start_game", "target_score": 3}
     - 影像串流: {"type": "frame", "image": "data:image/jpeg;base64,...", "timestamp": 123.45}
+    - 協商二進位影格: {"type": "negotiate", "binary_frames": true}，之後可改送
+      二進位訊息（固定標頭 + 原始 JPEG，見 utils/frame_protocol.py）
 
     服務器回應訊息格式:
-    - 辨識結果: {"type": "recognition_result", "gesture": "rock", "confidence": 0.96, "is_valid": true}
+    - 辨識結果: {"type": "recognition_result", "gesture": "rock", "confidence": 0.96, "is_valid": true,
+                 "detecting": true, "dropped_frames": 0, "dropped_frames_total": 0}
+    - 影格確認（辨識視窗外、未推論）: {"type": "frame_ack", "timestamp": 123.45, "state": "countdown",
+                 "skipped_frames_total": 12}
+    - 幀率提示: {"type": "frame_rate", "desired_fps": 15, "detecting": true, "state": "waiting_player"}
     - 控制確認: {"type": "control_ack", "action": "start_game", "status": "started"}
-    - 遊戲狀態: {"type": "game_state", "stage": "countdown", "message": "3", "data": {...}}
+    - 遊戲狀態: {"type": "game_state", "stage": "countdown", "message": "3", "session_id": "...", "data": {...}}
     - 錯誤訊息: {"type": "error", "message": "辨識失敗"}
     - 心跳回應: {"type": "pong"}
+    - 協商回應: {"type": "negotiated", "binary_frames": true, "header_format": "!BBdI", ...}
 
     工作流程：
     1. 客戶端連接 WebSocket
@@ -80,22 +238,117 @@ async def websocket_rps(websocket: WebSocket) -> None:
     4. 後端自動設定高信心度手勢
     5. 遊戲狀態透過廣播即時更新
 
+    影格節流：只在等待出拳（與倒數最後一段）對每幀推論，其餘狀態以預覽幀率推論，
+    遊戲狀態改變時以 frame_rate 訊息告知客戶端目前希望的送幀率。
+
     Args:
         websocket (WebSocket): WebSocket 連接實例
 
     Note:
-        整合式設計大幅簡化了前端實作，開發者不再需要管理多個 WebSocket 連接
+        整合式設計大幅簡化了前端實作，開發者不再需要管理多個 WebSocket 連接。
+        每條連線擁有獨立的遊戲工作階段（RPSSessionManager），多台展場機可同時各自遊戲。
     """
     await websocket.accept()
-    logger.info("✅ RPS 整合式連接已建立")
 
-    # 註冊接收遊戲狀態廣播
-    queue = await status_broadcaster.register()
+    # 每條連線擁有獨立的遊戲工作階段；管理器（含手勢偵測模型）首次使用時在執行緒池中建立
+    session_manager = await resolve_service(rps_session_manager)
+    try:
+        game_session = session_manager.create_session()
+    except RPSSessionLimitError as exc:
+        await websocket.send_json({"type": "error", "message": str(exc)})
+        await websocket.close(code=1013)
+        return
+    logger.info("✅ RPS 整合式連接已建立: session=%s", game_session.session_id)
+
+    # 註冊接收遊戲狀態廣播（只訂閱本連線工作階段的主題）
+    queue = await status_broadcaster.register(channels=[game_session.broadcast_topic])
+    frame_protocol = FrameProtocolSession("frame")
+    frame_mailbox = LatestFrameMailbox()
+    frame_gate = _RPSFrameGate()
+
+    async def send_rate_hint(policy: dict) -> None:
+        hint = frame_gate.rate_hint(policy)
+        if hint is not None:
+            await websocket.send_json(hint)
+
+    async def handle_frame(message: dict, dropped: int) -> None:
+        """辨識信箱中最新的一幀並回傳結果；辨識視窗外的影格只確認不推論。"""
+        image_data = message.get("image", "")
+        timestamp = message.get("timestamp", 0)
+
+        policy = game_session.frame_policy()
+        await send_rate_hint(policy)
+        if not frame_gate.should_infer(policy):
+            await websocket.send_json({
+                "type": "frame_ack",
+                "timestamp": timestamp,
+                "state": policy["state"],
+                "skipped_frames_total": frame_gate.skipped,
+                **_drop_stats(frame_mailbox, dropped)
+            })
+            return
+
+        try:
+            # 解碼影像 + MediaPipe 手勢辨識（在推論執行緒中進行）
+            detection = await inference_executor.run(
+                "rps_gesture", _detect_rps_frame, image_data, game_session.hand_roi)
+
+            if detection is None:
+                await websocket.send_json({
+                    "type": "error",
+                    "message": "無法解碼圖片"
+                })
+                return
+
+            gesture, confidence = detection
+
+            # 🎯 自動設定玩家手勢（遊戲等待中 + 有效手勢 + 信心度 > 60%）
+            logger.info("[RPS WS] 遊戲狀態檢查: game_state=%s, gesture=%s, confidence=%.1f%%, player_gesture=%s",
+                       game_session.game_state.value if game_session.game_state else "None",
+                       gesture.value,
+                       confidence * 100,
+                       game_session.player_gesture.value if game_session.player_gesture else "None")
+
+            if (game_session.game_state == GameState.WAITING_PLAYER and
+                gesture != RPSGesture.UNKNOWN and
+                confidence > 0.6 and
+                game_session.accept_player_gesture(gesture)):
+
+                logger.info("✅ 自動設定玩家手勢: %s (%.1f%%)", gesture.value, confidence * 100)
+
+            # 發送辨識結果
+            await websocket.send_json({
+                "type": "recognition_result",
+                "gesture": gesture.value,
+                "confidence": float(confidence),
+                "timestamp": timestamp,
+                "is_valid": gesture.value != "unknown",
+                "detecting": policy["detecting"],
+                **_drop_stats(frame_mailbox, dropped)
+            })
+
+        except InferenceBusyError:
+            await websocket.send_json({
+                "type": "busy",
+                "message": "辨識忙碌中，已略過此幀",
+                "timestamp": timestamp,
+                **_drop_stats(frame_mailbox, dropped)
+            })
+        except Exception as e:
+            logger.exception("影像辨識錯誤: %s", e)
+            await websocket.send_json({
+                "type": "error",
+                "message": f"影像辨識錯誤: {str(e)}"
+            })
+
+    frame_task = _start_frame_worker(frame_mailbox, handle_frame)
 
     try:
+        await send_rate_hint(game_session.frame_policy())
+
         while True:
             # 使用 asyncio.wait 同時等待兩種訊息來源
-            receive_task = asyncio.create_task(websocket.receive_json())
+            receive_task = asyncio.create_task(frame_protocol.receive(websocket))
             broadcast_task = asyncio.create_task(queue.get())
 
             done, pending = await asyncio.wait(
@@ -130,7 +383,7 @@ async def websocket_rps(websocket: WebSocket) -> None:
                 try:
                     result = task.result()
 
-                    # 如果是來自客戶端的訊息（receive_json）
+                    # 如果是來自客戶端的訊息（JSON 或已轉換的二進位影格）
                     if task == receive_task:
                         message_type = result.get("type", "")
                         logger.info("[RPS WS] 收到訊息類型: %s", message_type)
@@ -140,67 +393,16 @@ async def websocket_rps(websocket: WebSocket) -> None:
                             await websocket.send_json({"type": "pong"})
                             continue
 
-                        # 處理影像幀辨識
+                        # 影像幀放入信箱，由處理任務辨識最新一幀
                         if message_type == "frame":
-                            image_data = result.get("image", "")
-                            timestamp = result.get("timestamp", 0)
-
-                            try:
-                                # 處理 base64 影像
-                                if image_data.startswith("data:image/"):
-                                    image_data = image_data.split(",")[1]
-
-                                image_bytes = base64.b64decode(image_data)
-                                nparr = np.frombuffer(image_bytes, np.uint8)
-                                img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-                                if img is None:
-                                    await websocket.send_json({
-                                        "type": "error",
-                                        "message": "無法解碼圖片"
-                                    })
-                                    continue
-
-                                # MediaPipe 手勢辨識
-                                gesture, confidence = rps_game_service.detector.detect(img)
-
-                                # 🎯 自動設定玩家手勢（遊戲等待中 + 有效手勢 + 信心度 > 60%）
-                                logger.info("[RPS WS] 遊戲狀態檢查: game_state=%s, gesture=%s, confidence=%.1f%%, player_gesture=%s",
-                                           rps_game_service.game_state.value if rps_game_service.game_state else "None",
-                                           gesture.value,
-                                           confidence * 100,
-                                           rps_game_service.player_gesture.value if rps_game_service.player_gesture else "None")
-
-                                if (rps_game_service.game_state == GameState.WAITING_PLAYER and
-                                    gesture != RPSGesture.UNKNOWN and
-                                    confidence > 0.6 and
-                                    rps_game_service.player_gesture is None):
-
-                                    rps_game_service.player_gesture = gesture
-                                    logger.info("✅ 自動設定玩家手勢: %s (%.1f%%)", gesture.value, confidence * 100)
-
-                                # 發送辨識結果
-                                await websocket.send_json({
-                                    "type": "recognition_result",
-                                    "gesture": gesture.value,
-                                    "confidence": float(confidence),
-                                    "timestamp": timestamp,
-                                    "is_valid": gesture.value != "unknown"
-                                })
-
-                            except Exception as e:
-                                logger.exception("影像辨識錯誤: %s", e)
-                                await websocket.send_json({
-                                    "type": "error",
-                                    "message": f"影像辨識錯誤: {str(e)}"
-                                })
+                            frame_mailbox.put(result)
 
                         elif message_type == "game_control":
                             action = result.get("action")
                             if action == "start_game":
                                 target_score = result.get("target_score", 1)
                                 try:
-                                    start_result = rps_game_service.start_game(target_score)
+                                    start_result = game_session.start_game(target_score)
                                     logger.info("[RPS WS] start_game 控制請求 (target=%s): %s", target_score, start_result)
                                     await websocket.send_json({
                                         "type": "control_ack",
@@ -215,7 +417,7 @@ async def websocket_rps(websocket: WebSocket) -> None:
                                     })
 
                             elif action == "stop_game":
-                                stop_result = rps_game_service.stop_game()
+                                stop_result = game_session.stop_game()
                                 logger.info("[RPS WS] stop_game 控制請求: %s", stop_result)
                                 await websocket.send_json({
                                     "type": "control_ack",
@@ -235,8 +437,7 @@ async def websocket_rps(websocket: WebSocket) -> None:
                             logger.info("[RPS WS] 未偵測到有效手勢，unknown 信心度: %.1f%%", unknown_confidence * 100)
 
                             # 設定玩家手勢為 UNKNOWN（讓遊戲可以繼續）
-                            if rps_game_service.game_state == GameState.WAITING_PLAYER:
-                                rps_game_service.player_gesture = RPSGesture.UNKNOWN
+                            if game_session.accept_player_gesture(RPSGesture.UNKNOWN):
                                 logger.info("✅ 設定玩家手勢為 UNKNOWN，遊戲繼續")
 
                             await websocket.send_json({
@@ -254,15 +455,10 @@ async def websocket_rps(websocket: WebSocket) -> None:
 
                     # 如果是來自廣播的遊戲狀態更新
                     elif task == broadcast_task:
-                        if result.get("channel") == "rps_game":
-                            # 修改訊息類型為 game_state，但保留 channel 資訊
-                            game_message = result.copy()
-                            game_message["type"] = "game_state"
-                            # 確保 channel 資訊被保留
-                            if "channel" not in game_message:
-                                game_message["channel"] = "rps_game"
-                            logger.debug("[RPS WS] 推播遊戲狀態: %s", game_message.get("stage"))
-                            await websocket.send_json(game_message)
+                        # 訊息類型改為 game_state 並保留 channel 資訊；序列化結果由所有連線共用
+                        logger.debug("[RPS WS] 推播遊戲狀態: %s", result.get("stage"))
+                        await websocket.send_text(result.to_json(type="game_state"))
+                        await send_rate_hint(game_session.frame_policy())
 
                 except (RuntimeError, WebSocketDisconnect) as e:
                     if "disconnect" in str(e).lower() or "WebSocket is not connected" in str(e):
@@ -278,8 +474,10 @@ async def websocket_rps(websocket: WebSocket) -> None:
     except Exception as e:
         logger.exception("WebSocket 錯誤: %s", e)
     finally:
+        await _stop_frame_worker(frame_mailbox, frame_task)
         await status_broadcaster.unregister(queue)
-        logger.info("🔌 RPS 整合式連接關閉")
+        session_manager.close_session(game_session.session_id)
+        logger.info("🔌 RPS 整合式連接關閉: session=%s", game_session.session_id)
 
 
 @router.websocket("/ws/gesture")
@@ -299,12 +497,11 @@ async def websocket_gesture(websocket: WebSocket) -> None:
         Only gesture-related messages are forwarded to this endpoint.
     """
     await websocket.accept()
-    queue = await status_broadcaster.register()
+    queue = await status_broadcaster.register(channels=["gesture"])
     try:
         while True:
             message = await queue.get()
-            if message.get("channel") == "gesture":
-                await websocket.send_json(message)
+            await websocket.send_text(message.to_json())
     except WebSocketDisconnect:
         pass
     finally:
@@ -323,19 +520,29 @@ async def websocket_drawing_gesture(websocket: WebSocket) -> None:
     Supported message types:
     - Client → Server:
         - {"type": "open", "client_id": "unique_id"} - Open WebSocket connection
-        - {"type": "start_gesture_drawing", "mode": "gesture_control", "color": "blue", "canvas_size": [720, 1280]}
+        - {"type": "start_gesture_drawing", "mode": "gesture_control", "color": "blue", "canvas_size": [720, 1280],
+           "canvas_updates": "full" | "delta" | "patch"}
         - {"type": "camera_frame", "image": "base64_data", "timestamp": 123.45}
+        - {"type": "negotiate", "binary_frames": true} - Switch camera frames to binary messages
+          (fixed header + raw JPEG bytes, see utils/frame_protocol.py)
+        - {"type": "resync"} - Request a full canvas snapshot (delta / patch modes)
         - {"type": "stop_drawing"} - Stop drawing session
         - {"type": "close"} - Close WebSocket connection
 
     - Server → Client:
         - {"type": "opened", "session_id": "ws_gesture_12345", "status": "ready"}
+        - {"type": "negotiated", "binary_frames": true, "header_format": "!BBdI", ...}
         - {"type": "connection_confirmed", "client_id": "unique_id", "status": "active"}
         - {"type": "drawing_started", "session_id": "gesture_12345", "canvas_size": [720, 1280]}
         - {"type": "gesture_status", "current_gesture": "drawing", "fingers_up": [false, true, false, false, false]}
         - {"type": "canvas_update", "canvas_base64": "data:image/png;base64,...", "stroke_count": 15}
+        - Frame results carry "canvas_update": "full" with "canvas_base64", or in delta mode
+          "segments": [{"op": "line", "points": [[x, y], ...], "color": "#rrggbb", "width": 5}, ...]
+          plus "dirty_rect": [x, y, w, h] (patch mode sends "patch_base64" for that rect instead)
         - {"type": "recognition_result", "recognized_shape": "circle", "confidence": 0.87}
         - {"type": "drawing_stopped", "session_id": "gesture_12345", "final_recognition": {...}}
+        - {"type": "drawing_stopped", "reason": "idle_timeout"} - The idle session was reclaimed;
+          send start_gesture_drawing again to continue on a new canvas
         - {"type": "closed", "reason": "client_request"}
         - {"type": "error", "message": "MediaPipe initialization failed"}
 
@@ -345,15 +552,75 @@ async def websocket_drawing_gesture(websocket: WebSocket) -> None:
     Note:
         This endpoint processes camera frames and performs gesture recognition
         for interactive drawing. Requires MediaPipe to be properly initialized.
+        Only the newest camera frame is processed when inference falls behind;
+        frame results carry "dropped_frames" / "dropped_frames_total".
+        Each connection draws on its own canvas (DrawingSessionManager), so
+        several booths can draw concurrently.
     """
     await websocket.accept()
 
     # WebSocket session state
     ws_session_id = f"ws_gesture_{int(asyncio.get_event_loop().time() * 1000)}"
+    drawing_session: Optional['DrawingService'] = None
     gesture_session_active = False
     session_id = None
     drawing_mode = "gesture_control"
+    canvas_updates = "full"
     client_id = None
+    frame_protocol = FrameProtocolSession("camera_frame")
+    frame_mailbox = LatestFrameMailbox()
+
+    async def handle_frame(message: dict, dropped: int) -> None:
+        """Process the newest camera frame for gesture drawing."""
+        nonlocal gesture_session_active
+        session = drawing_session
+        if not gesture_session_active or session is None:
+            return
+        image_data = message.get("image", "")
+        timestamp = message.get("timestamp", 0)
+
+        if session.closed:
+            # The idle session was reclaimed by the session manager
+            gesture_session_active = False
+            await websocket.send_json({
+                "type": "drawing_stopped",
+                "session_id": session_id,
+                "reason": "idle_timeout",
+                "timestamp": timestamp
+            })
+            return
+
+        try:
+            # Raw bytes for binary frames, base64 decode for JSON frames
+            image_bytes = _image_bytes(image_data)
+
+            # Process frame through this connection's drawing session on the inference executor
+            result = await inference_executor.run(
+                "drawing",
+                session.process_frame_for_gesture_drawing,
+                frame_data=image_bytes,
+                mode=drawing_mode,
+                canvas_updates=canvas_updates
+            )
+
+            # Send the processing result back to client
+            await websocket.send_json({**result, **_drop_stats(frame_mailbox, dropped)})
+
+        except InferenceBusyError:
+            await websocket.send_json({
+                "type": "busy",
+                "message": "Drawing pipeline busy, frame skipped",
+                "timestamp": timestamp,
+                **_drop_stats(frame_mailbox, dropped)
+            })
+        except Exception as e:
+            await websocket.send_json({
+                "type": "error",
+                "message": f"Frame processing error: {str(e)}",
+                "timestamp": timestamp
+            })
+
+    frame_task = _start_frame_worker(frame_mailbox, handle_frame)
 
     try:
         # Send initial connection confirmation
@@ -366,7 +633,7 @@ async def websocket_drawing_gesture(websocket: WebSocket) -> None:
 
         while True:
             # Receive client message
-            data = await websocket.receive_json()
+            data = await frame_protocol.receive(websocket)
             message_type = data.get("type", "")
 
             if message_type == "open":
@@ -384,32 +651,36 @@ async def websocket_drawing_gesture(websocket: WebSocket) -> None:
                 mode = data.get("mode", "gesture_control")
                 color = data.get("color", "black")
                 canvas_size = data.get("canvas_size", [640, 480])
+                requested_updates = data.get("canvas_updates", "full")
+
+                # Each connection owns its drawing session (canvas, finger tracking, strokes)
+                if drawing_session is None or drawing_session.closed:
+                    gesture_session_active = False
+                    try:
+                        # 建立工作階段會借用 MediaPipe Hands 實例，不在事件迴圈上執行
+                        session_manager = await resolve_service(drawing_session_manager)
+                        drawing_session = await asyncio.to_thread(session_manager.create_session)
+                    except DrawingSessionLimitError as exc:
+                        await websocket.send_json({
+                            "type": "error",
+                            "message": str(exc),
+                            "timestamp": data.get("timestamp", 0)
+                        })
+                        continue
 
                 # If there's already an active session for this WebSocket, stop it first
                 if gesture_session_active:
-                    drawing_service.stop_drawing_session()
+                    drawing_session.stop_drawing_session()
                     gesture_session_active = False
 
                 # Start drawing session (WebSocket mode - no camera needed)
-                result = drawing_service.start_drawing_session(
+                result = drawing_session.start_drawing_session(
                     mode=mode,
                     color=color,
                     auto_recognize=True,
                     websocket_mode=True
                 )
 
-                if result.get("status") == "error":
-                    # If session already exists, try to stop it and restart
-                    if "已在進行中" in result.get("message", ""):
-                        drawing_service.stop_drawing_session()
-                        # Try again after stopping
-                        result = drawing_service.start_drawing_session(
-                            mode=mode,
-                            color=color,
-                            auto_recognize=True,
-                            websocket_mode=True
-                        )
-
                 if result.get("status") == "error":
                     await websocket.send_json({
                         "type": "error",
@@ -419,42 +690,20 @@ async def websocket_drawing_gesture(websocket: WebSocket) -> None:
                 else:
                     gesture_session_active = True
                     drawing_mode = mode
+                    canvas_updates = requested_updates if requested_updates in CANVAS_UPDATE_MODES else "full"
                     session_id = f"gesture_{int(data.get('timestamp', 0) * 1000)}"
 
                     await websocket.send_json({
                         "type": "drawing_started",
                         "session_id": session_id,
                         "canvas_size": canvas_size,
+                        "canvas_updates": canvas_updates,
                         "timestamp": data.get("timestamp", 0)
                     })
 
             elif message_type == "camera_frame" and gesture_session_active:
-                # Process camera frame for gesture drawing
-                image_data = data.get("image", "")
-                timestamp = data.get("timestamp", 0)
-
-                try:
-                    # Decode base64 image
-                    if image_data.startswith("data:image/"):
-                        image_data = image_data.split(",")[1]
-
-                    image_bytes = base64.b64decode(image_data)
-
-                    # Process frame through drawing service
-                    result = drawing_service.process_frame_for_gesture_drawing(
-                        frame_data=image_bytes,
-                        mode=drawing_mode
-                    )
-
-                    # Send the processing result back to client
-                    await websocket.send_json(result)
-
-                except Exception as e:
-                    await websocket.send_json({
-                        "type": "error",
-                        "message": f"Frame processing error: {str(e)}",
-                        "timestamp": timestamp
-                    })
+                # Keep only the newest camera frame; the frame worker processes it
+                frame_mailbox.put(data)
 
             elif message_type == "change_color" and gesture_session_active:
                 # Handle color change during drawing
@@ -472,7 +721,7 @@ async def websocket_drawing_gesture(websocket: WebSocket) -> None:
                         })
                     else:
                         # Change drawing color
-                        drawing_service.change_drawing_color(new_color)
+                        drawing_session.change_drawing_color(new_color)
                         await websocket.send_json({
                             "type": "color_changed",
                             "color": new_color,
@@ -487,10 +736,15 @@ async def websocket_drawing_gesture(websocket: WebSocket) -> None:
                         "timestamp": timestamp
                     })
 
+            elif message_type == "resync" and gesture_session_active:
+                # Client lost track of deltas: send a full canvas snapshot
+                await websocket.send_json(drawing_session.get_canvas_snapshot())
+
             elif message_type == "stop_drawing":
                 # Stop gesture drawing session
                 if gesture_session_active:
-                    result = drawing_service.stop_drawing_session()
+                    frame_mailbox.discard()
+                    result = drawing_session.stop_drawing_session()
                     gesture_session_active = False
 
                     await websocket.send_json({
@@ -508,9 +762,12 @@ async def websocket_drawing_gesture(websocket: WebSocket) -> None:
 
             elif message_type == "close":
                 # Handle explicit WebSocket close request
-                if gesture_session_active:
-                    drawing_service.stop_drawing_session()
-                    gesture_session_active = False
+                gesture_session_active = False
+                # 先釋放畫布與手指追蹤器，客戶端收到 closed 時資源已歸還
+                if drawing_session is not None:
+                    session_manager = await resolve_service(drawing_session_manager)
+                    await asyncio.to_thread(session_manager.close_session, drawing_session.session_id)
+                    drawing_session = None
 
                 await websocket.send_json({
                     "type": "closed",
@@ -540,9 +797,7 @@ async def websocket_drawing_gesture(websocket: WebSocket) -> None:
                 })
 
     except WebSocketDisconnect:
-        # Cleanup on disconnect
-        if gesture_session_active:
-            drawing_service.stop_drawing_session()
+        pass
     except Exception as e:
         try:
             await websocket.send_json({
@@ -551,6 +806,13 @@ async def websocket_drawing_gesture(websocket: WebSocket) -> None:
             })
         except:
             pass
+    finally:
+        await _stop_frame_worker(frame_mailbox, frame_task)
+        # Stops any active drawing and releases this connection's canvas and tracker
+        if drawing_session is not None:
+            # 關閉需等待推論執行緒中進行中的影格放開手指追蹤器，不在事件迴圈上等待
+            session_manager = await resolve_service(drawing_session_manager)
+            await asyncio.to_thread(session_manager.close_session, drawing_session.session_id)
 
 
 @router.websocket("/ws/action")
@@ -570,12 +832,12 @@ async def websocket_action(websocket: WebSocket) -> None:
         Only action-related messages are forwarded to this endpoint.
     """
     await websocket.accept()
-    queue = await status_broadcaster.register()
+    # 進度更新只保留最新一則，慢速客戶端不會累積過時的進度
+    queue = await status_broadcaster.register(channels=["action"], overflow=OVERFLOW_COALESCE)
     try:
         while True:
             message = await queue.get()
-            if message.get("channel") == "action":
-                await websocket.send_json(message)
+            await websocket.send_text(message.to_json())
     except WebSocketDisconnect:
         pass
     finally:
@@ -592,7 +854,15 @@ async def websocket_emotion(websocket: WebSocket) -> None:
 
     支持的訊息格式:
     - 客戶端發送: {"type": "frame", "image": "base64_data", "timestamp": 123.45}
-    - 服務器返回: {"type": "result", "emotion_zh": "開心", "confidence": 0.96, ...}
+    - 協商二進位影格: {"type": "negotiate", "binary_frames": true}，之後影格可直接以
+      二進位訊息傳送（固定標頭 + 原始 JPEG，見 utils/frame_protocol.py）
+    - 服務器返回: {"type": "result", "emotion_zh": "開心", "confidence": 0.96, "dropped_frames": 0,
+      "cache": {"hit": false, "age_ms": 0.0, "hits": 12, "misses": 3}, ...}
+
+    接收與分析解耦：分析較慢時只處理最新一幀，被略過的影格數以
+    dropped_frames（自上次結果起）與 dropped_frames_total 回報。
+    臉部關鍵點相對上次分析幾乎沒有移動且結果未過期時沿用上次結果，
+    cache.hit 標示本幀是否為快取結果，cache.hits / cache.misses 為連線累計次數。
 
     Args:
         websocket (WebSocket): WebSocket連接實例
@@ -601,11 +871,61 @@ async def websocket_emotion(websocket: WebSocket) -> None:
         WebSocket 本身就是串流協議，不需要額外的 /stream 後綴
     """
     await websocket.accept()
+    frame_protocol = FrameProtocolSession("frame")
+    frame_mailbox = LatestFrameMailbox()
+    # 此連線的臉部 ROI 追蹤：FaceMesh 預檢只搜尋上一幀臉部附近
+    face_roi = RoiTracker()
+    # 此連線的情緒結果快取：表情未變時不重複呼叫 DeepFace
+    result_cache = EmotionResultCache()
+
+    async def handle_frame(message: dict, dropped: int) -> None:
+        """分析信箱中最新的一幀並回傳結果。"""
+        image_data = message.get("image", "")
+        timestamp = message.get("timestamp", 0)
+
+        try:
+            # 在推論執行緒中解碼影像並使用DeepFace分析情緒（微批次啟用時與其他連線合併推論）
+            result = await _analyze_emotion_frame_async(image_data, face_roi, result_cache)
+
+            if result is None:
+                await websocket.send_json({
+                    "type": "error",
+                    "message": "無法解碼圖片",
+                    "timestamp": timestamp
+                })
+                return
+
+            # 添加時間戳、類型與丟棄影格統計
+            result.update({
+                "type": "result",
+                "timestamp": timestamp,
+                "frame_time": timestamp,
+                **_drop_stats(frame_mailbox, dropped)
+            })
+
+            # 發送分析結果
+            await websocket.send_json(result)
+
+        except InferenceBusyError:
+            await websocket.send_json({
+                "type": "busy",
+                "message": "情緒分析忙碌中，已略過此幀",
+                "timestamp": timestamp,
+                **_drop_stats(frame_mailbox, dropped)
+            })
+        except Exception as e:
+            await websocket.send_json({
+                "type": "error",
+                "message": f"影像分析錯誤: {str(e)}",
+                "timestamp": timestamp
+            })
+
+    frame_task = _start_frame_worker(frame_mailbox, handle_frame)
 
     try:
         while True:
-            # 接收客戶端消息
-            data = await websocket.receive_json()
+            # 接收客戶端消息（JSON 或已協商的二進位影格）
+            data = await frame_protocol.receive(websocket)
 
             # 處理心跳訊息
             if data.get("type") == "ping":
@@ -621,49 +941,8 @@ async def websocket_emotion(websocket: WebSocket) -> None:
                 })
                 continue
 
-            # 解析base64影像數據
-            image_data = data.get("image", "")
-            timestamp = data.get("timestamp", 0)
-
-            try:
-                # 處理base64影像數據
-                if image_data.startswith("data:image/"):
-                    # 移除data URL前綴
-                    image_data = image_data.split(",")[1]
-
-                # 解碼base64
-                image_bytes = base64.b64decode(image_data)
-
-                # 創建臨時檔案
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp_file:
-                    tmp_file.write(image_bytes)
-                    temp_path = tmp_file.name
-
-                try:
-                    # 使用DeepFace分析情緒
-                    result = emotion_service.analyze_image_deepface(temp_path)
-
-                    # 添加時間戳和類型
-                    result.update({
-                        "type": "result",
-                        "timestamp": timestamp,
-                        "frame_time": timestamp
-                    })
-
-                    # 發送分析結果
-                    await websocket.send_json(result)
-
-                finally:
-                    # 清理臨時檔案
-                    if os.path.exists(temp_path):
-                        os.unlink(temp_path)
-
-            except Exception as e:
-                await websocket.send_json({
-                    "type": "error",
-                    "message": f"影像分析錯誤: {str(e)}",
-                    "timestamp": timestamp
-                })
+            # 只保留最新一幀，由處理任務進行分析
+            frame_mailbox.put(data)
 
     except WebSocketDisconnect:
         pass
@@ -675,3 +954,5 @@ async def websocket_emotion(websocket: WebSocket) -> None:
             })
         except:
             pass
+    finally:
+        await _stop_frame_worker(frame_mailbox, frame_task)
@@ -13,16 +13,26 @@
 # - WebSocket即時狀態廣播
 # =============================================================================
 
+import asyncio
 import logging
 import threading
 import time
+import uuid
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import cv2
+import numpy as np
 
 from .status_broadcaster import StatusBroadcaster
+from .video_shard_pool import get_video_shard_pool, plan_video_shards
+from ..config.settings import FACE_MESH_POOL_SIZE
+from ..utils.async_loops import SerializedCapture, cancel_loop_task, start_loop_task
 from ..utils.gpu_runtime import configure_gpu_runtime
+from ..utils.lazy_service import model_state
+from ..utils.model_registry import FACE_MESH_OPTIONS, model_registry
+from ..utils.roi_tracker import RoiTracker, bbox_from_points
+from ..utils.video_sampling import SampledFrameReader
 
 _GPU_STATUS = configure_gpu_runtime()
 
@@ -89,23 +99,50 @@ class FacialFeatureExtractor:
         self.EYEBROW_LEFT_INDICES = [70, 63, 105, 66]
         self.EYEBROW_RIGHT_INDICES = [296, 334, 293, 300]
 
+        # 各串流 session 的臉部 ROI 追蹤器：只在上一幀臉部附近執行 FaceMesh
+        self._roi_trackers: Dict[str, RoiTracker] = {}
+        self._roi_lock = threading.Lock()
+
         # 初始化 MediaPipe
         self.mediapipe_ready = True
+        self.init_error: Optional[str] = None
         try:
             import mediapipe as mp
             self.mp_face_mesh = mp.solutions.face_mesh
-            self.face_mesh = self.mp_face_mesh.FaceMesh(
-                static_image_mode=False,
-                max_num_faces=1,
-                refine_landmarks=True,
-                min_detection_confidence=0.5,
-                min_tracking_confidence=0.5,
+            # 每個串流 session（攝影機 / 單支影片）使用專屬 FaceMesh，互不干擾追蹤狀態；
+            # 實例池與情緒分析的串流 FaceMesh 共用（模型登錄表以相同設定去重）
+            self.face_mesh_pool = model_registry.pool(
+                "face_mesh",
+                {**FACE_MESH_OPTIONS, "static_image_mode": False},
+                self.mp_face_mesh.FaceMesh,
+                max_instances=FACE_MESH_POOL_SIZE,
             )
-        except Exception:
+            self.face_mesh_pool.prefill()
+        except Exception as exc:
             self.mediapipe_ready = False
-            self.face_mesh = None
-
-    def extract_features(self, frame) -> Optional[Dict]:
+            self.init_error = str(exc)
+            self.face_mesh_pool = None
+
+    @staticmethod
+    def _pool_session(session_id: str) -> str:
+        # 共用池中的 session 以前綴區隔，避免與情緒分析的同名 session 共用追蹤狀態
+        return f"action:{session_id}"
+
+    def release_session(self, session_id: str) -> None:
+        """結束串流 session，關閉其專屬 FaceMesh 實例並丟棄臉部追蹤狀態。"""
+        with self._roi_lock:
+            self._roi_trackers.pop(session_id, None)
+        if self.face_mesh_pool is not None:
+            self.face_mesh_pool.release_session(self._pool_session(session_id))
+
+    def _session_roi_tracker(self, session_id: str) -> RoiTracker:
+        with self._roi_lock:
+            tracker = self._roi_trackers.get(session_id)
+            if tracker is None:
+                tracker = self._roi_trackers[session_id] = RoiTracker()
+            return tracker
+
+    def extract_features(self, frame, session_id: Optional[str] = None) -> Optional[Dict]:
         if not self.mediapipe_ready or frame is None:
             # 回退到模擬數據
             import random
@@ -113,15 +150,29 @@ class FacialFeatureExtractor:
             return self._build_feature_dict(landmarks, 640, 480)
 
         height, width = frame.shape[:2]
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.face_mesh.process(frame_rgb)
+        session_id = session_id or "default"
+        pool_session = self._pool_session(session_id)
+
+        def detect(region, offset):
+            region_height, region_width = region.shape[:2]
+            region_rgb = cv2.cvtColor(region, cv2.COLOR_BGR2RGB)
+            with self.face_mesh_pool.checkout(pool_session) as face_mesh:
+                results = face_mesh.process(region_rgb)
+            if not results or not results.multi_face_landmarks:
+                return None
+            # ROI 內的正規化座標換算回整張影格的像素座標
+            points = np.array(
+                [(lm.x * region_width + offset[0], lm.y * region_height + offset[1])
+                 for lm in results.multi_face_landmarks[0].landmark],
+                dtype=np.float32,
+            )
+            return points, bbox_from_points(points, width, height)
 
-        if not results or not results.multi_face_landmarks:
+        points = self._session_roi_tracker(session_id).track(frame, detect)
+        if points is None:
             return None
 
-        face_landmarks = results.multi_face_landmarks[0].landmark
-        landmarks = [(lm.x * width, lm.y * height) for lm in face_landmarks]
-
+        landmarks = [(float(x), float(y)) for x, y in points]
         return self._build_feature_dict(landmarks, width, height)
 
     def _build_feature_dict(self, landmarks, width, height):
@@ -276,6 +327,66 @@ class ActionDetector:
         return float(min(1.0, max(0.0, vertical_shift / 20))) if vertical_shift > 0 else 0.0
 
 
+def _record_action_progress(
+    action_detector: ActionDetector,
+    features: Dict,
+    timestamp: float,
+    action_detections: Dict[str, List[Dict]],
+) -> None:
+    """以同一組特徵評估所有動作類型，並附加到各動作的檢測時間軸。"""
+    for action_type in ActionType:
+        progress = action_detector.calculate_progress(action_type, features)
+        action_detections[action_type.value].append({
+            "timestamp": round(timestamp, 2),
+            "progress": round(progress, 3),
+            "detected": progress > 0.5  # 簡單閾值判定
+        })
+
+
+def _scan_action_range(
+    feature_extractor: FacialFeatureExtractor,
+    action_detector: ActionDetector,
+    samples: Iterable[Tuple[float, np.ndarray]],
+    action_detections: Dict[str, List[Dict]],
+    session_id: Optional[str] = None,
+) -> int:
+    """逐一處理取樣幀，回傳實際偵測到臉部的幀數。"""
+    frames_analyzed = 0
+    for timestamp, frame in samples:
+        features = feature_extractor.extract_features(frame, session_id=session_id)
+        if features:
+            _record_action_progress(action_detector, features, timestamp, action_detections)
+            frames_analyzed += 1
+    return frames_analyzed
+
+
+# 子行程內共用的 FaceMesh 實例（每個子行程只初始化一次）
+_SHARD_FEATURE_EXTRACTOR: Optional[FacialFeatureExtractor] = None
+
+
+def _analyze_action_shard(video_path: str, start_frame: int, end_frame: Optional[int],
+                          sample_interval: int, fps: int, baseline_features: Dict) -> Dict:
+    """子行程進入點：以父行程提供的基準特徵分析 [start_frame, end_frame) 範圍。"""
+    global _SHARD_FEATURE_EXTRACTOR
+    if _SHARD_FEATURE_EXTRACTOR is None:
+        _SHARD_FEATURE_EXTRACTOR = FacialFeatureExtractor()
+
+    action_detector = ActionDetector()
+    action_detector.set_baseline(baseline_features)
+    action_detections: Dict[str, List[Dict]] = {action_type.value: [] for action_type in ActionType}
+
+    session_id = f"video-{uuid.uuid4().hex}"
+    cap = cv2.VideoCapture(video_path)
+    try:
+        reader = SampledFrameReader(cap, sample_interval, fps=fps, start_frame=start_frame, end_frame=end_frame)
+        frames_analyzed = _scan_action_range(
+            _SHARD_FEATURE_EXTRACTOR, action_detector, reader, action_detections, session_id)
+    finally:
+        cap.release()
+        _SHARD_FEATURE_EXTRACTOR.release_session(session_id)
+    return {"detections": action_detections, "frames_analyzed": frames_analyzed}
+
+
 class ActionDetectionService:
     """動作偵測遊戲主服務"""
 
@@ -285,7 +396,7 @@ class ActionDetectionService:
         self.action_detector = ActionDetector()
 
         self.is_detecting = False
-        self.detection_thread: Optional[threading.Thread] = None
+        self.detection_task: Optional[asyncio.Task] = None
         self.camera = None
 
         self.current_challenge_set: List[ActionChallenge] = []
@@ -349,8 +460,9 @@ class ActionDetectionService:
             challenge.start_time = None
             challenge.completion_time = None
 
-        self.camera = cv2.VideoCapture(0)
+        self.camera = SerializedCapture(cv2.VideoCapture(0))
         if not self.camera.isOpened():
+            self.camera = None
             return {"status": "error", "message": "無法開啟攝影機"}
 
         self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
@@ -358,8 +470,7 @@ class ActionDetectionService:
         self.camera.set(cv2.CAP_PROP_FPS, 30)
 
         self.is_detecting = True
-        self.detection_thread = threading.Thread(target=self._detection_loop, daemon=True)
-        self.detection_thread.start()
+        self.detection_task = start_loop_task(self._detection_loop(), name="action-detection")
 
         self.status_broadcaster.broadcast_threadsafe(
             {
@@ -387,12 +498,13 @@ class ActionDetectionService:
 
         self.is_detecting = False
 
+        # 釋放攝影機會等待進行中的讀取完成；偵測任務隨即結束，不需等待
         if self.camera:
             self.camera.release()
             self.camera = None
 
-        if self.detection_thread:
-            self.detection_thread.join(timeout=2)
+        cancel_loop_task(self.detection_task)
+        self.detection_task = None
 
         self.status_broadcaster.broadcast_threadsafe(
             {
@@ -404,6 +516,11 @@ class ActionDetectionService:
 
         return {"status": "stopped", "message": "動作檢測已停止"}
 
+    def get_model_status(self) -> Dict[str, Dict]:
+        """回傳 FaceMesh 的載入狀態。"""
+        extractor = self.feature_extractor
+        return {"face_mesh": model_state(extractor.mediapipe_ready, extractor.init_error)}
+
     def get_detection_status(self) -> Dict:
         if not self.is_detecting:
             return {
@@ -438,13 +555,15 @@ class ActionDetectionService:
             "game_duration": time.time() - self.game_start_time if self.game_start_time else 0,
         }
 
-    def _detection_loop(self) -> None:
+    async def _detection_loop(self) -> None:
+        """偵測循環（事件迴圈上的背景任務）：讀取與特徵擷取在執行緒池執行。"""
         baseline_set = False
         frame_count = 0
+        camera = self.camera
 
         try:
-            while self.is_detecting and self.camera and self.camera.isOpened():
-                ret, frame = self.camera.read()
+            while self.is_detecting and camera is self.camera and camera.isOpened():
+                ret, frame = await asyncio.to_thread(camera.read)
                 if not ret:
                     break
 
@@ -453,7 +572,7 @@ class ActionDetectionService:
                 if frame_count % 3 != 0:
                     continue
 
-                features = self.feature_extractor.extract_features(frame)
+                features = await asyncio.to_thread(self.feature_extractor.extract_features, frame)
                 if not features:
                     continue
 
@@ -535,15 +654,19 @@ class ActionDetectionService:
                         }
                     )
 
-                time.sleep(1 / 30)
+                await asyncio.sleep(1 / 30)
 
+        except asyncio.CancelledError:
+            pass
         finally:
-            if self.camera:
-                self.camera.release()
-                self.camera = None
+            # 已被新一輪偵測取代的舊任務不可釋放新的攝影機
+            if self.detection_task is asyncio.current_task():
+                if self.camera:
+                    self.camera.release()
+                    self.camera = None
 
-            if self.is_detecting:
-                self.stop_action_detection()
+                if self.is_detecting:
+                    self.stop_action_detection()
 
     def _complete_game(self) -> None:
         self.status_broadcaster.broadcast_threadsafe(
@@ -561,16 +684,22 @@ class ActionDetectionService:
         )
         self.is_detecting = False
 
-    def analyze_video(self, video_path: str) -> Dict:
+    def analyze_video(self, video_path: str, parallel: bool = False) -> Dict:
         """
         分析影片檔案中的動作內容。
 
+        parallel 為 True 且影片夠長時，第一幀之後的影片依時間範圍分段交給子行程
+        平行分析；基準特徵由本行程從第一幀取得後傳給各子行程。
+
         Args:
             video_path (str): 影片檔案路径
+            parallel (bool): 是否啟用多行程分段分析
 
         Returns:
             Dict: 動作分析結果
         """
+        # 每次影片分析使用獨立的 FaceMesh 串流 session
+        session_id = f"video-{uuid.uuid4().hex}"
         try:
             start_time = time.time()
 
@@ -584,12 +713,17 @@ class ActionDetectionService:
             frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
             duration = frame_count / fps if fps > 0 else 0
 
+            # 只解碼取樣幀（每秒10幀），其餘幀以 grab() 跳過
+            sample_interval = max(1, fps // 10)
+            frames = iter(SampledFrameReader(cap, sample_interval, fps=fps))
+
             # 設定基準特徵 (使用第一幀)
-            ret, first_frame = cap.read()
-            if not ret:
+            first_sample = next(frames, None)
+            if first_sample is None:
                 raise ValueError("無法讀取影片第一幀")
+            first_timestamp, first_frame = first_sample
 
-            baseline_features = self.feature_extractor.extract_features(first_frame)
+            baseline_features = self.feature_extractor.extract_features(first_frame, session_id=session_id)
             if not baseline_features:
                 return {
                     "message": "影片中未檢測到臉部特徵",
@@ -603,45 +737,40 @@ class ActionDetectionService:
 
             self.action_detector.set_baseline(baseline_features)
 
-            # 分析所有動作類型
+            # 單次解碼：每個採樣幀只做一次特徵提取，並同時評估所有動作類型
+            action_detections: Dict[str, List[Dict]] = {action_type.value: [] for action_type in ActionType}
+
+            # 第一幀沿用基準特徵，不重複推論
+            _record_action_progress(self.action_detector, baseline_features, first_timestamp, action_detections)
+            frames_analyzed = 1
+
+            shards = plan_video_shards(frame_count, fps, sample_interval, start_frame=sample_interval) if parallel else []
+            if len(shards) > 1:
+                cap.release()
+                shard_results = get_video_shard_pool().map(
+                    _analyze_action_shard,
+                    [(video_path, start, end, sample_interval, fps, baseline_features) for start, end in shards],
+                )
+                # 各段結果依時間順序串接
+                for result in shard_results:
+                    frames_analyzed += result["frames_analyzed"]
+                    for action_name, detections in result["detections"].items():
+                        action_detections[action_name].extend(detections)
+            else:
+                frames_analyzed += _scan_action_range(
+                    self.feature_extractor, self.action_detector, frames, action_detections, session_id)
+
+            # 統計各動作的檢測結果
             action_results = {}
-            sample_interval = max(1, fps // 10)  # 每秒取10幀分析
-
             for action_type in ActionType:
-                # 重置影片到開始
-                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-
-                action_detections = []
-                frame_idx = 0
-
-                while True:
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
-
-                    # 按間隔採樣幀
-                    if frame_idx % sample_interval == 0:
-                        features = self.feature_extractor.extract_features(frame)
-                        if features:
-                            progress = self.action_detector.calculate_progress(action_type, features)
-                            timestamp = frame_idx / fps if fps > 0 else 0
-
-                            action_detections.append({
-                                "timestamp": round(timestamp, 2),
-                                "progress": round(progress, 3),
-                                "detected": progress > 0.5  # 簡單閾值判定
-                            })
-
-                    frame_idx += 1
-
-                # 統計該動作的檢測結果
-                detected_moments = [d for d in action_detections if d["detected"]]
-                max_progress = max([d["progress"] for d in action_detections]) if action_detections else 0
+                detections = action_detections[action_type.value]
+                detected_moments = [d for d in detections if d["detected"]]
+                max_progress = max([d["progress"] for d in detections]) if detections else 0
 
                 action_results[action_type.value] = {
                     "detected_count": len(detected_moments),
                     "max_progress": round(max_progress, 3),
-                    "detection_rate": len(detected_moments) / len(action_detections) if action_detections else 0,
+                    "detection_rate": len(detected_moments) / len(detections) if detections else 0,
                     "detected_moments": detected_moments[:10],  # 只保留前10個檢測時刻
                     "overall_detected": max_progress > 0.5
                 }
@@ -662,7 +791,8 @@ class ActionDetectionService:
                     "duration": duration,
                     "fps": fps,
                     "frame_count": frame_count,
-                    "frames_analyzed": len(action_detections) if 'action_detections' in locals() else 0,
+                    "frames_analyzed": frames_analyzed,
+                    "shards": max(1, len(shards)),
                     "sample_interval": sample_interval
                 },
                 "analysis_time": time.time(),
@@ -677,6 +807,8 @@ class ActionDetectionService:
                 "error": str(exc),
                 "analysis_time": time.time() if 'start_time' in locals() else 0
             }
+        finally:
+            self.feature_extractor.release_session(session_id)
 
 
 __all__ = ["ActionDetectionService", "DifficultyLevel", "ActionType"]
@@ -6,16 +6,14 @@
 import logging
 import threading
 import time
+import uuid
 from collections import deque
 from enum import Enum
 from typing import Dict, List, Optional, Tuple, Union
-import base64
-import io
 from types import SimpleNamespace
 
 import cv2
 import numpy as np
-from PIL import Image, ImageDraw
 
 from ..utils.gpu_runtime import configure_gpu_runtime
 
@@ -31,9 +29,16 @@ except Exception as exc:
     _MEDIAPIPE_ERROR = str(exc)
 
 from .status_broadcaster import StatusBroadcaster
+from ..utils.async_loops import SerializedCapture, cancel_loop_task, start_loop_task
 from ..utils.datetime_utils import _now_ts
-from ..utils.hand_tracking_module import HandTrackingModule, GestureResult, GestureType
+from ..utils.hand_tracking_module import HANDS_POOL_SIZE, HandTrackingModule, GestureResult, GestureType
 from ..utils.drawing_engine import DrawingEngine, BrushType
+from ..utils.instance_pool import InstancePool, InstancePoolExhausted
+from ..utils.lazy_service import model_state
+from ..utils.model_registry import model_registry
+from ..utils.roi_tracker import RoiTracker, bbox_from_points
+from ..utils.canvas_encoding import CANVAS_UPDATE_MODES, EncodedCanvasCache, encode_canvas_data_url
+from ..config.settings import CANVAS_ENCODE_FORMAT, CANVAS_PUSH_INTERVAL_MS
 
 # WebSocket 支援
 import asyncio
@@ -82,26 +87,58 @@ class DrawingAction(Enum):
     SAVE = "save"
 
 
+# FingerTracker 的 MediaPipe Hands 建構參數（模型登錄表以此去重）
+FINGER_TRACKER_HANDS_OPTIONS = {
+    "static_image_mode": False,
+    "max_num_hands": 1,
+    "min_detection_confidence": 0.6,  # 平衡準確度和敏感度
+    "min_tracking_confidence": 0.5,   # 穩定的追蹤
+    "model_complexity": 1,            # 使用中等模型，平衡速度和準確度
+}
+
+
+# 建立 FingerTracker 時等待共用 Hands 實例池空出名額的秒數上限
+HANDS_CHECKOUT_TIMEOUT_SECONDS = 5.0
+
+
 class FingerTracker:
-    """手指追蹤器，基於 MediaPipe Hands"""
+    """
+    手指追蹤器，基於 MediaPipe Hands
+
+    Raises:
+        InstancePoolExhausted: 共用 Hands 實例池在 ``HANDS_CHECKOUT_TIMEOUT_SECONDS`` 內沒有空出名額
+    """
 
     def __init__(self):
         self.mediapipe_ready = _MEDIAPIPE_AVAILABLE
         self.init_error: Optional[str] = _MEDIAPIPE_ERROR
-        self.hands = None
+        self.hands_pool: Optional[InstancePool] = None
+        # 在共用 Hands 實例池中的專屬 session：每個繪畫工作階段各自保有 MediaPipe 追蹤狀態，
+        # 閒置過久時由模型登錄表關閉，下一幀重新建立
+        self._pool_session = f"finger-{uuid.uuid4().hex}"
+        # 推論與關閉互斥：工作階段關閉時可能仍有影格在推論執行緒中處理
+        self._lock = threading.Lock()
+        # 手部 ROI 追蹤：每個繪畫工作階段各有一個 FingerTracker，追蹤狀態不互相干擾
+        self.roi_tracker = RoiTracker()
 
         if self.mediapipe_ready:
             try:
                 self.mp_hands = mp.solutions.hands
                 self.mp_drawing = mp.solutions.drawing_utils
-                self.hands = self.mp_hands.Hands(
-                    static_image_mode=False,
-                    max_num_hands=1,
-                    min_detection_confidence=0.6,  # 平衡準確度和敏感度
-                    min_tracking_confidence=0.5,   # 穩定的追蹤
-                    model_complexity=1             # 使用中等模型，平衡速度和準確度
+                hands_pool = model_registry.pool(
+                    "mp_hands",
+                    FINGER_TRACKER_HANDS_OPTIONS,
+                    self.mp_hands.Hands,
+                    max_instances=HANDS_POOL_SIZE,
                 )
+                # 先借用一次，確認 MediaPipe Hands 可正常初始化；池已滿時不無限等待
+                with hands_pool.checkout(self._pool_session, timeout=HANDS_CHECKOUT_TIMEOUT_SECONDS):
+                    pass
+                self.hands_pool = hands_pool
                 logger.info("MediaPipe Hands 初始化完成，啟用手指追蹤")
+            except InstancePoolExhausted:
+                # 名額不足不是 MediaPipe 故障，交由呼叫端（工作階段管理器）回報上限
+                raise
             except Exception as exc:
                 self.mediapipe_ready = False
                 self.init_error = str(exc)
@@ -111,23 +148,27 @@ class FingerTracker:
 
     def is_available(self) -> bool:
         """回傳 MediaPipe 是否可用"""
-        return self.mediapipe_ready and self.hands is not None
+        return self.mediapipe_ready and self.hands_pool is not None
+
+    def close(self) -> None:
+        """釋放本工作階段的 MediaPipe Hands 實例（工作階段結束時呼叫）。"""
+        with self._lock:
+            if self.hands_pool is not None:
+                self.hands_pool.release_session(self._pool_session)
+                self.hands_pool = None
+        self.roi_tracker.reset()
 
     def get_finger_positions(self, frame) -> Dict:
-        """獲取手指位置"""
+        """獲取手指位置（只在上一幀手部附近的 ROI 內追蹤，遺失時整張搜尋）"""
         if frame is None or not self.is_available():
             return {}
 
         height, width, _ = frame.shape
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(frame_rgb)
-
-        if not results.multi_hand_landmarks:
+        hand_landmarks = self.roi_tracker.track(
+            frame, lambda region, offset: self._detect_hand(region, offset, width, height))
+        if hand_landmarks is None:
             return {}
 
-        # 獲取第一隻手的關鍵點
-        hand_landmarks = results.multi_hand_landmarks[0]
-
         # 重要手指關鍵點索引
         finger_tips = {
             'thumb': 4,      # 拇指
@@ -150,6 +191,35 @@ class FingerTracker:
 
         return finger_positions
 
+    def _detect_hand(self, region, offset: Tuple[int, int], width: int, height: int):
+        """
+        在影像區域上執行 MediaPipe Hands。
+
+        Returns:
+            (以整張影格正規化座標表示的手部關鍵點, 手部外框)；未偵測到手部時回傳 None
+        """
+        region_height, region_width = region.shape[:2]
+        region_rgb = cv2.cvtColor(region, cv2.COLOR_BGR2RGB)
+        with self._lock:
+            if self.hands_pool is None:
+                return None
+            with self.hands_pool.checkout(self._pool_session) as hands:
+                results = hands.process(region_rgb)
+
+        if not results.multi_hand_landmarks:
+            return None
+
+        # 獲取第一隻手的關鍵點，換算回整張影格的正規化座標，手指判定門檻不受裁切影響
+        points = np.array(
+            [(lm.x * region_width + offset[0], lm.y * region_height + offset[1])
+             for lm in results.multi_hand_landmarks[0].landmark],
+            dtype=np.float32,
+        )
+        hand_landmarks = SimpleNamespace(landmark=[
+            SimpleNamespace(x=float(x) / width, y=float(y) / height) for x, y in points
+        ])
+        return hand_landmarks, bbox_from_points(points, width, height)
+
     def _get_fingers_up(self, hand_landmarks) -> List[bool]:
         """檢測哪些手指是伸直的
 
@@ -192,6 +262,10 @@ class FingerTracker:
         return fingers
 
 
+# 累積未推送的筆劃片段上限，超過時改送完整快照
+MAX_PENDING_SEGMENTS = 512
+
+
 class VirtualCanvas:
     """虛擬畫布"""
 
@@ -206,6 +280,15 @@ class VirtualCanvas:
         self.is_drawing = False
         self.last_position = None
 
+        # 增量更新：自上次推送以來的筆劃片段與髒區域（畫布座標，x0, y0, x1, y1）
+        self.pending_segments: List[Dict] = []
+        self.dirty_regions: List[Tuple[int, int, int, int]] = []
+        self.needs_full_sync = True
+
+        # 畫布版本號：每次內容變更遞增，編碼結果依版本快取
+        self.version = 0
+        self._encoded_cache = EncodedCanvasCache()
+
     @property
     def _color_with_alpha(self) -> Tuple[int, int, int, int]:
         """將當前顏色轉換為含 alpha 的 BGRA 顏色。"""
@@ -220,6 +303,8 @@ class VirtualCanvas:
         self.canvas = np.zeros((self.height, self.width, 4), dtype=np.uint8)
         self.drawing_points.clear()
         self.last_position = None
+        self.version += 1
+        self._reset_delta(needs_full_sync=True)
 
     def set_color(self, color: DrawingColor):
         """設置繪畫顏色"""
@@ -241,9 +326,11 @@ class VirtualCanvas:
             if self.last_position is not None:
                 # 畫線連接兩點
                 cv2.line(self.canvas, self.last_position, (x, y), self._color_with_alpha, self.brush_size)
+                self._record_segment("line", [self.last_position, (x, y)], self.brush_size)
             else:
                 # 畫點
                 cv2.circle(self.canvas, (x, y), self.brush_size // 2, self._color_with_alpha, -1)
+                self._record_segment("dot", [(x, y)], self.brush_size)
 
             self.drawing_points.append({
                 'position': (x, y),
@@ -255,6 +342,10 @@ class VirtualCanvas:
         elif action == DrawingAction.ERASE:
             # 橡皮擦效果
             cv2.circle(self.canvas, (x, y), self.brush_size * 2, (0, 0, 0, 0), -1)
+            self._record_segment("erase", [(x, y)], self.brush_size * 4)
+
+        if action in (DrawingAction.DRAW, DrawingAction.ERASE):
+            self.version += 1
 
         self.last_position = (x, y)
 
@@ -266,25 +357,103 @@ class VirtualCanvas:
         """獲取當前畫布圖像"""
         return self.canvas.copy()
 
-    def get_canvas_base64(self) -> str:
-        """獲取畫布的 base64 編碼（左右反轉以符合使用者視角）"""
-        # 對於RGBA canvas，直接創建PIL Image
-        if self.canvas.shape[2] == 4:  # RGBA
-            # 將BGRA轉換為RGBA（OpenCV使用BGRA，PIL使用RGBA）
-            rgba_canvas = cv2.cvtColor(self.canvas, cv2.COLOR_BGRA2RGBA)
-            pil_image = Image.fromarray(rgba_canvas, mode='RGBA')
-        else:  # RGB
-            pil_image = Image.fromarray(cv2.cvtColor(self.canvas, cv2.COLOR_BGR2RGB), mode='RGB')
+    def _reset_delta(self, needs_full_sync: bool) -> None:
+        self.pending_segments = []
+        self.dirty_regions = []
+        self.needs_full_sync = needs_full_sync
+
+    def _record_segment(self, op: str, points: List[Tuple[int, int]], width: int) -> None:
+        """記錄一段筆劃供增量推送；座標轉換為左右反轉後的顯示座標。"""
+        if self.needs_full_sync:
+            # 下一次推送為完整快照，不需累積片段
+            return
+        if len(self.pending_segments) >= MAX_PENDING_SEGMENTS:
+            # 太久沒有推送，改以完整快照重新同步
+            self._reset_delta(needs_full_sync=True)
+            return
+
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        margin = width // 2 + 1
+        self.dirty_regions.append((
+            max(0, min(xs) - margin),
+            max(0, min(ys) - margin),
+            min(self.width, max(xs) + margin + 1),
+            min(self.height, max(ys) + margin + 1),
+        ))
+
+        display_points = [[self.width - 1 - px, py] for px, py in points]
+        color = "#%02x%02x%02x" % tuple(reversed(self.current_color[:3]))
+        last = self.pending_segments[-1] if self.pending_segments else None
+        # 同色同寬且首尾相接的線段合併為折線
+        if (op == "line" and last is not None and last["op"] == "line"
+                and last["color"] == color and last["width"] == width
+                and last["points"][-1] == display_points[0]):
+            last["points"].append(display_points[1])
+            return
+
+        segment = {"op": op, "points": display_points, "width": width}
+        if op != "erase":
+            segment["color"] = color
+        self.pending_segments.append(segment)
+
+    def _dirty_bounds(self) -> Optional[Tuple[int, int, int, int]]:
+        """合併所有髒區域為單一矩形（畫布座標）。"""
+        if not self.dirty_regions:
+            return None
+        x0 = min(r[0] for r in self.dirty_regions)
+        y0 = min(r[1] for r in self.dirty_regions)
+        x1 = max(r[2] for r in self.dirty_regions)
+        y1 = max(r[3] for r in self.dirty_regions)
+        return x0, y0, x1, y1
+
+    def pop_delta(self, include_patch: bool = False) -> Optional[Dict]:
+        """
+        取出自上次推送以來的增量更新並清空。
+
+        Args:
+            include_patch: 是否附上髒區域的 PNG 編碼
 
-        # 左右反轉畫布，使其符合鏡像攝影機的視角
-        pil_image = pil_image.transpose(Image.FLIP_LEFT_RIGHT)
+        Returns:
+            Optional[Dict]: {"segments", "dirty_rect"[, "patch_base64"]}，
+            dirty_rect 為顯示座標的 [x, y, w, h]；沒有變更時回傳 None
+        """
+        bounds = self._dirty_bounds()
+        if bounds is None:
+            return None
+        x0, y0, x1, y1 = bounds
+        delta = {
+            "segments": self.pending_segments,
+            "dirty_rect": [self.width - x1, y0, x1 - x0, y1 - y0],
+        }
+        if include_patch:
+            delta["patch_base64"] = self._encode_png_base64(self.canvas[y0:y1, x0:x1])
+        self._reset_delta(needs_full_sync=False)
+        return delta
+
+    def take_snapshot_base64(self) -> str:
+        """取得完整畫布快照並重設增量追蹤（快照已包含所有待推送的變更）。"""
+        snapshot = self.get_canvas_base64()
+        self._reset_delta(needs_full_sync=False)
+        return snapshot
+
+    @staticmethod
+    def _encode_png_base64(region: np.ndarray) -> str:
+        """將 BGRA 區域左右反轉後編碼為 PNG data URL（保留透明度供客戶端疊加）。"""
+        return encode_canvas_data_url(region, fmt="png", flip=True)
 
-        # 轉換為 base64
-        buffered = io.BytesIO()
-        pil_image.save(buffered, format="PNG")
-        img_base64 = base64.b64encode(buffered.getvalue()).decode()
+    def get_canvas_base64(self) -> str:
+        """
+        獲取畫布的 data URL 編碼（左右反轉以符合使用者視角）。
 
-        return f"data:image/png;base64,{img_base64}"
+        依 CANVAS_ENCODE_FORMAT 以 cv2.imencode 編碼，結果依畫布版本號快取，
+        畫布未變更時重複呼叫不會重新編碼。
+        """
+        return self._encoded_cache.get(
+            self.version,
+            lambda: encode_canvas_data_url(self.canvas, flip=True),
+            variant=CANVAS_ENCODE_FORMAT,
+        )
 
 
 class ShapeRecognizer:
@@ -478,13 +647,32 @@ class ShapeRecognizer:
 
 
 class DrawingService:
-    """畫布識別服務主類"""
+    """
+    畫布識別服務主類
 
-    def __init__(self, status_broadcaster: StatusBroadcaster):
+    每條 /ws/drawing 連線由 DrawingSessionManager 建立獨立的實例（自己的畫布、
+    手指追蹤狀態與筆劃計數），形狀識別器則可共用。
+    """
+
+    def __init__(self,
+                 status_broadcaster: StatusBroadcaster,
+                 shape_recognizer: Optional["ShapeRecognizer"] = None,
+                 session_id: Optional[str] = None):
+        """
+        Args:
+            status_broadcaster: 狀態廣播器
+            shape_recognizer: 共用的形狀識別器；None 時自行建立
+            session_id: 繪畫工作階段 ID（由 DrawingSessionManager 指定）
+        """
         self.status_broadcaster = status_broadcaster
+        self.session_id = session_id
         self.finger_tracker = FingerTracker()
         self.virtual_canvas = VirtualCanvas()
-        self.ai_recognizer = ShapeRecognizer()
+        self.ai_recognizer = shape_recognizer if shape_recognizer is not None else ShapeRecognizer()
+
+        # 工作階段活動時間（monotonic）與是否已關閉（閒置回收後不可再使用）
+        self.last_active_at = time.monotonic()
+        self.closed = False
 
         if not self.finger_tracker.is_available():
             logger.error(
@@ -494,7 +682,7 @@ class DrawingService:
 
         # 服務狀態
         self.is_drawing = False
-        self.drawing_thread = None
+        self.drawing_task: Optional[asyncio.Task] = None
         self.camera = None
 
         # 繪畫設定
@@ -510,7 +698,8 @@ class DrawingService:
 
         # 視覺穩定性控制
         self.last_canvas_update_time = 0
-        self.canvas_update_interval = 0.1  # 最少間隔100ms更新一次畫布
+        self.canvas_update_interval = CANVAS_PUSH_INTERVAL_MS / 1000.0  # 畫布推送最短間隔（秒）
+        self._pushed_canvas_version = -1
         self.last_stable_gesture = "none"
 
         # 畫布尺寸（預設值，會在開始會話時更新）
@@ -545,20 +734,17 @@ class DrawingService:
             # WebSocket 模式不需要開啟攝影機
             if not websocket_mode:
                 # 開啟攝影機
-                self.camera = cv2.VideoCapture(0)
+                self.camera = SerializedCapture(cv2.VideoCapture(0))
                 if not self.camera.isOpened():
+                    self.camera = None
                     return {"status": "error", "message": "無法開啟攝影機"}
 
                 self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
                 self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
                 self.camera.set(cv2.CAP_PROP_FPS, 30)
 
-                # 開始繪畫線程
-                self.drawing_thread = threading.Thread(
-                    target=self._drawing_loop,
-                    daemon=True
-                )
-                self.drawing_thread.start()
+                # 開始繪畫任務（在呼叫端讓出事件迴圈後才開始執行）
+                self.drawing_task = start_loop_task(self._drawing_loop(), name="drawing")
 
             # 重置狀態
             self.virtual_canvas.clear_canvas()
@@ -603,12 +789,13 @@ class DrawingService:
 
         self.is_drawing = False
 
+        # 釋放攝影機會等待進行中的讀取完成；繪畫任務隨即結束，不需等待
         if self.camera:
             self.camera.release()
             self.camera = None
 
-        if self.drawing_thread:
-            self.drawing_thread.join(timeout=2)
+        cancel_loop_task(self.drawing_task)
+        self.drawing_task = None
 
         # 最終識別
         final_recognition = self.ai_recognizer.recognize_drawing(self.virtual_canvas.get_canvas_image())
@@ -633,6 +820,18 @@ class DrawingService:
             "final_recognition": final_recognition
         }
 
+    def close(self) -> None:
+        """結束工作階段：停止進行中的繪畫並釋放手指追蹤器。"""
+        if self.is_drawing:
+            self.stop_drawing_session()
+        self.finger_tracker.close()
+        self.closed = True
+
+    def get_model_status(self) -> Dict[str, Dict]:
+        """回傳手指追蹤模型（MediaPipe Hands）的載入狀態"""
+        tracker = self.finger_tracker
+        return {"hands": model_state(tracker.is_available(), tracker.init_error)}
+
     def get_drawing_status(self) -> Dict:
         """獲取繪畫狀態"""
         if not self.is_drawing:
@@ -717,7 +916,53 @@ class DrawingService:
                 "message": f"顏色變更失敗: {str(e)}"
             }
 
-    def process_frame_for_gesture_drawing(self, frame_data: bytes, mode: str = "gesture_control") -> Dict:
+    def _canvas_update_fields(self, canvas_updates: str, force_full: bool = False) -> Dict:
+        """依更新模式產生畫布更新欄位；清空、首次推送或需要重新同步時送完整快照。"""
+        canvas = self.virtual_canvas
+        if canvas_updates not in ("delta", "patch") or force_full or canvas.needs_full_sync:
+            return {"canvas_update": "full", "canvas_base64": canvas.take_snapshot_base64()}
+
+        delta = canvas.pop_delta(include_patch=canvas_updates == "patch")
+        if delta is None:
+            return {}
+        if canvas_updates == "patch":
+            delta.pop("segments")
+        return {"canvas_update": canvas_updates, **delta}
+
+    def _coalesced_canvas_update(self, canvas_updates: str, force: bool = False) -> Dict:
+        """
+        依最短推送間隔合併畫布更新。
+
+        間隔內的變更不推送，由下一次到期的影格一併送出（未推送的版本會在之後的
+        影格補送，即使該影格沒有繪畫動作）；清空畫布時立即推送完整快照。
+        """
+        version = self.virtual_canvas.version
+        if not force and version == self._pushed_canvas_version:
+            return {}
+        now = time.time()
+        if not force and now - self.last_canvas_update_time < self.canvas_update_interval:
+            return {}
+
+        fields = self._canvas_update_fields(canvas_updates, force_full=force)
+        self.last_canvas_update_time = now
+        self._pushed_canvas_version = version
+        return fields
+
+    def get_canvas_snapshot(self) -> Dict:
+        """取得完整畫布快照訊息（供客戶端重新同步）。"""
+        return {
+            "type": "canvas_update",
+            "canvas_update": "full",
+            "canvas_base64": self.virtual_canvas.take_snapshot_base64(),
+            "stroke_count": self.total_strokes,
+            "current_color": self.current_color.name.lower(),
+            "timestamp": time.time()
+        }
+
+    def process_frame_for_gesture_drawing(self,
+                                          frame_data: bytes,
+                                          mode: str = "gesture_control",
+                                          canvas_updates: str = "full") -> Dict:
         """處理單一幀用於手勢繪畫（WebSocket模式）
 
         接收前端發送的影像幀，進行手勢識別和繪畫處理，返回處理結果。
@@ -725,10 +970,14 @@ class DrawingService:
         Args:
             frame_data (bytes): JPEG 編碼的影像幀數據
             mode (str): 繪畫模式 ("gesture_control", "index_finger")
+            canvas_updates (str): 畫布更新模式，"full" 每次繪畫送完整 PNG；
+                "delta" 只送新筆劃片段（points/color/width）；"patch" 只送髒區域 PNG。
+                增量模式在首次推送、清空與重新同步時仍送完整快照
 
         Returns:
             Dict: 處理結果，包含手勢狀態、畫布更新和識別結果
         """
+        self.last_active_at = time.monotonic()
         try:
             # 將 bytes 轉換為 numpy array
             nparr = np.frombuffer(frame_data, np.uint8)
@@ -770,10 +1019,12 @@ class DrawingService:
                 "timestamp": current_time
             }
 
-            # 如果有繪畫發生，立即更新畫布（移除節流以確保即時性）
-            if gesture_info["drawing_occurred"]:
+            # 畫布有變更時推送更新（依 canvas_update_interval 合併，清空時立即推送）
+            canvas_fields = self._coalesced_canvas_update(
+                canvas_updates, force=gesture_name == "clearing")
+            if canvas_fields:
+                response.update(canvas_fields)
                 response.update({
-                    "canvas_base64": self.virtual_canvas.get_canvas_base64(),
                     "stroke_count": self.total_strokes,
                     "current_color": self.current_color.name.lower()
                 })
@@ -789,10 +1040,7 @@ class DrawingService:
 
             # 如果是清空手勢，額外發送清空通知
             if gesture_name == "clearing":
-                response.update({
-                    "canvas_cleared": True,
-                    "canvas_base64": self.virtual_canvas.get_canvas_base64()
-                })
+                response["canvas_cleared"] = True
                 logger.info("✅ 發送畫布清空通知")
 
             # 如果有識別結果，包含識別信息
@@ -993,14 +1241,15 @@ class DrawingService:
 
         return gesture_info
 
-    def _drawing_loop(self):
-        """繪畫主循環"""
+    async def _drawing_loop(self):
+        """繪畫主循環（事件迴圈上的背景任務）：讀取、手指追蹤與識別在執行緒池執行"""
         last_recognition_time = 0
         frame_count = 0
+        camera = self.camera
 
         try:
-            while self.is_drawing and self.camera and self.camera.isOpened():
-                ret, frame = self.camera.read()
+            while self.is_drawing and camera is self.camera and camera.isOpened():
+                ret, frame = await asyncio.to_thread(camera.read)
                 if not ret:
                     break
 
@@ -1010,7 +1259,7 @@ class DrawingService:
                 frame = cv2.flip(frame, 1)
 
                 # 獲取手指位置
-                finger_positions = self.finger_tracker.get_finger_positions(frame)
+                finger_positions = await asyncio.to_thread(self.finger_tracker.get_finger_positions, frame)
 
                 if finger_positions and 'index' in finger_positions:
                     # 根據模式處理繪畫
@@ -1024,7 +1273,7 @@ class DrawingService:
                 if (self.auto_recognize and
                     current_time - last_recognition_time >= self.recognition_interval):
 
-                    recognition_result = self.recognize_current_drawing()
+                    recognition_result = await asyncio.to_thread(self.recognize_current_drawing)
 
                     # 廣播識別結果
                     self.status_broadcaster.broadcast_threadsafe({
@@ -1041,8 +1290,10 @@ class DrawingService:
                     last_recognition_time = current_time
 
                 # 控制幀率
-                time.sleep(1/30)
+                await asyncio.sleep(1/30)
 
+        except asyncio.CancelledError:
+            pass
         except Exception as exc:
             self.status_broadcaster.broadcast_threadsafe({
                 "channel": "drawing",
@@ -1050,12 +1301,14 @@ class DrawingService:
                 "message": f"繪畫錯誤: {str(exc)}"
             })
         finally:
-            if self.camera:
-                self.camera.release()
-                self.camera = None
+            # 已被新會話取代的舊任務不可釋放新的攝影機
+            if self.drawing_task is asyncio.current_task():
+                if self.camera:
+                    self.camera.release()
+                    self.camera = None
 
-            if self.is_drawing:
-                self.stop_drawing_session()
+                if self.is_drawing:
+                    self.stop_drawing_session()
 
     def _process_drawing_input(self, finger_positions: Dict):
         """處理繪畫輸入"""
@@ -1094,4 +1347,4 @@ class DrawingService:
             self.virtual_canvas.stop_drawing()
 
 
-__all__ = ["DrawingService", "DrawingMode", "DrawingColor"]
+__all__ = ["DrawingService", "DrawingMode", "DrawingColor", "CANVAS_UPDATE_MODES"]
@@ -0,0 +1,201 @@
+# =============================================================================
+# services/drawing_session_manager.py - 手勢繪畫工作階段管理
+# 每條 /ws/drawing 連線擁有獨立的畫布、手指追蹤狀態與筆劃計數；
+# 閒置過久的工作階段會被回收，並以工作階段數與估計記憶體限制同時存在的畫布。
+# =============================================================================
+
+import logging
+import threading
+import time
+import uuid
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import numpy as np
+
+from ..config.settings import (
+    DRAWING_MAX_SESSIONS,
+    DRAWING_SESSION_IDLE_SECONDS,
+    DRAWING_SESSIONS_MAX_MEMORY_MB,
+)
+from .status_broadcaster import StatusBroadcaster
+from ..utils.instance_pool import InstancePoolExhausted
+
+if TYPE_CHECKING:
+    from .drawing_service import DrawingService
+
+logger = logging.getLogger(__name__)
+
+# MediaPipe Hands 實例（含追蹤狀態）的估計常駐記憶體
+FINGER_TRACKER_MEMORY_BYTES = 48 * 1024 * 1024
+
+
+class DrawingSessionLimitError(RuntimeError):
+    """繪畫工作階段數或估計記憶體已達上限。"""
+
+
+class DrawingSessionManager:
+    """
+    手勢繪畫工作階段管理器。
+
+    ``create_session()`` 為每條連線建立獨立的 DrawingService（共用形狀識別器），
+    建立前先回收閒置超過 ``idle_timeout`` 秒的工作階段；回收後仍超過工作階段數
+    或記憶體上限時拒絕建立。被回收的工作階段 ``closed`` 為 True，連線應通知客戶端重新開始。
+
+    Attributes:
+        max_sessions (int): 同時存在的工作階段上限
+        idle_timeout (float): 閒置回收秒數
+        max_memory_bytes (int): 所有工作階段估計記憶體上限
+    """
+
+    def __init__(
+        self,
+        status_broadcaster: StatusBroadcaster,
+        max_sessions: int = DRAWING_MAX_SESSIONS,
+        idle_timeout: float = DRAWING_SESSION_IDLE_SECONDS,
+        max_memory_mb: int = DRAWING_SESSIONS_MAX_MEMORY_MB,
+    ) -> None:
+        # 繪畫服務依賴 MediaPipe，延後到建立管理器時才匯入
+        from .drawing_service import ShapeRecognizer
+
+        self.status_broadcaster = status_broadcaster
+        self.shape_recognizer = ShapeRecognizer()
+        self.max_sessions = max(1, max_sessions)
+        self.idle_timeout = idle_timeout
+        self.max_memory_bytes = max_memory_mb * 1024 * 1024
+        self._sessions: Dict[str, 'DrawingService'] = {}
+        # 建置中的工作階段預留：session_id -> 預留的估計記憶體
+        self._pending: Dict[str, int] = {}
+        # 新工作階段的預留估計，成功建立後更新為實際估計值
+        self._reserve_bytes = FINGER_TRACKER_MEMORY_BYTES
+        self._lock = threading.Lock()
+        self.created_count = 0
+        self.evicted_count = 0
+
+    @staticmethod
+    def estimate_session_bytes(session: 'DrawingService') -> int:
+        """估計工作階段的常駐記憶體：畫布陣列 + 手指追蹤器。"""
+        canvas = session.virtual_canvas
+        canvas_bytes = sum(
+            value.nbytes for value in vars(canvas).values() if isinstance(value, np.ndarray)
+        )
+        tracker_bytes = FINGER_TRACKER_MEMORY_BYTES if session.finger_tracker.is_available() else 0
+        return canvas_bytes + tracker_bytes
+
+    def create_session(self, session_id: Optional[str] = None) -> 'DrawingService':
+        """
+        建立新的繪畫工作階段（會借用 MediaPipe Hands 實例，應在工作執行緒中呼叫）。
+
+        建置期間不持有鎖，因此先在鎖內預留名額與估計記憶體，建置完成後再以實際估計值
+        重新檢查；建置失敗或超過記憶體上限時釋放預留，並行建立也不會超過上限。
+
+        Raises:
+            DrawingSessionLimitError: 回收閒置工作階段後仍達數量或記憶體上限，
+                或共用 Hands 實例池逾時仍無名額
+        """
+        self.evict_idle()
+        session_id = session_id or uuid.uuid4().hex[:12]
+        with self._lock:
+            existing = self._sessions.get(session_id)
+            if existing is not None:
+                return existing
+            if session_id in self._pending:
+                raise DrawingSessionLimitError(f"繪畫工作階段建立中: {session_id}")
+            if len(self._sessions) + len(self._pending) >= self.max_sessions:
+                raise DrawingSessionLimitError(f"繪畫工作階段已達上限 ({self.max_sessions})")
+            if self._used_bytes_locked() + self._reserve_bytes > self.max_memory_bytes:
+                raise DrawingSessionLimitError("繪畫工作階段記憶體已達上限")
+            self._pending[session_id] = self._reserve_bytes
+
+        from .drawing_service import DrawingService
+
+        try:
+            session = DrawingService(
+                self.status_broadcaster,
+                shape_recognizer=self.shape_recognizer,
+                session_id=session_id,
+            )
+        except InstancePoolExhausted as exc:
+            with self._lock:
+                self._pending.pop(session_id, None)
+            raise DrawingSessionLimitError(f"手指追蹤器已達上限: {exc}") from exc
+        except BaseException:
+            with self._lock:
+                self._pending.pop(session_id, None)
+            raise
+
+        session_bytes = self.estimate_session_bytes(session)
+        with self._lock:
+            self._pending.pop(session_id, None)
+            over_memory = self._used_bytes_locked() + session_bytes > self.max_memory_bytes
+            if not over_memory:
+                self._sessions[session_id] = session
+                self._reserve_bytes = session_bytes
+                self.created_count += 1
+        if over_memory:
+            session.close()
+            raise DrawingSessionLimitError("繪畫工作階段記憶體已達上限")
+
+        logger.info("建立繪畫工作階段: %s", session_id)
+        return session
+
+    def _used_bytes_locked(self) -> int:
+        """已建立工作階段與建置中預留的估計記憶體總和（呼叫端須持有鎖）。"""
+        used = sum(self.estimate_session_bytes(s) for s in self._sessions.values())
+        return used + sum(self._pending.values())
+
+    def get_session(self, session_id: str) -> Optional['DrawingService']:
+        """取得指定的工作階段。"""
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def close_session(self, session_id: str) -> None:
+        """結束工作階段：停止繪畫、釋放手指追蹤器並移除。"""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return
+        session.close()
+        logger.info("關閉繪畫工作階段: %s", session_id)
+
+    def evict_idle(self, now: Optional[float] = None) -> List[str]:
+        """回收閒置超過 idle_timeout 秒的工作階段，回傳被回收的 ID。"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            expired = [
+                session_id for session_id, session in self._sessions.items()
+                if now - session.last_active_at >= self.idle_timeout
+            ]
+            sessions = [self._sessions.pop(session_id) for session_id in expired]
+            self.evicted_count += len(expired)
+
+        for session in sessions:
+            session.close()
+        if expired:
+            logger.info("回收閒置繪畫工作階段: %s", ", ".join(expired))
+        return expired
+
+    def get_stats(self) -> Dict:
+        """回傳工作階段數、估計記憶體與回收統計。"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            pending = len(self._pending)
+        return {
+            "active_sessions": len(sessions),
+            "pending_sessions": pending,
+            "drawing_sessions": sum(1 for session in sessions if session.is_drawing),
+            "max_sessions": self.max_sessions,
+            "estimated_memory_bytes": sum(self.estimate_session_bytes(s) for s in sessions),
+            "max_memory_bytes": self.max_memory_bytes,
+            "created": self.created_count,
+            "evicted_idle": self.evicted_count,
+        }
+
+    def close_all(self) -> None:
+        """結束所有工作階段（應用程式關閉時呼叫）。"""
+        with self._lock:
+            session_ids = list(self._sessions)
+        for session_id in session_ids:
+            self.close_session(session_id)
+
+
+__all__ = ["DrawingSessionManager", "DrawingSessionLimitError"]
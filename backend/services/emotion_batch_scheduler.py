@@ -0,0 +1,178 @@
+# =============================================================================
+# services/emotion_batch_scheduler.py - 情緒模型微批次排程器
+# 收集多個連線在短時間內送來的臉部裁切，合併成單一張量做一次前向推論，
+# 再依提交順序將結果分送回各呼叫端。
+# =============================================================================
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from ..config.settings import EMOTION_BATCH_MAX_SIZE, EMOTION_BATCH_MAX_WAIT_MS
+
+logger = logging.getLogger(__name__)
+
+# DeepFace Emotion 模型的輸出順序與輸入尺寸
+EMOTION_LABELS = ["angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"]
+EMOTION_INPUT_SIZE = 48
+
+_BatchItem = Tuple[np.ndarray, Future]
+
+
+def preprocess_face_crop(face_crop: np.ndarray) -> np.ndarray:
+    """
+    將 BGR 臉部裁切轉為情緒模型輸入：灰階、48x48、歸一化至 [0, 1]。
+
+    Args:
+        face_crop: BGR 或灰階的臉部影像
+
+    Returns:
+        np.ndarray: 形狀為 (48, 48, 1) 的 float32 陣列
+    """
+    if face_crop.ndim == 3:
+        gray = cv2.cvtColor(face_crop, cv2.COLOR_BGR2GRAY)
+    else:
+        gray = face_crop
+    resized = cv2.resize(gray, (EMOTION_INPUT_SIZE, EMOTION_INPUT_SIZE), interpolation=cv2.INTER_AREA)
+    return (resized.astype(np.float32) / 255.0)[:, :, np.newaxis]
+
+
+def scores_to_emotion_result(scores: np.ndarray) -> Dict:
+    """
+    將單張臉的模型輸出轉為與 DeepFace.analyze 相同格式的結果（百分比分數）。
+
+    Args:
+        scores: 長度為 7 的機率向量
+
+    Returns:
+        Dict: 含 ``emotion`` 與 ``dominant_emotion`` 的結果字典
+    """
+    scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+    total = float(scores.sum()) or 1.0
+    emotion = {label: 100.0 * float(score) / total for label, score in zip(EMOTION_LABELS, scores)}
+    return {
+        "emotion": emotion,
+        "dominant_emotion": EMOTION_LABELS[int(np.argmax(scores))],
+    }
+
+
+class EmotionBatchScheduler:
+    """
+    情緒模型的微批次排程器。
+
+    呼叫端（通常是推論執行緒）以 submit()/predict() 提交臉部裁切；背景工作執行緒
+    取得第一筆後最多再等待 ``max_wait_ms``，湊滿 ``max_batch_size`` 筆或逾時即
+    堆疊成 (N, 48, 48, 1) 張量呼叫一次 predict_fn，並依序設定各 Future 的結果。
+
+    Attributes:
+        max_batch_size (int): 單一批次的最大筆數
+        max_wait_ms (float): 湊批次時的最長等待時間（毫秒）
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[np.ndarray], np.ndarray],
+        max_batch_size: int = EMOTION_BATCH_MAX_SIZE,
+        max_wait_ms: float = EMOTION_BATCH_MAX_WAIT_MS,
+    ) -> None:
+        self._predict_fn = predict_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, float(max_wait_ms))
+        self._queue: "queue.Queue[Optional[_BatchItem]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batch_count = 0
+        self.frame_count = 0
+        self.largest_batch = 0
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._worker_loop, name="emotion-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, face_crop: np.ndarray) -> Future:
+        """
+        提交一張臉部裁切，回傳最終取得 7 維情緒機率向量的 Future。
+
+        前處理在呼叫端執行緒完成，讓工作執行緒只負責堆疊與推論。
+        """
+        future: Future = Future()
+        self._ensure_worker()
+        self._queue.put((preprocess_face_crop(face_crop), future))
+        return future
+
+    def predict(self, face_crop: np.ndarray, timeout: Optional[float] = None) -> np.ndarray:
+        """同步版本的 submit()，阻塞直到該臉部所屬的批次完成推論。"""
+        return self.submit(face_crop).result(timeout=timeout)
+
+    def _worker_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch: List[_BatchItem] = [item]
+            stop = False
+            deadline = time.monotonic() + self.max_wait_ms / 1000.0
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    next_item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if next_item is None:
+                    stop = True
+                    break
+                batch.append(next_item)
+
+            self._run_batch(batch)
+            if stop:
+                return
+
+    def _run_batch(self, batch: List[_BatchItem]) -> None:
+        pending = [(tensor, future) for tensor, future in batch if future.set_running_or_notify_cancel()]
+        if not pending:
+            return
+
+        try:
+            scores = np.asarray(self._predict_fn(np.stack([tensor for tensor, _ in pending])))
+        except Exception as exc:
+            logger.error("情緒模型批次推論失敗 (batch=%d): %s", len(pending), exc)
+            for _, future in pending:
+                future.set_exception(exc)
+            return
+
+        self.batch_count += 1
+        self.frame_count += len(pending)
+        self.largest_batch = max(self.largest_batch, len(pending))
+        for (_, future), row in zip(pending, scores):
+            future.set_result(row)
+
+    def get_stats(self) -> Dict:
+        """回傳批次數、平均批次大小等統計資訊。"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batch_count": self.batch_count,
+            "frame_count": self.frame_count,
+            "largest_batch": self.largest_batch,
+            "avg_batch_size": round(self.frame_count / self.batch_count, 2) if self.batch_count else 0.0,
+            "pending": self._queue.qsize(),
+        }
+
+    def close(self) -> None:
+        """停止工作執行緒；已排入的項目會先處理完。"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join(timeout=1.0)
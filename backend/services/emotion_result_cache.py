@@ -0,0 +1,108 @@
+# =============================================================================
+# services/emotion_result_cache.py - 以臉部關鍵點位移判斷是否沿用情緒結果
+# 站在攝影機前的訪客表情通常維持數秒不變；FaceMesh 預檢已算出關鍵點，
+# 與上次實際分析的影格相比位移很小且結果尚未過期時，直接沿用上次的 DeepFace 結果。
+# =============================================================================
+
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from ..config.settings import EMOTION_CACHE_LANDMARK_DELTA, EMOTION_CACHE_MAX_AGE_MS
+
+
+def landmark_delta(previous: np.ndarray, current: np.ndarray) -> float:
+    """
+    兩組臉部關鍵點的平均位移，以上一組關鍵點的臉部外框大小正規化。
+
+    Args:
+        previous: (N, >=2) 像素座標
+        current: (N, >=2) 像素座標
+
+    Returns:
+        float: 平均位移 / 臉部外框長邊；點數不同時回傳 inf
+    """
+    if previous.shape[0] != current.shape[0]:
+        return float("inf")
+    prev_xy = previous[:, :2]
+    span = prev_xy.max(axis=0) - prev_xy.min(axis=0)
+    scale = float(max(span.max(), 1.0))
+    return float(np.linalg.norm(current[:, :2] - prev_xy, axis=1).mean() / scale)
+
+
+class EmotionResultCache:
+    """
+    單一串流（連線）的情緒結果快取。
+
+    ``lookup()`` 在關鍵點相對上次實際分析的影格位移低於 ``max_delta``，
+    且上次結果距今未超過 ``max_age_ms`` 時回傳快取結果；否則記為未命中，
+    呼叫端完成分析後以 ``store()`` 更新。比較基準固定為上次分析的影格，
+    緩慢漂移累積超過門檻時仍會重新分析。
+
+    Attributes:
+        max_delta (float): 允許沿用結果的最大平均位移（相對臉部大小）
+        max_age_ms (float): 快取結果的最長沿用時間（毫秒）
+    """
+
+    def __init__(
+        self,
+        max_delta: float = EMOTION_CACHE_LANDMARK_DELTA,
+        max_age_ms: float = EMOTION_CACHE_MAX_AGE_MS,
+    ) -> None:
+        self.max_delta = max_delta
+        self.max_age_ms = max_age_ms
+        self._landmarks: Optional[np.ndarray] = None
+        self._result: Optional[Dict] = None
+        self._stored_at = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, landmarks: np.ndarray, now: Optional[float] = None) -> Optional[Dict]:
+        """回傳可沿用的結果副本；需要重新分析時回傳 None 並計為未命中。"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._result is not None and self._landmarks is not None:
+                age_ms = (now - self._stored_at) * 1000
+                if age_ms <= self.max_age_ms and landmark_delta(self._landmarks, landmarks) <= self.max_delta:
+                    self.hits += 1
+                    result = dict(self._result)
+                    result["cache"] = self._stats(hit=True, age_ms=age_ms)
+                    return result
+            self.misses += 1
+            return None
+
+    def store(self, landmarks: np.ndarray, result: Dict, now: Optional[float] = None) -> Dict:
+        """記錄本次分析的關鍵點與結果，回傳附上快取統計的結果。"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._landmarks = np.array(landmarks, dtype=np.float32, copy=True)
+            self._result = {key: value for key, value in result.items() if key != "cache"}
+            self._stored_at = now
+            result["cache"] = self._stats(hit=False, age_ms=0.0)
+        return result
+
+    def invalidate(self) -> None:
+        """丟棄快取結果（例如臉部離開畫面）。"""
+        with self._lock:
+            self._landmarks = None
+            self._result = None
+
+    def annotate(self, result: Dict) -> Dict:
+        """在未快取的結果（例如未偵測到臉部或分析失敗）附上目前的命中統計。"""
+        with self._lock:
+            result["cache"] = self._stats(hit=False, age_ms=None)
+        return result
+
+    def _stats(self, hit: bool, age_ms: Optional[float]) -> Dict:
+        return {
+            "hit": hit,
+            "age_ms": round(age_ms, 1) if age_ms is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+__all__ = ["EmotionResultCache", "landmark_delta"]
@@ -2,11 +2,12 @@ import logging
 import os
 import threading
 import time
-import tempfile
+import uuid
 from collections import deque
+from contextlib import contextmanager
 from enum import Enum
-from typing import Dict, List, Optional, Tuple
-from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
 from types import SimpleNamespace
 
 import cv2
@@ -91,6 +92,7 @@ try:
         print("ℹ️ 未檢測到 GPU，使用 CPU")
 
 except ImportError:
+    tf = None
     print("⚠️ TensorFlow 未安裝")
 
 # DeepFace 依賴初始化 (人臉情緒分析)
@@ -109,8 +111,17 @@ except Exception as exc:
     _DEEPFACE_ERROR = str(exc)
     logging.warning(f"DeepFace 不可用: {exc}")
 
+from .emotion_batch_scheduler import EmotionBatchScheduler, scores_to_emotion_result
+from .emotion_result_cache import EmotionResultCache
 from .status_broadcaster import StatusBroadcaster
+from .video_shard_pool import get_video_shard_pool, plan_video_shards
+from ..config.settings import EMOTION_BATCH_MAX_SIZE, EMOTION_MODEL_MAX_RSS_MB, FACE_MESH_POOL_SIZE
 from ..utils.datetime_utils import _now_ts
+from ..utils.instance_pool import InstancePool
+from ..utils.lazy_service import STATE_UNLOADED, model_state
+from ..utils.model_registry import FACE_MESH_OPTIONS, current_rss_bytes, model_registry
+from ..utils.roi_tracker import RoiTracker, bbox_from_points
+from ..utils.video_sampling import SampledFrameReader
 
 
 logger = logging.getLogger(__name__)
@@ -149,15 +160,230 @@ EMOTION_TRANSLATIONS = {
 }
 
 
+def _current_rss_mb() -> Optional[float]:
+    """讀取目前行程的常駐記憶體 (MB)，無法取得時回傳 None。"""
+    rss_bytes = current_rss_bytes()
+    return rss_bytes / (1024 * 1024) if rss_bytes is not None else None
+
+
+class EmotionModelHolder:
+    """
+    常駐的 DeepFace 情緒模型持有者。
+
+    模型在服務啟動時載入並以空白影像暖機一次，之後所有分析共用同一份模型，
+    每幀只需負擔一次前向推論。僅在行程記憶體超過 ``max_rss_mb`` 時才釋放
+    TensorFlow session 與 DeepFace 模型快取，下一次呼叫會自動重新載入。
+
+    釋放後配置器通常不會把記憶體還給作業系統，RSS 可能仍高於上限；
+    因此釋放後須等 RSS 降到 ``max_rss_mb * RESUME_RSS_RATIO`` 以下才會再次釋放，
+    且兩次釋放至少間隔 ``MIN_EVICTION_INTERVAL_SECONDS``，避免每幀都釋放、重新載入與暖機。
+    """
+
+    MODEL_NAME = "Emotion"
+    RESUME_RSS_RATIO = 0.8
+    MIN_EVICTION_INTERVAL_SECONDS = 60.0
+
+    def __init__(self, max_rss_mb: int = EMOTION_MODEL_MAX_RSS_MB):
+        self.max_rss_mb = max_rss_mb
+        self.model = None
+        self.load_error: Optional[str] = None
+        self.load_count = 0
+        self.eviction_count = 0
+        self.inference_count = 0
+        self.last_load_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+        # 進行中的推論數；釋放模型只在沒有推論進行時執行，不會拆掉其他執行緒正在使用的 session
+        self._active_inferences = 0
+        # 上次釋放的時間（time.monotonic）與是否仍在等待 RSS 回落
+        self._last_eviction_at: Optional[float] = None
+        self._pressure_latched = False
+
+    def is_loaded(self) -> bool:
+        """回傳模型是否已常駐於記憶體。"""
+        return self.model is not None
+
+    def load(self) -> bool:
+        """載入並暖機情緒模型；已載入時直接回傳。"""
+        if DeepFace is None:
+            self.load_error = _DEEPFACE_ERROR or "DeepFace 不可用"
+            return False
+
+        with self._lock:
+            if self.model is not None:
+                return True
+
+            start_time = time.time()
+            try:
+                self.model = DeepFace.build_model(self.MODEL_NAME)
+                # 以空白影像跑一次前向推論，讓 TensorFlow 完成圖形建構
+                warmup_image = np.zeros((48, 48, 3), dtype=np.uint8)
+                self._run_analyze(
+                    img_path=warmup_image,
+                    actions=['emotion'],
+                    enforce_detection=False,
+                    detector_backend='skip',
+                )
+            except Exception as exc:
+                self.model = None
+                self.load_error = str(exc)
+                logger.exception("載入 DeepFace 情緒模型失敗: %s", exc)
+                return False
+
+            self.load_error = None
+            self.load_count += 1
+            self.last_load_seconds = round(time.time() - start_time, 3)
+            logger.info("DeepFace 情緒模型已常駐 (%.3fs)", self.last_load_seconds)
+            return True
+
+    @contextmanager
+    def _in_use(self) -> Iterator[None]:
+        """標記推論進行中並確保模型已載入；期間 evict() 不會釋放模型。"""
+        with self._lock:
+            self._active_inferences += 1
+        try:
+            if self.model is None and not self.load():
+                raise RuntimeError(self.load_error or "DeepFace 情緒模型未就緒")
+            yield
+        finally:
+            with self._lock:
+                self._active_inferences -= 1
+
+    def analyze(self, **analyze_kwargs) -> List[Dict]:
+        """使用常駐模型執行 DeepFace.analyze，必要時先載入模型。"""
+        with self._in_use():
+            analysis = self._run_analyze(**analyze_kwargs)
+        self.inference_count += 1
+        return analysis
+
+    def predict_batch(self, faces: np.ndarray) -> np.ndarray:
+        """
+        對已前處理的臉部張量 (N, 48, 48, 1) 執行一次批次前向推論。
+
+        Returns:
+            np.ndarray: 形狀為 (N, 7) 的情緒機率
+        """
+        with self._in_use():
+            # DeepFace 的 Emotion client 將 Keras 模型包在 .model 屬性中
+            keras_model = getattr(self.model, "model", self.model)
+            if _GPU_STATUS.tensorflow_ready and tf is not None:
+                with tf.device('/GPU:0'):
+                    predictions = keras_model.predict(faces, verbose=0)
+            else:
+                predictions = keras_model.predict(faces, verbose=0)
+        self.inference_count += len(faces)
+        # 批次之間在批次執行緒上檢查記憶體壓力，呼叫端組成結果時不必再檢查
+        self.release_if_under_pressure()
+        return np.asarray(predictions)
+
+    def _run_analyze(self, **analyze_kwargs) -> List[Dict]:
+        if _GPU_STATUS.tensorflow_ready and tf is not None:
+            with tf.device('/GPU:0'):
+                return DeepFace.analyze(**analyze_kwargs)
+        return DeepFace.analyze(**analyze_kwargs)
+
+    def release_if_under_pressure(self) -> bool:
+        """記憶體超過上限時釋放模型，回傳是否實際執行了釋放。"""
+        if self.max_rss_mb <= 0 or self.model is None:
+            return False
+
+        rss_mb = _current_rss_mb()
+        if rss_mb is None:
+            return False
+
+        if self._pressure_latched:
+            # 上次釋放後 RSS 尚未回落到低水位，再次釋放也拿不回記憶體
+            if rss_mb >= self.max_rss_mb * self.RESUME_RSS_RATIO:
+                return False
+            self._pressure_latched = False
+
+        if rss_mb < self.max_rss_mb:
+            return False
+        now = time.monotonic()
+        if (self._last_eviction_at is not None
+                and now - self._last_eviction_at < self.MIN_EVICTION_INTERVAL_SECONDS):
+            return False
+
+        if not self.evict():
+            return False  # 其他執行緒推論中，下一次檢查再釋放
+        logger.warning(
+            "行程記憶體 %.0fMB 超過上限 %dMB，已釋放 DeepFace 情緒模型",
+            rss_mb,
+            self.max_rss_mb,
+        )
+        self._last_eviction_at = now
+        self._pressure_latched = True
+
+        after_mb = _current_rss_mb()
+        if after_mb is not None and after_mb >= self.max_rss_mb * self.RESUME_RSS_RATIO:
+            logger.warning(
+                "釋放情緒模型後行程記憶體仍為 %.0fMB，降到 %.0fMB 以下前不再釋放",
+                after_mb,
+                self.max_rss_mb * self.RESUME_RSS_RATIO,
+            )
+        return True
+
+    def evict(self) -> bool:
+        """
+        釋放模型與 TensorFlow session，下一次分析會重新載入。
+
+        有推論進行中（包含批次排程執行緒的 predict）時不釋放，回傳 False；
+        釋放期間新的推論會等待，待釋放完成後重新載入模型。
+        """
+        with self._lock:
+            if self._active_inferences:
+                return False
+            self.model = None
+            self.eviction_count += 1
+            try:
+                from deepface.modules import modeling
+                getattr(modeling, "model_obj", {}).clear()
+            except Exception:
+                pass
+            if tf is not None:
+                try:
+                    tf.keras.backend.clear_session()
+                except Exception:
+                    pass
+        return True
+
+    def get_state(self) -> Dict:
+        """回傳模型載入狀態：常駐為 ready、載入失敗為 failed、尚未載入或已釋放為 unloaded。"""
+        if self.model is not None:
+            return model_state(True)
+        if DeepFace is None or self.load_error:
+            return model_state(False, self.load_error or _DEEPFACE_ERROR or "DeepFace 不可用")
+        return {"state": STATE_UNLOADED, "error": None}
+
+    def get_stats(self) -> Dict:
+        """回傳模型常駐狀態與統計資訊。"""
+        return {
+            "loaded": self.is_loaded(),
+            "load_count": self.load_count,
+            "eviction_count": self.eviction_count,
+            "inference_count": self.inference_count,
+            "last_load_seconds": self.last_load_seconds,
+            "max_rss_mb": self.max_rss_mb,
+            "pressure_latched": self._pressure_latched,
+            "error": self.load_error,
+        }
+
+
+# 未指定 session 的串流呼叫共用的 FaceMesh session
+DEFAULT_STREAM_SESSION = "default"
+
+
 class FacialFeatureExtractor:
     """臉部特徵提取器，基於 MediaPipe FaceMesh."""
 
     def __init__(self):
         self.mediapipe_ready = _MEDIAPIPE_AVAILABLE
         self.init_error: Optional[str] = _MEDIAPIPE_ERROR
-        self.face_mesh_stream = None
-        self.face_mesh_static = None
-        self.face_mesh_lock = threading.Lock()
+        # 串流情境依 session 綁定專屬 FaceMesh（保留時序追蹤），靜態圖片共用閒置實例
+        self.stream_pool: Optional[InstancePool] = None
+        self.static_pool: Optional[InstancePool] = None
+        # 各串流 session 的臉部 ROI 追蹤器
+        self._roi_trackers: Dict[str, RoiTracker] = {}
+        self._roi_lock = threading.Lock()
 
         # MediaPipe 468點人臉網格關鍵索引
         self.LEFT_EYE_INDICES = [33, 7, 163, 144, 145, 153, 154, 155, 133, 173, 157, 158, 159, 160, 161, 246]
@@ -168,25 +394,39 @@ class FacialFeatureExtractor:
         self.NOSE_TIP = 1
         self.CHIN = 175
 
+        # 向量化特徵計算用的索引陣列
+        # 長寬比群組：左眼、右眼、嘴巴各取前 6 點
+        self._ratio_indices = np.array(
+            [self.LEFT_EYE_INDICES[:6], self.RIGHT_EYE_INDICES[:6], self.MOUTH_INDICES[:6]], dtype=np.intp)
+        # 每組內的點對：兩段垂直距離 (1,5)、(2,4) 與一段水平距離 (0,3)
+        self._ratio_pairs = np.array([[1, 5], [2, 4], [0, 3]], dtype=np.intp)
+        self._ratio_defaults = np.array([0.3, 0.3, 0.1], dtype=np.float32)
+        self._eyebrow_indices = np.array([self.EYEBROW_LEFT_INDICES, self.EYEBROW_RIGHT_INDICES], dtype=np.intp)
+        self._midline_indices = np.array([self.NOSE_TIP, self.CHIN, 10], dtype=np.intp)
+        # 對稱點：眼角、嘴角、臉頰
+        self._symmetry_left = np.array([33, 78, 234], dtype=np.intp)
+        self._symmetry_right = np.array([362, 308, 454], dtype=np.intp)
+
         if self.mediapipe_ready:
             try:
                 self.mp_face_mesh = mp.solutions.face_mesh
-                # 動態串流情境（攝影機/影片）
-                self.face_mesh_stream = self.mp_face_mesh.FaceMesh(
-                    static_image_mode=False,
-                    max_num_faces=1,
-                    refine_landmarks=True,
-                    min_detection_confidence=0.5,
-                    min_tracking_confidence=0.5,
+                # 動態串流情境（攝影機/影片）；與動作偵測設定相同，由模型登錄表共用同一個池
+                self.stream_pool = model_registry.pool(
+                    "face_mesh",
+                    {**FACE_MESH_OPTIONS, "static_image_mode": False},
+                    self.mp_face_mesh.FaceMesh,
+                    max_instances=FACE_MESH_POOL_SIZE,
                 )
                 # 靜態圖片情境
-                self.face_mesh_static = self.mp_face_mesh.FaceMesh(
-                    static_image_mode=True,
-                    max_num_faces=1,
-                    refine_landmarks=True,
-                    min_detection_confidence=0.5,
-                    min_tracking_confidence=0.5,
+                self.static_pool = model_registry.pool(
+                    "face_mesh",
+                    {**FACE_MESH_OPTIONS, "static_image_mode": True},
+                    self.mp_face_mesh.FaceMesh,
+                    max_instances=FACE_MESH_POOL_SIZE,
                 )
+                # 各先建立一個實例，確認 MediaPipe 可正常初始化（閒置過久時由登錄表卸載）
+                self.stream_pool.prefill()
+                self.static_pool.prefill()
                 logger.info("MediaPipe FaceMesh 初始化完成，啟用真實情緒檢測")
             except Exception as exc:  # pragma: no cover - 初始化失敗時記錄
                 self.mediapipe_ready = False
@@ -197,23 +437,77 @@ class FacialFeatureExtractor:
 
     def is_available(self) -> bool:
         """回傳 MediaPipe 是否可用。"""
-        return self.mediapipe_ready and self.face_mesh_stream is not None and self.face_mesh_static is not None
+        return self.mediapipe_ready and self.stream_pool is not None and self.static_pool is not None
+
+    def extract_features(
+        self,
+        frame,
+        static_image: bool = False,
+        include_bbox: bool = False,
+        session_id: Optional[str] = None,
+        roi_tracker: Optional[RoiTracker] = None,
+        include_landmarks: bool = False,
+    ) -> Optional[Dict]:
+        """
+        從影像幀中提取臉部特徵。
+
+        static_image=True 時從靜態池借用任一閒置 FaceMesh，可與其他請求平行執行；
+        串流情境使用 session_id 綁定的專屬實例，讓每個串流各自維持時序追蹤，
+        未指定 session_id 時使用共用的預設 session。結束串流後應呼叫 release_session()。
+
+        串流 session 各自記住上一幀的臉部外框，下一幀只把外擴後的區域交給 FaceMesh，
+        追蹤遺失時才整張搜尋；靜態圖片可由呼叫端傳入 ``roi_tracker`` 啟用相同行為。
 
-    def extract_features(self, frame, static_image: bool = False) -> Optional[Dict]:
-        """從影像幀中提取臉部特徵。"""
+        include_bbox 為 True 時額外回傳 ``face_bbox`` (x, y, w, h)，
+        由臉部網格外框向外擴張 10%，供情緒模型直接裁切臉部使用。
+        include_landmarks 為 True 時額外回傳 ``landmarks``：(N, 3) 整張影格像素座標。
+        """
         if frame is None or not self.is_available():
             return None
 
         height, width = frame.shape[:2]
-        mesh = self.face_mesh_static if static_image else self.face_mesh_stream
-        if mesh is None:
+        stream_session = None if static_image else (session_id or DEFAULT_STREAM_SESSION)
+        if roi_tracker is None and stream_session is not None:
+            roi_tracker = self._session_roi_tracker(stream_session)
+
+        def detect(region, offset):
+            points = self._detect_face_points(region, stream_session)
+            if points is None:
+                return None
+            points[:, 0] += offset[0]
+            points[:, 1] += offset[1]
+            return points, bbox_from_points(points, width, height)
+
+        if roi_tracker is not None:
+            points = roi_tracker.track(frame, detect)
+        else:
+            found = detect(frame, (0, 0))
+            points = found[0] if found is not None else None
+        if points is None:
             return None
 
+        features = self.compute_features(points, width, height)
+
+        if include_bbox:
+            features["face_bbox"] = self._calculate_face_bbox(points, width, height)
+        if include_landmarks:
+            features["landmarks"] = points
+
+        return features
+
+    def _detect_face_points(self, image, stream_session: Optional[str]) -> Optional[np.ndarray]:
+        """在影像（整張影格或 ROI）上執行 FaceMesh，回傳該影像座標系的 (N, 3) 像素座標。"""
+        height, width = image.shape[:2]
+
         # MediaPipe 需要 RGB 影像
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
 
-        with self.face_mesh_lock:
-            results = mesh.process(frame_rgb)
+        if stream_session is None:
+            with self.static_pool.checkout() as mesh:
+                results = mesh.process(image_rgb)
+        else:
+            with self.stream_pool.checkout(stream_session) as mesh:
+                results = mesh.process(image_rgb)
 
         if not results or not results.multi_face_landmarks:
             return None
@@ -222,186 +516,105 @@ class FacialFeatureExtractor:
         if len(landmarks) < 468:
             return None
 
-        # 將標記轉換為像素座標，並保留深度資訊用於對稱性分析
-        points = [(lm.x * width, lm.y * height, lm.z * width) for lm in landmarks]
+        # 將標記一次轉換為 (N, 3) 像素座標陣列，並保留深度資訊供長寬比計算
+        points = np.fromiter(
+            (coord for lm in landmarks for coord in (lm.x, lm.y, lm.z)),
+            dtype=np.float32,
+            count=len(landmarks) * 3,
+        ).reshape(-1, 3)
+        points *= np.array([width, height, width], dtype=np.float32)
+        return points
+
+    def _session_roi_tracker(self, session_id: str) -> RoiTracker:
+        with self._roi_lock:
+            tracker = self._roi_trackers.get(session_id)
+            if tracker is None:
+                tracker = self._roi_trackers[session_id] = RoiTracker()
+            return tracker
+
+    def release_session(self, session_id: str) -> None:
+        """結束串流 session，關閉其專屬 FaceMesh 實例並丟棄臉部追蹤狀態。"""
+        with self._roi_lock:
+            self._roi_trackers.pop(session_id, None)
+        if self.stream_pool is not None:
+            self.stream_pool.release_session(session_id)
+
+    def compute_features(self, points: np.ndarray, width: int, height: int) -> Dict[str, float]:
+        """
+        以預先建立的索引陣列，一次向量化計算十項臉部特徵。
 
-        face_width = abs(points[454][0] - points[234][0]) if len(points) > 454 else float(width)
-        face_height = abs(points[152][1] - points[10][1]) if len(points) > 152 else float(height)
+        Args:
+            points: (N, 3) float32 像素座標陣列（N >= 468）
+            width: 影像寬度
+            height: 影像高度
 
-        if face_width <= 0:
-            face_width = float(width)
+        Returns:
+            Dict[str, float]: 臉部特徵
+        """
+        xs = points[:, 0]
+        ys = points[:, 1]
+
+        face_width_raw = abs(float(xs[454] - xs[234]))
+        face_width = face_width_raw if face_width_raw > 0 else float(width)
+        face_height = abs(float(ys[152] - ys[10]))
         if face_height <= 0:
             face_height = float(height)
 
-        features = {
-            "eye_aspect_ratio_left": self._calculate_eye_aspect_ratio(points, self.LEFT_EYE_INDICES),
-            "eye_aspect_ratio_right": self._calculate_eye_aspect_ratio(points, self.RIGHT_EYE_INDICES),
-            "mouth_aspect_ratio": self._calculate_mouth_aspect_ratio(points),
-            "mouth_curvature": self._calculate_mouth_curvature(points, face_height),
-            "eyebrow_height_left": self._calculate_eyebrow_relative_height(points, self.EYEBROW_LEFT_INDICES, self.LEFT_EYE_INDICES, face_height),
-            "eyebrow_height_right": self._calculate_eyebrow_relative_height(points, self.EYEBROW_RIGHT_INDICES, self.RIGHT_EYE_INDICES, face_height),
-            "nose_wrinkle": self._calculate_nose_wrinkle(points, face_width),
-            "eye_openness": self._calculate_eye_openness(points),
-            "mouth_width": self._calculate_mouth_width(points, face_width),
-            "facial_symmetry": self._calculate_facial_symmetry(points),
-        }
-
-        return features
-
-    def _calculate_eye_aspect_ratio(self, landmarks: List[Tuple], eye_indices: List[int]) -> float:
-        """計算眼部長寬比 (EAR)"""
-        try:
-            if len(eye_indices) < 6:
-                return 0.3
-
-            eye_points = [landmarks[i] for i in eye_indices[:6]]
-
-            # 垂直距離
-            A = np.linalg.norm(np.array(eye_points[1]) - np.array(eye_points[5]))
-            B = np.linalg.norm(np.array(eye_points[2]) - np.array(eye_points[4]))
-
-            # 水平距離
-            C = np.linalg.norm(np.array(eye_points[0]) - np.array(eye_points[3]))
-
-            if C == 0:
-                return 0.3
-
-            ear = (A + B) / (2.0 * C)
-            return ear
-        except:
-            return 0.3
-
-    def _calculate_mouth_aspect_ratio(self, landmarks: List[Tuple]) -> float:
-        """計算嘴部長寬比 (MAR)"""
-        try:
-            mouth_points = [landmarks[i] for i in self.MOUTH_INDICES[:6]]
-
-            # 垂直距離
-            A = np.linalg.norm(np.array(mouth_points[1]) - np.array(mouth_points[5]))
-            B = np.linalg.norm(np.array(mouth_points[2]) - np.array(mouth_points[4]))
-
-            # 水平距離
-            C = np.linalg.norm(np.array(mouth_points[0]) - np.array(mouth_points[3]))
-
-            if C == 0:
-                return 0.1
-
-            mar = (A + B) / (2.0 * C)
-            return mar
-        except:
-            return 0.1
-
-    def _calculate_mouth_curvature(self, landmarks: List[Tuple], face_height: float) -> float:
-        """計算嘴角彎曲度（以臉部高度正規化）。"""
-        try:
-            left_corner = landmarks[78]
-            right_corner = landmarks[308]
-            top_lip = landmarks[13]
-            bottom_lip = landmarks[14]
-
-            mouth_center_y = (top_lip[1] + bottom_lip[1]) / 2
-            left_height = mouth_center_y - left_corner[1]
-            right_height = mouth_center_y - right_corner[1]
-
-            curvature = (left_height + right_height) / 2
-            normalized = curvature / max(face_height, 1e-6)
-            return float(normalized * 100)
-        except Exception:
-            return 0.0
-
-    def _calculate_eyebrow_relative_height(
-        self,
-        landmarks: List[Tuple],
-        eyebrow_indices: List[int],
-        eye_indices: List[int],
-        face_height: float,
-    ) -> float:
-        """計算眉毛相對於眼睛的高度差。"""
-        try:
-            eyebrow_points = [landmarks[i] for i in eyebrow_indices]
-            eyebrow_center_y = sum(p[1] for p in eyebrow_points) / len(eyebrow_points)
-
-            eye_points = [landmarks[i] for i in eye_indices[:6]]
-            eye_center_y = sum(p[1] for p in eye_points) / len(eye_points)
-
-            relative_height = (eye_center_y - eyebrow_center_y) / max(face_height, 1e-6)
-            return float(relative_height * 100)
-        except Exception:
-            return 0.0
-
-    def _calculate_nose_wrinkle(self, landmarks: List[Tuple], face_width: float) -> float:
-        """計算鼻子皺紋 (鼻翼變化)"""
-        try:
-            left_nostril = landmarks[31]
-            right_nostril = landmarks[35]
-
-            # 計算鼻翼寬度
-            nostril_width = abs(right_nostril[0] - left_nostril[0])
-
-            # 正常化
-            if face_width == 0:
-                return 0.0
-
-            normalized_width = nostril_width / face_width
-            return float(normalized_width)
-        except Exception:
-            return 0.0
-
-    def _calculate_eye_openness(self, landmarks: List[Tuple]) -> float:
-        """計算眼睛開合度"""
-        left_ear = self._calculate_eye_aspect_ratio(landmarks, self.LEFT_EYE_INDICES)
-        right_ear = self._calculate_eye_aspect_ratio(landmarks, self.RIGHT_EYE_INDICES)
-        return (left_ear + right_ear) / 2
-
-    def _calculate_mouth_width(self, landmarks: List[Tuple], face_width: float) -> float:
-        """計算嘴巴寬度"""
-        try:
-            left_corner = landmarks[78]
-            right_corner = landmarks[308]
-            mouth_width = abs(right_corner[0] - left_corner[0])
-
-            # 正常化
-            if face_width == 0:
-                return 0.0
-
-            normalized_width = mouth_width / face_width
-            return float(normalized_width)
-        except Exception:
-            return 0.0
-
-    def _calculate_facial_symmetry(self, landmarks: List[Tuple]) -> float:
-        """計算臉部對稱性"""
-        try:
-            # 計算臉部中線
-            nose_tip = landmarks[self.NOSE_TIP]
-            chin = landmarks[self.CHIN]
-            forehead = landmarks[10]
-
-            face_center_x = (nose_tip[0] + chin[0] + forehead[0]) / 3
-
-            # 計算左右對稱點的距離差異
-            symmetry_points = [
-                (landmarks[33], landmarks[362]),    # 眼角
-                (landmarks[78], landmarks[308]),    # 嘴角
-                (landmarks[234], landmarks[454])    # 臉頰
-            ]
-
-            asymmetry_sum = 0
-            for left_point, right_point in symmetry_points:
-                left_dist = abs(left_point[0] - face_center_x)
-                right_dist = abs(right_point[0] - face_center_x)
-                asymmetry_sum += abs(left_dist - right_dist)
-
-            # 正常化對稱性分數 (較低的值表示更對稱)
-            face_width = abs(landmarks[454][0] - landmarks[234][0])
-            if face_width == 0:
-                return 0.5
+        # 左眼、右眼、嘴巴的長寬比：(|p1-p5| + |p2-p4|) / (2|p0-p3|)
+        ratio_points = points[self._ratio_indices]                      # (3, 6, 3)
+        spans = np.linalg.norm(ratio_points[:, self._ratio_pairs[:, 0]]
+                               - ratio_points[:, self._ratio_pairs[:, 1]], axis=2)  # (3, 3)
+        vertical = spans[:, 0] + spans[:, 1]
+        horizontal = spans[:, 2]
+        safe_horizontal = np.where(horizontal == 0, 1.0, horizontal)
+        ratios = np.where(horizontal == 0, self._ratio_defaults, vertical / (2.0 * safe_horizontal))
+        ear_left, ear_right, mar = (float(v) for v in ratios)
+
+        # 眉毛相對眼睛的高度（以臉部高度正規化）
+        eye_centers_y = ratio_points[:2, :, 1].mean(axis=1)
+        eyebrow_centers_y = ys[self._eyebrow_indices].mean(axis=1)
+        eyebrow_heights = (eye_centers_y - eyebrow_centers_y) / max(face_height, 1e-6) * 100
+
+        # 嘴角彎曲度
+        mouth_center_y = (ys[13] + ys[14]) / 2
+        curvature = ((mouth_center_y - ys[78]) + (mouth_center_y - ys[308])) / 2
+        mouth_curvature = float(curvature / max(face_height, 1e-6) * 100)
+
+        # 臉部對稱性：左右對稱點到中線距離差的平均（較低差異表示更對稱）
+        face_center_x = xs[self._midline_indices].mean()
+        asymmetry = np.abs(np.abs(xs[self._symmetry_left] - face_center_x)
+                           - np.abs(xs[self._symmetry_right] - face_center_x)).sum()
+        if face_width_raw == 0:
+            symmetry = 0.5
+        else:
+            symmetry = float(np.clip(1.0 - asymmetry / (face_width_raw * len(self._symmetry_left)), 0.0, 1.0))
 
-            symmetry_score = 1.0 - (asymmetry_sum / (face_width * len(symmetry_points)))
-            return max(0.0, min(1.0, symmetry_score))
-        except:
-            return 0.5
+        return {
+            "eye_aspect_ratio_left": ear_left,
+            "eye_aspect_ratio_right": ear_right,
+            "mouth_aspect_ratio": mar,
+            "mouth_curvature": mouth_curvature,
+            "eyebrow_height_left": float(eyebrow_heights[0]),
+            "eyebrow_height_right": float(eyebrow_heights[1]),
+            "nose_wrinkle": float(abs(xs[35] - xs[31]) / face_width),
+            "eye_openness": (ear_left + ear_right) / 2,
+            "mouth_width": float(abs(xs[308] - xs[78]) / face_width),
+            "facial_symmetry": symmetry,
+        }
 
+    def _calculate_face_bbox(self, points: np.ndarray, width: int, height: int) -> Optional[Tuple[int, int, int, int]]:
+        """由臉部網格點計算外擴 10% 的臉部外框 (x, y, w, h)，超出畫面部分會被裁掉。"""
+        min_x, min_y = points[:, :2].min(axis=0)
+        max_x, max_y = points[:, :2].max(axis=0)
+        pad_x = (max_x - min_x) * 0.1
+        pad_y = (max_y - min_y) * 0.1
+        x0 = int(max(0, min_x - pad_x))
+        y0 = int(max(0, min_y - pad_y))
+        x1 = int(min(width, max_x + pad_x))
+        y1 = int(min(height, max_y + pad_y))
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return None
+        return (x0, y0, x1 - x0, y1 - y0)
 
 class EmotionDetector:
     """情緒檢測器"""
@@ -559,6 +772,74 @@ class EmotionDetector:
         }
 
 
+def _scan_emotion_range(
+    feature_extractor: FacialFeatureExtractor,
+    emotion_detector: EmotionDetector,
+    cap: "cv2.VideoCapture",
+    sample_interval: int,
+    fps: int,
+    start_frame: int = 0,
+    end_frame: Optional[int] = None,
+) -> Dict:
+    """
+    讀取影片的一段幀範圍並逐一檢測情緒。
+
+    Returns:
+        Dict: ``detections`` 時間軸、``feature_sums`` 特徵總和與 ``frames_processed``
+    """
+    detections: List[Dict] = []
+    feature_sums: Dict[str, float] = {}
+    frames_processed = 0
+
+    # 每段影片使用獨立的 FaceMesh 串流 session，避免與其他串流互相干擾追蹤狀態
+    session_id = f"video-{uuid.uuid4().hex}"
+    try:
+        # 只解碼取樣幀，其餘幀以 grab() 跳過
+        reader = SampledFrameReader(cap, sample_interval, fps=fps, start_frame=start_frame, end_frame=end_frame)
+        for timestamp, frame in reader:
+            # 提取特徵
+            features = feature_extractor.extract_features(frame, session_id=session_id)
+
+            if features:
+                # 檢測情緒
+                emotion, confidence = emotion_detector.detect_emotion(features)
+
+                for key, value in features.items():
+                    feature_sums[key] = feature_sums.get(key, 0.0) + float(value)
+
+                detections.append({
+                    "timestamp": timestamp,
+                    "emotion": emotion.value,
+                    "confidence": round(confidence, 3),
+                    "scores": emotion_detector.get_latest_scores(),
+                })
+                frames_processed += 1
+    finally:
+        feature_extractor.release_session(session_id)
+
+    return {"detections": detections, "feature_sums": feature_sums, "frames_processed": frames_processed}
+
+
+# 子行程內共用的 FaceMesh 實例（每個子行程只初始化一次）
+_SHARD_FEATURE_EXTRACTOR: Optional[FacialFeatureExtractor] = None
+
+
+def _analyze_emotion_shard(video_path: str, start_frame: int, end_frame: Optional[int],
+                           sample_interval: int, fps: int) -> Dict:
+    """子行程進入點：開啟影片並分析 [start_frame, end_frame) 範圍。"""
+    global _SHARD_FEATURE_EXTRACTOR
+    if _SHARD_FEATURE_EXTRACTOR is None:
+        _SHARD_FEATURE_EXTRACTOR = FacialFeatureExtractor()
+
+    cap = cv2.VideoCapture(video_path)
+    try:
+        return _scan_emotion_range(
+            _SHARD_FEATURE_EXTRACTOR, EmotionDetector(), cap,
+            sample_interval, fps, start_frame, end_frame)
+    finally:
+        cap.release()
+
+
 class EmotionService:
     """情緒辨識服務主類"""
 
@@ -566,6 +847,11 @@ class EmotionService:
         self.status_broadcaster = status_broadcaster
         self.feature_extractor = FacialFeatureExtractor()
         self.emotion_detector = EmotionDetector()
+        self.emotion_model = EmotionModelHolder()
+        # 多個連線的臉部裁切會在短時間內合併為單一批次推論；0 表示停用
+        self.batch_scheduler: Optional[EmotionBatchScheduler] = (
+            EmotionBatchScheduler(self.emotion_model.predict_batch) if EMOTION_BATCH_MAX_SIZE > 0 else None
+        )
 
         if not self.feature_extractor.is_available():
             logger.error(
@@ -573,8 +859,24 @@ class EmotionService:
                 self.feature_extractor.init_error,
             )
 
+        # 啟動時載入常駐情緒模型，避免第一幀才付出載入成本
+        if _DEEPFACE_AVAILABLE:
+            self.emotion_model.load()
+
         # 簡化的服務設計：只處理圖片分析，不管理攝影機或檢測狀態
 
+    def get_model_status(self) -> Dict[str, Dict]:
+        """回傳 DeepFace 情緒模型與 FaceMesh 的載入狀態（供 /api/system/ready 使用）。"""
+        return {
+            "deepface_emotion": self.emotion_model.get_state(),
+            "face_mesh": model_state(self.feature_extractor.is_available(), self.feature_extractor.init_error),
+        }
+
+    @property
+    def batching_enabled(self) -> bool:
+        """即時分析是否走微批次：需要批次排程器與 FaceMesh 臉部裁切，否則逐幀呼叫 DeepFace.analyze。"""
+        return self.batch_scheduler is not None and self.feature_extractor.is_available()
+
     # 移除了攝影機相關功能，保持服務簡潔專注於圖片分析
 
     def analyze_image(self, image_path: str) -> Dict:
@@ -630,12 +932,16 @@ class EmotionService:
                 "analysis_time": _now_ts()
             }
 
-    def analyze_video(self, video_path: str) -> Dict:
+    def analyze_video(self, video_path: str, parallel: bool = False) -> Dict:
         """
         分析影片檔案的情緒內容。
 
+        parallel 為 True 且影片夠長時，影片會依時間範圍分段交給子行程平行分析，
+        各段的時間軸、特徵總和再合併成與單一行程相同的結果格式。
+
         Args:
             video_path (str): 影片檔案路径
+            parallel (bool): 是否啟用多行程分段分析
 
         Returns:
             Dict: 情緒分析結果
@@ -658,40 +964,20 @@ class EmotionService:
             # 重置檢測器歷史
             self.emotion_detector.emotion_history.clear()
 
-            emotions_detected = []
-            frames_processed = 0
-            feature_sums: Dict[str, float] = {}
             sample_interval = max(1, fps // 2)  # 每秒取2幀分析
+            shards = plan_video_shards(frame_count, fps, sample_interval) if parallel else []
 
-            frame_idx = 0
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-
-                # 按間隔採樣幀
-                if frame_idx % sample_interval == 0:
-                    # 提取特徵
-                    features = self.feature_extractor.extract_features(frame)
-
-                    if features:
-                        # 檢測情緒
-                        emotion, confidence = self.emotion_detector.detect_emotion(features)
-
-                        for key, value in features.items():
-                            feature_sums[key] = feature_sums.get(key, 0.0) + float(value)
-
-                        emotions_detected.append({
-                            "timestamp": frame_idx / fps if fps > 0 else 0,
-                            "emotion": emotion.value,
-                            "confidence": round(confidence, 3),
-                            "scores": self.emotion_detector.get_latest_scores(),
-                        })
-                        frames_processed += 1
+            if len(shards) > 1:
+                cap.release()
+                scan = self._scan_video_shards(video_path, shards, sample_interval, fps)
+            else:
+                scan = _scan_emotion_range(
+                    self.feature_extractor, self.emotion_detector, cap, sample_interval, fps)
+                cap.release()
 
-                frame_idx += 1
-
-            cap.release()
+            emotions_detected = scan["detections"]
+            frames_processed = scan["frames_processed"]
+            feature_sums = scan["feature_sums"]
 
             if not emotions_detected:
                 return {
@@ -757,7 +1043,8 @@ class EmotionService:
                     "fps": fps,
                     "frame_count": frame_count,
                     "frames_processed": frames_processed,
-                    "sample_interval": sample_interval
+                    "sample_interval": sample_interval,
+                    "shards": max(1, len(shards))
                 },
                 "feature_averages": feature_averages,
                 "analysis_time": _now_ts(),
@@ -773,6 +1060,30 @@ class EmotionService:
                 "analysis_time": _now_ts()
             }
 
+    def _scan_video_shards(self, video_path: str, shards: List[Tuple[int, Optional[int]]],
+                           sample_interval: int, fps: int) -> Dict:
+        """
+        在子行程中平行分析各段影片，依時間順序合併時間軸與特徵總和。
+
+        合併後重建情緒檢測器的最近歷史，使 trend_analysis 與單一行程分析一致。
+        """
+        shard_results = get_video_shard_pool().map(
+            _analyze_emotion_shard,
+            [(video_path, start, end, sample_interval, fps) for start, end in shards],
+        )
+
+        merged: Dict = {"detections": [], "feature_sums": {}, "frames_processed": 0}
+        for result in shard_results:
+            merged["detections"].extend(result["detections"])
+            merged["frames_processed"] += result["frames_processed"]
+            for key, value in result["feature_sums"].items():
+                merged["feature_sums"][key] = merged["feature_sums"].get(key, 0.0) + value
+
+        for detection in merged["detections"][-self.emotion_detector.emotion_history.maxlen:]:
+            self.emotion_detector.emotion_history.append(
+                (EmotionType(detection["emotion"]), detection["confidence"]))
+        return merged
+
     def _get_key_moments(self, emotions_detected: List[Dict]) -> List[Dict]:
         """
         從完整的情緒檢測結果中篩選出關鍵時刻，避免冗長的時間軸。
@@ -949,9 +1260,6 @@ class EmotionService:
             return
 
         try:
-            import tempfile
-            import os
-
             # 開啟影片檔案
             cap = cv2.VideoCapture(video_path)
             if not cap.isOpened():
@@ -970,52 +1278,34 @@ class EmotionService:
 
             logger.info(f"開始DeepFace影片分析: FPS={fps}, 總幀數={total_frames}, 間隔={frame_interval}秒")
 
-            frame_count = 0
             analyzed_count = 0
-
-            # 創建臨時目錄來存放截圖
-            with tempfile.TemporaryDirectory() as temp_dir:
-                while True:
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
-
-                    # 按間隔處理幀
-                    if frame_count % frame_skip == 0:
-                        current_time = frame_count / fps if fps > 0 else 0
-
-                        # 保存當前幀為臨時圖片
-                        temp_image_path = os.path.join(temp_dir, f"frame_{analyzed_count:06d}.jpg")
-                        cv2.imwrite(temp_image_path, frame)
-
-                        # 使用DeepFace分析這一幀
-                        analysis_result = self.analyze_image_deepface(temp_image_path)
-
-                        # 添加時間戳和進度信息
-                        analysis_result.update({
-                            "frame_time": round(current_time, 2),
-                            "frame_number": frame_count,
-                            "analyzed_frame": analyzed_count,
-                            "progress": round((frame_count / total_frames) * 100, 1) if total_frames > 0 else 0,
-                            "total_duration": round(duration, 2),
-                            "completed": False
-                        })
-
-                        # 清理臨時檔案
-                        try:
-                            os.unlink(temp_image_path)
-                        except:
-                            pass
-
-                        yield analysis_result
-                        analyzed_count += 1
-
-                    frame_count += 1
-
-                    # 防止記憶體過載，限制分析幀數
-                    if analyzed_count >= 1200:  # 最多10分鐘 (0.5秒間隔)
-                        logger.warning("達到分析幀數限制，停止分析")
-                        break
+            reader = SampledFrameReader(cap, frame_skip, fps=fps)
+            roi_tracker = RoiTracker()
+
+            # 只解碼需要分析的幀，間隔較大時直接定位到下一個取樣點
+            for current_time, frame in reader:
+                frame_number = reader.frame_index
+
+                # 直接以記憶體中的影格進行 DeepFace 分析，不經過暫存 JPEG
+                analysis_result = self.analyze_frame_deepface(frame, roi_tracker=roi_tracker)
+
+                # 添加時間戳和進度信息
+                analysis_result.update({
+                    "frame_time": round(current_time, 2),
+                    "frame_number": frame_number,
+                    "analyzed_frame": analyzed_count,
+                    "progress": round((frame_number / total_frames) * 100, 1) if total_frames > 0 else 0,
+                    "total_duration": round(duration, 2),
+                    "completed": False
+                })
+
+                yield analysis_result
+                analyzed_count += 1
+
+                # 防止記憶體過載，限制分析幀數
+                if analyzed_count >= 1200:  # 最多10分鐘 (0.5秒間隔)
+                    logger.warning("達到分析幀數限制，停止分析")
+                    break
 
             cap.release()
 
@@ -1041,178 +1331,324 @@ class EmotionService:
         """
         使用 DeepFace 進行人臉特徵分析和情緒推測
 
+        圖片只解碼一次，之後交由 analyze_frame_deepface 以同一份陣列完成
+        MediaPipe 預檢與 DeepFace 分析。
+
         Args:
             image_path: 圖片檔案路徑
 
         Returns:
             DeepFace 分析結果
         """
-
         if not _DEEPFACE_AVAILABLE and DeepFace is None:
+            return self._deepface_unavailable_result()
+
+        image = cv2.imread(image_path)
+        if image is None:
             return {
-                "emotion_zh": "中性",
+                "emotion_zh": "面無表情",
                 "emotion_en": "neutral",
                 "emoji": "😐",
                 "confidence": 0.0,
-                "error": f"DeepFace 不可用: {_DEEPFACE_ERROR}"
+                "error": f"無法讀取圖片: {image_path}",
+                "engine": "deepface"
             }
 
-        try:
-            # 導入 TensorFlow 用於記憶體管理
-            import tensorflow as tf
-
-            # 先用 MediaPipe 進行快速臉部檢查（若可用）
-            preview_image = None
-            if self.feature_extractor.is_available():
-                preview_image = cv2.imread(image_path)
-                if preview_image is not None:
-                    preview_features = self.feature_extractor.extract_features(preview_image, static_image=True)
-                    if not preview_features:
-                        return {
-                            "emotion_zh": "沒分析到臉",
-                            "emotion_en": "not_detected",
-                            "emoji": "🙈",
-                            "confidence": 0.0,
-                            "error": "未偵測到臉部特徵",
-                            "engine": "mediapipe",
-                            "face_detected": False
-                        }
-
-            analyze_kwargs = dict(
-                img_path=image_path,
-                actions=['emotion'],
-                enforce_detection=False,  # 更寬鬆的人臉檢測
-                detector_backend='opencv',  # 使用 GPU 友好的 detector
-            )
+        return self.analyze_frame_deepface(image)
 
-            if _GPU_STATUS.tensorflow_ready:
-                with tf.device('/GPU:0'):
-                    analysis = DeepFace.analyze(**analyze_kwargs)
-            else:
-                analysis = DeepFace.analyze(**analyze_kwargs)
+    def _deepface_unavailable_result(self) -> Dict:
+        return {
+            "emotion_zh": "面無表情",
+            "emotion_en": "neutral",
+            "emoji": "😐",
+            "confidence": 0.0,
+            "error": f"DeepFace 不可用: {_DEEPFACE_ERROR}"
+        }
 
-            # DeepFace 返回一個列表，每個元素是一張臉的分析結果
-            if not analysis or not isinstance(analysis, list) or len(analysis) == 0:
-                return {
-                    "emotion_zh": "沒分析到臉",
-                    "emotion_en": "not_detected",
-                    "emoji": "🙈",
-                    "confidence": 0.0,
-                    "error": "未檢測到人臉",
-                    "engine": "deepface",
-                    "face_detected": False
-                }
+    def analyze_frame_deepface(
+        self,
+        frame: np.ndarray,
+        roi_tracker: Optional[RoiTracker] = None,
+        result_cache: Optional[EmotionResultCache] = None,
+    ) -> Dict:
+        """
+        使用 DeepFace 分析已解碼的 BGR 影格
 
-            # 我們只取第一張臉的結果
-            result = analysis[0]
+        同一份陣列依序交給 MediaPipe FaceMesh 預檢與 DeepFace，
+        不經過任何暫存檔或額外的 JPEG 編解碼。FaceMesh 找到臉部時直接裁切
+        外框交給微批次排程器，與其他連線的影格合併為一次前向推論；
+        批次停用時把同一塊臉部裁切交給 DeepFace.analyze 並跳過其 OpenCV 臉部偵測。
+        只有 FaceMesh 不可用時才讓 DeepFace 自行在整張影格上找臉。
 
-            # 檢查是否有有效的臉部檢測結果
-            if 'dominant_emotion' not in result or 'emotion' not in result:
-                return {
+        提供 ``result_cache`` 時，FaceMesh 關鍵點相對上次實際分析的影格幾乎沒有移動
+        且結果未過期，直接回傳上次的結果而不呼叫 DeepFace；回應的 ``cache`` 欄位
+        帶有是否命中與累計命中 / 未命中次數。
+
+        Args:
+            frame: BGR 格式的影像陣列
+            roi_tracker: 串流（連線 / 影片）專屬的臉部 ROI 追蹤器，FaceMesh 預檢只搜尋上一幀臉部附近
+            result_cache: 串流專屬的情緒結果快取
+
+        Returns:
+            DeepFace 分析結果
+        """
+        result, face_bbox, landmarks = self._precheck_frame(frame, roi_tracker, result_cache)
+        if result is not None:
+            return result
+        return self._finish_frame(self._run_deepface(frame, face_bbox), landmarks, result_cache)
+
+    def submit_frame_deepface(
+        self,
+        frame: np.ndarray,
+        roi_tracker: Optional[RoiTracker] = None,
+        result_cache: Optional[EmotionResultCache] = None,
+    ) -> Tuple[Optional[Dict], Optional[Future], Optional[np.ndarray]]:
+        """
+        微批次路徑的第一階段：FaceMesh 預檢、查詢結果快取並把臉部裁切排入批次。
+
+        在推論執行緒中呼叫，排入批次後立即返回，等待批次結果不佔用執行緒；
+        呼叫端等到 Future 完成後以 finish_batched_frame() 組成回應。
+
+        Returns:
+            (result, future, landmarks)：result 不為 None 時已是最終結果
+            （未偵測到臉、快取命中、錯誤或無法批次時的逐幀分析），否則等待 future
+        """
+        result, face_bbox, landmarks = self._precheck_frame(frame, roi_tracker, result_cache)
+        if result is not None:
+            return result, None, None
+        if face_bbox is None or self.batch_scheduler is None:
+            result = self._finish_frame(self._run_deepface(frame, face_bbox), landmarks, result_cache)
+            return result, None, None
+        x, y, w, h = face_bbox
+        return None, self.batch_scheduler.submit(frame[y:y + h, x:x + w]), landmarks
+
+    def finish_batched_frame(
+        self,
+        future: Future,
+        landmarks: Optional[np.ndarray],
+        result_cache: Optional[EmotionResultCache] = None,
+    ) -> Dict:
+        """
+        微批次路徑的第二階段：將已完成的批次推論結果轉為回應並更新結果快取。
+
+        只做字典轉換，可在事件迴圈上呼叫；記憶體壓力檢查由批次執行緒在批次之間進行。
+        """
+        try:
+            emotion = scores_to_emotion_result(future.result())
+        except Exception as exc:
+            logger.error(f"DeepFace 批次分析失敗: {exc}")
+            result = self._deepface_error_result(exc)
+        else:
+            result = self._format_deepface_result(emotion, check_pressure=False)
+        return self._finish_frame(result, landmarks, result_cache)
+
+    def _precheck_frame(
+        self,
+        frame: np.ndarray,
+        roi_tracker: Optional[RoiTracker],
+        result_cache: Optional[EmotionResultCache],
+    ) -> Tuple[Optional[Dict], Optional[Tuple[int, int, int, int]], Optional[np.ndarray]]:
+        """FaceMesh 預檢與結果快取查詢，回傳 (最終結果或 None, 臉部外框, 關鍵點)。"""
+        if not _DEEPFACE_AVAILABLE and DeepFace is None:
+            return self._deepface_unavailable_result(), None, None
+
+        # 先用 MediaPipe 進行快速臉部檢查（若可用）
+        face_bbox = None
+        landmarks = None
+        if self.feature_extractor.is_available():
+            try:
+                preview_features = self.feature_extractor.extract_features(
+                    frame, static_image=True, include_bbox=True,
+                    include_landmarks=result_cache is not None, roi_tracker=roi_tracker)
+            except Exception as exc:
+                logger.error(f"MediaPipe 臉部預檢失敗: {exc}")
+                return self._deepface_error_result(exc), None, None
+            if not preview_features:
+                result = {
                     "emotion_zh": "沒分析到臉",
                     "emotion_en": "not_detected",
                     "emoji": "🙈",
                     "confidence": 0.0,
-                    "error": "臉部檢測失敗",
-                    "engine": "deepface",
+                    "error": "未偵測到臉部特徵",
+                    "engine": "mediapipe",
                     "face_detected": False
                 }
+                if result_cache is not None:
+                    result_cache.invalidate()
+                    result_cache.annotate(result)
+                return result, None, None
+            if isinstance(preview_features, dict):
+                face_bbox = preview_features.get("face_bbox")
+                landmarks = preview_features.get("landmarks")
+
+        if result_cache is not None and landmarks is not None:
+            cached = result_cache.lookup(landmarks)
+            if cached is not None:
+                return cached, None, None
+        return None, face_bbox, landmarks
+
+    @staticmethod
+    def _finish_frame(
+        result: Dict,
+        landmarks: Optional[np.ndarray],
+        result_cache: Optional[EmotionResultCache],
+    ) -> Dict:
+        """以實際分析的結果更新串流結果快取。"""
+        if result_cache is not None:
+            if landmarks is not None and "error" not in result:
+                result_cache.store(landmarks, result)
+            else:
+                result_cache.annotate(result)
+        return result
 
-            dominant_emotion_en = result['dominant_emotion']
-            confidence = result['emotion'][dominant_emotion_en] / 100.0
+    def _run_deepface(self, frame: np.ndarray, face_bbox: Optional[Tuple[int, int, int, int]]) -> Dict:
+        """以 FaceMesh 臉部外框（若有）執行情緒推論。"""
+        try:
+            if face_bbox is not None:
+                x, y, w, h = face_bbox
+                face_crop = frame[y:y + h, x:x + w]
+                if self.batch_scheduler is not None:
+                    scores = self.batch_scheduler.predict(face_crop)
+                    return self._format_deepface_result(scores_to_emotion_result(scores))
+                # 已有 MediaPipe 臉部外框，DeepFace 直接分析裁切，不再跑 OpenCV 偵測器
+                analyze_kwargs = dict(
+                    img_path=face_crop,
+                    actions=['emotion'],
+                    enforce_detection=False,
+                    detector_backend='skip',
+                )
+            else:
+                analyze_kwargs = dict(
+                    img_path=frame,
+                    actions=['emotion'],
+                    enforce_detection=False,  # 更寬鬆的人臉檢測
+                    detector_backend='opencv',  # 使用 GPU 友好的 detector
+                )
+
+            analysis = self.emotion_model.analyze(**analyze_kwargs)
 
-            # 如果所有情緒的信心度都很低（都接近0），表示實際上沒有檢測到臉
-            all_emotions_low = all(score <= 1.0 for score in result['emotion'].values())  # 1%以下算作未檢測
-            if confidence <= 0.01 or all_emotions_low:  # 信心度小於1%或所有情緒都很低
+            # DeepFace 返回一個列表，每個元素是一張臉的分析結果
+            if not analysis or not isinstance(analysis, list) or len(analysis) == 0:
                 return {
                     "emotion_zh": "沒分析到臉",
                     "emotion_en": "not_detected",
                     "emoji": "🙈",
                     "confidence": 0.0,
-                    "error": "未檢測到有效的人臉特徵",
+                    "error": "未檢測到人臉",
                     "engine": "deepface",
                     "face_detected": False
                 }
 
-            # 英文轉中文
-            emotion_zh = "面無表情"  # 預設值
-            emoji = "😐"
-            for zh_key, details in EMOTION_TRANSLATIONS.items():
-                if details['en'] == dominant_emotion_en:
-                    emotion_zh = details.get('zh') or zh_key
-                    emoji = details.get('emoji', emoji)
-                    break
+            # 我們只取第一張臉的結果
+            return self._format_deepface_result(analysis[0])
 
-            # 取得其他特徵分析結果
-            age = result.get('age', 0)
+        except Exception as exc:
+            logger.error(f"DeepFace 分析失敗: {exc}")
+            self.emotion_model.release_if_under_pressure()
+            return self._deepface_error_result(exc)
 
-            # 性別分析
-            gender_analysis = result.get('gender', {})
-            if isinstance(gender_analysis, dict) and gender_analysis:
-                gender_scores = {k.lower(): v for k, v in gender_analysis.items()}
-                dominant_gender_key = max(gender_scores, key=gender_scores.get)
-                gender_zh = '男性' if dominant_gender_key == 'man' else '女性' if dominant_gender_key == 'woman' else '未知'
-                gender_confidence = gender_scores.get(dominant_gender_key, 0) / 100.0
-            else:
-                gender_zh = '未知'
-                dominant_gender_key = 'unknown'
-                gender_confidence = 0.0
-                gender_scores = {}
-
-            # 種族分析
-            race_analysis = result.get('race', {})
-            if isinstance(race_analysis, dict) and race_analysis:
-                race_scores = {k.lower().replace(' ', '_'): v for k, v in race_analysis.items()}
-                dominant_race_key = max(race_scores, key=race_scores.get)
-
-                # 種族中文映射
-                race_mapping = {
-                    'asian': '亞洲人',
-                    'white': '白人',
-                    'black': '黑人',
-                    'indian': '印度人',
-                    'latino_hispanic': '拉丁裔',
-                    'middle_eastern': '中東人'
-                }
-                race_zh = race_mapping.get(dominant_race_key, '未知')
-                race_confidence = race_scores.get(dominant_race_key, 0) / 100.0
-            else:
-                race_zh = '未知'
-                dominant_race_key = 'unknown'
-                race_confidence = 0.0
-                race_scores = {}
+    def _deepface_error_result(self, exc: Exception) -> Dict:
+        return {
+            "emotion_zh": "面無表情",
+            "emotion_en": "neutral",
+            "emoji": "😐",
+            "confidence": 0.0,
+            "error": f"DeepFace 分析錯誤: {str(exc)}",
+            "engine": "deepface"
+        }
 
-            # 分析完成後清理 TensorFlow session（防止記憶體累積）
-            try:
-                tf.keras.backend.clear_session()
-            except:
-                pass  # 如果清理失敗也不影響結果
+    def _format_deepface_result(self, result: Dict, check_pressure: bool = True) -> Dict:
+        """
+        將單張臉的 DeepFace 結果（含 emotion 與 dominant_emotion）轉為 API 回應格式。
 
+        ``check_pressure`` 為 False 時不檢查記憶體壓力（在事件迴圈上組成批次結果時）。
+        """
+        # 檢查是否有有效的臉部檢測結果
+        if 'dominant_emotion' not in result or 'emotion' not in result:
             return {
-                "emotion_zh": emotion_zh,
-                "emotion_en": dominant_emotion_en,
-                "emoji": emoji,
-                "confidence": round(confidence, 3),
+                "emotion_zh": "沒分析到臉",
+                "emotion_en": "not_detected",
+                "emoji": "🙈",
+                "confidence": 0.0,
+                "error": "臉部檢測失敗",
                 "engine": "deepface",
-                "face_detected": True,
-                "raw_scores": {k: round(v / 100.0, 4) for k, v in result['emotion'].items()}
+                "face_detected": False
             }
 
-        except Exception as exc:
-            logger.error(f"DeepFace 分析失敗: {exc}")
-
-            # 錯誤時也清理 session（防止記憶體洩漏）
-            try:
-                import tensorflow as tf
-                tf.keras.backend.clear_session()
-            except:
-                pass
+        dominant_emotion_en = result['dominant_emotion']
+        confidence = result['emotion'][dominant_emotion_en] / 100.0
 
+        # 如果所有情緒的信心度都很低（都接近0），表示實際上沒有檢測到臉
+        all_emotions_low = all(score <= 1.0 for score in result['emotion'].values())  # 1%以下算作未檢測
+        if confidence <= 0.01 or all_emotions_low:  # 信心度小於1%或所有情緒都很低
             return {
-                "emotion_zh": "面無表情",
-                "emotion_en": "neutral",
-                "emoji": "😐",
+                "emotion_zh": "沒分析到臉",
+                "emotion_en": "not_detected",
+                "emoji": "🙈",
                 "confidence": 0.0,
-                "error": f"DeepFace 分析錯誤: {str(exc)}",
-                "engine": "deepface"
+                "error": "未檢測到有效的人臉特徵",
+                "engine": "deepface",
+                "face_detected": False
             }
+
+        # 英文轉中文
+        emotion_zh = "面無表情"  # 預設值
+        emoji = "😐"
+        for zh_key, details in EMOTION_TRANSLATIONS.items():
+            if details['en'] == dominant_emotion_en:
+                emotion_zh = details.get('zh') or zh_key
+                emoji = details.get('emoji', emoji)
+                break
+
+        # 取得其他特徵分析結果
+        age = result.get('age', 0)
+
+        # 性別分析
+        gender_analysis = result.get('gender', {})
+        if isinstance(gender_analysis, dict) and gender_analysis:
+            gender_scores = {k.lower(): v for k, v in gender_analysis.items()}
+            dominant_gender_key = max(gender_scores, key=gender_scores.get)
+            gender_zh = '男性' if dominant_gender_key == 'man' else '女性' if dominant_gender_key == 'woman' else '未知'
+            gender_confidence = gender_scores.get(dominant_gender_key, 0) / 100.0
+        else:
+            gender_zh = '未知'
+            dominant_gender_key = 'unknown'
+            gender_confidence = 0.0
+            gender_scores = {}
+
+        # 種族分析
+        race_analysis = result.get('race', {})
+        if isinstance(race_analysis, dict) and race_analysis:
+            race_scores = {k.lower().replace(' ', '_'): v for k, v in race_analysis.items()}
+            dominant_race_key = max(race_scores, key=race_scores.get)
+
+            # 種族中文映射
+            race_mapping = {
+                'asian': '亞洲人',
+                'white': '白人',
+                'black': '黑人',
+                'indian': '印度人',
+                'latino_hispanic': '拉丁裔',
+                'middle_eastern': '中東人'
+            }
+            race_zh = race_mapping.get(dominant_race_key, '未知')
+            race_confidence = race_scores.get(dominant_race_key, 0) / 100.0
+        else:
+            race_zh = '未知'
+            dominant_race_key = 'unknown'
+            race_confidence = 0.0
+            race_scores = {}
+
+        # 模型常駐重用，只在記憶體壓力過高時才釋放
+        if check_pressure:
+            self.emotion_model.release_if_under_pressure()
+
+        return {
+            "emotion_zh": emotion_zh,
+            "emotion_en": dominant_emotion_en,
+            "emoji": emoji,
+            "confidence": round(confidence, 3),
+            "engine": "deepface",
+            "face_detected": True,
+            "raw_scores": {k: round(v / 100.0, 4) for k, v in result['emotion'].items()}
+        }
@@ -3,11 +3,10 @@
 # 基於 MediaPipe Tasks GestureRecognizer 實作猜拳手勢檢測
 # =============================================================================
 
+import asyncio
 import logging
-import threading
 import time
 from enum import Enum
-from pathlib import Path
 from types import SimpleNamespace
 from typing import Dict, List, Optional, Tuple
 
@@ -20,13 +19,7 @@ _GPU_STATUS = configure_gpu_runtime()
 
 try:
     import mediapipe as mp
-    from mediapipe.tasks.python import BaseOptions
-    from mediapipe.tasks.python.vision import (
-        GestureRecognizer,
-        GestureRecognizerOptions,
-        GestureRecognizerResult,
-        RunningMode,
-    )
+    from mediapipe.tasks.python.vision import GestureRecognizerResult
     _MEDIAPIPE_AVAILABLE = True
     _MEDIAPIPE_ERROR: Optional[str] = None
 except Exception as exc:
@@ -39,8 +32,12 @@ except Exception as exc:
     # Mock missing classes for type hinting
     GestureRecognizerResult = object
 
+from .mediapipe_rps_detector import DEFAULT_MODEL_PATH, _import_mediapipe, shared_gesture_recognizer
 from .status_broadcaster import StatusBroadcaster
+from ..utils.async_loops import SerializedCapture, cancel_loop_task, start_loop_task
 from ..utils.datetime_utils import _now_ts
+from ..utils.lazy_service import model_state
+from ..utils.model_registry import SharedModel
 
 
 logger = logging.getLogger(__name__)
@@ -74,33 +71,28 @@ GESTURE_MAPPING = {
 
 
 class HandGestureDetector:
-    """手勢檢測器，基於 MediaPipe Tasks GestureRecognizer"""
+    """手勢檢測器，使用與猜拳遊戲共用的 MediaPipe Tasks GestureRecognizer"""
 
     def __init__(self, service: "HandGestureService"):
         self.service = service
         self.mediapipe_ready = _MEDIAPIPE_AVAILABLE
         self.init_error: Optional[str] = _MEDIAPIPE_ERROR
-        self.recognizer: Optional[GestureRecognizer] = None
+        self.recognizer: Optional[SharedModel] = None
 
         if self.mediapipe_ready:
             try:
-                model_path = Path(__file__).resolve().parent.parent / "models" / "gesture_recognizer.task"
-                if not model_path.exists():
-                    raise FileNotFoundError(f"模型檔案不存在: {model_path}")
-
-                options = GestureRecognizerOptions(
-                    base_options=BaseOptions(
-                        model_asset_path=str(model_path)
-                        # 舊版 MediaPipe 0.10.11 不支援 delegate 參數
-                    ),
-                    running_mode=RunningMode.LIVE_STREAM,
-                    num_hands=1,
-                    min_hand_detection_confidence=0.5,
-                    min_tracking_confidence=0.5,
-                    result_callback=self._result_callback,
-                )
-                self.recognizer = GestureRecognizer.create_from_options(options)
-                logger.info("MediaPipe GestureRecognizer 初始化完成（CPU 模式）")
+                if not DEFAULT_MODEL_PATH.exists():
+                    raise FileNotFoundError(f"模型檔案不存在: {DEFAULT_MODEL_PATH}")
+                tasks_error = _import_mediapipe()
+                if tasks_error:
+                    raise RuntimeError(tasks_error)
+
+                # 與 MediaPipeRPSDetector 共用同一個 IMAGE 模式辨識器（模型登錄表去重），
+                # 不再另外載入一份 LIVE_STREAM 模式的模型
+                recognizer = shared_gesture_recognizer(DEFAULT_MODEL_PATH)
+                recognizer.load()
+                self.recognizer = recognizer
+                logger.info("MediaPipe GestureRecognizer 初始化完成（CPU 模式，與猜拳共用）")
             except Exception as exc:
                 self.mediapipe_ready = False
                 self.init_error = str(exc)
@@ -108,8 +100,8 @@ class HandGestureDetector:
         else:
             logger.warning("MediaPipe GestureRecognizer 無法使用: %s", self.init_error)
 
-    def _result_callback(self, result: GestureRecognizerResult, output_image: 'mp.Image', timestamp_ms: int):
-        """MediaPipe 結果回呼"""
+    def _handle_result(self, result: GestureRecognizerResult):
+        """更新服務的手勢狀態與歷史"""
         if not self.service.is_detecting:
             return
 
@@ -141,22 +133,21 @@ class HandGestureDetector:
                 "stable_count": self.service.gesture_stable_count
             })
 
-    def recognize_async(self, frame: np.ndarray, timestamp_ms: int):
-        """異步辨識手勢"""
+    def recognize(self, frame: np.ndarray):
+        """辨識單一影格的手勢（於執行緒池中呼叫）"""
         if not self.is_available():
             return
 
         mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-        self.recognizer.recognize_async(mp_image, timestamp_ms)
+        # 共用辨識器已被閒置卸載時會重新載入
+        with self.recognizer.use() as recognizer:
+            result = recognizer.recognize(mp_image)
+        self._handle_result(result)
 
     def is_available(self) -> bool:
         """回傳 MediaPipe 是否可用"""
         return self.mediapipe_ready and self.recognizer is not None
 
-    def close(self):
-        if self.recognizer:
-            self.recognizer.close()
-
 
 class HandGestureService:
     """手勢識別服務主類"""
@@ -173,7 +164,7 @@ class HandGestureService:
 
         # 服務狀態
         self.is_detecting = False
-        self.detection_thread = None
+        self.detection_task: Optional[asyncio.Task] = None
         self.camera = None
 
         # 檢測統計
@@ -200,8 +191,9 @@ class HandGestureService:
 
         try:
             # 開啟攝影機
-            self.camera = cv2.VideoCapture(0)
+            self.camera = SerializedCapture(cv2.VideoCapture(0))
             if not self.camera.isOpened():
+                self.camera = None
                 return {"status": "error", "message": "無法開啟攝影機"}
 
             # 設定攝影機參數
@@ -219,14 +211,9 @@ class HandGestureService:
             self.last_stable_gesture = HandGestureType.UNKNOWN
             self.last_broadcast_time = 0
 
-            # 開始檢測線程
+            # 開始檢測任務
             self.is_detecting = True
-            self.detection_thread = threading.Thread(
-                target=self._detection_loop,
-                args=(duration,),
-                daemon=True
-            )
-            self.detection_thread.start()
+            self.detection_task = start_loop_task(self._detection_loop(duration), name="hand-gesture-detection")
 
             # 廣播開始狀態
             self.status_broadcaster.broadcast_threadsafe({
@@ -256,14 +243,13 @@ class HandGestureService:
 
         self.is_detecting = False
 
+        # 釋放攝影機會等待進行中的讀取完成；檢測任務隨即結束，不需等待
         if self.camera:
             self.camera.release()
             self.camera = None
 
-        if self.detection_thread:
-            self.detection_thread.join(timeout=2)
-        
-        self.gesture_detector.close()
+        cancel_loop_task(self.detection_task)
+        self.detection_task = None
 
         # 生成最終報告
         total_time = time.time() - self.detection_start_time if self.detection_start_time else 0
@@ -289,6 +275,11 @@ class HandGestureService:
             }
         }
 
+    def get_model_status(self) -> Dict[str, Dict]:
+        """回傳手勢辨識模型的載入狀態"""
+        detector = self.gesture_detector
+        return {"gesture_recognizer": model_state(detector.is_available(), detector.init_error)}
+
     def get_detection_status(self) -> Dict:
         """獲取檢測狀態"""
         if not self.is_detecting:
@@ -320,23 +311,23 @@ class HandGestureService:
             "timestamp": _now_ts()
         }
 
-    def _detection_loop(self, duration: Optional[int] = None):
-        """檢測循環 (在背景線程中運行)"""
+    async def _detection_loop(self, duration: Optional[int] = None):
+        """檢測循環（事件迴圈上的背景任務）：讀取與辨識送出在執行緒池執行"""
         if self.detection_start_time is None:
             self.detection_start_time = time.time()
+        camera = self.camera
 
         try:
-            while self.is_detecting and self.camera and self.camera.isOpened():
+            while self.is_detecting and camera is self.camera and camera.isOpened():
                 # 檢查時間限制
                 if duration and (time.time() - self.detection_start_time) >= duration:
                     break
 
-                ret, frame = self.camera.read()
+                ret, frame = await asyncio.to_thread(camera.read)
                 if not ret:
                     break
-                
-                timestamp_ms = int(time.time() * 1000)
-                self.gesture_detector.recognize_async(frame, timestamp_ms)
+
+                await asyncio.to_thread(self.gesture_detector.recognize, frame)
 
                 # 定期廣播結果 (每秒)
                 current_time = time.time()
@@ -358,8 +349,10 @@ class HandGestureService:
                     self.last_broadcast_time = current_time
 
                 # 控制幀率
-                time.sleep(1/60)
+                await asyncio.sleep(1/60)
 
+        except asyncio.CancelledError:
+            pass
         except Exception as exc:
             self.status_broadcaster.broadcast_threadsafe({
                 "channel": "gesture",
@@ -367,13 +360,15 @@ class HandGestureService:
                 "message": f"檢測錯誤: {str(exc)}"
             })
         finally:
-            if self.camera:
-                self.camera.release()
-                self.camera = None
-
-            # 自動停止
-            if self.is_detecting:
-                self.stop_gesture_detection()
+            # 已被新一輪檢測取代的舊任務不可釋放新的攝影機
+            if self.detection_task is asyncio.current_task():
+                if self.camera:
+                    self.camera.release()
+                    self.camera = None
+
+                # 自動停止
+                if self.is_detecting:
+                    self.stop_gesture_detection()
 
 
 __all__ = ["HandGestureService", "HandGestureType"]
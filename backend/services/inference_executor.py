@@ -0,0 +1,204 @@
+# =============================================================================
+# services/inference_executor.py - 共用推論執行器
+# 將同步、CPU 密集的模型推論從 asyncio 事件迴圈移至有界的工作執行緒池，
+# 並依模型提供並行上限、排隊深度統計與背壓（backpressure）保護。
+# =============================================================================
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from ..config.settings import (
+    INFERENCE_MAX_QUEUE_DEPTH,
+    INFERENCE_MAX_WORKERS,
+    INFERENCE_MODEL_CONCURRENCY,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 預設的模型並行上限；未列出的模型使用 default_concurrency。
+# 微批次啟用時 /ws/emotion 影格只以 face_mesh 執行預檢，等待批次結果時不佔用執行緒與 deepface 名額
+DEFAULT_MODEL_CONCURRENCY: Dict[str, int] = {
+    "deepface": 1,
+    "face_mesh": 2,
+    "action_video": 1,
+    "emotion_video": 1,
+    "rps_gesture": 2,
+    "drawing": 2,
+}
+
+
+class InferenceBusyError(RuntimeError):
+    """當指定模型的排隊深度已達上限時拋出，呼叫端應回報「忙碌」而非繼續等待。"""
+
+    def __init__(self, model_key: str, queue_depth: int) -> None:
+        super().__init__(f"推論佇列已滿: model={model_key}, queue_depth={queue_depth}")
+        self.model_key = model_key
+        self.queue_depth = queue_depth
+
+
+@dataclass
+class _ModelStats:
+    """單一模型的執行統計。"""
+
+    concurrency: int
+    max_queue_depth: int
+    queued: int = 0
+    running: int = 0
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    rejected: int = 0
+    peak_queue_depth: int = 0
+    total_wait_seconds: float = 0.0
+    total_run_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            "concurrency": self.concurrency,
+            "max_queue_depth": self.max_queue_depth,
+            "queued": self.queued,
+            "running": self.running,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "peak_queue_depth": self.peak_queue_depth,
+            "avg_wait_ms": round(self.total_wait_seconds / finished * 1000, 2) if finished else 0.0,
+            "avg_run_ms": round(self.total_run_seconds / finished * 1000, 2) if finished else 0.0,
+        }
+
+
+class InferenceExecutor:
+    """
+    所有 router 共用的推論執行器。
+
+    每個模型（以 model_key 區分）擁有獨立的 asyncio.Semaphore 控制同時執行數，
+    等待中的請求數超過 max_queue_depth 時立即拋出 InferenceBusyError，
+    避免單一慢模型佔滿整個執行緒池或讓請求無限堆積。
+
+    Attributes:
+        max_workers (int): 底層執行緒池大小
+        max_queue_depth (int): 每個模型允許的最大排隊數
+    """
+
+    def __init__(
+        self,
+        max_workers: int = INFERENCE_MAX_WORKERS,
+        model_concurrency: Optional[Dict[str, int]] = None,
+        max_queue_depth: int = INFERENCE_MAX_QUEUE_DEPTH,
+        default_concurrency: int = 1,
+    ) -> None:
+        self.max_workers = max(1, max_workers)
+        self.max_queue_depth = max(0, max_queue_depth)
+        self.default_concurrency = max(1, default_concurrency)
+        self._model_concurrency = dict(DEFAULT_MODEL_CONCURRENCY)
+        self._model_concurrency.update(
+            INFERENCE_MODEL_CONCURRENCY if model_concurrency is None else model_concurrency
+        )
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._stats: Dict[str, _ModelStats] = {}
+        # Semaphore 綁定於建立時的事件迴圈；以 (loop, model_key) 作為鍵以支援多個迴圈（例如測試）
+        self._semaphores: Dict[Tuple[int, str], asyncio.Semaphore] = {}
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="inference"
+                )
+            return self._pool
+
+    def _get_stats(self, model_key: str) -> _ModelStats:
+        stats = self._stats.get(model_key)
+        if stats is None:
+            concurrency = max(1, self._model_concurrency.get(model_key, self.default_concurrency))
+            stats = _ModelStats(concurrency=concurrency, max_queue_depth=self.max_queue_depth)
+            self._stats[model_key] = stats
+        return stats
+
+    def _get_semaphore(self, model_key: str, concurrency: int) -> asyncio.Semaphore:
+        key = (id(asyncio.get_running_loop()), model_key)
+        semaphore = self._semaphores.get(key)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(concurrency)
+            self._semaphores[key] = semaphore
+        return semaphore
+
+    async def run(self, model_key: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        在工作執行緒中執行同步函式，受 model_key 的並行上限與排隊深度限制。
+
+        Args:
+            model_key (str): 模型識別鍵，例如 "deepface"、"rps_gesture"
+            func (Callable): 要執行的同步函式
+            *args, **kwargs: 傳給 func 的參數
+
+        Returns:
+            func 的回傳值
+
+        Raises:
+            InferenceBusyError: 該模型的排隊數已達上限
+        """
+        stats = self._get_stats(model_key)
+        semaphore = self._get_semaphore(model_key, stats.concurrency)
+
+        # 所有執行槽都被佔用時才計入排隊；排隊已滿則直接拒絕
+        if semaphore.locked() and stats.queued >= stats.max_queue_depth:
+            stats.rejected += 1
+            raise InferenceBusyError(model_key, stats.queued)
+
+        stats.submitted += 1
+        stats.queued += 1
+        stats.peak_queue_depth = max(stats.peak_queue_depth, stats.queued)
+        enqueued_at = time.perf_counter()
+        try:
+            await semaphore.acquire()
+        finally:
+            stats.queued -= 1
+
+        started_at = time.perf_counter()
+        stats.total_wait_seconds += started_at - enqueued_at
+        stats.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_pool(), lambda: func(*args, **kwargs))
+        except Exception:
+            stats.failed += 1
+            raise
+        else:
+            stats.completed += 1
+            return result
+        finally:
+            stats.running -= 1
+            stats.total_run_seconds += time.perf_counter() - started_at
+            semaphore.release()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        取得執行器與各模型的排隊深度、執行數與延遲統計。
+
+        Returns:
+            Dict[str, Any]: 執行器統計資訊
+        """
+        return {
+            "max_workers": self.max_workers,
+            "max_queue_depth": self.max_queue_depth,
+            "models": {key: stats.to_dict() for key, stats in sorted(self._stats.items())},
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """關閉底層執行緒池；之後的 run() 呼叫會重新建立執行緒池。"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        self._semaphores.clear()
+        if pool is not None:
+            pool.shutdown(wait=wait)
@@ -13,6 +13,9 @@ from typing import Optional, Tuple, Union
 import cv2
 import numpy as np
 
+from ..utils.model_registry import SharedModel, model_registry
+from ..utils.roi_tracker import Box, RoiTracker, bbox_from_points
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,19 +27,61 @@ class RPSGesture(Enum):
     UNKNOWN = "unknown"    # 未知
 
 
-# 嘗試載入 MediaPipe
-try:
-    import mediapipe as mp
-    from mediapipe.tasks import python
-    from mediapipe.tasks.python import vision
-    _MEDIAPIPE_AVAILABLE = True
-    _MEDIAPIPE_ERROR = None
-except ImportError as exc:
-    mp = None
-    python = None
-    vision = None
-    _MEDIAPIPE_AVAILABLE = False
-    _MEDIAPIPE_ERROR = str(exc)
+# MediaPipe 延後到建立辨識器時才載入：只需要 RPSGesture 的模組（例如 WebSocket 路由）不必付出匯入成本
+mp = None
+python = None
+vision = None
+_MEDIAPIPE_AVAILABLE: Optional[bool] = None
+_MEDIAPIPE_ERROR: Optional[str] = None
+
+
+def _import_mediapipe() -> Optional[str]:
+    """載入 MediaPipe Tasks（只嘗試一次），回傳錯誤訊息；成功時回傳 None。"""
+    global mp, python, vision, _MEDIAPIPE_AVAILABLE, _MEDIAPIPE_ERROR
+    if _MEDIAPIPE_AVAILABLE is None:
+        try:
+            import mediapipe as _mp
+            from mediapipe.tasks import python as _python
+            from mediapipe.tasks.python import vision as _vision
+        except ImportError as exc:
+            _MEDIAPIPE_AVAILABLE = False
+            _MEDIAPIPE_ERROR = str(exc)
+        else:
+            mp, python, vision = _mp, _python, _vision
+            _MEDIAPIPE_AVAILABLE = True
+    return _MEDIAPIPE_ERROR
+
+
+# 預設模型路徑（不存在時自動下載）
+DEFAULT_MODEL_PATH = Path(__file__).resolve().parent.parent / "models" / "gesture_recognizer.task"
+
+# GestureRecognizer 建構參數（IMAGE 模式）：猜拳與手勢偵測服務以相同設定共用同一個辨識器
+GESTURE_RECOGNIZER_OPTIONS = {
+    "num_hands": 1,  # 只辨識一隻手
+    "min_hand_detection_confidence": 0.3,  # 降低閾值以提高偵測率
+    "min_hand_presence_confidence": 0.3,
+    "min_tracking_confidence": 0.3,
+}
+
+
+def _create_gesture_recognizer(model_path: str, **options):
+    # 舊版 MediaPipe 0.10.11 不支援 Delegate
+    base_options = python.BaseOptions(model_asset_path=model_path)
+    return vision.GestureRecognizer.create_from_options(
+        vision.GestureRecognizerOptions(base_options=base_options, **options))
+
+
+def shared_gesture_recognizer(model_path: Union[str, Path] = DEFAULT_MODEL_PATH) -> SharedModel:
+    """
+    取得行程共用的 GestureRecognizer（由模型登錄表去重，閒置過久時卸載、下次使用時重新載入）。
+
+    呼叫前須確認 MediaPipe 可用（``_import_mediapipe()`` 回傳 None）。
+    """
+    return model_registry.shared(
+        "gesture_recognizer",
+        {"model_path": str(model_path), **GESTURE_RECOGNIZER_OPTIONS},
+        _create_gesture_recognizer,
+    )
 
 
 class MediaPipeRPSDetector:
@@ -67,16 +112,10 @@ class MediaPipeRPSDetector:
         Args:
             model_path: 模型路徑，預設會自動下載
         """
-        self.model_available = _MEDIAPIPE_AVAILABLE
-        self.init_error = _MEDIAPIPE_ERROR
-        self.recognizer = None
-
-        # 預設模型路徑
-        if model_path is None:
-            base_dir = Path(__file__).resolve().parent.parent
-            model_path = base_dir / "models" / "gesture_recognizer.task"
-
-        self.model_path = Path(model_path)
+        self.init_error = _import_mediapipe()
+        self.model_available = self.init_error is None
+        self.recognizer: Optional[SharedModel] = None
+        self.model_path = Path(model_path) if model_path is not None else DEFAULT_MODEL_PATH
 
         if self.model_available:
             self._download_model()
@@ -112,16 +151,10 @@ class MediaPipeRPSDetector:
             return
 
         try:
-            # 建立 GestureRecognizer（舊版 MediaPipe 0.10.11 不支援 Delegate）
-            base_options = python.BaseOptions(model_asset_path=str(self.model_path))
-            options = vision.GestureRecognizerOptions(
-                base_options=base_options,
-                num_hands=1,  # 只辨識一隻手
-                min_hand_detection_confidence=0.3,  # 降低閾值以提高偵測率
-                min_hand_presence_confidence=0.3,
-                min_tracking_confidence=0.3
-            )
-            self.recognizer = vision.GestureRecognizer.create_from_options(options)
+            # 共用辨識器：先載入一次確認模型可用，之後由模型登錄表管理常駐與卸載
+            recognizer = shared_gesture_recognizer(self.model_path)
+            recognizer.load()
+            self.recognizer = recognizer
 
             logger.info("✅ MediaPipe 手勢辨識器載入成功: %s", self.model_path.name)
 
@@ -134,12 +167,18 @@ class MediaPipeRPSDetector:
         """檢查辨識器是否可用"""
         return self.model_available and self.recognizer is not None
 
-    def detect(self, image: Union[str, Path, np.ndarray]) -> Tuple[RPSGesture, float]:
+    def detect(
+        self,
+        image: Union[str, Path, np.ndarray],
+        roi_tracker: Optional[RoiTracker] = None,
+    ) -> Tuple[RPSGesture, float]:
         """
         辨識手勢
 
         Args:
             image: 圖片路徑或 numpy array (BGR 格式)
+            roi_tracker: 串流專屬的手部 ROI 追蹤器；提供時只辨識上一幀手部附近的區域，
+                追蹤遺失才整張搜尋（辨識器為多連線共用，追蹤狀態由呼叫端保存）
 
         Returns:
             (gesture, confidence): 手勢類型和信心度 (0-1)
@@ -150,63 +189,97 @@ class MediaPipeRPSDetector:
         try:
             # 載入圖片
             if isinstance(image, (str, Path)):
-                # MediaPipe 需要 RGB 格式
                 img_bgr = cv2.imread(str(image))
                 if img_bgr is None:
                     logger.error("無法載入圖片: %s", image)
                     return RPSGesture.UNKNOWN, 0.0
-                img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
             else:
                 # 輸入是 numpy array (BGR)
-                img_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+                img_bgr = image
 
-            # 建立 MediaPipe Image 物件
-            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=img_rgb)
-
-            # 辨識手勢
-            result = self.recognizer.recognize(mp_image)
+            if roi_tracker is None:
+                found = self._recognize(img_bgr, (0, 0), img_bgr.shape)
+                detection = found[0] if found is not None else None
+            else:
+                detection = roi_tracker.track(
+                    img_bgr, lambda region, offset: self._recognize(region, offset, img_bgr.shape))
 
-            # 處理結果
-            if not result.gestures:
-                # 檢查是否偵測到手部但沒有手勢
-                if result.hand_landmarks:
-                    logger.info("偵測到手部但無法辨識手勢")
-                else:
-                    logger.info("未偵測到手部")
+            if detection is None:
+                logger.info("未偵測到手部")
                 return RPSGesture.UNKNOWN, 0.0
-
-            # 取得最高信心度的手勢
-            top_gesture = result.gestures[0][0]
-            gesture_name = top_gesture.category_name
-            confidence = top_gesture.score
-
-            # 顯示所有偵測到的手勢（前3名）
-            if len(result.gestures[0]) > 1:
-                logger.info("所有偵測到的手勢:")
-                for i, g in enumerate(result.gestures[0][:3]):
-                    logger.info("  %d. %s (%.3f)", i+1, g.category_name, g.score)
-
-            logger.info(
-                "MediaPipe 辨識: %s (信心度: %.3f)",
-                gesture_name,
-                confidence
-            )
-
-            # 映射到 RPS 手勢
-            rps_gesture = self.GESTURE_MAPPING.get(gesture_name, RPSGesture.UNKNOWN)
-
-            if rps_gesture == RPSGesture.UNKNOWN:
-                logger.warning(
-                    "無法映射手勢 '%s' 到 RPS，可能是其他手勢（如 Pointing_Up, Thumb_Down 等）",
-                    gesture_name
-                )
-
-            return rps_gesture, confidence
+            return detection
 
         except Exception as exc:
             logger.exception("MediaPipe 辨識錯誤: %s", exc)
             return RPSGesture.UNKNOWN, 0.0
 
+    def _recognize(
+        self,
+        region: np.ndarray,
+        offset: Tuple[int, int],
+        frame_shape: Tuple[int, ...],
+    ) -> Optional[Tuple[Tuple[RPSGesture, float], Optional[Box]]]:
+        """
+        在影像區域上執行手勢辨識。
+
+        Returns:
+            ((gesture, confidence), 手部在原影格的外框)；未偵測到手部時回傳 None
+        """
+        # MediaPipe 需要 RGB 格式
+        img_rgb = cv2.cvtColor(region, cv2.COLOR_BGR2RGB)
+
+        # 建立 MediaPipe Image 物件
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=img_rgb)
+
+        # 辨識手勢（共用辨識器，已被閒置卸載時會重新載入）
+        with self.recognizer.use() as recognizer:
+            result = recognizer.recognize(mp_image)
+
+        if not result.hand_landmarks:
+            return None
+
+        # 手部外框（換算回原影格座標），供下一幀裁切
+        region_height, region_width = region.shape[:2]
+        points = np.array(
+            [(lm.x * region_width + offset[0], lm.y * region_height + offset[1])
+             for lm in result.hand_landmarks[0]],
+            dtype=np.float32,
+        )
+        box = bbox_from_points(points, frame_shape[1], frame_shape[0])
+
+        # 處理結果
+        if not result.gestures:
+            logger.info("偵測到手部但無法辨識手勢")
+            return (RPSGesture.UNKNOWN, 0.0), box
+
+        # 取得最高信心度的手勢
+        top_gesture = result.gestures[0][0]
+        gesture_name = top_gesture.category_name
+        confidence = top_gesture.score
+
+        # 顯示所有偵測到的手勢（前3名）
+        if len(result.gestures[0]) > 1:
+            logger.info("所有偵測到的手勢:")
+            for i, g in enumerate(result.gestures[0][:3]):
+                logger.info("  %d. %s (%.3f)", i+1, g.category_name, g.score)
+
+        logger.info(
+            "MediaPipe 辨識: %s (信心度: %.3f)",
+            gesture_name,
+            confidence
+        )
+
+        # 映射到 RPS 手勢
+        rps_gesture = self.GESTURE_MAPPING.get(gesture_name, RPSGesture.UNKNOWN)
+
+        if rps_gesture == RPSGesture.UNKNOWN:
+            logger.warning(
+                "無法映射手勢 '%s' 到 RPS，可能是其他手勢（如 Pointing_Up, Thumb_Down 等）",
+                gesture_name
+            )
+
+        return (rps_gesture, confidence), box
+
     def detect_batch(self, images: list) -> list:
         """
         批次辨識多張圖片
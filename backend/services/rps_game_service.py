@@ -3,19 +3,28 @@
 # 獨立的遊戲邏輯，支援 WebSocket 即時更新
 # =============================================================================
 
+import asyncio
 import logging
 import random
 import threading
 import time
+from collections import deque
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Deque, Dict, List, Optional
 
 from .mediapipe_rps_detector import MediaPipeRPSDetector, RPSGesture
-from .status_broadcaster import StatusBroadcaster
+from ..config.settings import RPS_ACTIVE_FPS, RPS_DETECTION_LEAD_MS, RPS_PREVIEW_FPS
+from .status_broadcaster import BroadcastMessage, StatusBroadcaster
+from ..utils.async_loops import cancel_loop_task, start_loop_task
+from ..utils.roi_tracker import RoiTracker
 from ..utils.datetime_utils import _now_ts
+from ..utils.lazy_service import model_state
 
 logger = logging.getLogger(__name__)
 
+# 保留最近幾回合的「手勢接受 → 結果廣播」延遲樣本
+GESTURE_LATENCY_SAMPLES = 50
+
 
 class GameState(Enum):
     """遊戲狀態"""
@@ -43,13 +52,27 @@ class RPSGameService:
     - 支援 WebSocket 即時狀態更新
     - 完全獨立，不依賴攝影機服務
     - 支援圖片上傳辨識
+    - 遊戲循環以 asyncio 任務執行，不需為每個工作階段建立執行緒
     """
 
-    def __init__(self, status_broadcaster: StatusBroadcaster):
+    def __init__(self,
+                 status_broadcaster: StatusBroadcaster,
+                 detector: Optional[MediaPipeRPSDetector] = None,
+                 session_id: Optional[str] = None):
+        """
+        Args:
+            status_broadcaster: 狀態廣播器
+            detector: 共用的手勢辨識器；None 時自行建立
+            session_id: 遊戲工作階段 ID；設定時遊戲狀態只廣播給訂閱該工作階段主題的連線
+        """
         self.status_broadcaster = status_broadcaster
-        self.detector = MediaPipeRPSDetector()
+        self.detector = detector if detector is not None else MediaPipeRPSDetector()
+        self.session_id = session_id
+        self.broadcast_topic: Optional[str] = f"rps_game:{session_id}" if session_id else None
+        # 此工作階段的手部 ROI 追蹤（辨識器共用，追蹤狀態各自保存）
+        self.hand_roi = RoiTracker()
 
-        if not self.detector.is_available():
+        if detector is None and not self.detector.is_available():
             logger.warning(
                 "MediaPipe 辨識器不可用，遊戲功能受限: %s",
                 self.detector.init_error
@@ -57,11 +80,23 @@ class RPSGameService:
 
         # 遊戲狀態
         self.game_state = GameState.IDLE
-        self.game_thread: Optional[threading.Thread] = None
-        self.stop_flag = threading.Event()
+        self.game_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # 玩家出拳通知：等待玩家時建立，接受手勢時設定，遊戲循環立即進入判定
+        self._gesture_event: Optional[asyncio.Event] = None
+        self._gesture_lock = threading.Lock()
+        self._gesture_accepted_at: Optional[float] = None
+        self.gesture_to_result_ms: Deque[float] = deque(maxlen=GESTURE_LATENCY_SAMPLES)
 
         # 遊戲設定
         self.countdown_time = 3  # 倒數秒數
+        self._countdown_deadline: Optional[float] = None  # 倒數結束的 monotonic 時間
+
+        # 影格節流：只在等待出拳（及倒數最後一段）全速辨識
+        self.active_fps = RPS_ACTIVE_FPS
+        self.preview_fps = RPS_PREVIEW_FPS
+        self.detection_lead_s = RPS_DETECTION_LEAD_MS / 1000.0
         self.result_display_time = 3  # 結果顯示時間
         self.target_score = 1  # 目標分數
 
@@ -83,6 +118,8 @@ class RPSGameService:
         """
         開始遊戲（單回合模式）
 
+        需在事件迴圈上呼叫，遊戲循環會建立為該迴圈上的背景任務。
+
         Args:
             target_score: 保留為 API 相容性，實際上遊戲固定為單回合模式
         """
@@ -102,15 +139,14 @@ class RPSGameService:
         self.current_round = 0
         self.round_history = []
         self.game_start_time = time.time()
-        self.stop_flag.clear()
+
+        # 開始遊戲循環
+        self._loop = asyncio.get_running_loop()
+        self.game_task = start_loop_task(self._game_loop(), name=f"rps-game-{self.session_id or 'default'}")
 
         # 變更狀態
         self.game_state = GameState.COUNTDOWN
 
-        # 開始遊戲循環
-        self.game_thread = threading.Thread(target=self._game_loop, daemon=True)
-        self.game_thread.start()
-
         # 廣播遊戲開始
         self._broadcast({
             "stage": "game_started",
@@ -133,13 +169,10 @@ class RPSGameService:
         if self.game_state == GameState.IDLE:
             return {"status": "idle", "message": "遊戲未在進行中"}
 
-        # 設定停止旗標
-        self.stop_flag.set()
+        # 取消遊戲循環（倒數與等待都在 await 點上，取消立即生效）
         self.game_state = GameState.IDLE
-
-        # 等待遊戲線程結束
-        if self.game_thread and self.game_thread.is_alive():
-            self.game_thread.join(timeout=2)
+        cancel_loop_task(self.game_task)
+        self.game_task = None
 
         # 計算統計資料
         total_time = time.time() - self.game_start_time if self.game_start_time else 0
@@ -196,7 +229,12 @@ class RPSGameService:
             }
 
         # 儲存玩家手勢
-        self.player_gesture = gesture
+        if not self.accept_player_gesture(gesture):
+            return {
+                "status": "error",
+                "message": "本回合已出拳",
+                "gesture": self.player_gesture.value if self.player_gesture else None
+            }
 
         logger.info(
             "玩家出拳: %s (信心度: %.3f)",
@@ -211,6 +249,75 @@ class RPSGameService:
             "confidence": confidence
         }
 
+    def accept_player_gesture(self, gesture: RPSGesture) -> bool:
+        """
+        接受本回合的玩家手勢並通知遊戲循環（可從任意執行緒呼叫）。
+
+        只在等待玩家出拳時接受，且每回合只接受第一個手勢；
+        接受後遊戲循環立即進入判定，不需等待下一次輪詢。
+
+        Returns:
+            bool: 是否接受此手勢
+        """
+        with self._gesture_lock:
+            if self.game_state != GameState.WAITING_PLAYER or self.player_gesture is not None:
+                return False
+            self.player_gesture = gesture
+            self._gesture_accepted_at = time.perf_counter()
+            event = self._gesture_event
+
+        if event is not None:
+            self._notify(event)
+        return True
+
+    def _notify(self, event: asyncio.Event) -> None:
+        """在遊戲循環所在的事件迴圈上設定事件。"""
+        loop = self._loop
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if loop is None or running_loop is loop:
+            event.set()
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(event.set)
+
+    def frame_policy(self) -> Dict:
+        """
+        依遊戲狀態決定影格是否需要辨識，以及希望客戶端送出的幀率。
+
+        只有等待玩家出拳、以及倒數結束前 ``detection_lead_s`` 秒內需要全速辨識；
+        其餘狀態（閒置、倒數前段、結果）辨識出的手勢會被丟棄，只需預覽幀率。
+
+        Returns:
+            Dict: ``state``、``detecting``（是否在辨識視窗內）與 ``desired_fps``
+        """
+        state = self.game_state
+        detecting = state == GameState.WAITING_PLAYER
+        deadline = self._countdown_deadline
+        if state == GameState.COUNTDOWN and deadline is not None:
+            detecting = deadline - time.monotonic() <= self.detection_lead_s
+        return {
+            "state": state.value,
+            "detecting": detecting,
+            "desired_fps": self.active_fps if detecting else self.preview_fps,
+        }
+
+    def get_metrics(self) -> Dict:
+        """回傳最近回合「手勢被接受 → 結果廣播」的延遲統計（毫秒）。"""
+        samples = list(self.gesture_to_result_ms)
+        return {
+            "rounds_measured": len(samples),
+            "last_gesture_to_result_ms": samples[-1] if samples else None,
+            "avg_gesture_to_result_ms": round(sum(samples) / len(samples), 3) if samples else None,
+            "max_gesture_to_result_ms": max(samples) if samples else None,
+        }
+
+    def get_model_status(self) -> Dict[str, Dict]:
+        """回傳手勢辨識模型的載入狀態"""
+        return {"gesture_recognizer": model_state(self.detector.is_available(), self.detector.init_error)}
+
     def get_game_status(self) -> Dict:
         """取得遊戲狀態"""
         return {
@@ -227,23 +334,22 @@ class RPSGameService:
                 "computer": self.computer_gesture.value if self.computer_gesture else None
             },
             "current_result": self.current_result.value if self.current_result else None,
-            "game_duration": time.time() - self.game_start_time if self.game_start_time else 0
+            "game_duration": time.time() - self.game_start_time if self.game_start_time else 0,
+            "metrics": self.get_metrics()
         }
 
-    def _game_loop(self):
-        """遊戲主循環（在背景執行）"""
+    async def _game_loop(self):
+        """遊戲主循環（事件迴圈上的背景任務）"""
         try:
-            while not self.stop_flag.is_set():
+            while True:
                 # 開始新回合
                 self._start_round()
 
                 # 倒數 3...2...1
-                if not self._countdown():
-                    break
+                await self._countdown()
 
                 # 等待玩家出拳
-                if not self._wait_for_player():
-                    break
+                await self._wait_for_player()
 
                 # 電腦出拳
                 self._computer_play()
@@ -259,6 +365,8 @@ class RPSGameService:
                 self._finish_game()
                 break
 
+        except asyncio.CancelledError:
+            logger.info("遊戲循環已取消")
         except Exception as exc:
             logger.exception("遊戲循環錯誤: %s", exc)
             self._broadcast({
@@ -266,12 +374,17 @@ class RPSGameService:
                 "message": f"遊戲錯誤: {str(exc)}"
             })
         finally:
-            self.game_state = GameState.IDLE
+            # 已被新遊戲取代的舊任務不可覆寫新遊戲的狀態
+            if self.game_task is asyncio.current_task():
+                self.game_state = GameState.IDLE
+                self.game_task = None
 
     def _start_round(self):
         """開始新回合"""
         self.current_round += 1
-        self.player_gesture = None
+        with self._gesture_lock:
+            self.player_gesture = None
+            self._gesture_accepted_at = None
         self.computer_gesture = None
         self.current_result = None
 
@@ -289,27 +402,27 @@ class RPSGameService:
             }
         })
 
-    def _countdown(self) -> bool:
+    async def _countdown(self):
         """倒數 3...2...1"""
         self.game_state = GameState.COUNTDOWN
+        self._countdown_deadline = time.monotonic() + self.countdown_time
 
         for i in range(self.countdown_time, 0, -1):
-            if self.stop_flag.is_set():
-                return False
-
             self._broadcast({
                 "stage": "countdown",
                 "message": str(i),
                 "data": {"count": i}
             })
 
-            time.sleep(1)
-
-        return True
+            await asyncio.sleep(1)
 
-    def _wait_for_player(self) -> bool:
-        """等待玩家出拳"""
-        self.game_state = GameState.WAITING_PLAYER
+    async def _wait_for_player(self):
+        """等待玩家出拳：手勢被接受時立即返回，最多等待 10 秒"""
+        event = asyncio.Event()
+        with self._gesture_lock:
+            self._gesture_event = event
+            self.game_state = GameState.WAITING_PLAYER
+            self._countdown_deadline = None
 
         self._broadcast({
             "stage": "waiting_player",
@@ -318,23 +431,17 @@ class RPSGameService:
         })
 
         # 等待玩家透過 WebSocket 自動設定手勢（最多等待 10 秒）
-        wait_time = 0
         max_wait = 10
 
-        while self.player_gesture is None and wait_time < max_wait:
-            if self.stop_flag.is_set():
-                return False
-
-            time.sleep(0.5)
-            wait_time += 0.5
-
-        # 🎯 如果超時且沒有偵測到手勢，不要隨機給手勢
-        # 前端會發送 no_gesture_detected 訊息，設定為 UNKNOWN
-        if self.player_gesture is None:
+        try:
+            await asyncio.wait_for(event.wait(), timeout=max_wait)
+        except asyncio.TimeoutError:
+            # 🎯 如果超時且沒有偵測到手勢，不要隨機給手勢
+            # 前端會發送 no_gesture_detected 訊息，設定為 UNKNOWN
             logger.warning("⏰ 等待超時，未偵測到玩家手勢")
-            # 不做任何事，等待前端發送 no_gesture_detected
-
-        return True
+        finally:
+            with self._gesture_lock:
+                self._gesture_event = None
 
     def _computer_play(self):
         """電腦出拳（隨機）"""
@@ -376,21 +483,29 @@ class RPSGameService:
             }
             result_message = result_messages[self.current_result]
 
+        data = {
+            "result": self.current_result.value,
+            "gestures": {
+                "player": self.player_gesture.value,
+                "computer": self.computer_gesture.value
+            },
+            # 🎯 保留分數欄位以相容前端，但永遠是 0-0 或對決結果
+            "scores": {
+                "player": 1 if self.current_result == RoundResult.WIN else 0,
+                "computer": 1 if self.current_result == RoundResult.LOSE else 0
+            }
+        }
+
+        # 記錄手勢被接受到結果廣播的延遲
+        if self._gesture_accepted_at is not None:
+            latency_ms = round((time.perf_counter() - self._gesture_accepted_at) * 1000, 3)
+            self.gesture_to_result_ms.append(latency_ms)
+            data["gesture_to_result_ms"] = latency_ms
+
         self._broadcast({
             "stage": "result",
             "message": result_message,
-            "data": {
-                "result": self.current_result.value,
-                "gestures": {
-                    "player": self.player_gesture.value,
-                    "computer": self.computer_gesture.value
-                },
-                # 🎯 保留分數欄位以相容前端，但永遠是 0-0 或對決結果
-                "scores": {
-                    "player": 1 if self.current_result == RoundResult.WIN else 0,
-                    "computer": 1 if self.current_result == RoundResult.LOSE else 0
-                }
-            }
+            "data": data
         })
 
         # 🎯 不要 sleep，讓遊戲循環立即執行 break
@@ -457,6 +572,10 @@ class RPSGameService:
             "timestamp": _now_ts(),
             **data
         }
+        if self.session_id:
+            # 工作階段模式：以專屬主題路由，只送達建立此遊戲的連線
+            message["session_id"] = self.session_id
+            message = BroadcastMessage.for_topic(message, self.broadcast_topic)
         logger.info("📡 廣播遊戲狀態: stage=%s", data.get("stage"))
         self.status_broadcaster.broadcast_threadsafe(message)
 
@@ -0,0 +1,118 @@
+# =============================================================================
+# services/rps_session_manager.py - 猜拳遊戲工作階段管理
+# 每條 /ws/rps 連線擁有獨立的遊戲狀態機，遊戲狀態只推送給該連線；
+# 所有工作階段共用同一個 MediaPipe 手勢辨識器。
+# =============================================================================
+
+import logging
+import threading
+import uuid
+from typing import Dict, Optional
+
+from ..config.settings import RPS_MAX_SESSIONS
+from .mediapipe_rps_detector import MediaPipeRPSDetector
+from .rps_game_service import GameState, RPSGameService
+from .status_broadcaster import StatusBroadcaster
+from ..utils.lazy_service import model_state
+
+logger = logging.getLogger(__name__)
+
+
+class RPSSessionLimitError(RuntimeError):
+    """同時進行的遊戲工作階段已達上限。"""
+
+
+class RPSSessionManager:
+    """
+    猜拳遊戲工作階段管理器。
+
+    ``create_session()`` 為每條連線建立獨立的 RPSGameService，
+    其廣播以 ``session.broadcast_topic`` 為主題，連線只需訂閱該主題即可收到自己的遊戲狀態。
+
+    Attributes:
+        detector (MediaPipeRPSDetector): 所有工作階段共用的手勢辨識器
+        max_sessions (int): 同時進行的工作階段上限
+    """
+
+    def __init__(
+        self,
+        status_broadcaster: StatusBroadcaster,
+        detector: Optional[MediaPipeRPSDetector] = None,
+        max_sessions: int = RPS_MAX_SESSIONS,
+    ) -> None:
+        self.status_broadcaster = status_broadcaster
+        self.detector = detector if detector is not None else MediaPipeRPSDetector()
+        self.max_sessions = max(1, max_sessions)
+        self._sessions: Dict[str, RPSGameService] = {}
+        self._lock = threading.Lock()
+        self.created_count = 0
+
+    def create_session(self, session_id: Optional[str] = None) -> RPSGameService:
+        """
+        建立新的遊戲工作階段。
+
+        Raises:
+            RPSSessionLimitError: 工作階段數已達上限
+        """
+        session_id = session_id or uuid.uuid4().hex[:12]
+        with self._lock:
+            if session_id in self._sessions:
+                return self._sessions[session_id]
+            if len(self._sessions) >= self.max_sessions:
+                raise RPSSessionLimitError(f"猜拳遊戲工作階段已達上限 ({self.max_sessions})")
+            session = RPSGameService(self.status_broadcaster, detector=self.detector, session_id=session_id)
+            self._sessions[session_id] = session
+            self.created_count += 1
+
+        logger.info("建立猜拳遊戲工作階段: %s", session_id)
+        return session
+
+    def get_session(self, session_id: str) -> Optional[RPSGameService]:
+        """取得指定的工作階段。"""
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def close_session(self, session_id: str) -> None:
+        """結束工作階段：停止進行中的遊戲並移除。"""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return
+        if session.game_state != GameState.IDLE:
+            session.stop_game()
+        logger.info("關閉猜拳遊戲工作階段: %s", session_id)
+
+    def get_model_status(self) -> Dict[str, Dict]:
+        """回傳各工作階段共用的手勢辨識模型載入狀態。"""
+        return {"gesture_recognizer": model_state(self.detector.is_available(), self.detector.init_error)}
+
+    def get_stats(self) -> Dict:
+        """回傳工作階段數、各狀態的遊戲數與「手勢接受 → 結果」延遲統計。"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+        states: Dict[str, int] = {}
+        latencies = []
+        for session in sessions:
+            states[session.game_state.value] = states.get(session.game_state.value, 0) + 1
+            latencies.extend(session.gesture_to_result_ms)
+        return {
+            "active_sessions": len(sessions),
+            "max_sessions": self.max_sessions,
+            "created": self.created_count,
+            "states": states,
+            "gesture_to_result_ms": {
+                "samples": len(latencies),
+                "avg": round(sum(latencies) / len(latencies), 3) if latencies else None,
+                "max": max(latencies) if latencies else None,
+            },
+        }
+
+    def close_all(self) -> None:
+        """結束所有工作階段（應用程式關閉時呼叫）。"""
+        with self._lock:
+            session_ids = list(self._sessions)
+        for session_id in session_ids:
+            self.close_session(session_id)
+
+
+__all__ = ["RPSSessionManager", "RPSSessionLimitError"]
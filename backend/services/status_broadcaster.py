@@ -4,7 +4,134 @@
 # =============================================================================
 
 import asyncio
-from typing import Any, Dict, Optional
+import json
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 訂閱者佇列滿載時的處理策略
+OVERFLOW_DROP_OLDEST = "drop_oldest"  # 丟棄最舊的訊息
+OVERFLOW_COALESCE = "coalesce"        # 相同鍵的訊息只保留最新一則，仍滿載時丟棄最舊訊息
+
+# 預設可合併的訊息階段：進度更新只需要最新一則
+COALESCE_STAGES = frozenset({"progress_update"})
+
+
+class BroadcastMessage(dict):
+    """
+    廣播訊息：在 dict 之上快取 JSON 序列化結果。
+
+    同一則訊息會被放入多個訂閱者的佇列，``to_json()`` 只在第一次呼叫時序列化，
+    其餘訂閱者直接重用結果；訊息應視為唯讀。
+
+    Attributes:
+        topic (Optional[str]): 路由用的訂閱主題；None 表示依訊息的 channel 欄位路由。
+            主題不會出現在序列化結果中，可用來將同一 channel 的訊息只送給特定連線
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.topic: Optional[str] = None
+        self._json_cache: Dict[Tuple[Tuple[str, Any], ...], str] = {}
+
+    @classmethod
+    def for_topic(cls, message: Dict[str, Any], topic: Optional[str]) -> "BroadcastMessage":
+        """建立指定路由主題的廣播訊息。"""
+        wrapped = cls(message)
+        wrapped.topic = topic
+        return wrapped
+
+    def to_json(self, **overrides: Any) -> str:
+        """
+        取得訊息的 JSON 字串（格式與 WebSocket.send_json 相同）。
+
+        Args:
+            **overrides: 覆寫的欄位，例如 ``type="game_state"``；每組覆寫各快取一份
+        """
+        key = tuple(sorted(overrides.items()))
+        cached = self._json_cache.get(key)
+        if cached is None:
+            payload = {**self, **overrides} if overrides else self
+            cached = json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+            self._json_cache[key] = cached
+        return cached
+
+
+def default_coalesce_key(message: Dict[str, Any]) -> Optional[Hashable]:
+    """預設合併鍵：同頻道的進度類訊息視為同一鍵，其餘訊息不合併。"""
+    stage = message.get("stage")
+    if stage in COALESCE_STAGES:
+        return (message.get("channel"), stage)
+    return None
+
+
+class SubscriberQueue(asyncio.Queue):
+    """
+    具溢位策略的訂閱者佇列。
+
+    廣播端以 ``offer()`` 放入訊息，佇列已滿時依策略丟棄最舊訊息，
+    或（coalesce 策略）以新訊息取代佇列中相同合併鍵的舊訊息；慢速訂閱者只會漏掉
+    部分中間狀態，而不會被移除。
+
+    Attributes:
+        overflow (str): 溢位策略
+        dropped (int): 因佇列滿載被丟棄的訊息數
+        coalesced (int): 被同鍵新訊息取代的訊息數
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 32,
+        overflow: str = OVERFLOW_DROP_OLDEST,
+        coalesce_key: Callable[[Dict[str, Any]], Optional[Hashable]] = default_coalesce_key,
+    ) -> None:
+        if overflow not in (OVERFLOW_DROP_OLDEST, OVERFLOW_COALESCE):
+            raise ValueError(f"未知的溢位策略: {overflow}")
+        super().__init__(maxsize=maxsize)
+        self.overflow = overflow
+        self._coalesce_key = coalesce_key
+        self.dropped = 0
+        self.coalesced = 0
+
+    def _init(self, maxsize: int) -> None:
+        self._queue = deque()
+
+    def offer(self, message: Dict[str, Any]) -> bool:
+        """
+        放入訊息（不會阻塞）。
+
+        Returns:
+            bool: 是否因滿載或合併而捨棄了其他訊息
+        """
+        if self.overflow == OVERFLOW_COALESCE:
+            key = self._coalesce_key(message)
+            if key is not None:
+                for index, pending in enumerate(self._queue):
+                    if self._coalesce_key(pending) == key:
+                        self._queue[index] = message
+                        self.coalesced += 1
+                        return True
+
+        replaced = False
+        if self.full():
+            self._queue.popleft()
+            self.dropped += 1
+            replaced = True
+        self.put_nowait(message)
+        return replaced
+
+    def get_stats(self) -> Dict[str, Any]:
+        """回傳佇列長度與丟棄統計。"""
+        return {
+            "overflow": self.overflow,
+            "size": self.qsize(),
+            "maxsize": self.maxsize,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
 
 
 class StatusBroadcaster:
@@ -14,9 +141,18 @@ class StatusBroadcaster:
     此類別管理WebSocket連接的狀態廣播，提供線程安全的非同步消息分發機制。
     支持多個客戶端同時接收狀態更新，並自動清理斷開的連接。
 
+    訂閱者可以只訂閱特定頻道（例如 "rps_game"），廣播時只會喚醒該頻道的訂閱者，
+    發布成本與實際關心該頻道的連線數成正比。
+
+    訂閱者集合採 copy-on-write：註冊與取消註冊在鎖內建立新的不可變快照後替換，
+    廣播只讀取當下的快照，不需取得鎖。佇列滿載時依訂閱者的溢位策略丟棄或合併訊息，
+    不再移除慢速訂閱者。
+
     Attributes:
-        _connections (set[asyncio.Queue]): 活躍的WebSocket連接隊列集合
-        _lock (asyncio.Lock): 非同步鎖，用於保護連接集合的線程安全
+        _connections (frozenset[SubscriberQueue]): 活躍的WebSocket連接隊列快照
+        _channel_subscribers (Dict[str, frozenset[SubscriberQueue]]): 各頻道的訂閱者快照
+        _wildcard_subscribers (frozenset[SubscriberQueue]): 接收所有頻道的訂閱者快照
+        _lock (threading.Lock): 保護快照替換的寫入鎖
         _loop (Optional[asyncio.AbstractEventLoop]): 事件循環引用
     """
 
@@ -24,11 +160,18 @@ class StatusBroadcaster:
         """
         初始化StatusBroadcaster實例。
 
-        建立空的連接集合和非同步鎖，為狀態廣播做準備。
+        建立空的訂閱者快照與寫入鎖，為狀態廣播做準備。
         """
-        self._connections: set[asyncio.Queue] = set()
-        self._lock = asyncio.Lock()
+        self._connections: frozenset = frozenset()
+        # 依頻道分組的訂閱者；未指定頻道的訂閱者接收所有訊息
+        self._channel_subscribers: Dict[str, frozenset] = {}
+        self._wildcard_subscribers: frozenset = frozenset()
+        self._subscriptions: Dict[SubscriberQueue, Optional[frozenset]] = {}
+        self._lock = threading.Lock()
         self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.published_count = 0
+        self.delivered_count = 0
+        self.dropped_count = 0
 
     def set_loop(self, loop: asyncio.AbstractEventLoop) -> None:
         """
@@ -39,20 +182,47 @@ class StatusBroadcaster:
         """
         self._loop = loop
 
-    async def register(self) -> asyncio.Queue:
+    async def register(
+        self,
+        channels: Optional[Iterable[str]] = None,
+        overflow: str = OVERFLOW_DROP_OLDEST,
+        maxsize: int = 32,
+    ) -> SubscriberQueue:
         """
         註冊新的WebSocket連接並返回消息隊列。
 
-        建立新的非同步隊列並添加到活躍連接集合中，用於接收廣播消息。
+        Args:
+            channels (Optional[Iterable[str]]): 要訂閱的頻道；None 表示接收所有頻道
+            overflow (str): 佇列滿載時的策略（OVERFLOW_DROP_OLDEST / OVERFLOW_COALESCE）
+            maxsize (int): 佇列容量
 
         Returns:
-            asyncio.Queue: 新建立的消息隊列，最大容量32條消息
+            SubscriberQueue: 新建立的消息隊列，預設最大容量32條消息
         """
-        queue: asyncio.Queue = asyncio.Queue(maxsize=32)
-        async with self._lock:
-            self._connections.add(queue)
+        queue = SubscriberQueue(maxsize=maxsize, overflow=overflow)
+        subscription = frozenset(channels) if channels is not None else None
+        with self._lock:
+            self._subscriptions[queue] = subscription
+            self._rebuild_snapshots()
         return queue
 
+    def _rebuild_snapshots(self) -> None:
+        """依目前的訂閱建立新的不可變快照並替換（呼叫端需持有鎖）。"""
+        channel_subscribers: Dict[str, set] = {}
+        wildcard = set()
+        for queue, subscription in self._subscriptions.items():
+            if subscription is None:
+                wildcard.add(queue)
+                continue
+            for channel in subscription:
+                channel_subscribers.setdefault(channel, set()).add(queue)
+
+        self._channel_subscribers = {
+            channel: frozenset(queues) for channel, queues in channel_subscribers.items()
+        }
+        self._wildcard_subscribers = frozenset(wildcard)
+        self._connections = frozenset(self._subscriptions)
+
     async def unregister(self, queue: asyncio.Queue) -> None:
         """
         從活躍連接集合中移除指定的消息隊列。
@@ -60,31 +230,67 @@ class StatusBroadcaster:
         Args:
             queue (asyncio.Queue): 要移除的消息隊列
         """
-        async with self._lock:
-            self._connections.discard(queue)
+        with self._lock:
+            if queue in self._subscriptions:
+                del self._subscriptions[queue]
+                self._rebuild_snapshots()
 
     async def broadcast(self, message: Dict[str, Any]) -> None:
         """
-        向所有活躍的WebSocket連接廣播消息。
+        向訂閱該頻道的WebSocket連接廣播消息。
 
-        遍歷所有連接隊列，嘗試發送消息。對於已滿或斷開的隊列進行清理。
+        Args:
+            message (Dict[str, Any]): 要廣播的消息字典
+        """
+        self.publish(message)
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        """
+        在事件循環執行緒上立即投遞消息（不建立協程）。
+
+        讀取當下的訂閱者快照（不取得鎖），只有訂閱訊息頻道（或 BroadcastMessage.topic）
+        或訂閱所有頻道的隊列會收到消息；消息包裝為 BroadcastMessage，各連線共用同一份
+        JSON 序列化結果。
 
         Args:
             message (Dict[str, Any]): 要廣播的消息字典
         """
-        import logging
-        logger = logging.getLogger(__name__)
-        async with self._lock:
-            dead = []
-            conn_count = len(self._connections)
-            logger.info(f"📢 廣播訊息到 {conn_count} 個連接: channel={message.get('channel')}, stage={message.get('stage')}")
-            for queue in list(self._connections):
-                try:
-                    queue.put_nowait(message)
-                except asyncio.QueueFull:
-                    dead.append(queue)
-            for queue in dead:
-                self._connections.discard(queue)
+        if not isinstance(message, BroadcastMessage):
+            message = BroadcastMessage(message)
+
+        wildcard = self._wildcard_subscribers
+        route = message.topic or message.get("channel")
+        channel_subscribers = self._channel_subscribers.get(route, frozenset())
+        targets = wildcard | channel_subscribers if wildcard else channel_subscribers
+
+        self.published_count += 1
+        for queue in targets:
+            if queue.offer(message):
+                self.dropped_count += 1
+            self.delivered_count += 1
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📢 廣播訊息到 %d 個連接: channel=%s, stage=%s",
+                         len(targets), message.get("channel"), message.get("stage"))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        取得發布、投遞與丟棄統計（dropped 包含滿載丟棄與同鍵合併取代的訊息）。
+
+        Returns:
+            Dict[str, Any]: 廣播統計與各頻道訂閱者數
+        """
+        connections = self._connections
+        return {
+            "subscribers": len(connections),
+            "channels": {channel: len(queues) for channel, queues in self._channel_subscribers.items()},
+            "wildcard_subscribers": len(self._wildcard_subscribers),
+            "published": self.published_count,
+            "delivered": self.delivered_count,
+            "dropped": self.dropped_count,
+            "subscriber_dropped": sum(queue.dropped for queue in connections),
+            "subscriber_coalesced": sum(queue.coalesced for queue in connections),
+        }
 
     def _ensure_loop(self) -> Optional[asyncio.AbstractEventLoop]:
         """
@@ -110,7 +316,7 @@ class StatusBroadcaster:
         在同步上下文中廣播消息。
 
         根據呼叫端是否已附著在事件迴圈上，選擇適當的排程策略：
-        - 若目前執行緒正運行於目標事件迴圈，直接建立 task。
+        - 若目前執行緒正運行於目標事件迴圈（例如 asyncio 遊戲循環），直接投遞到訂閱者佇列。
         - 否則透過 run_coroutine_threadsafe 排程協程。
 
         Args:
@@ -126,7 +332,7 @@ class StatusBroadcaster:
             running_loop = None
 
         if running_loop is loop:
-            loop.create_task(self.broadcast(message))
+            self.publish(message)
             return
 
         asyncio.run_coroutine_threadsafe(self.broadcast(message), loop)
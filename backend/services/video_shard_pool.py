@@ -0,0 +1,127 @@
+# =============================================================================
+# services/video_shard_pool.py - 影片分段平行分析
+# 將長影片切成多個時間範圍，交由獨立的子行程（各自持有 FaceMesh 實例）
+# 解碼與分析，讓處理量隨 CPU 核心數擴展。
+# =============================================================================
+
+import logging
+import math
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+from ..config.settings import VIDEO_SHARD_MIN_SECONDS, VIDEO_SHARD_WORKERS
+
+logger = logging.getLogger(__name__)
+
+FrameRange = Tuple[int, Optional[int]]
+
+
+def plan_video_shards(
+    frame_count: int,
+    fps: float,
+    sample_interval: int,
+    start_frame: int = 0,
+    max_shards: int = VIDEO_SHARD_WORKERS,
+    min_shard_seconds: float = VIDEO_SHARD_MIN_SECONDS,
+) -> List[FrameRange]:
+    """
+    將 [start_frame, frame_count) 切成不超過 max_shards 段的幀範圍。
+
+    每段起點都對齊 sample_interval，使分段後的取樣幀與單一行程逐段讀取時完全相同；
+    最後一段的結束設為 None，讀到檔尾為止（容器回報的幀數不一定準確）。
+    影片太短或無法取得 FPS 時回傳單一範圍，呼叫端應改用單一行程分析。
+
+    Returns:
+        List[Tuple[int, Optional[int]]]: (start_frame, end_frame) 列表
+    """
+    sample_interval = max(1, sample_interval)
+    span = frame_count - start_frame
+    if fps <= 0 or span <= 0 or max_shards <= 1:
+        return [(start_frame, None)]
+
+    min_shard_frames = max(sample_interval, int(min_shard_seconds * fps))
+    shard_count = min(max_shards, span // min_shard_frames)
+    if shard_count <= 1:
+        return [(start_frame, None)]
+
+    shard_frames = math.ceil(span / shard_count / sample_interval) * sample_interval
+    shards: List[FrameRange] = []
+    for index in range(shard_count):
+        begin = start_frame + index * shard_frames
+        if begin >= frame_count:
+            break
+        shards.append((begin, begin + shard_frames))
+    shards[-1] = (shards[-1][0], None)
+    return shards
+
+
+class VideoShardPool:
+    """
+    影片分段分析用的行程池。
+
+    子行程以 spawn 方式建立，避免複製已初始化 TensorFlow / MediaPipe 的父行程狀態；
+    行程池在第一次使用時建立並持續重用，讓每個子行程只需初始化一次模型。
+
+    Attributes:
+        max_workers (int): 子行程數量
+    """
+
+    def __init__(self, max_workers: int = VIDEO_SHARD_WORKERS) -> None:
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def map(self, func: Callable[..., Any], shard_args: Iterable[Tuple]) -> List[Any]:
+        """
+        在子行程中平行執行 func(*args)，依輸入順序回傳結果。
+
+        子行程異常終止時會重置行程池後再拋出例外，下一次呼叫會建立新的行程池。
+        """
+        executor = self._get_executor()
+        futures = [executor.submit(func, *args) for args in shard_args]
+        try:
+            return [future.result() for future in futures]
+        except BrokenProcessPool:
+            logger.error("影片分段行程池異常終止，將於下次使用時重建")
+            self.shutdown(wait=False)
+            raise
+
+    def shutdown(self, wait: bool = True) -> None:
+        """關閉行程池。"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_shared_pool: Optional[VideoShardPool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_video_shard_pool() -> VideoShardPool:
+    """取得全域共用的影片分段行程池。"""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = VideoShardPool()
+        return _shared_pool
+
+
+def shutdown_video_shard_pool() -> None:
+    """關閉全域共用的影片分段行程池（應用程式關閉時呼叫）。"""
+    with _shared_pool_lock:
+        pool = _shared_pool
+    if pool is not None:
+        pool.shutdown(wait=False)
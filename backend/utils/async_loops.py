@@ -0,0 +1,93 @@
+# =============================================================================
+# utils/async_loops.py - 事件迴圈上的背景循環
+# 遊戲與偵測狀態機以 asyncio 任務執行，計時使用 asyncio.sleep，
+# 阻塞的攝影機讀取與推論交由執行緒池；廣播直接在事件迴圈上投遞，不需跨執行緒排程。
+# =============================================================================
+
+import asyncio
+import logging
+import threading
+from typing import Any, Coroutine, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def start_loop_task(coro: Coroutine[Any, Any, Any], name: str) -> asyncio.Task:
+    """
+    在目前執行中的事件迴圈建立背景任務，未處理的例外會記錄到日誌。
+
+    Raises:
+        RuntimeError: 目前執行緒沒有執行中的事件迴圈
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        coro.close()
+        raise
+    task = loop.create_task(coro, name=name)
+    task.add_done_callback(_log_task_result)
+    return task
+
+
+def cancel_loop_task(task: Optional[asyncio.Task]) -> None:
+    """
+    取消背景任務（可從任意執行緒呼叫）。
+
+    任務已結束，或呼叫端就是該任務本身（例如循環結束時的自動停止）時不做任何事。
+    """
+    if task is None or task.done():
+        return
+
+    loop = task.get_loop()
+    try:
+        running_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        running_loop = None
+
+    if running_loop is loop:
+        if asyncio.current_task() is not task:
+            task.cancel()
+    elif not loop.is_closed():
+        loop.call_soon_threadsafe(task.cancel)
+
+
+def _log_task_result(task: asyncio.Task) -> None:
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc is not None:
+        logger.error("背景任務 %s 異常結束: %s", task.get_name(), exc, exc_info=exc)
+
+
+class SerializedCapture:
+    """
+    讓讀取與釋放互斥的 cv2.VideoCapture 包裝。
+
+    背景循環以 ``await asyncio.to_thread(camera.read)`` 讀取影格，停止時事件迴圈上的
+    ``release()`` 會等待進行中的讀取結束後才釋放裝置，之後的讀取回傳 ``(False, None)``，
+    循環因此自然結束，不需要 join 背景執行緒。
+    """
+
+    def __init__(self, capture: Any) -> None:
+        self._capture = capture
+        self._lock = threading.Lock()
+
+    def isOpened(self) -> bool:
+        capture = self._capture
+        return capture is not None and capture.isOpened()
+
+    def set(self, prop_id: int, value: float) -> bool:
+        with self._lock:
+            return self._capture is not None and self._capture.set(prop_id, value)
+
+    def read(self) -> Tuple[bool, Any]:
+        with self._lock:
+            if self._capture is None or not self._capture.isOpened():
+                return False, None
+            return self._capture.read()
+
+    def release(self) -> None:
+        with self._lock:
+            if self._capture is not None:
+                self._capture.release()
+                self._capture = None
@@ -0,0 +1,113 @@
+# =============================================================================
+# utils/canvas_encoding.py - 畫布影像編碼與快取
+# 以 cv2.imencode 將畫布編碼為 data URL（可調 PNG 壓縮等級或改用 WebP/JPEG），
+# 並依畫布版本號快取編碼結果，畫布未變更時重複推送不需重新編碼。
+# =============================================================================
+
+import base64
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from ..config.settings import (
+    CANVAS_ENCODE_FORMAT,
+    CANVAS_ENCODE_QUALITY,
+    CANVAS_PNG_COMPRESSION,
+)
+
+_MIME_TYPES = {"png": "image/png", "webp": "image/webp", "jpeg": "image/jpeg"}
+
+# WebSocket 畫布更新模式：完整 PNG 快照、筆劃片段、髒區域 PNG
+CANVAS_UPDATE_MODES = ("full", "delta", "patch")
+
+
+def _flatten_alpha(image: np.ndarray, background: Tuple[int, int, int] = (255, 255, 255)) -> np.ndarray:
+    """將 BGRA 影像合成到純色背景（JPEG 不支援透明度）。"""
+    alpha = image[:, :, 3:4].astype(np.float32) / 255.0
+    bg = np.array(background, dtype=np.float32)
+    blended = image[:, :, :3].astype(np.float32) * alpha + bg * (1.0 - alpha)
+    return blended.astype(np.uint8)
+
+
+def encode_canvas_data_url(
+    image: np.ndarray,
+    fmt: Optional[str] = None,
+    png_compression: int = CANVAS_PNG_COMPRESSION,
+    quality: int = CANVAS_ENCODE_QUALITY,
+    flip: bool = False,
+) -> str:
+    """
+    將 BGR / BGRA 畫布編碼為 data URL。
+
+    Args:
+        image: BGR 或 BGRA 影像
+        fmt: "png"、"webp" 或 "jpeg"，預設使用 CANVAS_ENCODE_FORMAT
+        png_compression: PNG 壓縮等級 (0-9)，數值越小編碼越快
+        quality: WebP / JPEG 品質 (1-100)
+        flip: 是否左右反轉（符合鏡像攝影機視角）
+
+    Returns:
+        str: ``data:image/...;base64,...``
+    """
+    fmt = (fmt or CANVAS_ENCODE_FORMAT).lower()
+    if fmt == "jpg":
+        fmt = "jpeg"
+    if fmt not in _MIME_TYPES:
+        raise ValueError(f"不支援的畫布編碼格式: {fmt}")
+
+    if flip:
+        image = cv2.flip(image, 1)
+
+    if fmt == "png":
+        params = [cv2.IMWRITE_PNG_COMPRESSION, int(png_compression)]
+    elif fmt == "webp":
+        params = [cv2.IMWRITE_WEBP_QUALITY, int(quality)]
+    else:
+        if image.ndim == 3 and image.shape[2] == 4:
+            image = _flatten_alpha(image)
+        params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+
+    ok, buffer = cv2.imencode(f".{'jpg' if fmt == 'jpeg' else fmt}", image, params)
+    if not ok:
+        raise ValueError(f"畫布編碼失敗: {fmt}")
+    return f"data:{_MIME_TYPES[fmt]};base64,{base64.b64encode(buffer.tobytes()).decode()}"
+
+
+class EncodedCanvasCache:
+    """
+    以畫布版本號為鍵的編碼結果快取。
+
+    每個變體（例如不同格式）只保留最新版本的一份編碼結果；
+    版本號相同時直接回傳快取，否則呼叫 encode() 重新編碼。
+
+    Attributes:
+        hits (int): 快取命中次數
+        misses (int): 重新編碼次數
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, Tuple[int, str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, version: int, encode: Callable[[], str], variant: str = "") -> str:
+        """取得指定版本的編碼結果，必要時重新編碼。"""
+        with self._lock:
+            entry = self._entries.get(variant)
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return entry[1]
+
+        encoded = encode()
+        with self._lock:
+            self._entries[variant] = (version, encoded)
+            self.misses += 1
+        return encoded
+
+    def clear(self) -> None:
+        """清除所有快取。"""
+        with self._lock:
+            self._entries.clear()
@@ -12,10 +12,12 @@ import math
 from typing import Tuple, Optional, Dict, List, Any
 from dataclasses import dataclass, asdict
 from enum import Enum
-from io import BytesIO
 from PIL import Image
 import time
 
+from .canvas_encoding import EncodedCanvasCache, encode_canvas_data_url
+from ..config.settings import CANVAS_ENCODE_FORMAT
+
 
 class BrushType(Enum):
     """筆刷類型枚舉"""
@@ -120,6 +122,8 @@ class DrawingEngine:
 
         # 性能優化
         self.dirty_regions = []  # 需要更新的區域
+        self.version = 0  # 畫布內容版本號，變更時遞增
+        self._encoded_cache = EncodedCanvasCache()
         self.last_position = None
         self.drawing_active = False
 
@@ -225,6 +229,7 @@ class DrawingEngine:
 
     def _draw_point(self, x: int, y: int, size: int):
         """繪製單個點"""
+        self.version += 1
         if self.current_brush == BrushType.ERASER:
             cv2.circle(self.canvas, (x, y), size, self.background_color, -1)
         else:
@@ -246,6 +251,7 @@ class DrawingEngine:
 
     def _draw_direct_line(self, start_pos: Tuple[int, int], end_pos: Tuple[int, int], pressure: float):
         """直接繪製線段"""
+        self.version += 1
         size = max(1, int(self.current_size * pressure))
 
         if self.current_brush == BrushType.ERASER:
@@ -255,6 +261,7 @@ class DrawingEngine:
 
     def _draw_smooth_line(self, start_pos: Tuple[int, int], end_pos: Tuple[int, int], pressure: float):
         """繪製平滑線段"""
+        self.version += 1
         x1, y1 = start_pos
         x2, y2 = end_pos
 
@@ -344,6 +351,8 @@ class DrawingEngine:
                 dtype=np.uint8
             )
 
+            self.version += 1
+
             # 清空筆觸歷史
             self.strokes = []
             self.current_stroke = None
@@ -373,20 +382,12 @@ class DrawingEngine:
                 return self.canvas.copy()
 
             elif format == "base64":
-                # 轉換為RGB格式
-                rgb_canvas = cv2.cvtColor(self.canvas, cv2.COLOR_BGR2RGB)
-
-                # 轉換為PIL Image
-                pil_image = Image.fromarray(rgb_canvas)
-
-                # 轉換為base64
-                buffer = BytesIO()
-                pil_image.save(buffer, format='PNG')
-                img_bytes = buffer.getvalue()
-                buffer.close()
-
-                base64_string = base64.b64encode(img_bytes).decode('utf-8')
-                return f"data:image/png;base64,{base64_string}"
+                # 依版本號快取編碼結果，畫布未變更時不重新編碼
+                return self._encoded_cache.get(
+                    self.version,
+                    lambda: encode_canvas_data_url(self.canvas),
+                    variant=CANVAS_ENCODE_FORMAT,
+                )
 
             elif format == "bytes":
                 # 編碼為PNG bytes
@@ -489,6 +490,7 @@ class DrawingEngine:
 
     def _redraw_canvas(self):
         """重繪整個畫布"""
+        self.version += 1
         # 清空畫布
         self.canvas = np.full(
             (self.canvas_height, self.canvas_width, 3),
@@ -556,6 +558,7 @@ class DrawingEngine:
 
             # 更新畫布
             self.canvas = resized_content
+            self.version += 1
             self.canvas_width = new_width
             self.canvas_height = new_height
 
@@ -0,0 +1,105 @@
+# =============================================================================
+# utils/frame_mailbox.py - 最新影格信箱
+# 將 WebSocket 的接收與推論處理解耦：每條連線只保留最新一幀，
+# 推論較慢時舊影格直接被覆蓋並計數，讓端到端延遲維持在一次推論時間之內。
+# =============================================================================
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import WebSocketDisconnect
+
+logger = logging.getLogger(__name__)
+
+
+class LatestFrameMailbox:
+    """
+    單槽影格信箱（latest-frame-wins）。
+
+    接收端以 ``put()`` 放入影格，若前一幀尚未被處理即被覆蓋並計入丟棄數；
+    處理端以 ``await get()`` 取出目前最新的影格，信箱關閉後回傳 None。
+
+    Attributes:
+        received (int): 放入的影格總數
+        processed (int): 被取出處理的影格總數
+        dropped (int): 未處理即被覆蓋或捨棄的影格總數
+    """
+
+    def __init__(self) -> None:
+        self._message: Optional[Dict[str, Any]] = None
+        self._event = asyncio.Event()
+        self._closed = False
+        self._unreported_drops = 0
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+
+    def put(self, message: Dict[str, Any]) -> bool:
+        """放入最新影格；回傳是否覆蓋了尚未處理的舊影格。"""
+        replaced = self._message is not None
+        if replaced:
+            self.dropped += 1
+            self._unreported_drops += 1
+        self._message = message
+        self.received += 1
+        self._event.set()
+        return replaced
+
+    def discard(self) -> None:
+        """捨棄尚未處理的影格（例如工作階段停止時）。"""
+        if self._message is not None:
+            self._message = None
+            self.dropped += 1
+            self._unreported_drops += 1
+
+    async def get(self) -> Optional[Dict[str, Any]]:
+        """等待並取出最新影格；信箱關閉且沒有待處理影格時回傳 None。"""
+        while self._message is None:
+            if self._closed:
+                return None
+            self._event.clear()
+            await self._event.wait()
+        message, self._message = self._message, None
+        self.processed += 1
+        return message
+
+    def take_dropped(self) -> int:
+        """取得自上次回報以來的丟棄影格數並歸零。"""
+        dropped, self._unreported_drops = self._unreported_drops, 0
+        return dropped
+
+    def close(self) -> None:
+        """關閉信箱，喚醒等待中的處理端。"""
+        self._closed = True
+        self._event.set()
+
+    def get_stats(self) -> Dict[str, int]:
+        """回傳接收、處理與丟棄影格數。"""
+        return {
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped,
+        }
+
+
+async def run_latest_frame_worker(
+    mailbox: LatestFrameMailbox,
+    handle_frame: Callable[[Dict[str, Any], int], Awaitable[None]],
+) -> None:
+    """
+    持續從信箱取出最新影格並交給 handle_frame(message, dropped_since_last)。
+
+    handle_frame 應自行回報處理錯誤；連線中斷時結束迴圈，其餘例外記錄後繼續處理下一幀。
+    """
+    while True:
+        message = await mailbox.get()
+        if message is None:
+            return
+        try:
+            await handle_frame(message, mailbox.take_dropped())
+        except (WebSocketDisconnect, RuntimeError) as exc:
+            logger.info("影格處理結束（連線已關閉）: %s", exc)
+            return
+        except Exception as exc:
+            logger.exception("影格處理錯誤: %s", exc)
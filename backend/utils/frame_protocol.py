@@ -0,0 +1,144 @@
+# =============================================================================
+# utils/frame_protocol.py - WebSocket 二進位影格協定
+# 攝影機影格以「固定標頭 + 原始 JPEG 位元組」的二進位訊息傳送，省去
+# data URL / base64 編解碼；每條連線需先協商，未協商的客戶端維持 JSON 格式。
+# =============================================================================
+
+import json
+import struct
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+# 標頭：協定版本 (u8)、訊息類型 (u8)、時間戳 (f64)、序號 (u32)，網路位元組序
+FRAME_HEADER = struct.Struct("!BBdI")
+FRAME_PROTOCOL_VERSION = 1
+
+# 訊息類型
+MSG_FRAME = 1
+
+
+class FrameProtocolError(ValueError):
+    """二進位訊息格式錯誤或未經協商。"""
+
+
+@dataclass
+class BinaryFrame:
+    """解析後的二進位影格。"""
+
+    msg_type: int
+    timestamp: float
+    seq: int
+    payload: bytes
+
+
+def pack_frame(payload: bytes, timestamp: float, seq: int, msg_type: int = MSG_FRAME) -> bytes:
+    """
+    將影像位元組包裝為二進位影格訊息（客戶端格式參考與測試用）。
+
+    Args:
+        payload: 已編碼的影像位元組（JPEG / PNG）
+        timestamp: 客戶端時間戳
+        seq: 序號（超過 u32 範圍時取模）
+        msg_type: 訊息類型
+
+    Returns:
+        bytes: 標頭 + payload
+    """
+    header = FRAME_HEADER.pack(FRAME_PROTOCOL_VERSION, msg_type, float(timestamp), seq & 0xFFFFFFFF)
+    return header + bytes(payload)
+
+
+def unpack_frame(data: bytes) -> BinaryFrame:
+    """
+    解析二進位影格訊息。
+
+    Raises:
+        FrameProtocolError: 長度不足、版本不符或未知訊息類型
+    """
+    if len(data) <= FRAME_HEADER.size:
+        raise FrameProtocolError("二進位訊息長度不足")
+    version, msg_type, timestamp, seq = FRAME_HEADER.unpack_from(data)
+    if version != FRAME_PROTOCOL_VERSION:
+        raise FrameProtocolError(f"不支援的協定版本: {version}")
+    if msg_type != MSG_FRAME:
+        raise FrameProtocolError(f"未知的訊息類型: {msg_type}")
+    return BinaryFrame(msg_type=msg_type, timestamp=timestamp, seq=seq, payload=data[FRAME_HEADER.size:])
+
+
+class FrameProtocolSession:
+    """
+    單一 WebSocket 連線的影格協定狀態。
+
+    ``receive()`` 取代 ``websocket.receive_json()``：文字訊息照常解析為 JSON；
+    客戶端送出 ``{"type": "negotiate", "binary_frames": true}`` 後即可改送二進位影格，
+    二進位影格會被轉換成與 JSON 影格相同結構的字典（``image`` 欄位為原始位元組），
+    讓各端點沿用既有的處理流程。
+
+    Attributes:
+        frame_message_type (str): 二進位影格對應的 JSON 訊息類型（如 "frame"、"camera_frame"）
+        binary_enabled (bool): 是否已協商啟用二進位影格
+        binary_frames (int): 已接收的二進位影格數
+    """
+
+    def __init__(self, frame_message_type: str = "frame") -> None:
+        self.frame_message_type = frame_message_type
+        self.binary_enabled = False
+        self.binary_frames = 0
+        self.last_seq: Optional[int] = None
+
+    def negotiate(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """處理協商訊息並回傳要送給客戶端的回覆。"""
+        self.binary_enabled = bool(message.get("binary_frames", False))
+        return {
+            "type": "negotiated",
+            "binary_frames": self.binary_enabled,
+            "protocol_version": FRAME_PROTOCOL_VERSION,
+            "header_format": FRAME_HEADER.format,
+            "header_size": FRAME_HEADER.size,
+            "frame_message_type": MSG_FRAME,
+            "timestamp": message.get("timestamp", 0),
+        }
+
+    def to_message(self, frame: BinaryFrame) -> Dict[str, Any]:
+        """將二進位影格轉為端點使用的訊息字典。"""
+        self.binary_frames += 1
+        self.last_seq = frame.seq
+        return {
+            "type": self.frame_message_type,
+            "image": frame.payload,
+            "timestamp": frame.timestamp,
+            "seq": frame.seq,
+            "binary": True,
+        }
+
+    async def receive(self, websocket: WebSocket) -> Dict[str, Any]:
+        """
+        接收下一則應用層訊息。
+
+        協商訊息與格式錯誤的二進位訊息會在此直接回覆，不會回傳給呼叫端。
+
+        Raises:
+            WebSocketDisconnect: 連線已關閉
+        """
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+            data = message.get("bytes")
+            if data is not None:
+                try:
+                    if not self.binary_enabled:
+                        raise FrameProtocolError("尚未協商二進位影格模式")
+                    return self.to_message(unpack_frame(data))
+                except FrameProtocolError as exc:
+                    await websocket.send_json({"type": "error", "message": f"二進位影格錯誤: {exc}"})
+                    continue
+
+            payload = json.loads(message.get("text") or "{}")
+            if isinstance(payload, dict) and payload.get("type") == "negotiate":
+                await websocket.send_json(self.negotiate(payload))
+                continue
+            return payload
@@ -7,12 +7,16 @@
 import cv2
 import numpy as np
 import math
+import uuid
 from typing import List, Tuple, Optional, Dict, Any
 from dataclasses import dataclass
 from enum import Enum
 from types import SimpleNamespace
 
+from ..config.settings import DRAWING_MAX_SESSIONS
 from .gpu_runtime import configure_gpu_runtime
+from .instance_pool import InstancePool
+from .model_registry import model_registry
 
 configure_gpu_runtime()
 
@@ -26,6 +30,10 @@ except Exception as exc:  # pragma: no cover - depends on runtime installation
     _MEDIAPIPE_ERROR = str(exc)
 
 
+# 共用 MediaPipe Hands 實例池的上限：每個繪畫工作階段一個實例，另加應用程式層級的繪畫服務
+HANDS_POOL_SIZE = DRAWING_MAX_SESSIONS + 1
+
+
 class GestureType(Enum):
     """手勢類型枚舉"""
     NONE = "none"
@@ -81,7 +89,9 @@ class HandTrackingModule:
 
         self.mediapipe_ready = _MEDIAPIPE_AVAILABLE and mp is not None
         self.init_error = _MEDIAPIPE_ERROR
-        self.hands = None
+        self.hands_pool: Optional[InstancePool] = None
+        # 在共用 Hands 實例池中的專屬 session，保有本模組的追蹤狀態
+        self._pool_session = f"hand-tracking-{uuid.uuid4().hex}"
         self.mp_hands = None
         self.mp_draw = None
         self.mp_draw_styles = None
@@ -91,17 +101,26 @@ class HandTrackingModule:
                 self.mp_hands = mp.solutions.hands
                 self.mp_draw = mp.solutions.drawing_utils
                 self.mp_draw_styles = mp.solutions.drawing_styles
-                self.hands = self.mp_hands.Hands(
-                    static_image_mode=False,
-                    max_num_hands=self.config['max_num_hands'],
-                    min_detection_confidence=self.config['min_detection_confidence'],
-                    min_tracking_confidence=self.config['min_tracking_confidence'],
-                    model_complexity=self.config['model_complexity']
+                # 相同設定的 Hands 由模型登錄表共用實例池，不會重複載入模型
+                hands_pool = model_registry.pool(
+                    "mp_hands",
+                    {
+                        "static_image_mode": False,
+                        "max_num_hands": self.config['max_num_hands'],
+                        "min_detection_confidence": self.config['min_detection_confidence'],
+                        "min_tracking_confidence": self.config['min_tracking_confidence'],
+                        "model_complexity": self.config['model_complexity'],
+                    },
+                    self.mp_hands.Hands,
+                    max_instances=HANDS_POOL_SIZE,
                 )
+                with hands_pool.checkout(self._pool_session):
+                    pass
+                self.hands_pool = hands_pool
             except Exception as exc:  # pragma: no cover - depends on GPU drivers
                 self.mediapipe_ready = False
                 self.init_error = str(exc)
-                self.hands = None
+                self.hands_pool = None
 
         # 狀態追蹤
         self.previous_gesture = GestureType.NONE
@@ -124,7 +143,7 @@ class HandTrackingModule:
             GestureResult: 手勢識別結果
         """
         try:
-            if frame is None or not self.mediapipe_ready or self.hands is None:
+            if frame is None or not self.mediapipe_ready or self.hands_pool is None:
                 return GestureResult(
                     gesture_type=GestureType.UNKNOWN,
                     confidence=0.0,
@@ -133,7 +152,8 @@ class HandTrackingModule:
 
             # 轉換顏色空間 (BGR -> RGB)
             rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.hands.process(rgb_frame)
+            with self.hands_pool.checkout(self._pool_session) as hands:
+                results = hands.process(rgb_frame)
 
             if results.multi_hand_landmarks:
                 # 取第一隻手的關鍵點
@@ -511,6 +531,7 @@ class HandTrackingModule:
         return distance
 
     def cleanup(self):
-        """清理資源"""
-        if hasattr(self, 'hands'):
-            self.hands.close()
+        """清理資源：釋放本模組在共用實例池中的 Hands 實例"""
+        if self.hands_pool is not None:
+            self.hands_pool.release_session(self._pool_session)
+            self.hands_pool = None
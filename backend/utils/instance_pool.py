@@ -0,0 +1,259 @@
+# =============================================================================
+# utils/instance_pool.py - 模型實例池
+# 以借出/歸還方式管理 MediaPipe FaceMesh 等非執行緒安全的模型實例：
+# 串流情境依 session 綁定專屬實例以保留時序追蹤狀態，靜態影像則共用閒置實例。
+# =============================================================================
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Generic, Iterator, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class InstancePoolExhausted(RuntimeError):
+    """在等待時限內沒有可借出的實例。"""
+
+
+class _SessionSlot(Generic[T]):
+    """綁定於單一 session 的實例與其互斥鎖。"""
+
+    def __init__(self, instance: T) -> None:
+        self.instance = instance
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        # 已被關閉（release_session / trim_idle）的 slot，持有舊參照的借出會改用新 slot
+        self.closed = False
+
+
+class InstancePool(Generic[T]):
+    """
+    非執行緒安全模型實例的借出/歸還池。
+
+    - ``checkout()``：借出任一閒置實例，用完歸還，供靜態影像等無狀態推論平行使用。
+    - ``checkout(session_id)``：借出綁定該 session 的專屬實例，同一 session 的呼叫
+      會依序執行並沿用同一個實例的追蹤狀態；``release_session()`` 時關閉該實例，
+      避免舊的追蹤狀態帶入下一個串流。
+
+    實例總數（閒置 + 借出中 + 綁定 session）不超過 ``max_instances``，
+    達到上限時借出會等待，逾時拋出 InstancePoolExhausted。
+    ``trim_idle()`` 關閉閒置過久的實例，下一次借出時重新建立。
+
+    Attributes:
+        name (str): 池名稱（記錄用）
+        max_instances (int): 實例數上限
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], T],
+        max_instances: int,
+        name: str = "pool",
+        closer: Optional[Callable[[T], None]] = None,
+    ) -> None:
+        self.name = name
+        self.max_instances = max(1, max_instances)
+        self._factory = factory
+        self._closer = closer or self._default_close
+        self._idle: List[T] = []
+        self._sessions: Dict[str, _SessionSlot[T]] = {}
+        self._total = 0
+        self._cond = threading.Condition()
+        self.last_used = time.monotonic()
+        self.created_count = 0
+        self.closed_count = 0
+        self.wait_count = 0
+
+    @staticmethod
+    def _default_close(instance: T) -> None:
+        close = getattr(instance, "close", None)
+        if callable(close):
+            close()
+
+    def _close(self, instance: T) -> None:
+        try:
+            self._closer(instance)
+        except Exception as exc:  # pragma: no cover - 關閉失敗只記錄
+            logger.warning("關閉 %s 實例失敗: %s", self.name, exc)
+        self.closed_count += 1
+
+    def prefill(self, count: int = 1) -> None:
+        """預先建立閒置實例；建立失敗時拋出 factory 的例外。"""
+        for _ in range(count):
+            with self._cond:
+                if self._total >= self.max_instances:
+                    return
+                self._total += 1
+            try:
+                instance = self._factory()
+            except Exception:
+                with self._cond:
+                    self._total -= 1
+                raise
+            self.created_count += 1
+            with self._cond:
+                self._idle.append(instance)
+                self._cond.notify()
+
+    def _acquire_instance(self, timeout: Optional[float]) -> T:
+        """取得閒置實例或建立新實例（必要時等待）。"""
+        with self._cond:
+            while not self._idle and self._total >= self.max_instances:
+                self.wait_count += 1
+                if not self._cond.wait(timeout=timeout):
+                    raise InstancePoolExhausted(f"{self.name} 實例池已滿 ({self.max_instances})")
+            if self._idle:
+                return self._idle.pop()
+            self._total += 1
+
+        try:
+            instance = self._factory()
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+        self.created_count += 1
+        return instance
+
+    def _return_instance(self, instance: T) -> None:
+        with self._cond:
+            self._idle.append(instance)
+            self._cond.notify()
+
+    @contextmanager
+    def checkout(self, session_id: Optional[str] = None, timeout: Optional[float] = None) -> Iterator[T]:
+        """
+        借出一個實例，離開 with 區塊時自動歸還。
+
+        Args:
+            session_id: 串流 session 識別碼；None 表示借用任一閒置實例
+            timeout: 等待可用實例的秒數上限，None 表示無限等待
+        """
+        self.last_used = time.monotonic()
+        if session_id is None:
+            instance = self._acquire_instance(timeout)
+            try:
+                yield instance
+            finally:
+                self.last_used = time.monotonic()
+                self._return_instance(instance)
+            return
+
+        while True:
+            slot = self._session_slot(session_id, timeout)
+            slot.lock.acquire()
+            if not slot.closed:
+                break
+            slot.lock.release()
+
+        try:
+            yield slot.instance
+        finally:
+            slot.last_used = self.last_used = time.monotonic()
+            slot.lock.release()
+
+    def _session_slot(self, session_id: str, timeout: Optional[float]) -> _SessionSlot[T]:
+        with self._cond:
+            slot = self._sessions.get(session_id)
+        if slot is None:
+            created = _SessionSlot(self._acquire_instance(timeout))
+            with self._cond:
+                slot = self._sessions.setdefault(session_id, created)
+            if slot is not created:
+                self._return_instance(created.instance)
+        return slot
+
+    def release_session(self, session_id: str) -> None:
+        """結束 session：關閉其專屬實例並釋出名額。"""
+        with self._cond:
+            slot = self._sessions.pop(session_id, None)
+        if slot is None:
+            return
+        with slot.lock:
+            self._close_slot(slot)
+
+    def _close_slot(self, slot: _SessionSlot[T]) -> None:
+        # 呼叫端須持有 slot.lock，且 slot 已自 _sessions 移除
+        slot.closed = True
+        self._close(slot.instance)
+        with self._cond:
+            self._total -= 1
+            self._cond.notify()
+
+    def trim_idle(self, max_idle_seconds: float, now: Optional[float] = None) -> int:
+        """
+        關閉閒置過久的實例，回傳關閉的數量。
+
+        整個池超過 ``max_idle_seconds`` 未被借用時關閉所有閒置實例；
+        session 實例則依各自最後使用時間判斷（正在使用中的不會被關閉），
+        之後同一 session 再借用時會取得新實例並重新開始追蹤。
+        """
+        now = time.monotonic() if now is None else now
+        closed = 0
+
+        with self._cond:
+            idle: List[T] = []
+            if now - self.last_used >= max_idle_seconds:
+                idle, self._idle = self._idle, []
+                self._total -= len(idle)
+                self._cond.notify_all()
+            stale = [
+                (session_id, slot) for session_id, slot in self._sessions.items()
+                if now - slot.last_used >= max_idle_seconds
+            ]
+        for instance in idle:
+            self._close(instance)
+            closed += 1
+
+        for session_id, slot in stale:
+            if not slot.lock.acquire(blocking=False):
+                continue
+            try:
+                with self._cond:
+                    if self._sessions.get(session_id) is not slot or now - slot.last_used < max_idle_seconds:
+                        continue
+                    del self._sessions[session_id]
+                self._close_slot(slot)
+                closed += 1
+            finally:
+                slot.lock.release()
+
+        if closed:
+            logger.info("%s 關閉 %d 個閒置實例", self.name, closed)
+        return closed
+
+    def set_max_instances(self, max_instances: int) -> None:
+        """調整實例數上限（已存在的實例不受影響）。"""
+        with self._cond:
+            self.max_instances = max(1, max_instances)
+            self._cond.notify_all()
+
+    def get_stats(self) -> Dict:
+        """回傳實例數與等待次數等統計資訊。"""
+        with self._cond:
+            return {
+                "max_instances": self.max_instances,
+                "total": self._total,
+                "idle": len(self._idle),
+                "sessions": len(self._sessions),
+                "created": self.created_count,
+                "closed": self.closed_count,
+                "waits": self.wait_count,
+                "idle_seconds": round(time.monotonic() - self.last_used, 1),
+            }
+
+    def close(self) -> None:
+        """關閉所有閒置與 session 實例。"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            session_ids = list(self._sessions)
+            self._total -= len(idle)
+        for instance in idle:
+            self._close(instance)
+        for session_id in session_ids:
+            self.release_session(session_id)
@@ -0,0 +1,166 @@
+# =============================================================================
+# utils/lazy_service.py - 延遲建立的服務與背景暖機
+# 服務（及其 MediaPipe / TensorFlow 模型）不在匯入 backend.app 時建立，
+# 而是在背景暖機或第一次被使用時才建立；載入狀態供 /api/system/ready 回報。
+# =============================================================================
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Callable, Dict, Generic, Iterable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+STATE_PENDING = "pending"
+STATE_LOADING = "loading"
+STATE_READY = "ready"
+STATE_FAILED = "failed"
+# 服務已建立但其中有模型載入失敗
+STATE_DEGRADED = "degraded"
+# 模型尚未載入或已被釋放，下次使用時重新載入
+STATE_UNLOADED = "unloaded"
+
+
+def model_state(available: bool, error: Optional[str] = None) -> Dict:
+    """單一模型的載入狀態（服務 ``get_model_status()`` 的值）。"""
+    if available:
+        return {"state": STATE_READY, "error": None}
+    return {"state": STATE_FAILED, "error": error}
+
+
+class LazyService(Generic[T]):
+    """
+    首次使用時才建立的服務代理。
+
+    屬性存取會轉交給實際的服務實例，尚未建立時先在呼叫端執行緒建立；
+    並行的存取會等待同一次建立完成。建立失敗時記錄錯誤，之後的存取直接拋出。
+
+    Attributes:
+        name (str): 服務名稱（/api/system/ready 的鍵）
+        state (str): pending / loading / ready / failed
+        load_seconds (Optional[float]): 建立耗時
+        error (Optional[str]): 建立失敗的原因
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T]) -> None:
+        self.name = name
+        self._factory = factory
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+        self.state = STATE_PENDING
+        self.load_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def loaded(self) -> bool:
+        """服務是否已建立完成。"""
+        return self._instance is not None
+
+    def get(self) -> T:
+        """
+        取得服務實例，尚未建立時立即建立。
+
+        Raises:
+            RuntimeError: 服務建立失敗
+        """
+        instance = self._instance
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            if self._instance is not None:
+                return self._instance
+            if self.state == STATE_FAILED:
+                raise RuntimeError(f"{self.name} 初始化失敗: {self.error}")
+
+            self.state = STATE_LOADING
+            start_time = time.perf_counter()
+            try:
+                instance = self._factory()
+            except Exception as exc:
+                self.state = STATE_FAILED
+                self.error = str(exc)
+                logger.exception("建立服務 %s 失敗: %s", self.name, exc)
+                raise RuntimeError(f"{self.name} 初始化失敗: {exc}") from exc
+
+            self.load_seconds = round(time.perf_counter() - start_time, 3)
+            self._instance = instance
+            self.state = STATE_READY
+            logger.info("服務 %s 已就緒 (%.3fs)", self.name, self.load_seconds)
+            return instance
+
+    def status(self) -> Dict:
+        """
+        回傳載入狀態。
+
+        服務建立完成且提供 ``get_model_status()`` 時一併回報各模型狀態；
+        任一模型載入失敗時服務狀態為 degraded。
+        """
+        status = {
+            "state": self.state,
+            "load_seconds": self.load_seconds,
+            "error": self.error,
+        }
+        # 以類別查找，避免測試替身自動產生的屬性被當成模型狀態
+        get_model_status = getattr(type(self._instance), "get_model_status", None)
+        if self._instance is not None and callable(get_model_status):
+            models = get_model_status(self._instance)
+            status["models"] = models
+            if any(model["state"] == STATE_FAILED for model in models.values()):
+                status["state"] = STATE_DEGRADED
+        return status
+
+    def __getattr__(self, item: str):
+        # 只在一般屬性查找失敗時呼叫；私有屬性不轉交，避免在初始化前遞迴
+        if item.startswith("_"):
+            raise AttributeError(item)
+        return getattr(self.get(), item)
+
+
+async def resolve_service(service: T) -> T:
+    """
+    在事件迴圈上取得服務實例而不阻塞迴圈。
+
+    LazyService 已建立時直接回傳實例；尚未建立（或背景暖機正在建立）時改在執行緒池中
+    等待建立完成。非 LazyService 物件（例如測試注入的替身）原樣回傳。
+
+    Raises:
+        RuntimeError: 服務建立失敗
+    """
+    if not isinstance(service, LazyService):
+        return service
+    if service.loaded:
+        return service.get()
+    return await asyncio.to_thread(service.get)
+
+
+async def warm_up_services(services: Iterable[LazyService]) -> None:
+    """
+    依序在執行緒池中建立各服務（應用程式啟動後的背景任務）。
+
+    單一服務建立失敗只記錄在該服務的狀態中，不影響其他服務暖機。
+    """
+    for service in services:
+        if service.state != STATE_PENDING:
+            continue
+        try:
+            await asyncio.to_thread(service.get)
+        except RuntimeError:
+            continue
+
+
+__all__ = [
+    "LazyService",
+    "resolve_service",
+    "warm_up_services",
+    "STATE_PENDING",
+    "STATE_LOADING",
+    "STATE_READY",
+    "STATE_FAILED",
+    "STATE_DEGRADED",
+    "STATE_UNLOADED",
+    "model_state",
+]
@@ -0,0 +1,345 @@
+# =============================================================================
+# utils/model_registry.py - 行程層級的模型登錄表
+# 以「模型類型 + 建構參數」為鍵統一建立 MediaPipe 模型：相同設定的模型只載入一份
+# （共用實例或共用實例池），記錄每個模型估計佔用的記憶體，並卸載閒置過久的模型，
+# 讓常駐記憶體只反映實際有人在玩的遊戲。
+# =============================================================================
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Generic, Iterator, Mapping, Optional, Tuple, TypeVar
+
+from ..config.settings import MODEL_IDLE_CHECK_SECONDS, MODEL_IDLE_UNLOAD_SECONDS
+from .instance_pool import InstancePool
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+KIND_SHARED = "shared"
+KIND_POOL = "pool"
+
+# FaceMesh 建構參數（不含 static_image_mode）：情緒與動作偵測使用相同設定，
+# 兩者的串流 FaceMesh 因此共用同一個實例池
+FACE_MESH_OPTIONS: Dict[str, Any] = {
+    "max_num_faces": 1,
+    "refine_landmarks": True,
+    "min_detection_confidence": 0.5,
+    "min_tracking_confidence": 0.5,
+}
+
+
+def current_rss_bytes() -> Optional[int]:
+    """讀取目前行程的常駐記憶體（位元組），無法取得時回傳 None。"""
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def model_key(model_type: str, options: Mapping[str, Any]) -> str:
+    """由模型類型與建構參數組成登錄表的鍵，參數順序不影響結果。"""
+    params = ",".join(f"{name}={options[name]!r}" for name in sorted(options))
+    return f"{model_type}({params})"
+
+
+class SharedModel(Generic[T]):
+    """
+    整個行程共用的單一模型實例（例如 IMAGE 模式的 GestureRecognizer）。
+
+    ``use()`` 借用實例並在區塊內獨佔（MediaPipe Tasks 的同步呼叫本來就逐一執行），
+    尚未載入或已被閒置卸載時先載入。``unload_if_idle()`` 不會卸載正在使用中的實例。
+
+    Attributes:
+        key (str): 登錄表鍵
+        last_used (float): 最後使用時間（time.monotonic）
+    """
+
+    def __init__(self, key: str, factory: Callable[[], T], closer: Optional[Callable[[T], None]] = None) -> None:
+        self.key = key
+        self._factory = factory
+        self._closer = closer or InstancePool._default_close
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self.unload_count = 0
+
+    @property
+    def loaded(self) -> bool:
+        """模型目前是否常駐。"""
+        return self._instance is not None
+
+    def load(self) -> T:
+        """確保模型已載入並回傳實例；載入失敗時拋出 factory 的例外。"""
+        with self._lock:
+            return self._ensure_loaded()
+
+    def _ensure_loaded(self) -> T:
+        if self._instance is None:
+            self._instance = self._factory()
+        self.last_used = time.monotonic()
+        return self._instance
+
+    @contextmanager
+    def use(self) -> Iterator[T]:
+        """借用模型實例，必要時先載入。"""
+        with self._lock:
+            instance = self._ensure_loaded()
+            try:
+                yield instance
+            finally:
+                self.last_used = time.monotonic()
+
+    def unload_if_idle(self, max_idle_seconds: float, now: Optional[float] = None) -> bool:
+        """超過 ``max_idle_seconds`` 未使用時卸載模型，回傳是否實際卸載。"""
+        now = time.monotonic() if now is None else now
+        if not self._lock.acquire(blocking=False):
+            return False  # 使用中
+        try:
+            if self._instance is None or now - self.last_used < max_idle_seconds:
+                return False
+            self._unload()
+            return True
+        finally:
+            self._lock.release()
+
+    def unload(self) -> None:
+        """立即卸載模型（等待使用中的呼叫結束）。"""
+        with self._lock:
+            if self._instance is not None:
+                self._unload()
+
+    def _unload(self) -> None:
+        instance, self._instance = self._instance, None
+        try:
+            self._closer(instance)
+        except Exception as exc:  # pragma: no cover - 關閉失敗只記錄
+            logger.warning("關閉模型 %s 失敗: %s", self.key, exc)
+        self.unload_count += 1
+
+
+class _RegistryEntry:
+    """登錄表中的一個模型：共用實例或實例池，加上載入與記憶體統計。"""
+
+    def __init__(self, model_type: str, kind: str) -> None:
+        self.model_type = model_type
+        self.kind = kind
+        self.model: Any = None  # SharedModel 或 InstancePool
+        self.load_count = 0
+        self.load_seconds_total = 0.0
+        self.measured_bytes_total = 0
+        self.measured_count = 0
+        self._lock = threading.Lock()
+
+    def measured(self, factory: Callable[[], T]) -> Callable[[], T]:
+        """包裝 factory：記錄每次建立的耗時與常駐記憶體增量。"""
+
+        def create() -> T:
+            before = current_rss_bytes()
+            start_time = time.perf_counter()
+            instance = factory()
+            elapsed = time.perf_counter() - start_time
+            after = current_rss_bytes()
+            with self._lock:
+                self.load_seconds_total += elapsed
+                self.load_count += 1
+                if before is not None and after is not None:
+                    # 其他執行緒同時配置的記憶體也會算進來，因此只是估計值
+                    self.measured_bytes_total += max(0, after - before)
+                    self.measured_count += 1
+            return instance
+
+        return create
+
+    @property
+    def bytes_per_instance(self) -> Optional[int]:
+        if not self.measured_count:
+            return None
+        return self.measured_bytes_total // self.measured_count
+
+    def instance_count(self) -> int:
+        if self.kind == KIND_POOL:
+            return self.model.get_stats()["total"]
+        return 1 if self.model.loaded else 0
+
+    def get_stats(self) -> Dict:
+        instances = self.instance_count()
+        per_instance = self.bytes_per_instance
+        if self.kind == KIND_POOL:
+            pool_stats = self.model.get_stats()
+            idle_seconds = pool_stats["idle_seconds"]
+            unload_count = pool_stats["closed"]
+        else:
+            pool_stats = None
+            idle_seconds = round(time.monotonic() - self.model.last_used, 1)
+            unload_count = self.model.unload_count
+        stats = {
+            "type": self.model_type,
+            "kind": self.kind,
+            "instances": instances,
+            "bytes_per_instance": per_instance,
+            "estimated_bytes": per_instance * instances if per_instance is not None else None,
+            "load_count": self.load_count,
+            "unload_count": unload_count,
+            "avg_load_seconds": round(self.load_seconds_total / self.load_count, 3) if self.load_count else None,
+            "idle_seconds": idle_seconds,
+        }
+        if pool_stats is not None:
+            stats["pool"] = pool_stats
+        return stats
+
+
+class ModelRegistry:
+    """
+    行程層級的模型登錄表。
+
+    - ``shared()``：相同鍵只建立一個 SharedModel，供無時序狀態的模型共用。
+    - ``pool()``：相同鍵只建立一個 InstancePool，供需要逐 session 追蹤狀態的模型共用；
+      多個使用者以不同的 ``max_instances`` 登錄時取最大值。
+
+    模型實例以 ``factory(**options)`` 建立，因此登錄的鍵一定與實際的建構參數一致。
+    ``unload_idle()`` 卸載超過 ``idle_unload_seconds`` 未使用的模型，下一次使用時自動重新載入。
+
+    Attributes:
+        idle_unload_seconds (float): 閒置卸載秒數，0 表示不卸載
+    """
+
+    def __init__(self, idle_unload_seconds: float = MODEL_IDLE_UNLOAD_SECONDS) -> None:
+        self.idle_unload_seconds = idle_unload_seconds
+        self._entries: Dict[str, _RegistryEntry] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, model_type: str, options: Mapping[str, Any], kind: str) -> Tuple[str, _RegistryEntry, bool]:
+        key = model_key(model_type, options)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.kind != kind:
+                raise ValueError(f"模型 {key} 已以 {entry.kind} 方式登錄")
+            return key, entry, False
+        entry = self._entries[key] = _RegistryEntry(model_type, kind)
+        return key, entry, True
+
+    def shared(
+        self,
+        model_type: str,
+        options: Mapping[str, Any],
+        factory: Callable[..., T],
+        closer: Optional[Callable[[T], None]] = None,
+    ) -> SharedModel[T]:
+        """
+        取得共用模型（尚未登錄時登錄，不會立即載入）。
+
+        Args:
+            model_type: 模型類型，例如 ``"gesture_recognizer"``
+            options: 建構參數，與 model_type 一起組成鍵
+            factory: 以 ``factory(**options)`` 建立模型
+            closer: 卸載時的關閉函式，預設呼叫實例的 ``close()``
+        """
+        options = dict(options)
+        with self._lock:
+            key, entry, created = self._entry(model_type, options, KIND_SHARED)
+            if created:
+                entry.model = SharedModel(key, entry.measured(lambda: factory(**options)), closer)
+            return entry.model
+
+    def pool(
+        self,
+        model_type: str,
+        options: Mapping[str, Any],
+        factory: Callable[..., T],
+        max_instances: int,
+        closer: Optional[Callable[[T], None]] = None,
+    ) -> InstancePool[T]:
+        """
+        取得共用實例池（尚未登錄時登錄，不會預先建立實例）。
+
+        Args:
+            model_type: 模型類型，例如 ``"face_mesh"``
+            options: 建構參數，與 model_type 一起組成鍵
+            factory: 以 ``factory(**options)`` 建立模型
+            max_instances: 實例數上限（與既有登錄取最大值）
+            closer: 關閉實例的函式，預設呼叫實例的 ``close()``
+        """
+        options = dict(options)
+        with self._lock:
+            key, entry, created = self._entry(model_type, options, KIND_POOL)
+            if created:
+                entry.model = InstancePool(
+                    entry.measured(lambda: factory(**options)),
+                    max_instances=max_instances,
+                    name=key,
+                    closer=closer,
+                )
+            elif max_instances > entry.model.max_instances:
+                entry.model.set_max_instances(max_instances)
+            return entry.model
+
+    def unload_idle(self, now: Optional[float] = None) -> int:
+        """卸載閒置過久的模型實例，回傳卸載的實例數。"""
+        if self.idle_unload_seconds <= 0:
+            return 0
+        with self._lock:
+            entries = list(self._entries.values())
+
+        unloaded = 0
+        for entry in entries:
+            if entry.kind == KIND_POOL:
+                unloaded += entry.model.trim_idle(self.idle_unload_seconds, now=now)
+            elif entry.model.unload_if_idle(self.idle_unload_seconds, now=now):
+                logger.info("卸載閒置模型 %s", entry.model.key)
+                unloaded += 1
+        return unloaded
+
+    def get_stats(self) -> Dict:
+        """回傳各模型的實例數、估計記憶體與載入 / 卸載次數。"""
+        with self._lock:
+            entries = dict(self._entries)
+        models = {key: entry.get_stats() for key, entry in entries.items()}
+        return {
+            "idle_unload_seconds": self.idle_unload_seconds,
+            "instances": sum(stats["instances"] for stats in models.values()),
+            "estimated_bytes": sum(stats["estimated_bytes"] or 0 for stats in models.values()),
+            "rss_bytes": current_rss_bytes(),
+            "models": models,
+        }
+
+    def close(self) -> None:
+        """關閉所有模型（應用程式結束時呼叫）。"""
+        with self._lock:
+            entries = list(self._entries.values())
+        for entry in entries:
+            if entry.kind == KIND_POOL:
+                entry.model.close()
+            else:
+                entry.model.unload()
+
+
+async def run_idle_unloader(registry: "ModelRegistry", interval: float = MODEL_IDLE_CHECK_SECONDS) -> None:
+    """背景循環：每隔 ``interval`` 秒在執行緒池中卸載閒置模型。"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(registry.unload_idle)
+        except Exception as exc:  # pragma: no cover - 單次失敗不中斷循環
+            logger.warning("卸載閒置模型失敗: %s", exc)
+
+
+# 行程共用的登錄表
+model_registry = ModelRegistry()
+
+
+__all__ = [
+    "ModelRegistry",
+    "SharedModel",
+    "model_registry",
+    "model_key",
+    "FACE_MESH_OPTIONS",
+    "current_rss_bytes",
+    "run_idle_unloader",
+]
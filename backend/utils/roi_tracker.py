@@ -0,0 +1,169 @@
+# =============================================================================
+# utils/roi_tracker.py - 臉部 / 手部感興趣區域 (ROI) 追蹤
+# 記住上一幀偵測到的外框，下一幀只把外擴後的區域交給偵測器；
+# 追蹤遺失時才退回整張影格搜尋。每個串流 session 應持有自己的追蹤器。
+# =============================================================================
+
+import threading
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+
+import numpy as np
+
+# 外框格式：(x, y, w, h) 整數像素座標
+Box = Tuple[int, int, int, int]
+T = TypeVar("T")
+
+# 偵測函式：輸入 (裁切影像, 裁切左上角在原影格的座標)，
+# 回傳 (結果, 原影格座標的外框)；未偵測到時回傳 None
+DetectFn = Callable[[np.ndarray, Tuple[int, int]], Optional[Tuple[T, Box]]]
+
+
+def bbox_from_points(points: np.ndarray, width: int, height: int) -> Optional[Box]:
+    """由 (N, >=2) 像素座標點計算外框，超出畫面部分會被裁掉；外框過小時回傳 None。"""
+    if points is None or len(points) == 0:
+        return None
+    min_x, min_y = points[:, :2].min(axis=0)
+    max_x, max_y = points[:, :2].max(axis=0)
+    x0 = int(max(0, np.floor(min_x)))
+    y0 = int(max(0, np.floor(min_y)))
+    x1 = int(min(width, np.ceil(max_x)))
+    y1 = int(min(height, np.ceil(max_y)))
+    if x1 - x0 < 2 or y1 - y0 < 2:
+        return None
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+class RoiTracker:
+    """
+    單一串流的 ROI 追蹤器。
+
+    ``track(frame, detect)`` 先以上一幀外框外擴 ``padding`` 倍的區域呼叫偵測器；
+    區域內找不到目標時視為追蹤遺失，同一幀立即改以整張影格重新搜尋。
+    新外框仍落在目前裁切視窗內時沿用原視窗，讓 MediaPipe 的時序追蹤看到穩定的輸入。
+
+    Attributes:
+        padding (float): 外框每邊外擴的比例（相對外框寬高）
+        min_size (int): 裁切視窗的最小邊長（像素）
+        max_area_ratio (float): 裁切視窗佔影格面積超過此比例時直接使用整張影格
+    """
+
+    def __init__(self, padding: float = 0.5, min_size: int = 96, max_area_ratio: float = 0.8) -> None:
+        self.padding = padding
+        self.min_size = min_size
+        self.max_area_ratio = max_area_ratio
+        self._window: Optional[Box] = None
+        self._lock = threading.Lock()
+        self.roi_frames = 0
+        self.full_frames = 0
+        self.lost_count = 0
+
+    @property
+    def window(self) -> Optional[Box]:
+        """目前的裁切視窗；None 表示下一幀需整張搜尋。"""
+        return self._window
+
+    def reset(self) -> None:
+        """丟棄追蹤狀態，下一幀整張搜尋。"""
+        with self._lock:
+            self._window = None
+
+    def crop(self, frame: np.ndarray) -> Tuple[np.ndarray, Tuple[int, int]]:
+        """回傳 (要交給偵測器的影像, 左上角偏移)；尚未追蹤時回傳整張影格。"""
+        window = self._window
+        if window is None:
+            return frame, (0, 0)
+        x, y, w, h = window
+        height, width = frame.shape[:2]
+        if x + w > width or y + h > height:
+            # 影格尺寸改變（例如客戶端切換解析度），舊視窗不再有效
+            self.reset()
+            return frame, (0, 0)
+        return frame[y:y + h, x:x + w], (x, y)
+
+    def update(self, box: Optional[Box], frame_shape: Tuple[int, ...]) -> None:
+        """以本幀偵測到的外框更新裁切視窗；box 為 None 時重置追蹤。"""
+        if box is None:
+            self.reset()
+            return
+        height, width = frame_shape[:2]
+        with self._lock:
+            current = self._window
+            if current is not None and self._contains(current, self._margin_box(box, width, height)):
+                return
+            self._window = self._padded_window(box, width, height)
+
+    def track(self, frame: np.ndarray, detect: DetectFn) -> Optional[T]:
+        """
+        在 ROI（或整張影格）上執行偵測並更新追蹤狀態。
+
+        Args:
+            frame: 原始 BGR 影格
+            detect: 偵測函式，見 ``DetectFn``
+
+        Returns:
+            偵測結果；ROI 與整張影格都找不到時回傳 None
+        """
+        region, offset = self.crop(frame)
+        tracking = region is not frame
+        found = detect(region, offset)
+
+        if tracking:
+            self.roi_frames += 1
+            if found is None:
+                # 追蹤遺失：同一幀退回整張影格搜尋
+                self.lost_count += 1
+                self.reset()
+                self.full_frames += 1
+                found = detect(frame, (0, 0))
+        else:
+            self.full_frames += 1
+
+        if found is None:
+            self.reset()
+            return None
+        result, box = found
+        self.update(box, frame.shape)
+        return result
+
+    def get_stats(self) -> Dict:
+        """回傳 ROI / 整張影格的偵測次數與追蹤遺失次數。"""
+        return {
+            "tracking": self._window is not None,
+            "window": self._window,
+            "roi_frames": self.roi_frames,
+            "full_frames": self.full_frames,
+            "lost": self.lost_count,
+        }
+
+    def _padded_window(self, box: Box, width: int, height: int) -> Optional[Box]:
+        x, y, w, h = box
+        pad_w = max(w * (1 + 2 * self.padding), self.min_size)
+        pad_h = max(h * (1 + 2 * self.padding), self.min_size)
+        cx, cy = x + w / 2, y + h / 2
+        x0 = int(max(0, cx - pad_w / 2))
+        y0 = int(max(0, cy - pad_h / 2))
+        x1 = int(min(width, cx + pad_w / 2))
+        y1 = int(min(height, cy + pad_h / 2))
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return None
+        if (x1 - x0) * (y1 - y0) >= self.max_area_ratio * width * height:
+            # 目標幾乎佔滿畫面，裁切沒有效益
+            return None
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def _margin_box(self, box: Box, width: int, height: int) -> Box:
+        # 沿用視窗前保留一半外擴作為移動餘裕，目標貼近視窗邊緣時就重新置中
+        x, y, w, h = box
+        mx, my = w * self.padding / 2, h * self.padding / 2
+        x0, y0 = max(0, int(x - mx)), max(0, int(y - my))
+        x1, y1 = min(width, int(x + w + mx)), min(height, int(y + h + my))
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    @staticmethod
+    def _contains(window: Box, box: Box) -> bool:
+        wx, wy, ww, wh = window
+        x, y, w, h = box
+        return wx <= x and wy <= y and x + w <= wx + ww and y + h <= wy + wh
+
+
+__all__ = ["RoiTracker", "Box", "bbox_from_points"]
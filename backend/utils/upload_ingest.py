@@ -0,0 +1,122 @@
+# =============================================================================
+# utils/upload_ingest.py - 串流寫入上傳檔案
+# 上傳內容以固定大小的區塊直接寫入暫存檔（Linux 可選 memfd），寫入途中即檢查大小上限，
+# 分析器以路徑讀取；不論上傳多大，單一請求只佔用一個區塊的記憶體。
+# =============================================================================
+
+import asyncio
+import logging
+import os
+import tempfile
+from typing import Optional
+
+from fastapi import UploadFile
+
+from ..config.settings import MAX_UPLOAD_SIZE_BYTES, UPLOAD_CHUNK_SIZE_BYTES, UPLOAD_SPOOL_MEMFD
+
+logger = logging.getLogger(__name__)
+
+
+class UploadTooLargeError(ValueError):
+    """上傳內容超過大小上限。"""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        super().__init__(f"檔案過大，最大允許 {max_bytes // (1024 * 1024)}MB")
+
+
+class IngestedUpload:
+    """
+    已寫入暫存位置的上傳檔案。
+
+    ``path`` 可直接交給 cv2.imread / cv2.VideoCapture；memfd 以
+    ``/proc/<pid>/fd/<fd>`` 表示，子行程（影片分段池）同樣可以開啟。
+    用畢呼叫 ``cleanup()``（可重複呼叫）或以 ``with`` 區塊包住。
+
+    Attributes:
+        path (str): 檔案路徑
+        size (int): 寫入的位元組數
+    """
+
+    def __init__(self, path: str, size: int, fd: Optional[int] = None) -> None:
+        self.path = path
+        self.size = size
+        self._fd = fd
+        self._cleaned = False
+
+    def cleanup(self) -> None:
+        """刪除暫存檔或關閉 memfd。"""
+        if self._cleaned:
+            return
+        self._cleaned = True
+        if self._fd is not None:
+            os.close(self._fd)
+        elif os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def __enter__(self) -> "IngestedUpload":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.cleanup()
+
+
+def _memfd_supported() -> bool:
+    return hasattr(os, "memfd_create") and os.path.isdir(f"/proc/{os.getpid()}/fd")
+
+
+async def ingest_upload(
+    file: UploadFile,
+    suffix: str = "",
+    max_bytes: int = MAX_UPLOAD_SIZE_BYTES,
+    chunk_size: int = UPLOAD_CHUNK_SIZE_BYTES,
+    use_memfd: bool = UPLOAD_SPOOL_MEMFD,
+) -> IngestedUpload:
+    """
+    將上傳檔案以區塊串流寫入暫存位置。
+
+    已知大小（multipart 標頭提供）超過上限時直接拒絕；否則邊寫邊累計，
+    一超過上限就停止讀取並清除已寫入的內容。
+
+    Args:
+        file: FastAPI 上傳檔案
+        suffix: 暫存檔副檔名（部分解碼器依副檔名判斷格式）
+        max_bytes: 大小上限
+        chunk_size: 每次讀寫的區塊大小
+        use_memfd: Linux 上改寫入 memfd（不落地，但內容佔用 RAM）
+
+    Raises:
+        UploadTooLargeError: 上傳內容超過 max_bytes
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLargeError(max_bytes)
+
+    fd: Optional[int] = None
+    if use_memfd and _memfd_supported():
+        fd = os.memfd_create(f"upload{suffix}")
+        path = f"/proc/{os.getpid()}/fd/{fd}"
+        out = os.fdopen(os.dup(fd), "wb")
+    else:
+        out = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+        path = out.name
+    upload = IngestedUpload(path, 0, fd=fd)
+
+    try:
+        with out:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                upload.size += len(chunk)
+                if upload.size > max_bytes:
+                    raise UploadTooLargeError(max_bytes)
+                await asyncio.to_thread(out.write, chunk)
+    except BaseException:
+        upload.cleanup()
+        raise
+
+    logger.debug("上傳檔案已寫入 %s (%d bytes)", path, upload.size)
+    return upload
+
+
+__all__ = ["IngestedUpload", "UploadTooLargeError", "ingest_upload"]
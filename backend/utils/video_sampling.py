@@ -0,0 +1,97 @@
+# =============================================================================
+# utils/video_sampling.py - 影片取樣讀取工具
+# 以 grab()/retrieve() 只解碼需要分析的幀，跳過的幀只推進解碼器不做 BGR 轉換；
+# 取樣間隔很大且容器支援時改以定位 (seek) 直接跳到下一個取樣點。
+# =============================================================================
+
+from typing import Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# 取樣間隔達到此幀數時才嘗試 seek；間隔較小時逐幀 grab 通常比重新定位更快
+SEEK_MIN_INTERVAL = 60
+
+
+class SampledFrameReader:
+    """
+    依固定幀間隔讀取影片的迭代器，產生 ``(timestamp, frame)``。
+
+    跳過的幀以 ``cap.grab()`` 推進，只有取樣幀才呼叫 ``cap.retrieve()``；
+    若取樣間隔 >= ``seek_min_interval`` 且 ``cap.set(CAP_PROP_POS_FRAMES)``
+    實際生效，則改以定位跳到下一個取樣點。呼叫端負責開啟與釋放 VideoCapture。
+
+    指定 ``start_frame`` / ``end_frame`` 時只讀取 [start_frame, end_frame) 範圍，
+    供影片分段平行分析使用；起點會先嘗試定位，不支援時以 grab 前進。
+
+    Attributes:
+        frame_index (int): 最近一次產生的幀序號
+        sampled_frames (int): 已產生的取樣幀數
+        skipped_frames (int): 以 grab 或 seek 跳過、未解碼成影像的幀數
+    """
+
+    def __init__(
+        self,
+        cap: "cv2.VideoCapture",
+        sample_interval: int,
+        fps: Optional[float] = None,
+        seek_min_interval: int = SEEK_MIN_INTERVAL,
+        start_frame: int = 0,
+        end_frame: Optional[int] = None,
+    ) -> None:
+        self.cap = cap
+        self.sample_interval = max(1, int(sample_interval))
+        self.fps = float(fps if fps is not None else cap.get(cv2.CAP_PROP_FPS) or 0.0)
+        self.seek_min_interval = seek_min_interval
+        self.start_frame = max(0, int(start_frame))
+        self.end_frame = end_frame
+        self.frame_index = -1
+        self.sampled_frames = 0
+        self.skipped_frames = 0
+        self._seek_supported = seek_min_interval > 0 and self.sample_interval >= seek_min_interval
+
+    def timestamp(self, frame_index: int) -> float:
+        """將幀序號換算為秒數；未知 FPS 時回傳 0。"""
+        return frame_index / self.fps if self.fps > 0 else 0.0
+
+    def _seek(self, target_index: int) -> bool:
+        """嘗試定位至 target_index，回傳是否成功；失敗後不再以 seek 跳過取樣間隔。"""
+        try:
+            if self.cap.set(cv2.CAP_PROP_POS_FRAMES, target_index) and \
+                    int(self.cap.get(cv2.CAP_PROP_POS_FRAMES)) == target_index:
+                return True
+        except cv2.error:
+            pass
+        self._seek_supported = False
+        return False
+
+    def __iter__(self) -> Iterator[Tuple[float, np.ndarray]]:
+        next_index = self.start_frame
+        position = 0  # 下一次 grab 會取得的幀序號
+        if next_index > 0 and self._seek(next_index):
+            position = next_index
+
+        while self.end_frame is None or next_index < self.end_frame:
+            if position < next_index and self._seek_supported:
+                if self._seek(next_index):
+                    self.skipped_frames += next_index - position
+                    position = next_index
+
+            while position < next_index:
+                if not self.cap.grab():
+                    return
+                position += 1
+                self.skipped_frames += 1
+
+            if not self.cap.grab():
+                return
+            position += 1
+            ret, frame = self.cap.retrieve()
+            if not ret or frame is None:
+                return
+
+            self.frame_index = next_index
+            self.sampled_frames += 1
+            yield self.timestamp(next_index), frame
+            next_index += self.sample_interval
+
@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 from unittest.mock import MagicMock, patch
 from backend.services.action_detection_service import ActionDetectionService, DifficultyLevel
@@ -31,23 +33,25 @@ class TestActionDetectionService:
         """Test ActionDetectionService initialization."""
         assert action_service.status_broadcaster == mock_broadcaster
         assert not action_service.is_detecting
-        assert action_service.detection_thread is None
+        assert action_service.detection_task is None
         assert action_service.difficulty_level == DifficultyLevel.EASY
 
     def test_start_action_detection_valid_difficulty(self, action_service):
         """Test starting action detection with valid difficulty."""
-        with patch('threading.Thread') as mock_thread:
+        with patch('backend.services.action_detection_service.start_loop_task') as mock_start:
             result = action_service.start_action_detection("medium")
             assert result["status"] == "started"
             assert "動作檢測遊戲已開始" in result["message"]
             assert action_service.difficulty_level == DifficultyLevel.MEDIUM
             assert action_service.is_detecting
-            mock_thread.assert_called_once()
+            mock_start.assert_called_once()
+            mock_start.call_args[0][0].close()
 
     def test_start_action_detection_invalid_difficulty(self, action_service):
         """Test starting action detection with invalid difficulty - should default to easy."""
-        with patch('threading.Thread'):
+        with patch('backend.services.action_detection_service.start_loop_task') as mock_start:
             result = action_service.start_action_detection("invalid")
+            mock_start.call_args[0][0].close()
             assert result["status"] == "started"
             assert action_service.difficulty_level == DifficultyLevel.EASY
 
@@ -61,13 +65,34 @@ class TestActionDetectionService:
     def test_stop_action_detection(self, action_service):
         """Test stopping action detection."""
         action_service.is_detecting = True
-        mock_thread = MagicMock()
-        action_service.detection_thread = mock_thread
-        result = action_service.stop_action_detection()
+        mock_task = MagicMock()
+        action_service.detection_task = mock_task
+        with patch('backend.services.action_detection_service.cancel_loop_task') as mock_cancel:
+            result = action_service.stop_action_detection()
         assert result["status"] == "stopped"
         assert "動作檢測已停止" in result["message"]
         assert not action_service.is_detecting
-        mock_thread.join.assert_called_once()
+        mock_cancel.assert_called_once_with(mock_task)
+        assert action_service.detection_task is None
+
+    @pytest.mark.asyncio
+    async def test_detection_loop_runs_as_task_and_stops_on_camera_end(self, action_service, mock_broadcaster):
+        """The detection loop is an asyncio task; a failed camera read ends it and auto-stops."""
+        camera = MagicMock()
+        camera.isOpened.return_value = True
+        camera.read.side_effect = [(True, MagicMock())] * 3 + [(False, None)]
+
+        with patch('backend.services.action_detection_service.cv2.VideoCapture', return_value=camera):
+            assert action_service.start_action_detection("easy")["status"] == "started"
+            task = action_service.detection_task
+            await asyncio.wait_for(task, timeout=2)
+
+        assert not action_service.is_detecting
+        camera.release.assert_called_once()
+        stages = [call.args[0]["stage"] for call in mock_broadcaster.broadcast_threadsafe.call_args_list]
+        assert stages[0] == "started"
+        assert "baseline_set" in stages
+        assert stages[-1] == "stopped"
 
     def test_get_detection_status_running(self, action_service):
         """Test getting detection status when running."""
@@ -83,4 +108,22 @@ class TestActionDetectionService:
         action_service.is_detecting = False
         status = action_service.get_detection_status()
         assert status["status"] == "idle"
-        assert "未在進行中" in status["message"]
\ No newline at end of file
+        assert "未在進行中" in status["message"]
+
+    def test_analyze_video_extracts_features_once_per_sampled_frame(self, action_service):
+        """All action types are evaluated from a single decode pass."""
+        frame = MagicMock()
+        mock_cap = MagicMock()
+        mock_cap.isOpened.return_value = True
+        mock_cap.get.side_effect = lambda prop: {5: 10, 7: 4}.get(prop, 0)  # FPS=10, FRAME_COUNT=4
+        mock_cap.grab.side_effect = [True] * 4 + [False]
+        mock_cap.retrieve.return_value = (True, frame)
+
+        with patch('backend.services.action_detection_service.cv2.VideoCapture', return_value=mock_cap):
+            result = action_service.analyze_video("fake_video.mp4")
+
+        # 1 baseline frame + 3 sampled frames, no rewinds
+        assert action_service.feature_extractor.extract_features.call_count == 4
+        mock_cap.set.assert_not_called()
+        assert result["video_info"]["frames_analyzed"] == 4
+        assert len(result["all_actions"]) == 7
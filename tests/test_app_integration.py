@@ -106,6 +106,63 @@ class TestAppIntegration:
         gpu_keys = ['tensorflow_ready', 'mediapipe_gpu_enabled']
         assert any(key in data for key in gpu_keys), f"Expected GPU keys not found in response: {data}"
 
+        # Broadcaster statistics endpoint
+        response = self.client.get("/api/system/broadcaster")
+        assert response.status_code == 200
+        assert {"published", "delivered", "dropped"} <= set(response.json())
+
+        # Session managers that have not been built yet only report their load state
+        response = self.client.get("/api/system/rps")
+        assert response.status_code == 200
+        data = response.json()
+        assert "gesture_to_result_ms" in data or "state" in data
+
+        response = self.client.get("/api/system/drawing")
+        assert response.status_code == 200
+        data = response.json()
+        assert {"active_sessions", "estimated_memory_bytes", "evicted_idle"} <= set(data) or "state" in data
+
+        response = self.client.get("/api/system/models")
+        assert response.status_code == 200
+        assert {"idle_unload_seconds", "instances", "estimated_bytes", "models"} <= set(response.json())
+
+        response = self.client.get("/api/system/ready")
+        assert response.status_code in (200, 503)
+        data = response.json()
+        assert data["ready"] is (response.status_code == 200)
+        assert {"emotion", "action", "hand_gesture", "rps", "drawing"} <= set(data["services"])
+
+    def test_session_metrics_do_not_build_cold_services(self):
+        """Metrics endpoints report a placeholder instead of loading models."""
+        from backend.utils.lazy_service import LazyService
+
+        rps_factory = Mock()
+        drawing_factory = Mock()
+        with patch("backend.app.rps_session_manager", LazyService("rps_sessions", rps_factory)), \
+                patch("backend.app.drawing_session_manager", LazyService("drawing_sessions", drawing_factory)):
+            rps_response = self.client.get("/api/system/rps")
+            drawing_response = self.client.get("/api/system/drawing")
+
+        assert rps_response.status_code == 200
+        assert rps_response.json()["state"] == "pending"
+        assert drawing_response.json()["state"] == "pending"
+        rps_factory.assert_not_called()
+        drawing_factory.assert_not_called()
+
+    def test_action_upload_validated_before_building_service(self):
+        """Malformed action uploads are rejected without loading models."""
+        from backend.utils.lazy_service import LazyService
+
+        factory = Mock()
+        with patch("backend.routers.action.action_service", LazyService("action", factory)):
+            response = self.client.post(
+                "/api/action/analyze",
+                files={"file": ("clip.txt", b"not a video", "text/plain")},
+            )
+
+        assert response.status_code == 400
+        factory.assert_not_called()
+
     def test_emotion_api_endpoints(self):
         """Test emotion API endpoints are accessible."""
         # Test emotion image analysis endpoint (should return 422 for missing file)
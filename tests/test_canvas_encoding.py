@@ -0,0 +1,64 @@
+import base64
+
+import cv2
+import numpy as np
+import pytest
+
+from backend.utils.canvas_encoding import EncodedCanvasCache, encode_canvas_data_url
+from backend.utils.drawing_engine import DrawingEngine
+
+
+def _decode(data_url):
+    header, payload = data_url.split(",", 1)
+    image = cv2.imdecode(np.frombuffer(base64.b64decode(payload), np.uint8), cv2.IMREAD_UNCHANGED)
+    return header, image
+
+
+class TestEncodeCanvasDataUrl:
+
+    def test_png_roundtrip_keeps_alpha_and_flips(self):
+        canvas = np.zeros((4, 6, 4), dtype=np.uint8)
+        canvas[1, 0] = (0, 0, 255, 255)
+
+        header, image = _decode(encode_canvas_data_url(canvas, fmt="png", flip=True))
+
+        assert header == "data:image/png;base64"
+        assert image.shape == (4, 6, 4)
+        assert tuple(image[1, 5]) == (0, 0, 255, 255)
+
+    def test_jpeg_flattens_transparency_onto_white(self):
+        canvas = np.zeros((8, 8, 4), dtype=np.uint8)
+
+        header, image = _decode(encode_canvas_data_url(canvas, fmt="jpeg"))
+
+        assert header == "data:image/jpeg;base64"
+        assert image.shape == (8, 8, 3)
+        assert image.min() > 240
+
+    def test_rejects_unknown_format(self):
+        with pytest.raises(ValueError):
+            encode_canvas_data_url(np.zeros((2, 2, 3), dtype=np.uint8), fmt="gif")
+
+
+class TestEncodedCanvasCache:
+
+    def test_reencodes_only_when_version_changes(self):
+        cache = EncodedCanvasCache()
+        calls = []
+
+        def encode():
+            calls.append(1)
+            return f"encoded-{len(calls)}"
+
+        assert cache.get(1, encode) == "encoded-1"
+        assert cache.get(1, encode) == "encoded-1"
+        assert cache.get(2, encode) == "encoded-2"
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_drawing_engine_base64_is_cached_per_version(self):
+        engine = DrawingEngine(canvas_size=(64, 48))
+        first = engine.get_canvas_image("base64")
+        assert engine.get_canvas_image("base64") is first
+
+        engine.start_stroke(10, 10)
+        assert engine.get_canvas_image("base64") != first
@@ -1,6 +1,12 @@
 import pytest
 from unittest.mock import MagicMock, patch
-from backend.services.drawing_service import DrawingService, DrawingMode, DrawingColor
+from backend.services.drawing_service import (
+    DrawingAction,
+    DrawingColor,
+    DrawingMode,
+    DrawingService,
+    VirtualCanvas,
+)
 from backend.services.status_broadcaster import StatusBroadcaster
 
 @pytest.fixture
@@ -23,18 +29,19 @@ class TestDrawingService:
     def test_initialization(self, drawing_service, mock_broadcaster):
         assert drawing_service.status_broadcaster == mock_broadcaster
         assert not drawing_service.is_drawing
-        assert drawing_service.drawing_thread is None
+        assert drawing_service.drawing_task is None
         assert drawing_service.drawing_mode == DrawingMode.INDEX_FINGER
 
     def test_start_drawing_session(self, drawing_service):
-        with patch('threading.Thread') as mock_thread:
+        with patch('backend.services.drawing_service.start_loop_task') as mock_start:
             result = drawing_service.start_drawing_session(mode="gesture_control", color="red", auto_recognize=False)
+            mock_start.call_args[0][0].close()
             assert result["status"] == "started"
             assert drawing_service.is_drawing
             assert drawing_service.drawing_mode == DrawingMode.GESTURE_CONTROL
             assert drawing_service.current_color == DrawingColor.RED
             assert not drawing_service.auto_recognize
-            mock_thread.assert_called_once()
+            mock_start.assert_called_once()
 
     def test_start_drawing_session_already_running(self, drawing_service):
         drawing_service.is_drawing = True
@@ -44,15 +51,16 @@ class TestDrawingService:
 
     def test_stop_drawing_session(self, drawing_service):
         drawing_service.is_drawing = True
-        mock_thread = MagicMock()
-        drawing_service.drawing_thread = mock_thread
+        mock_task = MagicMock()
+        drawing_service.drawing_task = mock_task
         drawing_service.ai_recognizer.recognize_drawing.return_value = {"recognized": "circle"}
         drawing_service.virtual_canvas.get_canvas_base64.return_value = "base64_string"
 
-        result = drawing_service.stop_drawing_session()
+        with patch('backend.services.drawing_service.cancel_loop_task') as mock_cancel:
+            result = drawing_service.stop_drawing_session()
         assert result["status"] == "stopped"
         assert not drawing_service.is_drawing
-        mock_thread.join.assert_called_once()
+        mock_cancel.assert_called_once_with(mock_task)
         assert result["final_recognition"]["recognized"] == "circle"
 
     def test_get_drawing_status_running(self, drawing_service):
@@ -87,4 +95,86 @@ class TestDrawingService:
         result = drawing_service.clear_canvas()
         assert result["status"] == "success"
         drawing_service.virtual_canvas.clear_canvas.assert_called_once()
-        mock_broadcaster.broadcast_threadsafe.assert_called_once()
\ No newline at end of file
+        mock_broadcaster.broadcast_threadsafe.assert_called_once()
+
+class TestVirtualCanvasDelta:
+
+    def test_first_update_requires_full_snapshot(self):
+        canvas = VirtualCanvas(width=100, height=80)
+        canvas.draw_point((10, 10))
+
+        assert canvas.needs_full_sync
+        assert canvas.pending_segments == []
+        assert canvas.take_snapshot_base64().startswith("data:image/png;base64,")
+        assert not canvas.needs_full_sync
+
+    def test_delta_merges_connected_lines_in_display_coordinates(self):
+        canvas = VirtualCanvas(width=100, height=80)
+        canvas.take_snapshot_base64()
+        canvas.set_color(DrawingColor.RED)
+
+        canvas.draw_point((10, 10))
+        canvas.draw_point((20, 10))
+        canvas.draw_point((30, 20))
+
+        delta = canvas.pop_delta()
+        dot, line = delta["segments"]
+        assert dot == {"op": "dot", "points": [[89, 10]], "width": 5, "color": "#ff0000"}
+        assert line["op"] == "line"
+        assert line["points"] == [[89, 10], [79, 10], [69, 20]]
+
+        x, y, w, h = delta["dirty_rect"]
+        assert x <= 69 and x + w > 89
+        assert y <= 10 and y + h > 20
+        assert canvas.pop_delta() is None
+
+    def test_patch_and_clear(self):
+        canvas = VirtualCanvas(width=100, height=80)
+        canvas.take_snapshot_base64()
+        canvas.draw_point((50, 40))
+        canvas.draw_point((50, 40), DrawingAction.ERASE)
+
+        delta = canvas.pop_delta(include_patch=True)
+        assert delta["segments"][-1]["op"] == "erase"
+        assert delta["patch_base64"].startswith("data:image/png;base64,")
+
+        canvas.clear_canvas()
+        assert canvas.needs_full_sync
+
+    def test_service_sends_delta_after_initial_snapshot(self, drawing_service):
+        drawing_service.virtual_canvas = VirtualCanvas(width=100, height=80)
+        drawing_service.virtual_canvas.draw_point((10, 10))
+
+        first = drawing_service._canvas_update_fields("delta")
+        assert first["canvas_update"] == "full"
+
+        drawing_service.virtual_canvas.draw_point((12, 12))
+        second = drawing_service._canvas_update_fields("delta")
+        assert second["canvas_update"] == "delta"
+        assert "canvas_base64" not in second
+        assert second["segments"][0]["op"] == "line"
+
+        drawing_service.virtual_canvas.draw_point((14, 14))
+        patch_fields = drawing_service._canvas_update_fields("patch")
+        assert "segments" not in patch_fields
+        assert "patch_base64" in patch_fields
+
+    def test_canvas_pushes_are_coalesced(self, drawing_service):
+        drawing_service.virtual_canvas = VirtualCanvas(width=100, height=80)
+        drawing_service.canvas_update_interval = 60.0
+
+        drawing_service.virtual_canvas.draw_point((10, 10))
+        assert drawing_service._coalesced_canvas_update("delta")["canvas_update"] == "full"
+
+        # 間隔內的變更暫不推送，且不會遺失
+        drawing_service.virtual_canvas.draw_point((12, 12))
+        assert drawing_service._coalesced_canvas_update("delta") == {}
+
+        drawing_service.last_canvas_update_time = 0
+        pushed = drawing_service._coalesced_canvas_update("delta")
+        assert pushed["segments"][0]["points"] == [[89, 10], [87, 12]]
+        assert drawing_service._coalesced_canvas_update("delta") == {}
+
+        # 清空畫布立即推送完整快照
+        drawing_service.virtual_canvas.clear_canvas()
+        assert drawing_service._coalesced_canvas_update("delta", force=True)["canvas_update"] == "full"
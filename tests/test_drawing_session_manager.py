@@ -0,0 +1,147 @@
+# =============================================================================
+# test_drawing_session_manager.py - 手勢繪畫工作階段管理測試
+# =============================================================================
+
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import MagicMock, patch
+
+from backend.services.drawing_service import DrawingAction, FingerTracker
+from backend.services.drawing_session_manager import (
+    DrawingSessionLimitError,
+    DrawingSessionManager,
+)
+from backend.services.status_broadcaster import StatusBroadcaster
+from backend.utils.instance_pool import InstancePoolExhausted
+
+
+@pytest.fixture
+def manager():
+    with patch.object(FingerTracker, 'is_available', return_value=True):
+        yield DrawingSessionManager(MagicMock(spec=StatusBroadcaster), max_sessions=4,
+                                    idle_timeout=60, max_memory_mb=1024)
+
+
+class TestDrawingSessionManager:
+
+    def test_sessions_have_independent_canvases(self, manager):
+        first = manager.create_session()
+        second = manager.create_session()
+
+        first.start_drawing_session(mode="gesture_control", websocket_mode=True)
+        # 另一個攤位可同時開始繪畫，不會中斷第一個工作階段
+        assert second.start_drawing_session(mode="gesture_control", websocket_mode=True)["status"] == "started"
+        assert first.is_drawing and second.is_drawing
+
+        first.virtual_canvas.draw_point((10, 10), DrawingAction.DRAW)
+        first.virtual_canvas.draw_point((40, 40), DrawingAction.DRAW)
+        assert first.virtual_canvas.canvas.any()
+        assert not second.virtual_canvas.canvas.any()
+        assert first.finger_tracker is not second.finger_tracker
+        assert first.ai_recognizer is second.ai_recognizer is manager.shape_recognizer
+
+    def test_idle_sessions_are_evicted(self, manager):
+        idle = manager.create_session("idle")
+        active = manager.create_session("active")
+        idle.last_active_at = time.monotonic() - 120
+
+        with patch.object(idle.finger_tracker, 'close') as mock_close:
+            assert manager.evict_idle() == ["idle"]
+
+        assert idle.closed
+        mock_close.assert_called_once()
+        assert manager.get_session("idle") is None
+        assert manager.get_session("active") is active
+        assert manager.get_stats()["evicted_idle"] == 1
+
+    def test_session_count_limit_reclaims_idle_first(self, manager):
+        sessions = [manager.create_session() for _ in range(4)]
+        with pytest.raises(DrawingSessionLimitError):
+            manager.create_session()
+
+        sessions[0].last_active_at = time.monotonic() - 120
+        assert manager.create_session() is not None
+        assert sessions[0].closed
+
+    def test_memory_cap(self):
+        with patch.object(FingerTracker, 'is_available', return_value=True):
+            manager = DrawingSessionManager(MagicMock(spec=StatusBroadcaster), max_sessions=10,
+                                            idle_timeout=60, max_memory_mb=60)
+            manager.create_session()
+            with pytest.raises(DrawingSessionLimitError):
+                manager.create_session()
+
+        stats = manager.get_stats()
+        assert stats["active_sessions"] == 1
+        assert stats["estimated_memory_bytes"] <= stats["max_memory_bytes"]
+
+    def test_exhausted_hands_pool_reported_as_limit(self, manager):
+        with patch.object(FingerTracker, '__init__', side_effect=InstancePoolExhausted("mp_hands 實例池已滿 (17)")):
+            with pytest.raises(DrawingSessionLimitError):
+                manager.create_session()
+        assert manager.get_stats()["active_sessions"] == 0
+
+    def test_concurrent_creates_respect_session_cap(self, manager):
+        from backend.services.drawing_service import DrawingService
+
+        original_init = DrawingService.__init__
+
+        def slow_init(self, *args, **kwargs):
+            # 拉長建置時間，讓所有執行緒都在建置途中重疊
+            time.sleep(0.05)
+            original_init(self, *args, **kwargs)
+
+        created, rejected = [], []
+
+        def create():
+            try:
+                created.append(manager.create_session())
+            except DrawingSessionLimitError:
+                rejected.append(1)
+
+        with patch.object(DrawingService, '__init__', slow_init):
+            threads = [threading.Thread(target=create) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert len(created) == manager.max_sessions
+        assert len(rejected) == 8 - manager.max_sessions
+        stats = manager.get_stats()
+        assert stats["active_sessions"] == manager.max_sessions
+        assert stats["pending_sessions"] == 0
+
+    def test_failed_build_releases_reservation(self, manager):
+        with patch.object(FingerTracker, '__init__', side_effect=RuntimeError("camera")):
+            with pytest.raises(RuntimeError):
+                manager.create_session()
+        assert manager.get_stats()["pending_sessions"] == 0
+        assert manager.create_session() is not None
+
+
+class TestDrawingWebSocketSessions:
+
+    def test_two_connections_draw_concurrently(self):
+        from backend.app import app, drawing_session_manager
+
+        with patch.object(FingerTracker, 'is_available', return_value=True):
+            with TestClient(app) as client:
+                with client.websocket_connect("/ws/drawing") as first, \
+                     client.websocket_connect("/ws/drawing") as second:
+                    for websocket in (first, second):
+                        assert websocket.receive_json()["type"] == "opened"
+                        websocket.send_json({"type": "start_gesture_drawing", "timestamp": 1})
+                        assert websocket.receive_json()["type"] == "drawing_started"
+
+                    assert drawing_session_manager.get_stats()["drawing_sessions"] == 2
+
+                    first.send_json({"type": "close"})
+                    assert first.receive_json()["type"] == "closed"
+                    second.send_json({"type": "ping"})
+                    assert second.receive_json()["type"] == "pong"
+                    # 第一條連線關閉不影響第二條連線的畫布
+                    assert drawing_session_manager.get_stats()["drawing_sessions"] == 1
@@ -16,6 +16,8 @@ from unittest.mock import MagicMock, patch, AsyncMock
 from fastapi.testclient import TestClient
 from fastapi import UploadFile
 import websockets
+import cv2
+import numpy as np
 
 from backend.app import app
 from backend.services.emotion_service import EmotionService
@@ -233,6 +235,126 @@ class TestEmotionAPI:
             content = response.content.decode()
             assert "串流分析錯誤" in content
 
+    def test_video_emotion_stream_busy_sends_error_event(self, client, sample_video_file):
+        """測試影片串流分析經由推論執行器，排隊已滿時回傳 SSE 錯誤事件"""
+        from backend.services.inference_executor import InferenceBusyError
+
+        with patch('backend.services.emotion_service.EmotionService.analyze_video_deepface_stream') as mock_stream, \
+                patch('backend.routers.emotion.inference_executor') as mock_executor:
+            mock_stream.return_value = iter([{"emotion_zh": "開心", "completed": False}])
+            mock_executor.run = AsyncMock(side_effect=InferenceBusyError("deepface", 8))
+
+            filename, file_content, content_type = sample_video_file
+            response = client.post(
+                "/api/emotion/analyze/video",
+                files={"file": (filename, file_content, content_type)},
+                data={"frame_interval": "0.5"}
+            )
+
+            assert response.status_code == 200
+            content = response.content.decode()
+            assert "忙碌中" in content
+            assert mock_executor.run.await_args.args[0] == "deepface"
+
+    @pytest.mark.parametrize("build_fails", [False, True])
+    def test_invalid_upload_rejected_without_building_service(self, client, build_fails):
+        """測試格式錯誤的上傳在服務尚未建立或建立失敗時仍回傳 400，且不觸發模型載入"""
+        from backend.utils.lazy_service import LazyService
+
+        factory = MagicMock(side_effect=RuntimeError("DeepFace 模型缺失"))
+        service = LazyService("emotion", factory)
+        if build_fails:
+            with pytest.raises(RuntimeError):
+                service.get()
+            factory.reset_mock()
+
+        with patch('backend.routers.emotion.emotion_service', service):
+            image_response = client.post(
+                "/api/emotion/analyze/image",
+                files={"file": ("test.txt", BytesIO(b"not an image"), "text/plain")}
+            )
+            video_response = client.post(
+                "/api/emotion/analyze/video",
+                files={"file": ("test.mp4", BytesIO(b"video"), "video/mp4")},
+                data={"frame_interval": "0.05"}
+            )
+
+        assert image_response.status_code == 400
+        assert video_response.status_code == 400
+        factory.assert_not_called()
+
+    def test_failed_service_returns_503(self, client, sample_image_file):
+        """測試服務建立失敗時有效的上傳回傳 503"""
+        from backend.utils.lazy_service import LazyService
+
+        service = LazyService("emotion", MagicMock(side_effect=RuntimeError("DeepFace 模型缺失")))
+        filename, file_content, content_type = sample_image_file
+        with patch('backend.routers.emotion.emotion_service', service):
+            response = client.post(
+                "/api/emotion/analyze/image",
+                files={"file": (filename, file_content, content_type)}
+            )
+
+        assert response.status_code == 503
+
+
+class TestVideoStreamDisconnect:
+    """測試 SSE 串流在客戶端中途斷線時的資源釋放"""
+
+    @pytest.mark.asyncio
+    async def test_disconnect_mid_frame_releases_after_frame_finishes(self):
+        """斷線時進行中的一幀跑完後才關閉影片產生器並刪除臨時檔案"""
+        import threading
+        from starlette.datastructures import UploadFile as StarletteUploadFile
+        from backend.routers import emotion
+        from backend.services.inference_executor import InferenceExecutor
+
+        entered, finish = threading.Event(), threading.Event()
+        state = {}
+
+        def frames(video_path, frame_interval):
+            state["path"] = video_path
+            try:
+                yield {"emotion_zh": "開心", "frame_time": 0.0, "completed": False}
+                entered.set()
+                finish.wait(timeout=5)
+                # 關閉前影片檔案必須仍然存在（VideoCapture 仍在讀取）
+                state["file_present_in_frame"] = os.path.exists(video_path)
+                yield {"emotion_zh": "開心", "frame_time": 0.5, "completed": False}
+            finally:
+                state["closed"] = True
+
+        service = MagicMock()
+        service.analyze_video_deepface_stream.side_effect = frames
+        executor = InferenceExecutor(max_workers=2, model_concurrency={})
+        upload = StarletteUploadFile(file=BytesIO(b"video"), filename="clip.mp4")
+
+        with patch.object(emotion, "emotion_service", service), \
+                patch.object(emotion, "inference_executor", executor):
+            response = await emotion.analyze_video(file=upload, frame_interval=0.5, parallel=False)
+            stream = response.body_iterator
+            assert "開心" in await stream.__anext__()
+
+            pending = asyncio.ensure_future(stream.__anext__())
+            assert await asyncio.to_thread(entered.wait, 5)
+            # 客戶端斷線：串流任務被取消時第二幀仍在工作執行緒中
+            pending.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await pending
+            assert "closed" not in state
+            assert os.path.exists(state["path"])
+
+            finish.set()
+            for _ in range(100):
+                if state.get("closed") and not os.path.exists(state["path"]):
+                    break
+                await asyncio.sleep(0.02)
+
+        executor.shutdown()
+        assert state["file_present_in_frame"]
+        assert state["closed"]
+        assert not os.path.exists(state["path"])
+
 
 class TestEmotionWebSocket:
     """情緒分析WebSocket測試類"""
@@ -240,13 +362,14 @@ class TestEmotionWebSocket:
     @pytest.fixture
     def sample_base64_image(self):
         """建立base64編碼的測試圖片"""
-        image_data = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x02\x00\x00\x00\x90wS\xde\x00\x00\x00\tpHYs\x00\x00\x0b\x13\x00\x00\x0b\x13\x01\x00\x9a\x9c\x18\x00\x00\x00\nIDATx\x9cc\xf8\x00\x00\x00\x01\x00\x01\x00\x00\x00\x00IEND\xaeB`\x82'
+        _, encoded = cv2.imencode('.png', np.zeros((1, 1, 3), dtype=np.uint8))
+        image_data = encoded.tobytes()
         return base64.b64encode(image_data).decode()
 
     @pytest.mark.asyncio
     async def test_websocket_emotion_stream_success(self, sample_base64_image):
         """測試WebSocket情緒串流成功案例"""
-        with patch('backend.services.emotion_service.EmotionService.analyze_image_deepface') as mock_analyze:
+        with patch('backend.services.emotion_service.EmotionService.analyze_frame_deepface') as mock_analyze:
             mock_analyze.return_value = {
                 "emotion_zh": "開心",
                 "emotion_en": "happy",
@@ -304,7 +427,7 @@ class TestEmotionWebSocket:
     @pytest.mark.asyncio
     async def test_websocket_emotion_stream_analysis_error(self, sample_base64_image):
         """測試WebSocket分析錯誤"""
-        with patch('backend.services.emotion_service.EmotionService.analyze_image_deepface') as mock_analyze:
+        with patch('backend.services.emotion_service.EmotionService.analyze_frame_deepface') as mock_analyze:
             mock_analyze.side_effect = Exception("Analysis failed")
 
             with TestClient(app) as client:
@@ -0,0 +1,110 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from backend.services.emotion_batch_scheduler import (
+    EMOTION_LABELS,
+    EmotionBatchScheduler,
+    preprocess_face_crop,
+    scores_to_emotion_result,
+)
+
+
+def _fake_predict(batches):
+    def predict(faces):
+        batches.append(faces.shape)
+        # 每張臉回傳以其平均亮度決定的 one-hot，方便驗證結果對應順序
+        scores = np.zeros((len(faces), len(EMOTION_LABELS)), dtype=np.float32)
+        for i, face in enumerate(faces):
+            scores[i, int(round(float(face.mean()) * 6))] = 1.0
+        return scores
+    return predict
+
+
+class TestEmotionBatchScheduler:
+
+    def test_preprocess_face_crop_shape_and_range(self):
+        tensor = preprocess_face_crop(np.full((120, 90, 3), 255, dtype=np.uint8))
+        assert tensor.shape == (48, 48, 1)
+        assert tensor.dtype == np.float32
+        assert tensor.max() == pytest.approx(1.0)
+
+    def test_concurrent_frames_share_one_forward_pass(self):
+        batches = []
+        scheduler = EmotionBatchScheduler(_fake_predict(batches), max_batch_size=4, max_wait_ms=200)
+        levels = [0, 3, 6]
+        results = {}
+
+        def worker(level):
+            crop = np.full((60, 60, 3), int(level / 6 * 255), dtype=np.uint8)
+            results[level] = scheduler.predict(crop, timeout=5)
+
+        threads = [threading.Thread(target=worker, args=(level,)) for level in levels]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        scheduler.close()
+
+        assert batches == [(3, 48, 48, 1)]
+        for level in levels:
+            assert int(np.argmax(results[level])) == level
+        assert scheduler.get_stats()["largest_batch"] == 3
+
+    def test_model_error_is_fanned_out(self):
+        def broken(_faces):
+            raise RuntimeError("model not ready")
+
+        scheduler = EmotionBatchScheduler(broken, max_batch_size=2, max_wait_ms=0)
+        with pytest.raises(RuntimeError):
+            scheduler.predict(np.zeros((10, 10, 3), dtype=np.uint8), timeout=5)
+        scheduler.close()
+
+    def test_scores_to_emotion_result_matches_deepface_format(self):
+        result = scores_to_emotion_result(np.array([0, 0, 0, 3, 1, 0, 0], dtype=np.float32))
+        assert result["dominant_emotion"] == "happy"
+        assert result["emotion"]["happy"] == pytest.approx(75.0)
+        assert sum(result["emotion"].values()) == pytest.approx(100.0)
+
+
+class TestBatchedEmotionWebSocketPath:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_connections_share_one_batch(self):
+        from unittest.mock import MagicMock, patch
+
+        from backend.routers import websockets
+        from backend.services.emotion_service import EmotionService
+        from backend.services.inference_executor import InferenceExecutor
+
+        batches = []
+
+        def predict(faces):
+            batches.append(len(faces))
+            scores = np.zeros((len(faces), len(EMOTION_LABELS)), dtype=np.float32)
+            scores[:, EMOTION_LABELS.index("happy")] = 1.0
+            return scores
+
+        frame = np.zeros((40, 40, 3), dtype=np.uint8)
+        executor = InferenceExecutor(max_workers=4, model_concurrency={})
+
+        # 預檢只佔用 face_mesh 並行名額（預設 2），等待批次時不佔用執行緒，四條連線的影格合併為一批
+        with patch('backend.services.emotion_service.DeepFace'), \
+                patch.object(websockets, 'inference_executor', executor), \
+                patch.object(websockets, '_decode_image', return_value=frame):
+            service = EmotionService(MagicMock())
+            service.feature_extractor = MagicMock()
+            service.feature_extractor.is_available.return_value = True
+            service.feature_extractor.extract_features.return_value = {"face_bbox": (0, 0, 20, 20)}
+            service.batch_scheduler = EmotionBatchScheduler(predict, max_batch_size=8, max_wait_ms=300)
+            with patch.object(websockets, 'emotion_service', service):
+                results = await asyncio.gather(
+                    *(websockets._analyze_emotion_frame_async("frame") for _ in range(4)))
+            service.batch_scheduler.close()
+        executor.shutdown()
+
+        assert batches == [4]
+        assert all(result["emotion_en"] == "happy" for result in results)
+        assert "deepface" not in executor.get_metrics()["models"]
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from backend.services.emotion_result_cache import EmotionResultCache, landmark_delta
+
+
+def _face(offset=0.0, size=100.0):
+    grid = np.stack(np.meshgrid(np.linspace(0, size, 5), np.linspace(0, size, 5)), axis=-1)
+    return grid.reshape(-1, 2).astype(np.float32) + offset
+
+
+class TestLandmarkDelta:
+
+    def test_normalized_by_face_size(self):
+        assert landmark_delta(_face(), _face(offset=1.0)) == pytest.approx(np.sqrt(2) / 100)
+        assert landmark_delta(_face(size=200), _face(size=200) + 1.0) == pytest.approx(np.sqrt(2) / 200)
+
+    def test_mismatched_point_count_is_infinite(self):
+        assert landmark_delta(_face(), _face()[:10]) == float("inf")
+
+
+class TestEmotionResultCache:
+
+    def test_first_lookup_misses(self):
+        cache = EmotionResultCache()
+        assert cache.lookup(_face(), now=0.0) is None
+        assert (cache.hits, cache.misses) == (0, 1)
+
+    def test_still_face_hits_within_max_age(self):
+        cache = EmotionResultCache(max_delta=0.02, max_age_ms=1000)
+        stored = cache.store(_face(), {"emotion_en": "happy", "confidence": 0.9}, now=0.0)
+        assert stored["cache"]["hit"] is False
+
+        result = cache.lookup(_face(offset=0.5), now=0.5)
+
+        assert result["emotion_en"] == "happy"
+        assert result["cache"] == {"hit": True, "age_ms": 500.0, "hits": 1, "misses": 0}
+
+    def test_movement_above_threshold_misses(self):
+        cache = EmotionResultCache(max_delta=0.02, max_age_ms=1000)
+        cache.store(_face(), {"emotion_en": "happy"}, now=0.0)
+        assert cache.lookup(_face(offset=5.0), now=0.1) is None
+
+    def test_stale_result_misses(self):
+        cache = EmotionResultCache(max_delta=0.02, max_age_ms=1000)
+        cache.store(_face(), {"emotion_en": "happy"}, now=0.0)
+        assert cache.lookup(_face(), now=1.5) is None
+
+    def test_compares_against_last_analyzed_frame(self):
+        cache = EmotionResultCache(max_delta=0.02, max_age_ms=10_000)
+        cache.store(_face(), {"emotion_en": "happy"}, now=0.0)
+        # 每幀只移動一點，但相對上次分析的影格累積位移超過門檻
+        assert cache.lookup(_face(offset=1.0), now=0.1) is not None
+        assert cache.lookup(_face(offset=2.0), now=0.2) is None
+
+    def test_invalidate_drops_result(self):
+        cache = EmotionResultCache()
+        cache.store(_face(), {"emotion_en": "happy"}, now=0.0)
+        cache.invalidate()
+        assert cache.lookup(_face(), now=0.0) is None
@@ -1,6 +1,10 @@
+import threading
+
+import numpy as np
 import pytest
 from unittest.mock import MagicMock, patch
-from backend.services.emotion_service import EmotionService, EmotionType
+from backend.services.emotion_service import EmotionService, EmotionType, EmotionModelHolder
+from backend.services.emotion_result_cache import EmotionResultCache
 from backend.services.status_broadcaster import StatusBroadcaster
 
 @pytest.fixture
@@ -39,7 +43,8 @@ class TestEmotionService:
     def test_analyze_video_success(self, mock_videocapture, emotion_service):
         mock_cap = MagicMock()
         mock_cap.isOpened.return_value = True
-        mock_cap.read.side_effect = [(True, MagicMock()), (False, None)] # Simulate one frame
+        mock_cap.grab.side_effect = [True, False] # Simulate one frame
+        mock_cap.retrieve.return_value = (True, MagicMock())
         mock_videocapture.return_value = mock_cap
 
         emotion_service.feature_extractor.extract_features.return_value = {"some_feature": 1}
@@ -49,8 +54,10 @@ class TestEmotionService:
         assert result["dominant_emotion"] == "悲傷"
         assert result["confidence_average"] > 0
 
+    @patch('cv2.imread')
     @patch('backend.services.emotion_service.DeepFace')
-    def test_analyze_image_deepface_success(self, mock_deepface, emotion_service):
+    def test_analyze_image_deepface_success(self, mock_deepface, mock_imread, emotion_service):
+        mock_imread.return_value = np.zeros((4, 4, 3), dtype=np.uint8)
         mock_deepface.analyze.return_value = [{
             'dominant_emotion': 'happy',
             'emotion': {'happy': 99.0, 'sad': 1.0}
@@ -62,6 +69,91 @@ class TestEmotionService:
         assert result["confidence"] == 0.99
         assert result["engine"] == "deepface"
 
+    @patch('backend.services.emotion_service.DeepFace')
+    def test_analyze_frame_deepface_passes_array_to_both_engines(self, mock_deepface, emotion_service):
+        frame = np.zeros((4, 4, 3), dtype=np.uint8)
+        emotion_service.feature_extractor.extract_features.return_value = {"some_feature": 1}
+        mock_deepface.analyze.return_value = [{
+            'dominant_emotion': 'sad',
+            'emotion': {'happy': 10.0, 'sad': 90.0}
+        }]
+
+        result = emotion_service.analyze_frame_deepface(frame)
+
+        assert result["emotion_en"] == "sad"
+        assert emotion_service.feature_extractor.extract_features.call_args[0][0] is frame
+        assert mock_deepface.analyze.call_args.kwargs["img_path"] is frame
+
+    @patch('backend.services.emotion_service.DeepFace')
+    def test_analyze_frame_deepface_batches_face_crop(self, mock_deepface, emotion_service):
+        frame = np.zeros((100, 100, 3), dtype=np.uint8)
+        emotion_service.feature_extractor.extract_features.return_value = {
+            "some_feature": 1, "face_bbox": (10, 20, 40, 50)}
+        emotion_service.batch_scheduler = MagicMock()
+        emotion_service.batch_scheduler.predict.return_value = np.array([0, 0, 0, 0.9, 0.1, 0, 0])
+
+        result = emotion_service.analyze_frame_deepface(frame)
+
+        assert result["emotion_en"] == "happy"
+        assert result["confidence"] == 0.9
+        crop = emotion_service.batch_scheduler.predict.call_args[0][0]
+        assert crop.shape == (50, 40, 3)
+        mock_deepface.analyze.assert_not_called()
+
+    @patch('backend.services.emotion_service.DeepFace')
+    def test_analyze_frame_deepface_skips_detector_with_face_box(self, mock_deepface, emotion_service):
+        frame = np.zeros((100, 100, 3), dtype=np.uint8)
+        emotion_service.feature_extractor.extract_features.return_value = {
+            "some_feature": 1, "face_bbox": (10, 20, 40, 50)}
+        emotion_service.batch_scheduler = None
+        mock_deepface.analyze.return_value = [{
+            'dominant_emotion': 'happy',
+            'emotion': {'happy': 80.0, 'sad': 20.0}
+        }]
+        roi_tracker = MagicMock()
+
+        result = emotion_service.analyze_frame_deepface(frame, roi_tracker=roi_tracker)
+
+        assert result["emotion_en"] == "happy"
+        kwargs = mock_deepface.analyze.call_args.kwargs
+        assert kwargs["detector_backend"] == "skip"
+        assert kwargs["img_path"].shape == (50, 40, 3)
+        assert emotion_service.feature_extractor.extract_features.call_args.kwargs["roi_tracker"] is roi_tracker
+
+    @patch('backend.services.emotion_service.DeepFace')
+    def test_analyze_frame_deepface_reuses_result_while_face_is_still(self, mock_deepface, emotion_service):
+        frame = np.zeros((100, 100, 3), dtype=np.uint8)
+        landmarks = np.array([[10, 10, 0], [60, 10, 0], [35, 70, 0]], dtype=np.float32)
+        emotion_service.feature_extractor.extract_features.return_value = {
+            "some_feature": 1, "landmarks": landmarks}
+        mock_deepface.analyze.return_value = [{
+            'dominant_emotion': 'happy',
+            'emotion': {'happy': 80.0, 'sad': 20.0}
+        }]
+        result_cache = EmotionResultCache()
+
+        first = emotion_service.analyze_frame_deepface(frame, result_cache=result_cache)
+        calls_after_first = mock_deepface.analyze.call_count
+        second = emotion_service.analyze_frame_deepface(frame, result_cache=result_cache)
+
+        assert mock_deepface.analyze.call_count == calls_after_first
+        assert first["cache"]["hit"] is False
+        assert second["emotion_en"] == "happy"
+        assert second["cache"]["hit"] is True
+        assert (second["cache"]["hits"], second["cache"]["misses"]) == (1, 1)
+
+    @patch('backend.services.emotion_service.DeepFace')
+    def test_analyze_frame_deepface_no_face_invalidates_cache(self, mock_deepface, emotion_service):
+        frame = np.zeros((100, 100, 3), dtype=np.uint8)
+        result_cache = MagicMock()
+        emotion_service.feature_extractor.extract_features.return_value = None
+
+        result = emotion_service.analyze_frame_deepface(frame, result_cache=result_cache)
+
+        assert result["face_detected"] is False
+        result_cache.invalidate.assert_called_once()
+        mock_deepface.analyze.assert_not_called()
+
     @patch('backend.services.emotion_service.DeepFace')
     def test_analyze_video_deepface_stream_success(self, mock_deepface, emotion_service):
         # Mock the stream generator
@@ -110,3 +202,158 @@ class TestEmotionService:
             result = emotion_service.analyze_video_simple("fake_video.mp4")
             assert result["emotion_zh"] == "開心"
             assert result["confidence"] == 0.85
+
+
+class TestEmotionModelHolder:
+
+    @patch('backend.services.emotion_service.DeepFace')
+    def test_model_loaded_once_and_reused(self, mock_deepface):
+        mock_deepface.analyze.return_value = [{'dominant_emotion': 'happy', 'emotion': {'happy': 99.0}}]
+        holder = EmotionModelHolder(max_rss_mb=0)
+
+        holder.analyze(img_path="a.jpg", actions=['emotion'])
+        holder.analyze(img_path="b.jpg", actions=['emotion'])
+
+        mock_deepface.build_model.assert_called_once_with("Emotion")
+        assert holder.is_loaded()
+        assert holder.get_stats()["inference_count"] == 2
+
+    @patch('backend.services.emotion_service.DeepFace')
+    def test_release_only_under_memory_pressure(self, mock_deepface):
+        holder = EmotionModelHolder(max_rss_mb=1024)
+        holder.load()
+
+        with patch('backend.services.emotion_service._current_rss_mb', return_value=512.0):
+            assert holder.release_if_under_pressure() is False
+            assert holder.is_loaded()
+
+        with patch('backend.services.emotion_service._current_rss_mb', return_value=2048.0):
+            assert holder.release_if_under_pressure() is True
+            assert not holder.is_loaded()
+            assert holder.get_stats()["eviction_count"] == 1
+
+    @patch('backend.services.emotion_service.DeepFace')
+    def test_sustained_pressure_evicts_at_most_once(self, mock_deepface):
+        mock_deepface.analyze.return_value = [{'dominant_emotion': 'happy', 'emotion': {'happy': 99.0}}]
+        holder = EmotionModelHolder(max_rss_mb=1024)
+        holder.load()
+
+        # 釋放後配置器沒有把記憶體還給作業系統：RSS 一直高於上限
+        with patch('backend.services.emotion_service._current_rss_mb', return_value=2048.0):
+            for _ in range(5):
+                holder.analyze(img_path="a.jpg", actions=['emotion'])
+                holder.release_if_under_pressure()
+
+        stats = holder.get_stats()
+        assert stats["eviction_count"] == 1
+        assert stats["load_count"] == 2
+        assert stats["pressure_latched"]
+
+    @patch('backend.services.emotion_service.DeepFace')
+    def test_pressure_rearmed_after_rss_drops(self, mock_deepface):
+        holder = EmotionModelHolder(max_rss_mb=1024)
+        holder.load()
+        with patch('backend.services.emotion_service._current_rss_mb', return_value=2048.0):
+            assert holder.release_if_under_pressure() is True
+        holder.load()
+
+        # 回落到低水位以下後解除鎖定；超過最短間隔後才會再次釋放
+        with patch('backend.services.emotion_service._current_rss_mb', return_value=700.0):
+            assert holder.release_if_under_pressure() is False
+        assert not holder.get_stats()["pressure_latched"]
+        holder._last_eviction_at -= EmotionModelHolder.MIN_EVICTION_INTERVAL_SECONDS
+        with patch('backend.services.emotion_service._current_rss_mb', return_value=2048.0):
+            assert holder.release_if_under_pressure() is True
+        assert holder.get_stats()["eviction_count"] == 2
+
+    @patch('backend.services.emotion_service.DeepFace')
+    def test_eviction_waits_for_in_flight_batch(self, mock_deepface):
+        holder = EmotionModelHolder(max_rss_mb=1024)
+        holder.load()
+        started, finish = threading.Event(), threading.Event()
+
+        def slow_predict(faces, verbose=0):
+            started.set()
+            finish.wait(timeout=5)
+            return np.zeros((len(faces), 7))
+
+        holder.model.model.predict.side_effect = slow_predict
+        batch = threading.Thread(target=holder.predict_batch, args=(np.zeros((2, 48, 48, 1)),))
+        batch.start()
+        assert started.wait(timeout=5)
+
+        # 批次推論進行中：不拆掉其正在使用的模型
+        with patch('backend.services.emotion_service._current_rss_mb', return_value=2048.0):
+            assert holder.release_if_under_pressure() is False
+            assert holder.is_loaded()
+            assert not holder.get_stats()["pressure_latched"]
+
+            # 批次完成後由批次執行緒在批次之間釋放
+            finish.set()
+            batch.join(timeout=5)
+        assert not holder.is_loaded()
+        assert holder.get_stats()["eviction_count"] == 1
+
+    @patch('backend.services.emotion_service.DeepFace')
+    def test_failed_load_reported_in_model_status(self, mock_deepface, emotion_service):
+        mock_deepface.build_model.side_effect = OSError("權重檔案不存在")
+        emotion_service.emotion_model = EmotionModelHolder(max_rss_mb=0)
+
+        assert emotion_service.emotion_model.load() is False
+        models = emotion_service.get_model_status()
+        assert models["deepface_emotion"] == {"state": "failed", "error": "權重檔案不存在"}
+        assert models["face_mesh"]["state"] == "ready"
+
+
+def _reference_features(extractor, pts, width, height):
+    """Per-point reference implementation of the original feature formulas."""
+    p = [tuple(map(float, row)) for row in pts]
+    dist = lambda a, b: float(np.linalg.norm(np.array(a) - np.array(b)))
+
+    def ratio(indices, default):
+        q = [p[i] for i in indices[:6]]
+        c = dist(q[0], q[3])
+        return default if c == 0 else (dist(q[1], q[5]) + dist(q[2], q[4])) / (2.0 * c)
+
+    face_width = abs(p[454][0] - p[234][0]) or float(width)
+    face_height = abs(p[152][1] - p[10][1]) or float(height)
+
+    def brow(brow_idx, eye_idx):
+        brow_y = sum(p[i][1] for i in brow_idx) / len(brow_idx)
+        eye_y = sum(p[i][1] for i in eye_idx[:6]) / 6
+        return (eye_y - brow_y) / face_height * 100
+
+    center_x = (p[1][0] + p[175][0] + p[10][0]) / 3
+    asym = sum(abs(abs(p[l][0] - center_x) - abs(p[r][0] - center_x))
+               for l, r in [(33, 362), (78, 308), (234, 454)])
+    mouth_center_y = (p[13][1] + p[14][1]) / 2
+    ear_l = ratio(extractor.LEFT_EYE_INDICES, 0.3)
+    ear_r = ratio(extractor.RIGHT_EYE_INDICES, 0.3)
+    return {
+        "eye_aspect_ratio_left": ear_l,
+        "eye_aspect_ratio_right": ear_r,
+        "mouth_aspect_ratio": ratio(extractor.MOUTH_INDICES, 0.1),
+        "mouth_curvature": ((mouth_center_y - p[78][1]) + (mouth_center_y - p[308][1])) / 2 / face_height * 100,
+        "eyebrow_height_left": brow(extractor.EYEBROW_LEFT_INDICES, extractor.LEFT_EYE_INDICES),
+        "eyebrow_height_right": brow(extractor.EYEBROW_RIGHT_INDICES, extractor.RIGHT_EYE_INDICES),
+        "nose_wrinkle": abs(p[35][0] - p[31][0]) / face_width,
+        "eye_openness": (ear_l + ear_r) / 2,
+        "mouth_width": abs(p[308][0] - p[78][0]) / face_width,
+        "facial_symmetry": max(0.0, min(1.0, 1.0 - asym / (abs(p[454][0] - p[234][0]) * 3))),
+    }
+
+
+class TestFacialFeatureExtractor:
+
+    def test_vectorized_features_match_per_point_formulas(self):
+        from backend.services.emotion_service import FacialFeatureExtractor
+        extractor = FacialFeatureExtractor()
+        rng = np.random.default_rng(7)
+        points = (rng.random((478, 3)) * np.array([640, 480, 64])).astype(np.float32)
+
+        features = extractor.compute_features(points, 640, 480)
+        expected = _reference_features(extractor, points, 640, 480)
+
+        assert set(features) == set(expected)
+        for key, value in expected.items():
+            assert features[key] == pytest.approx(value, rel=1e-4, abs=1e-4), key
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from backend.utils.frame_mailbox import LatestFrameMailbox, run_latest_frame_worker
+
+
+class TestLatestFrameMailbox:
+
+    @pytest.mark.asyncio
+    async def test_keeps_only_newest_frame(self):
+        mailbox = LatestFrameMailbox()
+
+        assert mailbox.put({"seq": 1}) is False
+        assert mailbox.put({"seq": 2}) is True
+        assert mailbox.put({"seq": 3}) is True
+
+        assert await mailbox.get() == {"seq": 3}
+        assert mailbox.take_dropped() == 2
+        assert mailbox.take_dropped() == 0
+        assert mailbox.get_stats() == {"received": 3, "processed": 1, "dropped": 2}
+
+    @pytest.mark.asyncio
+    async def test_get_returns_none_after_close(self):
+        mailbox = LatestFrameMailbox()
+        waiter = asyncio.create_task(mailbox.get())
+        await asyncio.sleep(0)
+
+        mailbox.close()
+        assert await waiter is None
+
+    @pytest.mark.asyncio
+    async def test_discard_counts_pending_frame(self):
+        mailbox = LatestFrameMailbox()
+        mailbox.put({"seq": 1})
+        mailbox.discard()
+
+        assert mailbox.dropped == 1
+        mailbox.close()
+        assert await mailbox.get() is None
+
+    @pytest.mark.asyncio
+    async def test_worker_processes_latest_frame_while_busy(self):
+        mailbox = LatestFrameMailbox()
+        handled = []
+        release = asyncio.Event()
+
+        async def handle(message, dropped):
+            handled.append((message["seq"], dropped))
+            if message["seq"] == 1:
+                await release.wait()
+
+        worker = asyncio.create_task(run_latest_frame_worker(mailbox, handle))
+        mailbox.put({"seq": 1})
+        await asyncio.sleep(0.01)
+
+        # 處理第一幀期間陸續到達的影格只保留最新一幀
+        for seq in range(2, 6):
+            mailbox.put({"seq": seq})
+        release.set()
+        await asyncio.sleep(0.01)
+
+        mailbox.close()
+        await asyncio.wait_for(worker, timeout=1)
+        assert handled == [(1, 0), (5, 3)]
@@ -0,0 +1,83 @@
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app import app
+from backend.utils.frame_protocol import (
+    FRAME_HEADER,
+    FrameProtocolError,
+    pack_frame,
+    unpack_frame,
+)
+
+
+@pytest.fixture
+def jpeg_bytes():
+    _, encoded = cv2.imencode('.jpg', np.zeros((8, 8, 3), dtype=np.uint8))
+    return encoded.tobytes()
+
+
+class TestFrameProtocol:
+
+    def test_pack_unpack_roundtrip(self, jpeg_bytes):
+        frame = unpack_frame(pack_frame(jpeg_bytes, timestamp=12.5, seq=7))
+
+        assert frame.timestamp == 12.5
+        assert frame.seq == 7
+        assert frame.payload == jpeg_bytes
+
+    def test_sequence_wraps_to_u32(self, jpeg_bytes):
+        frame = unpack_frame(pack_frame(jpeg_bytes, timestamp=0, seq=2 ** 32 + 3))
+        assert frame.seq == 3
+
+    def test_rejects_truncated_and_unknown_messages(self, jpeg_bytes):
+        with pytest.raises(FrameProtocolError):
+            unpack_frame(b"\x01\x01")
+
+        bad_version = bytes([99]) + pack_frame(jpeg_bytes, 0, 0)[1:]
+        with pytest.raises(FrameProtocolError):
+            unpack_frame(bad_version)
+
+        bad_type = FRAME_HEADER.pack(1, 42, 0.0, 0) + jpeg_bytes
+        with pytest.raises(FrameProtocolError):
+            unpack_frame(bad_type)
+
+
+class TestBinaryFrameWebSocket:
+
+    def test_emotion_binary_frame_after_negotiation(self, jpeg_bytes):
+        with patch('backend.services.emotion_service.EmotionService.analyze_frame_deepface') as mock_analyze:
+            mock_analyze.return_value = {"emotion_en": "happy", "confidence": 0.9}
+
+            with TestClient(app) as client:
+                with client.websocket_connect("/ws/emotion") as websocket:
+                    websocket.send_json({"type": "negotiate", "binary_frames": True})
+                    negotiated = websocket.receive_json()
+                    assert negotiated["type"] == "negotiated"
+                    assert negotiated["binary_frames"] is True
+                    assert negotiated["header_size"] == FRAME_HEADER.size
+
+                    websocket.send_bytes(pack_frame(jpeg_bytes, timestamp=3.25, seq=1))
+                    response = websocket.receive_json()
+
+            assert response["type"] == "result"
+            assert response["emotion_en"] == "happy"
+            assert response["timestamp"] == 3.25
+            decoded = mock_analyze.call_args[0][0]
+            assert decoded.shape == (8, 8, 3)
+
+    def test_binary_frame_without_negotiation_is_rejected(self, jpeg_bytes):
+        with TestClient(app) as client:
+            with client.websocket_connect("/ws/emotion") as websocket:
+                websocket.send_bytes(pack_frame(jpeg_bytes, timestamp=0, seq=0))
+                response = websocket.receive_json()
+
+                assert response["type"] == "error"
+                assert "二進位影格" in response["message"]
+
+                # JSON 模式仍可正常使用
+                websocket.send_json({"type": "ping"})
+                assert websocket.receive_text() == "pong"
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+
+import pytest
+
+from backend.services.inference_executor import InferenceBusyError, InferenceExecutor
+
+
+@pytest.fixture
+def executor():
+    ex = InferenceExecutor(max_workers=2, model_concurrency={"slow": 1}, max_queue_depth=1)
+    yield ex
+    ex.shutdown()
+
+
+class TestInferenceExecutor:
+
+    @pytest.mark.asyncio
+    async def test_runs_off_event_loop_thread(self, executor):
+        loop_thread = threading.get_ident()
+        result = await executor.run("fast", lambda x: (x * 2, threading.get_ident()), 21)
+        assert result[0] == 42
+        assert result[1] != loop_thread
+
+        metrics = executor.get_metrics()["models"]["fast"]
+        assert metrics["completed"] == 1
+        assert metrics["queued"] == 0
+        assert metrics["running"] == 0
+
+    @pytest.mark.asyncio
+    async def test_backpressure_when_queue_full(self, executor):
+        release = threading.Event()
+
+        def blocking():
+            release.wait(timeout=5)
+            return "done"
+
+        running = asyncio.ensure_future(executor.run("slow", blocking))
+        await asyncio.sleep(0.05)
+        queued = asyncio.ensure_future(executor.run("slow", blocking))
+        await asyncio.sleep(0.05)
+
+        metrics = executor.get_metrics()["models"]["slow"]
+        assert metrics["running"] == 1
+        assert metrics["queued"] == 1
+
+        with pytest.raises(InferenceBusyError):
+            await executor.run("slow", blocking)
+
+        release.set()
+        assert await running == "done"
+        assert await queued == "done"
+
+        metrics = executor.get_metrics()["models"]["slow"]
+        assert metrics["completed"] == 2
+        assert metrics["rejected"] == 1
+        assert metrics["peak_queue_depth"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failures_are_counted_and_reraised(self, executor):
+        def boom():
+            raise ValueError("bad frame")
+
+        with pytest.raises(ValueError):
+            await executor.run("fast", boom)
+        assert executor.get_metrics()["models"]["fast"]["failed"] == 1
@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from backend.utils.instance_pool import InstancePool, InstancePoolExhausted
+
+
+class FakeMesh:
+    """Stand-in for a stateful FaceMesh: records frames it has tracked."""
+
+    def __init__(self):
+        self.frames = []
+        self.closed = False
+
+    def process(self, frame):
+        self.frames.append(frame)
+        return len(self.frames)
+
+    def close(self):
+        self.closed = True
+
+
+class TestInstancePool:
+
+    def test_sessions_get_dedicated_instances(self):
+        pool = InstancePool(FakeMesh, max_instances=4, name="test")
+
+        with pool.checkout("a") as mesh_a:
+            mesh_a.process("a1")
+        with pool.checkout("b") as mesh_b:
+            mesh_b.process("b1")
+        with pool.checkout("a") as mesh_a_again:
+            assert mesh_a_again.process("a2") == 2
+
+        assert mesh_a_again is mesh_a
+        assert mesh_a.frames == ["a1", "a2"]
+        assert mesh_b.frames == ["b1"]
+
+    def test_release_session_closes_instance_and_frees_slot(self):
+        pool = InstancePool(FakeMesh, max_instances=1, name="test")
+        with pool.checkout("a") as mesh_a:
+            pass
+        pool.release_session("a")
+
+        assert mesh_a.closed
+        with pool.checkout("b", timeout=0.1) as mesh_b:
+            assert mesh_b is not mesh_a
+            assert mesh_b.frames == []
+
+    def test_static_checkouts_run_in_parallel(self):
+        pool = InstancePool(FakeMesh, max_instances=2, name="test")
+        inside = threading.Barrier(2, timeout=2)
+        used = []
+
+        def worker():
+            with pool.checkout() as mesh:
+                used.append(mesh)
+                inside.wait()  # both threads hold an instance at the same time
+
+        threads = [threading.Thread(target=worker) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert used[0] is not used[1]
+        assert pool.get_stats()["idle"] == 2
+
+    def test_checkout_times_out_when_exhausted(self):
+        pool = InstancePool(FakeMesh, max_instances=1, name="test")
+        with pool.checkout("busy"):
+            start = time.monotonic()
+            with pytest.raises(InstancePoolExhausted):
+                with pool.checkout(timeout=0.05):
+                    pass
+            assert time.monotonic() - start < 1
+
+    def test_trim_idle_closes_unused_instances(self):
+        pool = InstancePool(FakeMesh, max_instances=2, name="test")
+        with pool.checkout("stream") as stream, pool.checkout() as shared:
+            stream.process("s1")
+
+        # 剛使用過，不會被關閉
+        assert pool.trim_idle(60) == 0
+
+        assert pool.trim_idle(60, now=time.monotonic() + 61) == 2
+        assert shared.closed and stream.closed
+        assert pool.get_stats()["total"] == 0
+
+        # 同一 session 再借用時取得新實例，追蹤狀態重新開始
+        with pool.checkout("stream") as fresh:
+            assert fresh is not stream
+            assert fresh.frames == []
+
+    def test_trim_idle_skips_session_in_use(self):
+        pool = InstancePool(FakeMesh, max_instances=1, name="test")
+        with pool.checkout("stream") as mesh:
+            assert pool.trim_idle(0, now=time.monotonic() + 10) == 0
+        assert not mesh.closed
@@ -0,0 +1,125 @@
+import threading
+import time
+
+import pytest
+
+from backend.utils.lazy_service import LazyService, model_state, resolve_service, warm_up_services
+
+
+class _Service:
+    def __init__(self):
+        self.status_broadcaster = "broadcaster"
+
+    def ping(self):
+        return "pong"
+
+
+class TestLazyService:
+
+    def test_constructed_on_first_attribute_access(self):
+        calls = []
+
+        def factory():
+            calls.append(1)
+            return _Service()
+
+        service = LazyService("demo", factory)
+        assert not service.loaded
+        assert service.status()["state"] == "pending"
+
+        assert service.ping() == "pong"
+        assert service.status_broadcaster == "broadcaster"
+        assert calls == [1]
+        assert service.status()["state"] == "ready"
+        assert service.load_seconds is not None
+
+    def test_concurrent_access_builds_once(self):
+        calls = []
+
+        def factory():
+            calls.append(1)
+            time.sleep(0.05)
+            return _Service()
+
+        service = LazyService("demo", factory)
+        threads = [threading.Thread(target=service.get) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert calls == [1]
+
+    def test_failure_is_recorded_and_not_retried(self):
+        calls = []
+
+        def factory():
+            calls.append(1)
+            raise ValueError("model missing")
+
+        service = LazyService("demo", factory)
+        with pytest.raises(RuntimeError):
+            service.get()
+        with pytest.raises(RuntimeError):
+            service.ping()
+
+        assert calls == [1]
+        assert service.status() == {"state": "failed", "load_seconds": None, "error": "model missing"}
+
+    def test_failed_model_marks_service_degraded(self):
+        class _ModelService(_Service):
+            def get_model_status(self):
+                return {"emotion": model_state(False, "weights missing"), "face_mesh": model_state(True)}
+
+        service = LazyService("demo", _ModelService)
+        assert "models" not in service.status()
+
+        service.get()
+        status = service.status()
+        assert status["state"] == "degraded"
+        assert status["models"]["emotion"] == {"state": "failed", "error": "weights missing"}
+
+    def test_private_attributes_are_not_forwarded(self):
+        service = LazyService("demo", _Service)
+        assert not hasattr(service, "_missing")
+        assert not service.loaded
+
+
+class TestResolveService:
+
+    @pytest.mark.asyncio
+    async def test_builds_off_the_event_loop(self):
+        threads = []
+
+        def factory():
+            threads.append(threading.current_thread())
+            return _Service()
+
+        service = LazyService("demo", factory)
+        resolved = await resolve_service(service)
+
+        assert resolved.ping() == "pong"
+        assert threads and threads[0] is not threading.main_thread()
+        assert await resolve_service(service) is resolved
+
+    @pytest.mark.asyncio
+    async def test_plain_objects_returned_unchanged(self):
+        plain = _Service()
+        assert await resolve_service(plain) is plain
+
+
+class TestWarmUpServices:
+
+    @pytest.mark.asyncio
+    async def test_builds_all_services_and_isolates_failures(self):
+        def broken():
+            raise ValueError("boom")
+
+        first = LazyService("first", _Service)
+        failing = LazyService("failing", broken)
+        last = LazyService("last", _Service)
+
+        await warm_up_services([first, failing, last])
+
+        assert first.loaded and last.loaded
+        assert failing.status()["state"] == "failed"
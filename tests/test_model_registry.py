@@ -0,0 +1,129 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.utils.model_registry import ModelRegistry, model_key, run_idle_unloader
+
+
+class FakeModel:
+    instances = []
+
+    def __init__(self, **options):
+        self.options = options
+        self.closed = False
+        FakeModel.instances.append(self)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def _reset_instances():
+    FakeModel.instances = []
+
+
+class TestModelRegistry:
+
+    def test_model_key_ignores_option_order(self):
+        assert model_key("hands", {"a": 1, "b": True}) == model_key("hands", {"b": True, "a": 1})
+        assert model_key("hands", {"a": 1}) != model_key("hands", {"a": 2})
+
+    def test_shared_model_deduplicated_by_type_and_options(self):
+        registry = ModelRegistry(idle_unload_seconds=60)
+        first = registry.shared("gesture", {"path": "x.task", "num_hands": 1}, FakeModel)
+        second = registry.shared("gesture", {"num_hands": 1, "path": "x.task"}, FakeModel)
+        other = registry.shared("gesture", {"path": "x.task", "num_hands": 2}, FakeModel)
+
+        assert first is second
+        assert other is not first
+        assert FakeModel.instances == []  # 登錄時不載入
+
+        with first.use() as model:
+            assert model.options == {"path": "x.task", "num_hands": 1}
+        with second.use() as again:
+            assert again is model
+        assert len(FakeModel.instances) == 1
+
+    def test_pool_shared_and_max_instances_raised(self):
+        registry = ModelRegistry(idle_unload_seconds=60)
+        pool = registry.pool("face_mesh", {"static_image_mode": False}, FakeModel, max_instances=2)
+        same = registry.pool("face_mesh", {"static_image_mode": False}, FakeModel, max_instances=4)
+
+        assert same is pool
+        assert pool.max_instances == 4
+        with pool.checkout("emotion:a") as a, pool.checkout("action:a") as b:
+            assert a is not b
+
+    def test_kind_mismatch_rejected(self):
+        registry = ModelRegistry()
+        registry.shared("hands", {"n": 1}, FakeModel)
+        with pytest.raises(ValueError):
+            registry.pool("hands", {"n": 1}, FakeModel, max_instances=1)
+
+    def test_unload_idle_and_reload_on_next_use(self):
+        registry = ModelRegistry(idle_unload_seconds=30)
+        shared = registry.shared("gesture", {"path": "x"}, FakeModel)
+        pool = registry.pool("hands", {"complexity": 1}, FakeModel, max_instances=2)
+        with shared.use() as model:
+            pass
+        with pool.checkout("s") as hands:
+            pass
+
+        assert registry.unload_idle() == 0
+        assert registry.unload_idle(now=time.monotonic() + 31) == 2
+        assert model.closed and hands.closed
+        assert not shared.loaded
+
+        with shared.use() as reloaded:
+            assert reloaded is not model and not reloaded.closed
+        stats = registry.get_stats()["models"][shared.key]
+        assert stats["load_count"] == 2
+        assert stats["unload_count"] == 1
+
+    def test_unload_disabled_when_idle_seconds_zero(self):
+        registry = ModelRegistry(idle_unload_seconds=0)
+        shared = registry.shared("gesture", {"path": "x"}, FakeModel)
+        shared.load()
+        assert registry.unload_idle(now=time.monotonic() + 3600) == 0
+        assert shared.loaded
+
+    def test_stats_report_instances_and_memory(self):
+        registry = ModelRegistry(idle_unload_seconds=60)
+        pool = registry.pool("face_mesh", {"static_image_mode": True}, FakeModel, max_instances=2)
+        pool.prefill(2)
+        registry.shared("gesture", {"path": "x"}, FakeModel)
+
+        stats = registry.get_stats()
+        assert stats["instances"] == 2
+        entry = stats["models"][model_key("face_mesh", {"static_image_mode": True})]
+        assert entry["kind"] == "pool"
+        assert entry["instances"] == 2
+        assert entry["load_count"] == 2
+        if entry["bytes_per_instance"] is not None:
+            assert entry["estimated_bytes"] == entry["bytes_per_instance"] * 2
+        gesture = stats["models"][model_key("gesture", {"path": "x"})]
+        assert gesture["instances"] == 0
+
+    def test_close_unloads_everything(self):
+        registry = ModelRegistry()
+        registry.shared("gesture", {"path": "x"}, FakeModel).load()
+        registry.pool("hands", {}, FakeModel, max_instances=1).prefill()
+        registry.close()
+        assert all(model.closed for model in FakeModel.instances)
+        assert registry.get_stats()["instances"] == 0
+
+    @pytest.mark.asyncio
+    async def test_idle_unloader_loop(self):
+        registry = ModelRegistry(idle_unload_seconds=0.01)
+        shared = registry.shared("gesture", {"path": "x"}, FakeModel)
+        shared.load()
+        task = asyncio.create_task(run_idle_unloader(registry, interval=0.02))
+        try:
+            for _ in range(100):
+                if not shared.loaded:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            task.cancel()
+        assert not shared.loaded
@@ -0,0 +1,105 @@
+import numpy as np
+
+from backend.utils.roi_tracker import RoiTracker, bbox_from_points
+
+
+def _frame(height=480, width=640):
+    return np.zeros((height, width, 3), dtype=np.uint8)
+
+
+class TestBboxFromPoints:
+
+    def test_clips_to_frame(self):
+        points = np.array([[-5, 10], [50, 60], [700, 30]], dtype=np.float32)
+        assert bbox_from_points(points, 640, 480) == (0, 10, 640, 50)
+
+    def test_degenerate_box_is_none(self):
+        points = np.array([[10, 10], [10.5, 10.5]], dtype=np.float32)
+        assert bbox_from_points(points, 640, 480) is None
+
+
+class TestRoiTracker:
+
+    def test_first_frame_searches_full_frame(self):
+        tracker = RoiTracker()
+        frame = _frame()
+        seen = []
+
+        def detect(region, offset):
+            seen.append((region.shape[:2], offset))
+            return "face", (300, 200, 40, 40)
+
+        assert tracker.track(frame, detect) == "face"
+        assert seen == [((480, 640), (0, 0))]
+        # 外擴後不足最小邊長 96px，以外框中心補足
+        assert tracker.window == (272, 172, 96, 96)
+
+    def test_next_frame_crops_padded_region(self):
+        tracker = RoiTracker(padding=0.5, min_size=0)
+        frame = _frame()
+        tracker.track(frame, lambda region, offset: ("face", (300, 200, 40, 40)))
+
+        seen = []
+
+        def detect(region, offset):
+            seen.append((region.shape[:2], offset))
+            return "face", (305, 205, 40, 40)
+
+        tracker.track(frame, detect)
+
+        # 40px 外框每邊外擴 20px
+        assert seen == [((80, 80), (280, 180))]
+        assert tracker.get_stats()["roi_frames"] == 1
+
+    def test_window_kept_while_target_stays_inside(self):
+        tracker = RoiTracker(padding=1.0, min_size=0)
+        frame = _frame()
+        tracker.track(frame, lambda region, offset: ("face", (300, 200, 40, 40)))
+        window = tracker.window
+
+        tracker.track(frame, lambda region, offset: ("face", (302, 201, 40, 40)))
+        assert tracker.window == window
+
+        tracker.track(frame, lambda region, offset: ("face", (330, 200, 40, 40)))
+        assert tracker.window != window
+
+    def test_lost_target_falls_back_to_full_frame_same_call(self):
+        tracker = RoiTracker(min_size=0)
+        frame = _frame()
+        tracker.track(frame, lambda region, offset: ("face", (300, 200, 40, 40)))
+
+        calls = []
+
+        def detect(region, offset):
+            calls.append(offset)
+            if offset != (0, 0):
+                return None
+            return "face", (10, 10, 40, 40)
+
+        assert tracker.track(frame, detect) == "face"
+        assert calls[0] != (0, 0) and calls[1] == (0, 0)
+        stats = tracker.get_stats()
+        assert stats["lost"] == 1
+        assert stats["tracking"] is True
+
+    def test_nothing_found_resets_tracking(self):
+        tracker = RoiTracker()
+        frame = _frame()
+        tracker.track(frame, lambda region, offset: ("face", (300, 200, 40, 40)))
+
+        assert tracker.track(frame, lambda region, offset: None) is None
+        assert tracker.window is None
+
+    def test_large_target_uses_full_frame(self):
+        tracker = RoiTracker(padding=0.5)
+        frame = _frame()
+        tracker.track(frame, lambda region, offset: ("face", (100, 50, 440, 380)))
+        assert tracker.window is None
+
+    def test_resolution_change_invalidates_window(self):
+        tracker = RoiTracker(min_size=0)
+        tracker.track(_frame(), lambda region, offset: ("face", (500, 400, 40, 40)))
+
+        small = _frame(240, 320)
+        region, offset = tracker.crop(small)
+        assert region is small and offset == (0, 0)
@@ -2,7 +2,11 @@
 # test_rps_game_service.py - 猜拳遊戲服務測試
 # =============================================================================
 
+import asyncio
+import time
+
 import pytest
+from fastapi.testclient import TestClient
 from unittest.mock import MagicMock, patch
 from backend.services.rps_game_service import RPSGameService, GameState, RoundResult
 from backend.services.mediapipe_rps_detector import RPSGesture
@@ -29,15 +33,16 @@ class TestRPSGameService:
         assert rps_service.computer_score == 0
         assert rps_service.target_score == 1
 
-    def test_start_game_success(self, rps_service):
-        """測試成功開始遊戲"""
-        with patch('threading.Thread') as mock_thread, \
-             patch.object(rps_service.detector, 'is_available', return_value=True):
+    @pytest.mark.asyncio
+    async def test_start_game_success(self, rps_service):
+        """測試成功開始遊戲（遊戲循環為事件迴圈上的任務）"""
+        with patch.object(rps_service.detector, 'is_available', return_value=True):
             result = rps_service.start_game(target_score=1)
             assert result["status"] == "started"
             assert rps_service.game_state == GameState.COUNTDOWN
             assert rps_service.target_score == 1
-            mock_thread.assert_called_once()
+            assert isinstance(rps_service.game_task, asyncio.Task)
+            rps_service.stop_game()
 
     def test_start_game_already_running(self, rps_service):
         """測試遊戲已在進行中時開始遊戲"""
@@ -52,16 +57,68 @@ class TestRPSGameService:
         assert result["status"] == "idle"
         assert "遊戲未在進行中" in result["message"]
 
-    def test_stop_game_running(self, rps_service):
-        """測試停止進行中的遊戲"""
-        rps_service.game_state = GameState.WAITING_PLAYER
-        mock_thread = MagicMock()
-        rps_service.game_thread = mock_thread
+    @pytest.mark.asyncio
+    async def test_stop_game_running(self, rps_service):
+        """測試停止進行中的遊戲：取消遊戲任務，不需等待"""
+        with patch.object(rps_service.detector, 'is_available', return_value=True):
+            rps_service.start_game()
+        task = rps_service.game_task
+        await asyncio.sleep(0)
 
         result = rps_service.stop_game()
         assert result["status"] == "stopped"
         assert rps_service.game_state == GameState.IDLE
-        mock_thread.join.assert_called_once()
+        await asyncio.gather(task, return_exceptions=True)
+        assert task.cancelled() or task.done()
+        assert rps_service.game_task is None
+
+    @pytest.mark.asyncio
+    async def test_game_loop_plays_single_round(self, rps_service, mock_broadcaster):
+        """手勢被接受時遊戲立即判定，並回報「手勢接受 → 結果」延遲"""
+        rps_service.countdown_time = 1
+        real_sleep = asyncio.sleep
+
+        async def fast_sleep(delay):
+            await real_sleep(0)
+
+        with patch.object(rps_service.detector, 'is_available', return_value=True), \
+             patch('backend.services.rps_game_service.asyncio.sleep', side_effect=fast_sleep), \
+             patch('backend.services.rps_game_service.random.choice', return_value=RPSGesture.SCISSORS):
+            rps_service.start_game()
+            while rps_service.game_state != GameState.WAITING_PLAYER:
+                await real_sleep(0)
+
+            assert rps_service.accept_player_gesture(RPSGesture.ROCK)
+            # 同一回合只接受第一個手勢
+            assert not rps_service.accept_player_gesture(RPSGesture.PAPER)
+            await asyncio.wait_for(rps_service.game_task, timeout=1)
+
+        messages = [call.args[0] for call in mock_broadcaster.broadcast_threadsafe.call_args_list]
+        stages = [message["stage"] for message in messages]
+        assert stages == ["game_started", "round_started", "countdown", "waiting_player", "result", "game_finished"]
+        assert rps_service.current_result == RoundResult.WIN
+        assert rps_service.game_state == GameState.IDLE
+
+        result = messages[stages.index("result")]
+        assert result["data"]["gesture_to_result_ms"] >= 0
+        metrics = rps_service.get_game_status()["metrics"]
+        assert metrics["rounds_measured"] == 1
+        assert metrics["last_gesture_to_result_ms"] == result["data"]["gesture_to_result_ms"]
+
+    @pytest.mark.asyncio
+    async def test_gesture_from_worker_thread_wakes_game(self, rps_service):
+        """從其他執行緒接受手勢時，透過事件迴圈喚醒等待中的遊戲"""
+        rps_service._loop = asyncio.get_running_loop()
+        rps_service.current_round = 0
+        rps_service._start_round()
+        waiter = asyncio.create_task(rps_service._wait_for_player())
+        await asyncio.sleep(0)
+
+        accepted = await asyncio.to_thread(rps_service.accept_player_gesture, RPSGesture.PAPER)
+        await asyncio.wait_for(waiter, timeout=1)
+
+        assert accepted
+        assert rps_service.player_gesture == RPSGesture.PAPER
 
     def test_get_game_status_idle(self, rps_service):
         """測試獲取閒置狀態"""
@@ -130,3 +187,45 @@ class TestRPSGameService:
             assert result["status"] == "error"
             assert "無法辨識手勢" in result["message"]
             assert result["confidence"] == 0.3
+
+
+class TestRPSFrameGating:
+    """依遊戲狀態節流 /ws/rps 影格推論"""
+
+    def test_frame_policy_follows_game_state(self, rps_service):
+        rps_service.active_fps, rps_service.preview_fps = 15, 2
+        rps_service.detection_lead_s = 1.0
+
+        assert rps_service.frame_policy() == {"state": "idle", "detecting": False, "desired_fps": 2}
+
+        rps_service.game_state = GameState.COUNTDOWN
+        rps_service._countdown_deadline = time.monotonic() + 3
+        assert not rps_service.frame_policy()["detecting"]
+
+        # 倒數最後一秒提前進入辨識視窗
+        rps_service._countdown_deadline = time.monotonic() + 0.5
+        assert rps_service.frame_policy()["desired_fps"] == 15
+
+        rps_service.game_state = GameState.WAITING_PLAYER
+        assert rps_service.frame_policy()["detecting"]
+
+        rps_service.game_state = GameState.RESULT
+        assert not rps_service.frame_policy()["detecting"]
+
+    def test_idle_frames_are_acknowledged_without_inference(self):
+        from backend.app import app
+
+        with patch('backend.routers.websockets._detect_rps_frame', return_value=(RPSGesture.ROCK, 0.9)) as mock_detect, \
+             patch('backend.services.rps_game_service.RPS_PREVIEW_FPS', 0):
+            with TestClient(app) as client:
+                with client.websocket_connect("/ws/rps") as websocket:
+                    hint = websocket.receive_json()
+                    assert hint == {"type": "frame_rate", "state": "idle", "detecting": False, "desired_fps": 0}
+
+                    websocket.send_json({"type": "frame", "image": "", "timestamp": 1.5})
+                    ack = websocket.receive_json()
+
+        assert ack["type"] == "frame_ack"
+        assert ack["state"] == "idle"
+        assert ack["skipped_frames_total"] == 1
+        mock_detect.assert_not_called()
@@ -0,0 +1,75 @@
+# =============================================================================
+# test_rps_session_manager.py - 猜拳遊戲工作階段管理測試
+# =============================================================================
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from backend.services.rps_game_service import GameState
+from backend.services.rps_session_manager import RPSSessionLimitError, RPSSessionManager
+from backend.services.status_broadcaster import StatusBroadcaster
+
+
+@pytest.fixture
+def detector():
+    detector = MagicMock()
+    detector.is_available.return_value = True
+    return detector
+
+
+class TestRPSSessionManager:
+
+    @pytest.mark.asyncio
+    async def test_sessions_are_isolated_and_share_detector(self, detector):
+        manager = RPSSessionManager(MagicMock(spec=StatusBroadcaster), detector=detector)
+
+        first = manager.create_session()
+        second = manager.create_session()
+
+        assert first is not second
+        assert first.detector is second.detector is detector
+        assert first.broadcast_topic != second.broadcast_topic
+
+        assert first.start_game()["status"] == "started"
+        # 另一台展場機不受影響，可同時開始遊戲
+        assert second.start_game()["status"] == "started"
+        assert manager.get_stats()["states"] == {"countdown": 2}
+        manager.close_all()
+
+    def test_session_limit(self, detector):
+        manager = RPSSessionManager(MagicMock(spec=StatusBroadcaster), detector=detector, max_sessions=1)
+        manager.create_session("a")
+
+        with pytest.raises(RPSSessionLimitError):
+            manager.create_session("b")
+
+        manager.close_session("a")
+        assert manager.create_session("b").session_id == "b"
+
+    def test_close_session_stops_running_game(self, detector):
+        manager = RPSSessionManager(MagicMock(spec=StatusBroadcaster), detector=detector)
+        session = manager.create_session("kiosk")
+        session.game_state = GameState.WAITING_PLAYER
+
+        manager.close_session("kiosk")
+
+        assert session.game_state == GameState.IDLE
+        assert manager.get_session("kiosk") is None
+
+    @pytest.mark.asyncio
+    async def test_game_state_routed_only_to_own_session(self, detector):
+        broadcaster = StatusBroadcaster()
+        manager = RPSSessionManager(broadcaster, detector=detector)
+        first = manager.create_session("one")
+        second = manager.create_session("two")
+        first_queue = await broadcaster.register(channels=[first.broadcast_topic])
+        second_queue = await broadcaster.register(channels=[second.broadcast_topic])
+
+        with patch.object(broadcaster, 'broadcast_threadsafe') as mock_publish:
+            first._broadcast({"stage": "countdown", "message": "3"})
+        await broadcaster.broadcast(mock_publish.call_args[0][0])
+
+        message = first_queue.get_nowait()
+        assert message["channel"] == "rps_game"
+        assert message["session_id"] == "one"
+        assert second_queue.empty()
@@ -1,8 +1,13 @@
 import asyncio
+import json
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
-from backend.services.status_broadcaster import StatusBroadcaster
+from backend.services.status_broadcaster import (
+    OVERFLOW_COALESCE,
+    BroadcastMessage,
+    StatusBroadcaster,
+)
 
 @pytest.fixture
 def broadcaster():
@@ -44,25 +49,98 @@ class TestStatusBroadcaster:
         assert await queue2.get() == test_message
 
     @pytest.mark.asyncio
-    async def test_broadcast_with_full_queue(self, broadcaster):
+    async def test_broadcast_with_full_queue_drops_oldest(self, broadcaster):
         queue1 = await broadcaster.register()
-        queue2 = asyncio.Queue(maxsize=1) # Create a small queue
-        broadcaster._connections.add(queue2)
-
-        await queue2.put("full") # Fill the queue
+        queue2 = await broadcaster.register(maxsize=2)
+        queue2.put_nowait({"seq": 1})
+        queue2.put_nowait({"seq": 2})
 
         test_message = {"channel": "test", "data": "hello"}
         await broadcaster.broadcast(test_message)
 
-        # The full queue should be removed
-        assert queue2 not in broadcaster._connections
-        assert len(broadcaster._connections) == 1
-        # The other queue should still get the message
+        # The slow subscriber stays registered and keeps the newest messages
+        assert queue2 in broadcaster._connections
+        assert len(broadcaster._connections) == 2
+        assert await queue2.get() == {"seq": 2}
+        assert await queue2.get() == test_message
         assert await queue1.get() == test_message
 
+        stats = broadcaster.get_stats()
+        assert stats["published"] == 1
+        assert stats["delivered"] == 2
+        assert stats["dropped"] == 1
+        assert stats["subscriber_dropped"] == 1
+
+    @pytest.mark.asyncio
+    async def test_coalesce_keeps_latest_progress_update(self, broadcaster):
+        queue = await broadcaster.register(channels=["action"], overflow=OVERFLOW_COALESCE)
+
+        await broadcaster.broadcast({"channel": "action", "stage": "started"})
+        for progress in (10, 20, 30):
+            await broadcaster.broadcast({"channel": "action", "stage": "progress_update", "progress": progress})
+        await broadcaster.broadcast({"channel": "action", "stage": "stopped"})
+
+        received = [queue.get_nowait() for _ in range(queue.qsize())]
+        assert [m["stage"] for m in received] == ["started", "progress_update", "stopped"]
+        assert received[1]["progress"] == 30
+        assert queue.coalesced == 2
+
+    @pytest.mark.asyncio
+    async def test_subscriber_snapshot_is_copy_on_write(self, broadcaster):
+        queue1 = await broadcaster.register(channels=["rps_game"])
+        snapshot = broadcaster._channel_subscribers["rps_game"]
+
+        queue2 = await broadcaster.register(channels=["rps_game"])
+        assert snapshot == frozenset({queue1})
+        assert broadcaster._channel_subscribers["rps_game"] == frozenset({queue1, queue2})
+
+        await broadcaster.unregister(queue1)
+        await broadcaster.unregister(queue1)
+        assert broadcaster._channel_subscribers["rps_game"] == frozenset({queue2})
+
+    @pytest.mark.asyncio
+    async def test_channel_subscriptions(self, broadcaster):
+        rps_queue = await broadcaster.register(channels=["rps_game"])
+        action_queue = await broadcaster.register(channels=["action"])
+        all_queue = await broadcaster.register()
+
+        await broadcaster.broadcast({"channel": "action", "stage": "progress_update"})
+
+        assert rps_queue.empty()
+        assert (await action_queue.get())["stage"] == "progress_update"
+        assert (await all_queue.get())["channel"] == "action"
+
+        await broadcaster.unregister(action_queue)
+        assert "action" not in broadcaster._channel_subscribers
+        assert len(broadcaster._connections) == 2
+
+    @pytest.mark.asyncio
+    async def test_message_serialized_once_per_publish(self, broadcaster):
+        queue1 = await broadcaster.register(channels=["rps_game"])
+        queue2 = await broadcaster.register(channels=["rps_game"])
+
+        await broadcaster.broadcast({"channel": "rps_game", "stage": "countdown", "message": "3"})
+        message1, message2 = await queue1.get(), await queue2.get()
+
+        assert isinstance(message1, BroadcastMessage)
+        assert message1 is message2
+        assert message1.to_json() is message2.to_json()
+        assert json.loads(message1.to_json(type="game_state"))["type"] == "game_state"
+        assert "type" not in message1
+
     def test_broadcast_threadsafe(self, broadcaster):
         test_message = {"channel": "test", "data": "hello"}
         
         with patch.object(broadcaster, 'broadcast_sync') as mock_broadcast_sync:
             broadcaster.broadcast_threadsafe(test_message)
             mock_broadcast_sync.assert_called_once_with(test_message)
+
+    @pytest.mark.asyncio
+    async def test_broadcast_sync_on_loop_delivers_inline(self, broadcaster):
+        broadcaster.set_loop(asyncio.get_running_loop())
+        queue = await broadcaster.register(channels=["rps_game"])
+
+        broadcaster.broadcast_sync({"channel": "rps_game", "stage": "countdown"})
+
+        # 在事件迴圈上呼叫時不經過額外的 task，立即可取得
+        assert queue.get_nowait()["stage"] == "countdown"
@@ -0,0 +1,68 @@
+import os
+from io import BytesIO
+
+import pytest
+from fastapi import UploadFile
+
+from backend.utils.upload_ingest import UploadTooLargeError, ingest_upload
+
+
+class _ChunkRecordingFile(BytesIO):
+    """記錄每次讀取大小的檔案物件。"""
+
+    def __init__(self, data: bytes) -> None:
+        super().__init__(data)
+        self.read_sizes = []
+
+    def read(self, size=-1):
+        self.read_sizes.append(size)
+        return super().read(size)
+
+
+class TestIngestUpload:
+
+    @pytest.mark.asyncio
+    async def test_streams_to_temp_file_in_chunks(self):
+        data = os.urandom(10_000)
+        raw = _ChunkRecordingFile(data)
+        upload = await ingest_upload(
+            UploadFile(raw, filename="clip.mp4"), suffix=".mp4", chunk_size=4096, use_memfd=False)
+
+        with upload:
+            assert upload.path.endswith(".mp4")
+            assert upload.size == len(data)
+            with open(upload.path, "rb") as fh:
+                assert fh.read() == data
+        assert not os.path.exists(upload.path)
+        assert all(size == 4096 for size in raw.read_sizes)
+
+    @pytest.mark.asyncio
+    async def test_rejects_oversized_upload_while_streaming(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+        raw = _ChunkRecordingFile(b"0" * 10_000)
+
+        with pytest.raises(UploadTooLargeError):
+            await ingest_upload(
+                UploadFile(raw, filename="big.png"), max_bytes=5000, chunk_size=1024, use_memfd=False)
+
+        # 超過上限後立即停止讀取，並清除已寫入的內容
+        assert len(raw.read_sizes) == 5
+        assert list(tmp_path.iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_rejects_known_size_before_reading(self):
+        raw = _ChunkRecordingFile(b"0" * 100)
+        with pytest.raises(UploadTooLargeError):
+            await ingest_upload(UploadFile(raw, filename="big.png", size=100), max_bytes=10)
+        assert raw.read_sizes == []
+
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(not hasattr(os, "memfd_create"), reason="memfd 僅在 Linux 可用")
+    async def test_memfd_backend_is_readable_by_path(self):
+        data = b"frame-bytes" * 100
+        upload = await ingest_upload(UploadFile(BytesIO(data), filename="a.jpg"), use_memfd=True)
+
+        with upload:
+            assert upload.path.startswith("/proc/")
+            with open(upload.path, "rb") as fh:
+                assert fh.read() == data
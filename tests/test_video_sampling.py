@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+from unittest.mock import MagicMock
+
+from backend.utils.video_sampling import SampledFrameReader
+
+
+def _fake_capture(total_frames, seekable=False):
+    """Build a VideoCapture double that tracks grab/retrieve calls."""
+    state = {"pos": 0}
+    cap = MagicMock()
+
+    def grab():
+        if state["pos"] >= total_frames:
+            return False
+        state["pos"] += 1
+        return True
+
+    def retrieve():
+        return True, np.full((2, 2, 3), state["pos"] - 1, dtype=np.uint8)
+
+    def set_prop(prop, value):
+        if seekable and prop == cv2.CAP_PROP_POS_FRAMES:
+            state["pos"] = int(value)
+            return True
+        return False
+
+    cap.grab.side_effect = grab
+    cap.retrieve.side_effect = retrieve
+    cap.set.side_effect = set_prop
+    cap.get.side_effect = lambda prop: state["pos"] if prop == cv2.CAP_PROP_POS_FRAMES else 0
+    return cap
+
+
+class TestSampledFrameReader:
+
+    def test_only_sampled_frames_are_retrieved(self):
+        cap = _fake_capture(total_frames=10)
+        reader = SampledFrameReader(cap, sample_interval=3, fps=30)
+
+        samples = list(reader)
+
+        assert [int(frame[0, 0, 0]) for _, frame in samples] == [0, 3, 6, 9]
+        assert [round(ts, 3) for ts, _ in samples] == [0.0, 0.1, 0.2, 0.3]
+        assert cap.retrieve.call_count == 4
+        assert reader.skipped_frames == 6
+        cap.set.assert_not_called()
+
+    def test_large_interval_seeks_when_supported(self):
+        cap = _fake_capture(total_frames=200, seekable=True)
+        reader = SampledFrameReader(cap, sample_interval=90, fps=30, seek_min_interval=60)
+
+        samples = list(reader)
+
+        assert [int(frame[0, 0, 0]) for _, frame in samples] == [0, 90, 180]
+        # 只有取樣幀被 grab，跳過的幀全由 seek 處理
+        assert cap.grab.call_count == 4
+        assert reader.frame_index == 180
+
+    def test_falls_back_to_grab_when_seek_fails(self):
+        cap = _fake_capture(total_frames=200, seekable=False)
+        reader = SampledFrameReader(cap, sample_interval=90, fps=30, seek_min_interval=60)
+
+        samples = list(reader)
+
+        assert [int(frame[0, 0, 0]) for _, frame in samples] == [0, 90, 180]
+        assert cap.set.call_count == 1
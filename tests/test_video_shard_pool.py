@@ -0,0 +1,64 @@
+import functools
+from unittest.mock import MagicMock, patch
+
+import cv2
+import numpy as np
+import pytest
+
+from backend.services import action_detection_service
+from backend.services.action_detection_service import ActionDetectionService
+from backend.services.status_broadcaster import StatusBroadcaster
+from backend.services.video_shard_pool import VideoShardPool, plan_video_shards
+
+
+class TestPlanVideoShards:
+
+    def test_short_video_is_not_sharded(self):
+        assert plan_video_shards(frame_count=300, fps=30, sample_interval=3,
+                                 max_shards=16, min_shard_seconds=10) == [(0, None)]
+
+    def test_shards_align_to_sample_interval(self):
+        shards = plan_video_shards(frame_count=900, fps=30, sample_interval=15,
+                                   max_shards=4, min_shard_seconds=5)
+        assert len(shards) == 4
+        assert shards[0][0] == 0
+        assert shards[-1][1] is None
+        for (start, end), (next_start, _) in zip(shards, shards[1:]):
+            assert start % 15 == 0
+            assert end == next_start
+
+    def test_start_frame_offset(self):
+        shards = plan_video_shards(frame_count=600, fps=30, sample_interval=3, start_frame=3,
+                                   max_shards=2, min_shard_seconds=5)
+        assert shards[0][0] == 3
+        assert all((start - 3) % 3 == 0 for start, _ in shards)
+
+
+@pytest.fixture
+def sample_video(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 20, (64, 48))
+    for i in range(120):
+        writer.write(np.full((48, 64, 3), i * 2, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def test_action_analysis_sharded_matches_single_pass(sample_video):
+    """Sharded analysis covers exactly the same sampled frames as a single pass."""
+    service = ActionDetectionService(MagicMock(spec=StatusBroadcaster))
+    single = service.analyze_video(sample_video)
+
+    pool = VideoShardPool(max_workers=2)
+    short_plan = functools.partial(plan_video_shards, max_shards=3, min_shard_seconds=1)
+    try:
+        with patch.object(action_detection_service, "plan_video_shards", short_plan), \
+             patch.object(action_detection_service, "get_video_shard_pool", return_value=pool):
+            sharded = service.analyze_video(sample_video, parallel=True)
+    finally:
+        pool.shutdown()
+
+    assert sharded["video_info"]["shards"] == 3
+    assert sharded["video_info"]["frames_analyzed"] == single["video_info"]["frames_analyzed"]
+    timestamps = [d["timestamp"] for d in sharded["all_actions"]["smile"]["detected_moments"]]
+    assert timestamps == sorted(timestamps)